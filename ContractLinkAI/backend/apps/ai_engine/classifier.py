@@ -3,10 +3,15 @@ AI Classification Engine for RFPs.
 Uses OpenAI GPT-4o-mini for intelligent classification and metadata extraction.
 """
 import openai
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
 import json
 import logging
+import re
+import threading
 from django.conf import settings
+from django.core.cache import cache
 import time
 
 logger = logging.getLogger('ai_engine')
@@ -14,6 +19,52 @@ logger = logging.getLogger('ai_engine')
 # Initialize OpenAI client
 openai.api_key = settings.OPENAI_API_KEY
 
+CATEGORIES = [
+    'janitorial', 'construction', 'it_services', 'consulting', 'maintenance',
+    'supplies', 'professional_services', 'transportation', 'other',
+]
+
+# Unambiguous terms per category for the local pre-classifier.
+# Matched at word starts, so 'custodia' covers custodial/custodian.
+CATEGORY_KEYWORDS = {
+    'janitorial': ['janitor', 'custodia', 'cleaning', 'housekeeping', 'sanitation', 'disinfect', 'floor care'],
+    'construction': ['construction', 'renovation', 'roofing', 'paving', 'demolition', 'general contractor'],
+    'it_services': ['software', 'cybersecurity', 'network', 'it services', 'information technology', 'saas', 'cloud'],
+    'consulting': ['consulting', 'consultant', 'advisory', 'strategic plan', 'feasibility study'],
+    'maintenance': ['maintenance', 'repair', 'hvac', 'elevator', 'plumbing', 'landscap'],
+    'supplies': ['supplies', 'equipment purchase', 'furniture', 'toner', 'uniforms', 'procurement of'],
+    'professional_services': ['legal services', 'audit', 'accounting', 'actuarial', 'engineering services', 'architectural'],
+    'transportation': ['transportation', 'bus service', 'fleet', 'towing', 'shuttle', 'freight', 'logistics'],
+}
+
+# NAICS prefixes -> category; longest prefix wins.
+NAICS_CATEGORIES = {
+    '561720': 'janitorial',
+    '561790': 'janitorial',
+    '236': 'construction',
+    '237': 'construction',
+    '238': 'construction',
+    '5415': 'it_services',
+    '5182': 'it_services',
+    '5416': 'consulting',
+    '5411': 'professional_services',
+    '5412': 'professional_services',
+    '5413': 'professional_services',
+    '811': 'maintenance',
+    '484': 'transportation',
+    '485': 'transportation',
+    '4885': 'transportation',
+}
+
+
+def rfp_content_hash(title: str, description: str) -> str:
+    """
+    Stable hash of an RFP's classifiable content.
+    Case and whitespace are normalized so reposted RFPs share a hash.
+    """
+    normalized = ' '.join(f"{title or ''}\n{(description or '')[:2000]}".lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
 
 class AIClassifier:
     """
@@ -192,6 +243,118 @@ Return a JSON object with:
             # Fallback to simple classification
             return self.classify_rfp(title, description)
     
+    def classify_rfps_batch(self, items: Sequence[Tuple[str, str]],
+                            acquire: Optional[Callable[[], None]] = None) -> List[Dict]:
+        """
+        Classify several RFPs with a single prompt.
+        
+        Args:
+            items: (title, description) pairs
+            acquire: Called before each per-item fallback request (a rate
+                limiter's acquire), so fallbacks are throttled like batches
+            
+        Returns:
+            One result dict per item, in input order. Items the model skips
+            are classified individually with classify_rfp().
+        
+        Raises:
+            openai.RateLimitError: The batch request was rate limited. Items
+                are not retried one by one, which would multiply the load.
+        """
+        if not items:
+            return []
+        start_time = time.time()
+        
+        try:
+            response = openai.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert in government procurement and contract classification. Analyze RFP documents and provide accurate categorization."
+                    },
+                    {
+                        "role": "user",
+                        "content": self._build_batch_prompt(items)
+                    }
+                ],
+                max_tokens=min(4096, self.max_tokens * len(items)),
+                temperature=self.temperature,
+                response_format={"type": "json_object"}
+            )
+            
+            processing_time = int((time.time() - start_time) * 1000)
+            payload = json.loads(response.choices[0].message.content)
+            tokens_each = response.usage.total_tokens // len(items)
+            by_id = {}
+            for entry in payload.get('results', []):
+                try:
+                    by_id[int(entry.get('id'))] = entry
+                except (TypeError, ValueError):
+                    continue
+        except openai.RateLimitError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in batch classification of {len(items)} RFPs: {str(e)}")
+            by_id, processing_time, tokens_each = {}, None, None
+        
+        results = []
+        for index, (title, description) in enumerate(items, start=1):
+            entry = by_id.get(index)
+            if entry is None:
+                if acquire is not None:
+                    acquire()
+                results.append(self.classify_rfp(title, description))
+                continue
+            entry.pop('id', None)
+            if entry.get('predicted_category') not in CATEGORIES:
+                entry['predicted_category'] = 'other'
+            entry['processing_time_ms'] = processing_time
+            entry['tokens_used'] = tokens_each
+            entry['model_name'] = self.model
+            results.append(entry)
+        
+        logger.info(f"Batch classified {len(items)} RFPs ({len(by_id)} in one prompt)")
+        return results
+    
+    def _build_batch_prompt(self, items: Sequence[Tuple[str, str]]) -> str:
+        """Build the multi-RFP classification prompt."""
+        listing = "\n\n".join(
+            f"RFP {index}\nTitle: {title}\nDescription: {(description or '')[:500]}"
+            for index, (title, description) in enumerate(items, start=1)
+        )
+        return f"""Classify each government RFP/procurement opportunity below into one of these categories:
+
+Categories:
+- janitorial: Janitorial, cleaning, custodial, sanitation services
+- construction: Construction, renovation, building projects
+- it_services: IT, software, technology, cybersecurity services
+- consulting: Consulting, advisory, strategic planning services
+- maintenance: Maintenance, repair, facilities management
+- supplies: Supplies, equipment, materials procurement
+- professional_services: Professional services (legal, accounting, HR, etc.)
+- transportation: Transportation, logistics, fleet services
+- other: Other services not fitting above categories
+
+{listing}
+
+Return a JSON object with one entry per RFP, using the RFP number as "id":
+{{
+    "results": [
+        {{
+            "id": 1,
+            "predicted_category": "category_name",
+            "confidence_score": 0.0-1.0,
+            "reasoning": "one-sentence explanation",
+            "extracted_keywords": ["keyword1", "keyword2"],
+            "top_predictions": [
+                {{"category": "top_category", "confidence": 0.85}},
+                {{"category": "second_category", "confidence": 0.10}}
+            ]
+        }}
+    ]
+}}"""
+    
     def _build_classification_prompt(self, title: str, description: str) -> str:
         """Build the classification prompt."""
         return f"""Classify this government RFP/procurement opportunity into one of these categories:
@@ -225,6 +388,213 @@ Return a JSON object with:
 }}"""
 
 
+class KeywordPreClassifier:
+    """
+    Local rules that settle obvious RFPs without an API call.
+    """
+    
+    MODEL_NAME = 'keyword-rules'
+    
+    def __init__(self, keywords: Dict[str, List[str]] = None, naics_categories: Dict[str, str] = None):
+        keywords = keywords or CATEGORY_KEYWORDS
+        self.naics_categories = naics_categories or NAICS_CATEGORIES
+        self.patterns = {
+            category: re.compile(r'\b(?:' + '|'.join(re.escape(t) for t in terms) + r')\w*', re.IGNORECASE)
+            for category, terms in keywords.items()
+        }
+    
+    def naics_category(self, naics_codes: Optional[Sequence[str]]) -> Optional[str]:
+        """Category implied by the NAICS codes, if they all agree."""
+        found = set()
+        for code in naics_codes or []:
+            code = str(code).strip()
+            for length in range(len(code), 2, -1):
+                if code[:length] in self.naics_categories:
+                    found.add(self.naics_categories[code[:length]])
+                    break
+        return found.pop() if len(found) == 1 else None
+    
+    def classify(self, title: str, description: str, naics_codes: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        """
+        Classify an RFP when the evidence points to exactly one category.
+        
+        Returns:
+            Result dict shaped like AIClassifier.classify_rfp(), or None when
+            the RFP is ambiguous and needs the model.
+        """
+        start_time = time.time()
+        scores = {}
+        keywords = {}
+        for category, pattern in self.patterns.items():
+            title_hits = pattern.findall(title or '')
+            description_hits = pattern.findall((description or '')[:2000])
+            if title_hits or description_hits:
+                scores[category] = 2 * len(title_hits) + len(description_hits)
+                keywords[category] = sorted({h.lower() for h in title_hits + description_hits})
+        
+        naics = self.naics_category(naics_codes)
+        if naics and set(scores) <= {naics}:
+            category, confidence = naics, 0.95
+        elif len(scores) == 1:
+            category = next(iter(scores))
+            # A title hit is decisive; description-only mentions need repetition
+            if scores[category] < 2:
+                return None
+            confidence = 0.9
+        else:
+            return None
+        
+        return {
+            'predicted_category': category,
+            'confidence_score': confidence,
+            'reasoning': 'Matched local keyword/NAICS rules: ' + ', '.join(keywords.get(category) or [str(c) for c in naics_codes or []]),
+            'extracted_keywords': keywords.get(category, []),
+            'top_predictions': [{'category': category, 'confidence': confidence}],
+            'processing_time_ms': int((time.time() - start_time) * 1000),
+            'tokens_used': 0,
+            'model_name': self.MODEL_NAME,
+        }
+
+
+class RequestRateLimiter:
+    """
+    Thread-safe spacing of API calls to at most ``per_minute`` requests.
+    """
+    
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+    
+    def backoff(self, seconds: float):
+        """Hold every caller's next request for at least ``seconds``."""
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+
+def retry_after_seconds(error: Exception, default: float) -> float:
+    """Retry-After from a rate-limit error's response, else ``default``."""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
+class BatchClassifier:
+    """
+    High-throughput classification for the RFP backlog.
+    
+    Each RFP goes through, in order: the local keyword pre-classifier, the
+    result cache (keyed by a content hash of title+description, so reposted
+    RFPs are never sent twice), then batched prompts of ``batch_size`` RFPs
+    run ``concurrency`` at a time under a shared requests-per-minute limit.
+    Per-item fallbacks go through the same limiter, and a rate-limited
+    batch pauses it for every worker before one retry. A batch that still
+    fails leaves its RFPs unclassified (None) without losing the others.
+    """
+    
+    CACHE_PREFIX = 'ai_classification'
+    RATE_LIMIT_BACKOFF = 20.0  # seconds, when a 429 carries no Retry-After
+    
+    def __init__(self, classifier: AIClassifier = None, pre_classifier: KeywordPreClassifier = None,
+                 batch_size: int = None, concurrency: int = None, requests_per_minute: int = None,
+                 cache_ttl: int = None):
+        self.classifier = classifier or AIClassifier()
+        self.pre_classifier = pre_classifier or KeywordPreClassifier()
+        self.batch_size = batch_size or settings.AI_BATCH_SIZE
+        self.concurrency = concurrency or settings.AI_BATCH_CONCURRENCY
+        self.rate_limiter = RequestRateLimiter(requests_per_minute or settings.AI_REQUESTS_PER_MINUTE)
+        self.cache_ttl = cache_ttl or settings.AI_CLASSIFICATION_CACHE_TTL
+        self.stats = {'rules': 0, 'cached': 0, 'api': 0, 'api_calls': 0, 'failed': 0}
+    
+    def _cache_key(self, content_hash: str) -> str:
+        return f"{self.CACHE_PREFIX}:{self.classifier.model}:{content_hash}"
+    
+    def _run_batch(self, batch: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        One batched request under the limiter. A 429 pauses the limiter for
+        every worker and retries the batch once; a second 429 propagates and
+        classify_many leaves these RFPs for the task's next run.
+        """
+        for attempt in range(2):
+            self.rate_limiter.acquire()
+            try:
+                return self.classifier.classify_rfps_batch(batch, acquire=self.rate_limiter.acquire)
+            except openai.RateLimitError as e:
+                if attempt:
+                    raise
+                delay = retry_after_seconds(e, self.RATE_LIMIT_BACKOFF)
+                logger.warning(f"Rate limited on a batch of {len(batch)} RFPs; retrying in {delay:.0f}s")
+                self.rate_limiter.backoff(delay)
+    
+    def classify_many(self, items: Sequence[Dict], use_cache: bool = True) -> List[Optional[Dict]]:
+        """
+        Classify RFPs given as dicts with title, description and optional naics_codes.
+        
+        Returns:
+            One result dict per item, in input order; None for items whose
+            batch failed (e.g. rate limited twice), to be retried later.
+        """
+        results: List[Optional[Dict]] = [None] * len(items)
+        pending: Dict[str, List[int]] = {}  # content hash -> item positions
+        
+        for index, item in enumerate(items):
+            title, description = item.get('title') or '', item.get('description') or ''
+            result = self.pre_classifier.classify(title, description, item.get('naics_codes'))
+            if result:
+                results[index] = result
+                self.stats['rules'] += 1
+                continue
+            pending.setdefault(rfp_content_hash(title, description), []).append(index)
+        
+        if use_cache and pending:
+            keys = {self._cache_key(h): h for h in pending}
+            for key, cached in cache.get_many(list(keys)).items():
+                for index in pending.pop(keys[key]):
+                    results[index] = dict(cached, processing_time_ms=0, tokens_used=0)
+                    self.stats['cached'] += 1
+        
+        hashes = list(pending)
+        batches = [hashes[i:i + self.batch_size] for i in range(0, len(hashes), self.batch_size)]
+        if batches:
+            def run(batch_hashes):
+                first = [items[pending[h][0]] for h in batch_hashes]
+                return self._run_batch([(i.get('title') or '', i.get('description') or '') for i in first])
+            
+            to_cache = {}
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                futures = {executor.submit(run, batch_hashes): batch_hashes for batch_hashes in batches}
+                for future in as_completed(futures):
+                    batch_hashes = futures[future]
+                    self.stats['api_calls'] += 1
+                    try:
+                        batch_output = future.result()
+                    except Exception as e:
+                        failed = sum(len(pending[h]) for h in batch_hashes)
+                        self.stats['failed'] += failed
+                        logger.error(f"Batch of {failed} RFPs failed, leaving them for the next run: {str(e)}")
+                        continue
+                    for content_hash, result in zip(batch_hashes, batch_output):
+                        for index in pending[content_hash]:
+                            results[index] = result
+                            self.stats['api'] += 1
+                        if result.get('confidence_score') and not str(result.get('reasoning', '')).startswith('Error:'):
+                            to_cache[self._cache_key(content_hash)] = result
+            if to_cache:
+                cache.set_many(to_cache, timeout=self.cache_ttl)
+        
+        return results
+
+
 class MetadataExtractor:
     """
     Extract structured metadata from RFP pages using AI.
@@ -2,113 +2,143 @@
 Celery tasks for AI classification of RFPs.
 """
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 import logging
+import time
 from apps.rfps.models import RFP
 from apps.ai_engine.models import AIClassification
-from apps.ai_engine.classifier import AIClassifier
+from apps.ai_engine.classifier import BatchClassifier
 
 logger = logging.getLogger('ai_engine')
 
 
+def _rfp_item(rfp):
+    return {'title': rfp.title, 'description': rfp.description, 'naics_codes': rfp.naics_codes}
+
+
+def _classification_record(rfp, result):
+    return AIClassification(
+        rfp=rfp,
+        predicted_category=result.get('predicted_category', 'other'),
+        confidence_score=result.get('confidence_score', 0.0),
+        top_predictions=result.get('top_predictions', []),
+        reasoning=result.get('reasoning', ''),
+        extracted_keywords=result.get('extracted_keywords', []),
+        model_name=result.get('model_name', ''),
+        processing_time_ms=result.get('processing_time_ms'),
+        tokens_used=result.get('tokens_used')
+    )
+
+
 @shared_task(name='ai_engine.tasks.classify_new_rfps')
 def classify_new_rfps():
     """
     Classify newly discovered RFPs that haven't been classified yet.
-    Runs every 30 minutes.
+    Runs every 30 minutes and drains the backlog in chunks until it is empty
+    or AI_CLASSIFY_TIME_BUDGET runs out.
     """
     logger.info("Starting AI classification of new RFPs")
-    
-    # Get RFPs without AI classification
-    unclassified_rfps = RFP.objects.filter(
-        ai_classification_confidence__isnull=True,
-        status='active'
-    )[:50]  # Process 50 at a time
-    
-    classifier = AIClassifier()
+
+    classifier = BatchClassifier()
+    deadline = time.monotonic() + settings.AI_CLASSIFY_TIME_BUDGET
+    attempted_ids = set()
     classified_count = 0
-    
-    for rfp in unclassified_rfps:
+
+    while time.monotonic() < deadline:
+        # Get RFPs without AI classification
+        unclassified_rfps = list(
+            RFP.objects.filter(ai_classification_confidence__isnull=True, status='active')
+            .exclude(id__in=attempted_ids)
+            .order_by('id')[:settings.AI_CLASSIFY_CHUNK_SIZE]
+        )
+        if not unclassified_rfps:
+            break
+        attempted_ids.update(rfp.id for rfp in unclassified_rfps)
+
         try:
-            # Classify the RFP
-            result = classifier.classify_rfp_with_label_explanation(
-                rfp.title,
-                rfp.description
-            )
-            
-            # Update RFP with classification
+            results = classifier.classify_many([_rfp_item(rfp) for rfp in unclassified_rfps])
+        except Exception as e:
+            logger.error(f"Error classifying chunk of {len(unclassified_rfps)} RFPs: {str(e)}")
+            continue
+
+        # RFPs whose batch failed come back as None; they stay unclassified for the next run
+        classified = [(rfp, result) for rfp, result in zip(unclassified_rfps, results) if result is not None]
+        now = timezone.now()
+        for rfp, result in classified:
             rfp.category = result.get('predicted_category', 'other')
             rfp.ai_classification_confidence = result.get('confidence_score', 0.0)
-            rfp.ai_classification_date = timezone.now()
-            
+            rfp.ai_classification_date = now
             # Extract keywords if available
             if result.get('extracted_keywords'):
                 rfp.keywords = result['extracted_keywords']
-            
-            rfp.save()
-            
-            # Save detailed classification result
-            AIClassification.objects.create(
-                rfp=rfp,
-                predicted_category=result.get('predicted_category', 'other'),
-                confidence_score=result.get('confidence_score', 0.0),
-                top_predictions=result.get('top_predictions', []),
-                reasoning=result.get('reasoning', ''),
-                extracted_keywords=result.get('extracted_keywords', []),
-                model_name=result.get('model_name', ''),
-                processing_time_ms=result.get('processing_time_ms'),
-                tokens_used=result.get('tokens_used')
-            )
-            
-            classified_count += 1
-            logger.info(f"Classified RFP {rfp.rfp_number}: {rfp.category} ({rfp.ai_classification_confidence:.2f})")
-            
-        except Exception as e:
-            logger.error(f"Error classifying RFP {rfp.rfp_number}: {str(e)}")
-    
-    logger.info(f"AI classification complete: {classified_count} RFPs classified")
-    return {'classified_count': classified_count}
+
+        if classified:
+            with transaction.atomic():
+                RFP.objects.bulk_update(
+                    [rfp for rfp, _ in classified],
+                    ['category', 'ai_classification_confidence', 'ai_classification_date', 'keywords']
+                )
+                # Save detailed classification results
+                AIClassification.objects.bulk_create(
+                    [_classification_record(rfp, result) for rfp, result in classified]
+                )
+
+        classified_count += len(classified)
+        logger.info(f"Classified {len(classified)} of {len(unclassified_rfps)} RFPs "
+                    f"(running stats: {classifier.stats})")
+
+    logger.info(f"AI classification complete: {classified_count} RFPs classified ({classifier.stats})")
+    return {'classified_count': classified_count, **classifier.stats}
 
 
 @shared_task(name='ai_engine.tasks.reclassify_low_confidence_rfps')
 def reclassify_low_confidence_rfps():
     """
-    Re-classify RFPs with low confidence scores using enhanced method.
-    Runs weekly.
+    Re-classify RFPs with low confidence scores.
+    Runs weekly. Bypasses the result cache, which would only return the
+    same low-confidence answer.
     """
     logger.info("Re-classifying low confidence RFPs")
-    
+
     # Get RFPs with low confidence
-    low_confidence_rfps = RFP.objects.filter(
-        ai_classification_confidence__lt=0.7,
-        status='active'
-    ).order_by('ai_classification_confidence')[:20]
-    
-    classifier = AIClassifier()
-    improved_count = 0
-    
-    for rfp in low_confidence_rfps:
-        try:
-            # Use enhanced classification method
-            result = classifier.classify_rfp_with_label_explanation(
-                rfp.title,
-                rfp.description
+    low_confidence_rfps = list(
+        RFP.objects.filter(
+            ai_classification_confidence__lt=0.7,
+            status='active'
+        ).order_by('ai_classification_confidence')[:settings.AI_CLASSIFY_CHUNK_SIZE]
+    )
+
+    classifier = BatchClassifier()
+    try:
+        results = classifier.classify_many([_rfp_item(rfp) for rfp in low_confidence_rfps], use_cache=False)
+    except Exception as e:
+        logger.error(f"Error re-classifying RFPs: {str(e)}")
+        return {'improved_count': 0}
+
+    now = timezone.now()
+    improved = []
+    for rfp, result in zip(low_confidence_rfps, results):
+        if result is None:  # its batch failed; try again next week
+            continue
+        new_confidence = result.get('confidence_score', 0.0)
+
+        # Only update if confidence improved
+        if new_confidence > rfp.ai_classification_confidence:
+            rfp.category = result.get('predicted_category', rfp.category)
+            rfp.ai_classification_confidence = new_confidence
+            rfp.ai_classification_date = now
+            improved.append((rfp, result))
+            logger.info(f"Improved classification for {rfp.rfp_number}: {new_confidence:.2f}")
+
+    if improved:
+        with transaction.atomic():
+            RFP.objects.bulk_update(
+                [rfp for rfp, _ in improved],
+                ['category', 'ai_classification_confidence', 'ai_classification_date']
             )
-            
-            new_confidence = result.get('confidence_score', 0.0)
-            
-            # Only update if confidence improved
-            if new_confidence > rfp.ai_classification_confidence:
-                rfp.category = result.get('predicted_category', rfp.category)
-                rfp.ai_classification_confidence = new_confidence
-                rfp.ai_classification_date = timezone.now()
-                rfp.save()
-                
-                improved_count += 1
-                logger.info(f"Improved classification for {rfp.rfp_number}: {new_confidence:.2f}")
-                
-        except Exception as e:
-            logger.error(f"Error re-classifying RFP {rfp.rfp_number}: {str(e)}")
-    
-    logger.info(f"Re-classification complete: {improved_count} improved")
-    return {'improved_count': improved_count}
+            AIClassification.objects.bulk_create([_classification_record(rfp, result) for rfp, result in improved])
+
+    logger.info(f"Re-classification complete: {len(improved)} improved")
+    return {'improved_count': len(improved)}
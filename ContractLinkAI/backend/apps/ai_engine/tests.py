@@ -0,0 +1,162 @@
+"""
+Tests for batched RFP classification, the request limiter and fallbacks.
+The OpenAI client is mocked; no network calls are made.
+"""
+import json
+import re
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+import openai
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.ai_engine.classifier import AIClassifier, BatchClassifier, RequestRateLimiter
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Nothing the keyword pre-classifier can settle, so every item needs the model
+ITEMS = [('Annual services', 'Various'), ('Program support', 'See attachment'), ('Project 14', 'Details to follow')]
+
+
+def mock_openai(side_effect=None):
+    """Patch the module-level OpenAI client; returns (patcher, create mock)."""
+    chat = mock.MagicMock()
+    chat.completions.create.side_effect = side_effect
+    return mock.patch('apps.ai_engine.classifier.openai.chat', chat), chat.completions.create
+
+
+def completion(payload, tokens=100):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload)))],
+                           usage=SimpleNamespace(total_tokens=tokens))
+
+
+def result(index, category='maintenance', confidence=0.8):
+    return {'id': index, 'predicted_category': category, 'confidence_score': confidence,
+            'reasoning': 'test', 'extracted_keywords': [], 'top_predictions': []}
+
+
+def batch_answer(**kwargs):
+    """A batched completion answering every RFP in the prompt."""
+    ids = re.findall(r'^RFP (\d+)$', kwargs['messages'][1]['content'], re.M)
+    return completion({'results': [result(int(i)) for i in ids]})
+
+
+def rate_limit_error(retry_after='0'):
+    response = httpx.Response(429, headers={'retry-after': retry_after},
+                              request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+    return openai.RateLimitError('Rate limit reached', response=response, body=None)
+
+
+class ClassifyBatchTests(SimpleTestCase):
+    def test_one_prompt_and_throttled_fallback_for_skipped_items(self):
+        single = completion({'predicted_category': 'other', 'confidence_score': 0.4})
+        acquire = mock.Mock()
+        patcher, create = mock_openai([completion({'results': [result(1), result(3, 'bogus')]}), single])
+        with patcher:
+            results = AIClassifier().classify_rfps_batch(ITEMS, acquire=acquire)
+        self.assertEqual(create.call_count, 2)  # the batch, then item 2 on its own
+        self.assertEqual(acquire.call_count, 1)
+        self.assertEqual([r['predicted_category'] for r in results], ['maintenance', 'other', 'other'])
+        self.assertEqual(results[0]['tokens_used'], 33)
+
+    def test_failed_batch_falls_back_through_the_limiter(self):
+        single = completion({'predicted_category': 'maintenance', 'confidence_score': 0.9})
+        acquire = mock.Mock()
+        patcher, create = mock_openai([ValueError('bad json'), single, single, single])
+        with patcher:
+            results = AIClassifier().classify_rfps_batch(ITEMS, acquire=acquire)
+        self.assertEqual((create.call_count, acquire.call_count), (4, len(ITEMS)))
+        self.assertEqual(len(results), len(ITEMS))
+
+    def test_rate_limited_batch_does_not_fan_out(self):
+        patcher, create = mock_openai(rate_limit_error())
+        with patcher:
+            with self.assertRaises(openai.RateLimitError):
+                AIClassifier().classify_rfps_batch(ITEMS, acquire=mock.Mock())
+        self.assertEqual(create.call_count, 1)
+
+
+@override_settings(CACHES=LOCMEM)
+class BatchClassifierTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def make(self, **kwargs):
+        options = dict(batch_size=2, concurrency=2, requests_per_minute=6000, cache_ttl=60)
+        options.update(kwargs)
+        return BatchClassifier(**options)
+
+    def test_rules_cache_and_batches(self):
+        items = [{'title': 'Janitorial services for City Hall', 'description': ''}] + \
+                [{'title': title, 'description': description} for title, description in ITEMS] + \
+                [{'title': 'ANNUAL  services', 'description': 'various'}]  # same content hash as ITEMS[0]
+
+        classifier = self.make()
+        patcher, create = mock_openai(batch_answer)
+        with patcher:
+            results = classifier.classify_many(items)
+        self.assertEqual(create.call_count, 2)  # three distinct RFPs in batches of two
+        self.assertEqual(results[0]['model_name'], 'keyword-rules')
+        self.assertIs(results[1], results[4])
+        self.assertEqual(classifier.stats, {'rules': 1, 'cached': 0, 'api': 4, 'api_calls': 2, 'failed': 0})
+
+        patcher, create = mock_openai()
+        with patcher:
+            again = self.make().classify_many(items)
+        create.assert_not_called()
+        self.assertEqual(again[2]['predicted_category'], 'maintenance')
+
+    def test_rate_limited_batch_backs_off_once_then_retries(self):
+        items = [{'title': title, 'description': description} for title, description in ITEMS]
+        answer = completion({'results': [result(i) for i in (1, 2, 3)]})
+        patcher, create = mock_openai([rate_limit_error('0.05'), answer])
+        with patcher:
+            started = time.monotonic()
+            results = self.make(batch_size=5, concurrency=1).classify_many(items)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual((create.call_count, len(results)), (2, 3))
+
+        patcher, create = mock_openai(rate_limit_error('0'))
+        with patcher:
+            results = self.make(batch_size=5, concurrency=1).classify_many(items, use_cache=False)
+        self.assertEqual(create.call_count, 2)
+        self.assertEqual(results, [None] * 3)
+
+    def test_a_failed_batch_keeps_the_others(self):
+        items = [{'title': title, 'description': description} for title, description in ITEMS]
+
+        def answer(**kwargs):
+            if 'Annual services' in kwargs['messages'][1]['content']:  # the batch of items 0 and 1
+                raise rate_limit_error('0')
+            return batch_answer(**kwargs)
+
+        classifier = self.make(batch_size=2, concurrency=2)
+        patcher, create = mock_openai(answer)
+        with patcher:
+            results = classifier.classify_many(items)
+        self.assertEqual([r is None for r in results], [True, True, False])
+        self.assertEqual((classifier.stats['api'], classifier.stats['failed']), (1, 2))
+
+        patcher, create = mock_openai()
+        with patcher:
+            again = self.make().classify_many(items[2:])
+        create.assert_not_called()  # the batch that succeeded was cached
+        self.assertEqual(again[0]['predicted_category'], 'maintenance')
+
+
+class RequestRateLimiterTests(SimpleTestCase):
+    def test_calls_are_spaced_and_backoff_holds_everyone(self):
+        limiter = RequestRateLimiter(per_minute=3000)  # 20ms apart
+        started = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.06)
+
+        limiter = RequestRateLimiter(per_minute=0)
+        limiter.backoff(0.05)
+        started = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
@@ -2,9 +2,11 @@
 Celery tasks for notifications and email digests.
 """
 from celery import shared_task
+from collections import defaultdict
 from django.utils import timezone
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import transaction
 import logging
 from apps.users.models import User
 from apps.rfps.models import RFP
@@ -13,61 +15,163 @@ from apps.notifications.models import Notification, EmailDigest
 logger = logging.getLogger('notifications')
 
 
+DIGEST_FIELDS = ['id', 'title', 'issuing_agency', 'source_state', 'category', 'estimated_value',
+                 'due_date', 'source_url', 'posted_date']
+
+
 @shared_task(name='notifications.tasks.send_notification_emails')
 def send_notification_emails():
     """
     Send daily digest emails to subscribed users.
     Runs daily at 8:00 AM.
+    
+    One pass: the day's new RFPs are loaded once and matched to every
+    user's preferences in memory, messages go out over a single mail
+    connection, and EmailDigest rows are written in bulk.
     """
     logger.info("Starting daily notification emails")
     
     # Get users who want daily digests
-    daily_users = User.objects.filter(
+    daily_users = list(User.objects.filter(
         email_notifications_enabled=True,
         notification_frequency='daily',
         is_subscription_active=True
-    )
+    ).only('id', 'username', 'first_name', 'email', 'preferred_states',
+           'preferred_categories', 'minimum_contract_value'))
     
-    sent_count = 0
+    matches = match_rfps_to_users(daily_users, load_recent_rfps(days_back=1))
     
+    outgoing = []
     for user in daily_users:
+        rfps = matches.get(user.pk)
+        if not rfps:
+            logger.info(f"No new RFPs for {user.username}, skipping email")
+            continue
+        subject = f"ContractLink AI: {len(rfps)} New Opportunities"
+        message = EmailMessage(
+            subject=subject,
+            body=build_email_message(user, rfps),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
+        outgoing.append((user, subject, rfps, message))
+    
+    sent = send_messages_batched(outgoing)
+    record_digests(sent, digest_type='daily')
+    
+    logger.info(f"Daily emails complete: {len(sent)} sent")
+    return {'sent_count': len(sent)}
+
+
+def load_recent_rfps(days_back: int = 1):
+    """
+    Load the active RFPs created in the last ``days_back`` days, newest first.
+    """
+    from datetime import timedelta
+    cutoff = timezone.now() - timedelta(days=days_back)
+    return list(
+        RFP.objects.filter(created_at__gte=cutoff, status='active')
+        .only(*DIGEST_FIELDS)
+        .order_by('-posted_date')
+    )
+
+
+def rfp_matches_user(user: User, rfp) -> bool:
+    """
+    In-memory equivalent of get_relevant_rfps_for_user's filters.
+    """
+    if user.preferred_states and rfp.source_state not in user.preferred_states:
+        return False
+    if user.preferred_categories and rfp.category not in user.preferred_categories:
+        return False
+    if user.minimum_contract_value and (
+        rfp.estimated_value is None or rfp.estimated_value < user.minimum_contract_value
+    ):
+        return False
+    return True
+
+
+def match_rfps_to_users(users, rfps):
+    """
+    Match RFPs to users' state/category/min-value preferences.
+    
+    RFPs are bucketed by state once, so each user only scans the states
+    they follow.
+    
+    Returns:
+        Dict of user id -> list of matching RFPs (newest first)
+    """
+    by_state = defaultdict(list)
+    for rfp in rfps:
+        by_state[rfp.source_state].append(rfp)
+    
+    matches = {}
+    for user in users:
+        if user.preferred_states:
+            candidates = [r for state in dict.fromkeys(user.preferred_states) for r in by_state.get(state, [])]
+            candidates.sort(key=lambda r: r.posted_date, reverse=True)
+        else:
+            candidates = rfps
+        matched = [r for r in candidates if rfp_matches_user(user, r)]
+        if matched:
+            matches[user.pk] = matched
+    return matches
+
+
+def send_messages_batched(outgoing, batch_size: int = None):
+    """
+    Send prepared messages over one mail connection, reopened every
+    ``batch_size`` messages. A failing recipient does not stop the batch.
+    
+    Args:
+        outgoing: List of (user, subject, rfps, EmailMessage)
+        
+    Returns:
+        The subset of ``outgoing`` that was sent
+    """
+    batch_size = batch_size or settings.DIGEST_SEND_BATCH_SIZE
+    sent = []
+    for start in range(0, len(outgoing), batch_size):
+        batch = outgoing[start:start + batch_size]
+        connection = get_connection(fail_silently=False)
         try:
-            # Get new RFPs matching user preferences
-            rfps = get_relevant_rfps_for_user(user, days_back=1)
-            
-            if rfps.count() == 0:
-                logger.info(f"No new RFPs for {user.username}, skipping email")
-                continue
-            
-            # Send email
-            subject = f"ContractLink AI: {rfps.count()} New Opportunities"
-            message = build_email_message(user, rfps)
-            
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[user.email],
-                fail_silently=False,
-            )
-            
-            # Track email digest
-            digest = EmailDigest.objects.create(
-                user=user,
-                digest_type='daily',
-                subject=subject,
-                total_rfps=rfps.count()
-            )
-            digest.rfps_included.set(rfps)
-            
-            sent_count += 1
-            logger.info(f"Sent daily digest to {user.username}")
-            
+            connection.open()
+            for item in batch:
+                user, message = item[0], item[3]
+                try:
+                    if connection.send_messages([message]):
+                        sent.append(item)
+                        logger.info(f"Sent daily digest to {user.username}")
+                except Exception as e:
+                    logger.error(f"Error sending email to {user.username}: {str(e)}")
         except Exception as e:
-            logger.error(f"Error sending email to {user.username}: {str(e)}")
-    
-    logger.info(f"Daily emails complete: {sent_count} sent")
-    return {'sent_count': sent_count}
+            logger.error(f"Mail connection failed for batch of {len(batch)}: {str(e)}")
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+    return sent
+
+
+def record_digests(sent, digest_type: str = 'daily'):
+    """
+    Write EmailDigest rows and their RFP links in bulk.
+    """
+    if not sent:
+        return []
+    with transaction.atomic():
+        digests = EmailDigest.objects.bulk_create([
+            EmailDigest(user=user, digest_type=digest_type, subject=subject, total_rfps=len(rfps))
+            for user, subject, rfps, _ in sent
+        ])
+        Link = EmailDigest.rfps_included.through
+        Link.objects.bulk_create([
+            Link(emaildigest_id=digest.pk, rfp_id=rfp.pk)
+            for digest, (_, _, rfps, _) in zip(digests, sent)
+            for rfp in rfps
+        ], batch_size=1000)
+    return digests
 
 
 def get_relevant_rfps_for_user(user: User, days_back: int = 1):
@@ -101,9 +205,10 @@ def build_email_message(user: User, rfps):
     """
     Build email message content.
     """
+    total = len(rfps)
     message = f"""Hello {user.first_name or user.username},
 
-Here are {rfps.count()} new government procurement opportunities matching your preferences:
+Here are {total} new government procurement opportunities matching your preferences:
 
 """
     
@@ -118,8 +223,8 @@ View: {rfp.source_url}
 ---
 """
     
-    if rfps.count() > 10:
-        message += f"\n... and {rfps.count() - 10} more opportunities.\n"
+    if total > 10:
+        message += f"\n... and {total - 10} more opportunities.\n"
     
     message += f"""
 View all opportunities: https://contractlink.ai/rfps
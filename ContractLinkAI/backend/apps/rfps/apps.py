@@ -1,7 +1,12 @@
 # Apps config for rfps app
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RfpsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.rfps'
+    
+    def ready(self):
+        from apps.rfps.search import install_search_vector
+        post_migrate.connect(install_search_vector, sender=self)
@@ -0,0 +1,242 @@
+"""
+Write-behind counters for RFP views and bookmarks.
+
+Detail views and bookmark toggles used to write ``view_count`` /
+``bookmark_count`` and an ``RFPActivity`` row inline, which turns popular
+RFPs into hot rows. Instead, requests record a delta here and
+``flush_counters`` (Celery beat, every RFP_COUNTER_FLUSH_SECONDS) applies
+them in bulk: one ``F()`` UPDATE per distinct delta pair and one
+``bulk_create`` of the buffered activity rows.
+
+With a Redis cache the buffer is a Redis hash (``<rfp_id>:<field>`` ->
+delta) plus an append-only list of activity records, shared by every web
+worker. Without Redis (local SQLite runs) each process buffers in memory
+and flushes itself once the interval has elapsed.
+
+Counts shown to users lag by at most one flush interval. A crash between
+the DB commit and clearing the drained Redis keys can re-apply one batch;
+that is accepted for engagement counters.
+"""
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+logger = logging.getLogger('rfps')
+
+COUNTER_FIELDS = ('view_count', 'bookmark_count')
+COUNTER_KEY = 'rfp_counters:pending'
+FLUSHING_KEY = 'rfp_counters:flushing'
+ACTIVITY_KEY = 'rfp_counters:activity'
+FLUSH_LOCK_KEY = 'rfp_counters:flush_lock'
+ACTIVITY_BATCH = 5000
+
+
+def _redis_client():
+    """Raw redis-py client behind the default cache, or None."""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception:
+        pass
+    backend = getattr(cache, '_cache', None)
+    if backend is not None and hasattr(backend, 'get_client'):
+        try:
+            return backend.get_client(write=True)
+        except Exception:
+            return None
+    return None
+
+
+class RedisCounterStore:
+    """Buffer shared by all processes through Redis."""
+
+    shared = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def add(self, rfp_id, field, delta, activity=None):
+        pipe = self.client.pipeline(transaction=False)
+        if delta:
+            pipe.hincrby(COUNTER_KEY, f'{rfp_id}:{field}', delta)
+        if activity:
+            pipe.rpush(ACTIVITY_KEY, json.dumps(activity))
+        pipe.execute()
+
+    def drain_counters(self):
+        # A leftover FLUSHING_KEY means the previous flush died before applying it
+        if not self.client.exists(FLUSHING_KEY):
+            try:
+                self.client.rename(COUNTER_KEY, FLUSHING_KEY)
+            except Exception:
+                return {}  # nothing pending
+        raw = self.client.hgetall(FLUSHING_KEY)
+        return {_decode(k): int(v) for k, v in raw.items()}
+
+    def counters_applied(self):
+        self.client.delete(FLUSHING_KEY)
+
+    def drain_activity(self):
+        raw = self.client.lrange(ACTIVITY_KEY, 0, ACTIVITY_BATCH - 1)
+        return [json.loads(_decode(r)) for r in raw]
+
+    def activity_applied(self, count):
+        self.client.ltrim(ACTIVITY_KEY, count, -1)
+
+
+class MemoryCounterStore:
+    """Per-process buffer used when the cache is not Redis."""
+
+    shared = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._activity = []
+        self.last_flush = time.monotonic()
+
+    def add(self, rfp_id, field, delta, activity=None):
+        with self._lock:
+            if delta:
+                self._counters[f'{rfp_id}:{field}'] += delta
+            if activity:
+                self._activity.append(activity)
+
+    def drain_counters(self):
+        with self._lock:
+            counters, self._counters = dict(self._counters), defaultdict(int)
+        return counters
+
+    def counters_applied(self):
+        pass
+
+    def drain_activity(self):
+        with self._lock:
+            activity, self._activity = self._activity, []
+        return activity
+
+    def activity_applied(self, count):
+        pass
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                client = _redis_client()
+                _store = RedisCounterStore(client) if client is not None else MemoryCounterStore()
+    return _store
+
+
+def record(rfp_id, field=None, delta=0, user_id=None, activity_type=None):
+    """
+    Buffer a counter delta and/or an RFPActivity row.
+
+    Args:
+        rfp_id: RFP primary key
+        field: 'view_count' or 'bookmark_count' (optional)
+        delta: Amount to add to ``field``
+        user_id: User for the activity row (activity is skipped when None)
+        activity_type: RFPActivity.activity_type
+    """
+    if field and field not in COUNTER_FIELDS:
+        raise ValueError(f"Unknown counter field: {field}")
+    activity = None
+    if user_id and activity_type:
+        activity = {'user_id': user_id, 'rfp_id': rfp_id, 'activity_type': activity_type}
+    store = get_store()
+    try:
+        store.add(rfp_id, field, delta if field else 0, activity)
+    except Exception as e:
+        logger.warning(f"Counter buffer unavailable, dropping {field} delta for RFP {rfp_id}: {str(e)}")
+        return
+    if not store.shared and time.monotonic() - store.last_flush >= settings.RFP_COUNTER_FLUSH_SECONDS:
+        store.last_flush = time.monotonic()
+        flush_counters()
+
+
+def _apply_counters(counters):
+    """One UPDATE per distinct (view delta, bookmark delta) pair."""
+    per_rfp = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for key, delta in counters.items():
+        rfp_id, field = key.rsplit(':', 1)
+        if field in COUNTER_FIELDS and delta:
+            per_rfp[int(rfp_id)][field] += delta
+
+    groups = defaultdict(list)
+    for rfp_id, deltas in per_rfp.items():
+        signature = tuple(deltas[f] for f in COUNTER_FIELDS)
+        if any(signature):
+            groups[signature].append(rfp_id)
+
+    from apps.rfps.models import RFP
+    updated = 0
+    for signature, rfp_ids in groups.items():
+        changes = {field: Greatest(F(field) + delta, 0)
+                   for field, delta in zip(COUNTER_FIELDS, signature) if delta}
+        updated += RFP.objects.filter(id__in=rfp_ids).update(**changes)
+    return updated
+
+
+def _apply_activity(activity):
+    from apps.rfps.models import RFP, RFPActivity
+    from apps.users.models import User
+    rfp_ids = set(RFP.objects.filter(id__in={a['rfp_id'] for a in activity}).values_list('id', flat=True))
+    user_ids = set(User.objects.filter(id__in={a['user_id'] for a in activity}).values_list('id', flat=True))
+    rows = [
+        RFPActivity(user_id=a['user_id'], rfp_id=a['rfp_id'], activity_type=a['activity_type'])
+        for a in activity if a['rfp_id'] in rfp_ids and a['user_id'] in user_ids
+    ]
+    RFPActivity.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def flush_counters():
+    """
+    Apply buffered deltas and activity rows to the database.
+
+    Returns:
+        Dict with rfps_updated and activities_created
+    """
+    store = get_store()
+    if store.shared and not cache.add(FLUSH_LOCK_KEY, 1, timeout=300):
+        return {'rfps_updated': 0, 'activities_created': 0, 'skipped': 'flush already running'}
+    try:
+        counters = store.drain_counters()
+        with transaction.atomic():
+            rfps_updated = _apply_counters(counters) if counters else 0
+        store.counters_applied()
+
+        activities_created = 0
+        while True:
+            activity = store.drain_activity()
+            if not activity:
+                break
+            with transaction.atomic():
+                activities_created += _apply_activity(activity)
+            store.activity_applied(len(activity))
+            if not store.shared or len(activity) < ACTIVITY_BATCH:
+                break
+    finally:
+        if store.shared:
+            cache.delete(FLUSH_LOCK_KEY)
+
+    if rfps_updated or activities_created:
+        logger.info(f"Flushed counters: {rfps_updated} RFPs updated, {activities_created} activity rows")
+    return {'rfps_updated': rfps_updated, 'activities_created': activities_created}
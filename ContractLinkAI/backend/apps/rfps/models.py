@@ -2,6 +2,7 @@
 RFP (Request for Proposal) models for ContractLink AI.
 Core data model for government procurement opportunities.
 """
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
 from apps.users.models import User
@@ -94,6 +95,9 @@ class RFP(models.Model):
     keywords = models.JSONField(default=list, blank=True)  # Extracted keywords
     requirements = models.TextField(blank=True)
     
+    # Full-text search; maintained by a PostgreSQL trigger with a GIN index (see apps/rfps/search.py)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+    
     # Tracking
     view_count = models.IntegerField(default=0)
     bookmark_count = models.IntegerField(default=0)
@@ -131,9 +135,9 @@ class RFP(models.Model):
         return max(0, delta.days)
     
     def increment_view_count(self):
-        """Increment view counter."""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Increment view counter (buffered; applied by the counter flush)."""
+        from apps.rfps import counters
+        counters.record(self.pk, 'view_count', 1)
 
 
 class SavedRFP(models.Model):
@@ -0,0 +1,101 @@
+"""
+Full-text search for RFPs.
+
+On PostgreSQL the ``rfps.search_vector`` column is kept current by a trigger
+(so bulk_create/bulk_update from the scrapers are covered too) and served by
+a GIN index; searches are ranked with ``ts_rank``. Other databases (SQLite
+in local/test runs) fall back to the same ``icontains`` lookups DRF's
+SearchFilter used.
+"""
+import logging
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+from rest_framework import filters
+
+logger = logging.getLogger('rfps')
+
+SEARCH_CONFIG = 'english'
+
+# The app ships no migrations, so the column is added here rather than by
+# `migrate`. Weights: A = title/number, B = keywords/agency, C = description
+SEARCH_VECTOR_SQL = """
+ALTER TABLE rfps ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION rfps_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.rfp_number, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.keywords::text, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.issuing_agency, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS rfps_search_vector_trigger ON rfps;
+CREATE TRIGGER rfps_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, rfp_number, keywords, issuing_agency, description
+    ON rfps FOR EACH ROW EXECUTE FUNCTION rfps_search_vector_update();
+
+CREATE INDEX IF NOT EXISTS rfps_search_vector_gin ON rfps USING gin (search_vector);
+"""
+
+# Touching a watched column fires the trigger for rows indexed before it existed
+BACKFILL_SQL = "UPDATE rfps SET title = title WHERE search_vector IS NULL"
+
+
+def full_text_search_enabled() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def install_search_vector(sender=None, using='default', **kwargs):
+    """
+    post_migrate hook: add the search_vector column, install the trigger and
+    GIN index, and backfill rows. A no-op on non-PostgreSQL databases and
+    before the rfps table exists.
+    """
+    from django.db import connections
+    conn = connections[using]
+    if conn.vendor != 'postgresql' or 'rfps' not in conn.introspection.table_names():
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(SEARCH_VECTOR_SQL)
+        cursor.execute(BACKFILL_SQL)
+        if cursor.rowcount:
+            logger.info(f"Backfilled search vectors for {cursor.rowcount} RFPs")
+
+
+class RFPSearchFilter(filters.SearchFilter):
+    """
+    ``?search=`` backed by the indexed search vector, ranked by relevance.
+
+    Accepts web-search syntax ("quoted phrases", -exclusions, OR). Results
+    are annotated with ``search_rank``; RankedOrderingFilter orders by it
+    unless the client asks for another ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').replace('\x00', '').strip()
+        if not terms:
+            return queryset
+
+        if not full_text_search_enabled():
+            # icontains over view.search_fields
+            return super().filter_queryset(request, queryset, view)
+
+        query = SearchQuery(terms, config=SEARCH_CONFIG, search_type='websearch')
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """OrderingFilter that defaults to relevance when a ranked search ran."""
+
+    def get_ordering(self, request, queryset, view):
+        requested = request.query_params.get(self.ordering_param)
+        if not requested and 'search_rank' in queryset.query.annotations:
+            return ['-search_rank'] + list(self.get_default_ordering(view) or [])
+        return super().get_ordering(request, queryset, view)
@@ -41,14 +41,19 @@ class RFPListSerializer(serializers.ModelSerializer):
     
     days_until_due = serializers.ReadOnlyField()
     is_active = serializers.ReadOnlyField()
+    search_rank = serializers.SerializerMethodField()
     
     class Meta:
         model = RFP
         fields = [
             'id', 'rfp_number', 'title', 'source_state', 'source_city',
             'category', 'estimated_value', 'posted_date', 'due_date',
-            'status', 'days_until_due', 'is_active'
+            'status', 'days_until_due', 'is_active', 'search_rank'
         ]
+    
+    def get_search_rank(self, obj):
+        """Relevance score when the list came from a full-text search."""
+        return getattr(obj, 'search_rank', None)
 
 
 class SavedRFPSerializer(serializers.ModelSerializer):
@@ -5,6 +5,7 @@ from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
 import logging
+from apps.rfps import counters
 from apps.rfps.models import RFP
 
 logger = logging.getLogger('rfps')
@@ -37,3 +38,12 @@ def cleanup_old_rfps():
     # logger.info(f"Deleted {deleted_count} very old RFPs")
     
     return {'expired_count': expired_count}
+
+
+@shared_task(name='rfps.tasks.flush_rfp_counters')
+def flush_rfp_counters():
+    """
+    Apply buffered view/bookmark deltas and activity rows.
+    Runs every RFP_COUNTER_FLUSH_SECONDS.
+    """
+    return counters.flush_counters()
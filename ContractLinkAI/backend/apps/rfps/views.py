@@ -1,13 +1,15 @@
 """
 Views for RFP API.
 """
-from rest_framework import viewsets, filters, status
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
-from apps.rfps.models import RFP, SavedRFP, RFPActivity
+from apps.rfps import counters
+from apps.rfps.models import RFP, SavedRFP
+from apps.rfps.search import RankedOrderingFilter, RFPSearchFilter
 from apps.rfps.serializers import (
     RFPSerializer, RFPListSerializer, SavedRFPSerializer, RFPActivitySerializer
 )
@@ -16,13 +18,13 @@ from apps.rfps.serializers import (
 class RFPViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for viewing RFPs.
-    Supports filtering by state, category, status, and search.
+    Supports filtering by state, category, status, and ranked full-text search.
     """
-    queryset = RFP.objects.all()
+    queryset = RFP.objects.defer('search_vector')
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, RFPSearchFilter, RankedOrderingFilter]
     filterset_fields = ['source_state', 'source_city', 'category', 'status', 'source_type']
-    search_fields = ['title', 'description', 'rfp_number', 'issuing_agency', 'keywords']
+    search_fields = ['title', 'description', 'rfp_number', 'issuing_agency', 'keywords']  # SQLite fallback
     ordering_fields = ['posted_date', 'due_date', 'estimated_value', 'view_count']
     ordering = ['-posted_date']
     
@@ -61,17 +63,17 @@ class RFPViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
     
     def retrieve(self, request, *args, **kwargs):
-        """Track view activity when user views RFP detail."""
+        """
+        Track view activity when user views RFP detail.
+        The view count and activity row are buffered (see apps/rfps/counters.py),
+        so this request only reads from the database.
+        """
         instance = self.get_object()
-        instance.increment_view_count()
-        
-        # Track user activity
-        if request.user.is_authenticated:
-            RFPActivity.objects.create(
-                user=request.user,
-                rfp=instance,
-                activity_type='view'
-            )
+        counters.record(
+            instance.pk, 'view_count', 1,
+            user_id=request.user.pk if request.user.is_authenticated else None,
+            activity_type='view'
+        )
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -97,16 +99,8 @@ class RFPViewSet(viewsets.ReadOnlyModelViewSet):
         )
         
         if created:
-            # Increment bookmark count
-            rfp.bookmark_count += 1
-            rfp.save(update_fields=['bookmark_count'])
-            
-            # Track activity
-            RFPActivity.objects.create(
-                user=request.user,
-                rfp=rfp,
-                activity_type='save'
-            )
+            # Increment bookmark count and track activity (write-behind)
+            counters.record(rfp.pk, 'bookmark_count', 1, user_id=request.user.pk, activity_type='save')
             
             return Response({'message': 'RFP bookmarked successfully'}, status=status.HTTP_201_CREATED)
         else:
@@ -119,16 +113,8 @@ class RFPViewSet(viewsets.ReadOnlyModelViewSet):
         deleted_count, _ = SavedRFP.objects.filter(user=request.user, rfp=rfp).delete()
         
         if deleted_count > 0:
-            # Decrement bookmark count
-            rfp.bookmark_count = max(0, rfp.bookmark_count - 1)
-            rfp.save(update_fields=['bookmark_count'])
-            
-            # Track activity
-            RFPActivity.objects.create(
-                user=request.user,
-                rfp=rfp,
-                activity_type='unsave'
-            )
+            # Decrement bookmark count and track activity (write-behind)
+            counters.record(rfp.pk, 'bookmark_count', -1, user_id=request.user.pk, activity_type='unsave')
             
             return Response({'message': 'Bookmark removed successfully'})
         else:
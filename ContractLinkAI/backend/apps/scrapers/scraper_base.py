@@ -2,22 +2,64 @@
 Base scraper utilities for ContractLink AI.
 Provides common functionality for state and city portal scrapers.
 """
+import asyncio
 import httpx
 from bs4 import BeautifulSoup
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
+from urllib.parse import urlsplit
 from django.conf import settings
 
 logger = logging.getLogger('scrapers')
 
 
+class ScrapeSession:
+    """
+    One pooled httpx.AsyncClient shared by every scraper in a run.
+    
+    Connections are kept alive across portals, and each host gets its own
+    semaphore so concurrent scrapes never open more than ``per_host``
+    requests against the same server.
+    """
+    
+    def __init__(self, max_connections: int = None, per_host: int = None, timeout: int = None):
+        self.per_host = per_host or settings.SCRAPER_PER_HOST_LIMIT
+        max_connections = max_connections or settings.SCRAPER_MAX_CONNECTIONS
+        self.client = httpx.AsyncClient(
+            timeout=timeout or settings.SCRAPER_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+    
+    def host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return self._host_slots[host]
+    
+    async def get(self, url: str, headers: Dict = None) -> httpx.Response:
+        async with self.host_slot(url):
+            return await self.client.get(url, headers=headers)
+    
+    async def aclose(self):
+        await self.client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
 class BaseScraper:
     """
     Base class for all scrapers with common functionality.
     """
     
-    def __init__(self, timeout: int = None, max_retries: int = None):
+    def __init__(self, timeout: int = None, max_retries: int = None, session: ScrapeSession = None):
+        self.session = session  # shared pooled client; set by the hourly scrape
         self.timeout = timeout or settings.SCRAPER_TIMEOUT
         self.max_retries = max_retries or settings.SCRAPER_MAX_RETRIES
         self.user_agent = settings.SCRAPER_USER_AGENT
@@ -39,11 +81,14 @@ class BaseScraper:
         """
         for attempt in range(self.max_retries):
             try:
-                async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-                    response = await client.get(url, headers=self.headers)
-                    response.raise_for_status()
-                    logger.info(f"Successfully fetched {url}")
-                    return response.text
+                if self.session:
+                    response = await self.session.get(url, headers=self.headers)
+                else:
+                    async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
+                        response = await client.get(url, headers=self.headers)
+                response.raise_for_status()
+                logger.info(f"Successfully fetched {url}")
+                return response.text
             except httpx.HTTPStatusError as e:
                 logger.warning(f"HTTP error fetching {url}: {e.response.status_code}")
                 if attempt == self.max_retries - 1:
@@ -62,7 +107,7 @@ class BaseScraper:
     
     def parse_html(self, html: str) -> BeautifulSoup:
         """
-        Parse HTML content with BeautifulSoup.
+        Parse HTML content with BeautifulSoup on the lxml parser.
         
         Args:
             html: HTML content string
@@ -70,7 +115,7 @@ class BaseScraper:
         Returns:
             BeautifulSoup object
         """
-        return BeautifulSoup(html, 'html.parser')
+        return BeautifulSoup(html, 'lxml')
     
     def extract_text(self, element, selector: str) -> str:
         """
@@ -282,6 +327,74 @@ STATE_SCRAPERS = {
 }
 
 
+class ConfiguredPortalScraper(StateScraperTemplate):
+    """
+    Generic scraper driven by a portal's ``scraper_config`` CSS selectors.
+    
+    Expected config keys: ``row_selector`` plus optional ``rfp_number``,
+    ``title``, ``description``, ``link``, ``agency``, ``posted_date`` and
+    ``due_date`` selectors relative to each row.
+    """
+    
+    def __init__(self, state_code: str, portal_url: str, config: Dict, source_type: str = 'city_portal',
+                 source_city: str = '', **kwargs):
+        super().__init__(state_code=state_code, portal_url=portal_url, **kwargs)
+        self.config = config
+        self.source_type = source_type
+        self.source_city = source_city
+    
+    def parse_rfp_listing(self, soup: BeautifulSoup) -> List[Dict]:
+        cfg = self.config
+        rfps = []
+        for row in soup.select(cfg['row_selector']):
+            try:
+                title = self.extract_text(row, cfg.get('title', 'a'))
+                link = self.extract_attribute(row, cfg.get('link', 'a'), 'href')
+                rfp_number = self.clean_rfp_number(self.extract_text(row, cfg['rfp_number'])) if cfg.get('rfp_number') else ''
+                rfp = {
+                    'rfp_number': (rfp_number or (f"{self.state_code}-{self.source_city}-{link}" if link else ''))[:255],
+                    'title': title,
+                    'description': self.extract_text(row, cfg['description']) if cfg.get('description') else '',
+                    'source_url': self.build_absolute_url(self.portal_url, link) if link else self.portal_url,
+                    'source_state': self.state_code,
+                    'source_city': self.source_city,
+                    'source_type': self.source_type,
+                    'issuing_agency': self.extract_text(row, cfg['agency']) if cfg.get('agency') else '',
+                    'posted_date': (self.parse_date(self.extract_text(row, cfg['posted_date'])) if cfg.get('posted_date') else None) or datetime.now(),
+                    'due_date': self.parse_date(self.extract_text(row, cfg['due_date'])) if cfg.get('due_date') else None,
+                    'status': 'active',
+                }
+                if rfp['rfp_number'] and rfp['title']:
+                    rfps.append(rfp)
+            except Exception as e:
+                logger.warning(f"Error parsing row in {self.source_city or self.state_code}: {str(e)}")
+                continue
+        
+        logger.info(f"Found {len(rfps)} RFPs for {self.source_city or self.state_code}")
+        return rfps
+
+
+def get_scraper_for_city(city_portal) -> Optional[StateScraperTemplate]:
+    """
+    Get a configured scraper for a city portal.
+    
+    Args:
+        city_portal: CityPortal instance
+        
+    Returns:
+        Scraper instance or None when the portal has no usable scraper_config
+    """
+    config = city_portal.scraper_config or {}
+    if city_portal.scraper_type != 'html' or not config.get('row_selector'):
+        return None
+    return ConfiguredPortalScraper(
+        state_code=city_portal.state_portal.state_code,
+        portal_url=city_portal.portal_url,
+        config=config,
+        source_city=city_portal.city_name,
+    )
+
+
 def get_scraper_for_state(state_code: str) -> Optional[StateScraperTemplate]:
     """
     Get the appropriate scraper class for a state.
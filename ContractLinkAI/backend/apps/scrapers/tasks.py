@@ -2,96 +2,169 @@
 Celery tasks for scraping state and city portals.
 """
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 import asyncio
 import logging
+import time
 from apps.states.models import StatePortal, CityPortal
 from apps.rfps.models import RFP
 from apps.scrapers.models import ScrapeJob, ScrapeError
-from apps.scrapers.scraper_base import get_scraper_for_state
+from apps.scrapers.scraper_base import ScrapeSession, get_scraper_for_city, get_scraper_for_state
 from apps.ai_engine.classifier import CityPortalDiscovery
 
 logger = logging.getLogger('scrapers')
 
 
+async def _run_scrapers(scrapers, deadline_seconds):
+    """
+    Run scrapers concurrently in one event loop over a shared ScrapeSession.
+    
+    Args:
+        scrapers: Dict of key -> scraper
+        deadline_seconds: Global deadline; scrapers still running are cancelled
+        
+    Returns:
+        Dict of key -> {'rfps', 'error', 'started_at', 'seconds'}
+    """
+    outcomes = {}
+    
+    async with ScrapeSession() as session:
+        async def run(key, scraper):
+            scraper.session = session
+            outcome = outcomes[key] = {'rfps': [], 'error': None, 'started_at': timezone.now(),
+                                       't0': time.monotonic(), 'seconds': None}
+            try:
+                outcome['rfps'] = await scraper.scrape()
+            except Exception as e:
+                outcome['error'] = e
+            outcome['seconds'] = time.monotonic() - outcome['t0']
+        
+        tasks = [asyncio.ensure_future(run(key, scraper)) for key, scraper in scrapers.items()]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=deadline_seconds)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    for outcome in outcomes.values():
+        if outcome['seconds'] is None:
+            outcome['seconds'] = time.monotonic() - outcome['t0']
+            outcome['error'] = TimeoutError(f"Scrape exceeded the {deadline_seconds}s run deadline")
+    return outcomes
+
+
 @shared_task(name='scrapers.tasks.hourly_state_scrape')
 def hourly_state_scrape():
     """
-    Scrape all active state portals hourly.
+    Scrape all active state portals and configured city portals hourly.
+    
+    Every portal runs concurrently in a single event loop over one pooled
+    AsyncClient (per-host limits, global SCRAPER_RUN_DEADLINE); results are
+    saved afterwards with bulk writes and per-portal timings on ScrapeJob.
     """
     logger.info("Starting hourly state scrape")
     
-    active_portals = StatePortal.objects.filter(is_active=True)
-    total_new_rfps = 0
+    now = timezone.now()
+    targets = {}  # key -> (portal, job, scraper)
+    
+    for portal in StatePortal.objects.filter(is_active=True):
+        job = ScrapeJob(
+            job_type='state',
+            target_state_code=portal.state_code,
+            target_url=portal.portal_url,
+            status='running',
+            started_at=now
+        )
+        targets[('state', portal.pk)] = (portal, job, get_scraper_for_state(portal.state_code))
+    
+    for city in CityPortal.objects.filter(is_active=True, is_verified=True).select_related('state_portal'):
+        scraper = get_scraper_for_city(city)
+        if not scraper:
+            continue
+        job = ScrapeJob(
+            job_type='city',
+            target_state_code=city.state_portal.state_code,
+            target_city_name=city.city_name,
+            target_url=city.portal_url,
+            status='running',
+            started_at=now
+        )
+        targets[('city', city.pk)] = (city, job, scraper)
     
-    for portal in active_portals:
+    ScrapeJob.objects.bulk_create([job for _, job, _ in targets.values()])
+    
+    deadline = settings.SCRAPER_RUN_DEADLINE
+    runnable = {key: scraper for key, (_, _, scraper) in targets.items() if scraper}
+    outcomes = asyncio.run(_run_scrapers(runnable, deadline))
+    
+    total_new_rfps = 0
+    for key, (portal, job, scraper) in targets.items():
+        label = portal.state_code if key[0] == 'state' else f"{portal.city_name}, {job.target_state_code}"
+        outcome = outcomes.get(key)
+        error = outcome['error'] if outcome else None
+        
+        if not scraper:
+            job.status = 'failed'
+            job.error_message = f"No scraper available for {portal.state_code}"
+            job.completed_at = timezone.now()
+            job.save()
+            continue
+        
+        job.started_at = outcome['started_at']
+        job.duration_seconds = outcome['seconds']
+        job.metadata = {'scrape_seconds': round(outcome['seconds'], 3), 'run_deadline_seconds': deadline}
+        
         try:
-            # Create scrape job
-            job = ScrapeJob.objects.create(
-                job_type='state',
-                target_state_code=portal.state_code,
-                target_url=portal.portal_url,
-                status='running',
-                started_at=timezone.now()
-            )
-            
-            # Get scraper
-            scraper = get_scraper_for_state(portal.state_code)
-            if not scraper:
-                job.status = 'failed'
-                job.error_message = f"No scraper available for {portal.state_code}"
-                job.completed_at = timezone.now()
-                job.save()
-                continue
+            if error:
+                raise error
             
-            # Run scraper
-            rfps = asyncio.run(scraper.scrape())
-            
-            # Save RFPs
+            save_started = time.monotonic()
+            rfps = outcome['rfps']
             new_count, updated_count = save_rfps(rfps)
             
-            # Update job
             job.status = 'completed'
             job.rfps_found = len(rfps)
             job.rfps_new = new_count
             job.rfps_updated = updated_count
+            job.metadata['save_seconds'] = round(time.monotonic() - save_started, 3)
             job.completed_at = timezone.now()
-            job.duration_seconds = (job.completed_at - job.started_at).total_seconds()
             job.save()
             
             # Update portal statistics
             portal.total_rfps_found += new_count
             portal.successful_scrapes += 1
-            portal.last_scraped = timezone.now()
+            portal.last_scraped = job.completed_at
             portal.save()
             
             total_new_rfps += new_count
             
-            logger.info(f"Scraped {portal.state_code}: {new_count} new, {updated_count} updated")
+            logger.info(f"Scraped {label} in {outcome['seconds']:.1f}s: {new_count} new, {updated_count} updated")
             
         except Exception as e:
-            logger.error(f"Error scraping {portal.state_code}: {str(e)}")
+            logger.error(f"Error scraping {label}: {str(e)}")
             
             # Log error
             ScrapeError.objects.create(
-                scrape_job=job if 'job' in locals() else None,
+                scrape_job=job,
                 error_type=type(e).__name__,
                 error_message=str(e),
                 target_url=portal.portal_url
             )
             
             # Update portal
-            portal.failed_scrapes += 1
-            portal.save()
+            if hasattr(portal, 'failed_scrapes'):
+                portal.failed_scrapes += 1
+                portal.save()
             
-            if 'job' in locals():
-                job.status = 'failed'
-                job.error_message = str(e)
-                job.completed_at = timezone.now()
-                job.save()
+            job.status = 'failed'
+            job.error_message = str(e)
+            job.completed_at = timezone.now()
+            job.save()
     
-    logger.info(f"Hourly scrape complete: {total_new_rfps} new RFPs across all states")
-    return {'total_new_rfps': total_new_rfps}
+    logger.info(f"Hourly scrape complete: {total_new_rfps} new RFPs across {len(targets)} portals")
+    return {'total_new_rfps': total_new_rfps, 'portals': len(targets)}
 
 
 @shared_task(name='scrapers.tasks.nightly_city_discovery')
@@ -165,17 +238,50 @@ def save_rfps(rfps_data):
     """
     Save scraped RFPs to database.
     
+    Existing RFPs are looked up in one query and written with bulk_create /
+    bulk_update; if the bulk write fails the batch is retried row by row so
+    one bad record cannot drop the rest.
+    
     Returns:
         Tuple of (new_count, updated_count)
     """
+    by_number = {}
+    for rfp_data in rfps_data:
+        if rfp_data.get('rfp_number'):
+            by_number[rfp_data['rfp_number']] = rfp_data
+    if not by_number:
+        return 0, 0
+    
+    existing = RFP.objects.in_bulk(list(by_number), field_name='rfp_number')
+    now = timezone.now()
+    to_create, to_update, fields = [], [], {'updated_at'}
+    for rfp_number, rfp_data in by_number.items():
+        rfp = existing.get(rfp_number)
+        if rfp:
+            for key, value in rfp_data.items():
+                setattr(rfp, key, value)
+            rfp.updated_at = now
+            fields.update(rfp_data)
+            to_update.append(rfp)
+        else:
+            to_create.append(RFP(**rfp_data))
+    fields.discard('rfp_number')
+    
+    try:
+        with transaction.atomic():
+            RFP.objects.bulk_create(to_create, batch_size=500)
+            if to_update:
+                RFP.objects.bulk_update(to_update, sorted(fields), batch_size=500)
+        return len(to_create), len(to_update)
+    except Exception as e:
+        logger.warning(f"Bulk save of {len(by_number)} RFPs failed, saving row by row: {str(e)}")
+    
     new_count = 0
     updated_count = 0
     
-    for rfp_data in rfps_data:
+    for rfp_data in by_number.values():
         try:
             rfp_number = rfp_data.get('rfp_number')
-            if not rfp_number:
-                continue
             
             # Check if RFP already exists
             existing = RFP.objects.filter(rfp_number=rfp_number).first()
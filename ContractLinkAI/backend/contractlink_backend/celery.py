@@ -40,6 +40,12 @@ app.conf.beat_schedule = {
         'schedule': crontab(minute='*/30'),  # Every 30 minutes
     },
     
+    # Apply buffered RFP view/bookmark counters and activity rows
+    'flush-rfp-counters': {
+        'task': 'rfps.tasks.flush_rfp_counters',
+        'schedule': int(os.environ.get('RFP_COUNTER_FLUSH_SECONDS', '60')),  # same default as settings.py
+    },
+    
     # Send digest email notifications to subscribers
     'send-notification-emails': {
         'task': 'notifications.tasks.send_notification_emails',
@@ -177,6 +177,14 @@ OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o-mini')
 OPENAI_MAX_TOKENS = int(os.environ.get('OPENAI_MAX_TOKENS', '500'))
 OPENAI_TEMPERATURE = float(os.environ.get('OPENAI_TEMPERATURE', '0.2'))
 
+# Batched AI classification (apps.ai_engine.classifier.BatchClassifier)
+AI_BATCH_SIZE = int(os.environ.get('AI_BATCH_SIZE', '10'))  # RFPs per prompt
+AI_BATCH_CONCURRENCY = int(os.environ.get('AI_BATCH_CONCURRENCY', '4'))  # prompts in flight
+AI_REQUESTS_PER_MINUTE = int(os.environ.get('AI_REQUESTS_PER_MINUTE', '60'))
+AI_CLASSIFICATION_CACHE_TTL = int(os.environ.get('AI_CLASSIFICATION_CACHE_TTL', str(30 * 24 * 3600)))  # seconds
+AI_CLASSIFY_CHUNK_SIZE = int(os.environ.get('AI_CLASSIFY_CHUNK_SIZE', '200'))  # RFPs loaded per round
+AI_CLASSIFY_TIME_BUDGET = int(os.environ.get('AI_CLASSIFY_TIME_BUDGET', str(25 * 60)))  # seconds per task run
+
 # Email Configuration (for notifications)
 EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.sendgrid.net')
@@ -185,6 +193,7 @@ EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@contractlink.ai')
+DIGEST_SEND_BATCH_SIZE = int(os.environ.get('DIGEST_SEND_BATCH_SIZE', '100'))  # messages per mail connection
 
 # Scraper Configuration
 SCRAPER_TIMEOUT = int(os.environ.get('SCRAPER_TIMEOUT', '30'))  # seconds
@@ -194,6 +203,12 @@ SCRAPER_USER_AGENT = os.environ.get(
     'SCRAPER_USER_AGENT',
     'ContractLinkAI/1.0 (Government Procurement Aggregator)'
 )
+SCRAPER_MAX_CONNECTIONS = int(os.environ.get('SCRAPER_MAX_CONNECTIONS', '50'))  # shared client pool size
+SCRAPER_PER_HOST_LIMIT = int(os.environ.get('SCRAPER_PER_HOST_LIMIT', '2'))  # concurrent requests per host
+SCRAPER_RUN_DEADLINE = int(os.environ.get('SCRAPER_RUN_DEADLINE', str(20 * 60)))  # seconds for a whole portal sweep
+
+# Write-behind RFP view/bookmark counters (apps/rfps/counters.py)
+RFP_COUNTER_FLUSH_SECONDS = int(os.environ.get('RFP_COUNTER_FLUSH_SECONDS', '60'))
 
 # Cache Configuration
 CACHES = {
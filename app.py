@@ -1,7 +1,7 @@
 import os
 import json
 import urllib.parse
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, abort, send_from_directory, send_file, has_app_context, make_response
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, abort, send_from_directory, send_file, has_app_context, make_response, g, Response
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
@@ -18,8 +18,10 @@ import time
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import tempfile
+import shutil
 from functools import wraps, lru_cache
 from lead_generator import LeadGenerator
+from db_access import clear_column_cache, database_url, engine_options, get_engine, register_engine, sqlite_path as default_sqlite_path
 import paypalrestsdk
 import math
 import string
@@ -89,8 +91,6 @@ except ImportError as e:
     get_scraper_manager = None
     SCRAPERS_AVAILABLE = False
 
-# In-memory tracking for 2FA attempts (user_id -> timestamps)
-TWOFA_ATTEMPTS = {}
 FORCE_ADMIN_2FA = os.getenv('FORCE_ADMIN_2FA', '').lower() in ('1','true','yes','on')
 
 def _get_fernet():
@@ -124,22 +124,15 @@ def decrypt_twofa_secret(data: str) -> str:
         print(f"2FA decrypt error: {e}")
         return ''
 
+# 2FA attempt limits are enforced through the shared limiter (see rate_limiter.py)
+TWOFA_MAX_ATTEMPTS = 5
+TWOFA_WINDOW_SECONDS = 600  # 10 minutes
+
 def record_twofa_attempt(user_id: int):
-    from time import time as _now
-    now = _now()
-    bucket = TWOFA_ATTEMPTS.setdefault(user_id, [])
-    cutoff = now - 600  # 10 minutes
-    bucket[:] = [t for t in bucket if t >= cutoff]
-    bucket.append(now)
-    return bucket
-
-def too_many_twofa_attempts(user_id: int, limit=5):
-    from time import time as _now
-    now = _now()
-    bucket = TWOFA_ATTEMPTS.get(user_id, [])
-    cutoff = now - 600
-    bucket[:] = [t for t in bucket if t >= cutoff]
-    return len(bucket) >= limit
+    return rate_limiter.hit(f'twofa:{user_id}', TWOFA_MAX_ATTEMPTS, TWOFA_WINDOW_SECONDS)
+
+def too_many_twofa_attempts(user_id: int, limit=TWOFA_MAX_ATTEMPTS):
+    return not rate_limiter.peek(f'twofa:{user_id}', limit, TWOFA_WINDOW_SECONDS).allowed
 
 # Flask application setup (reconstructed after accidental removal)
 app = Flask(__name__)
@@ -152,14 +145,12 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = 86400 * 30  # 30 days
 
 DATABASE_URL = os.environ.get('DATABASE_URL', '').strip()
-if DATABASE_URL:
-    app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
-else:
+# Resolved the same way by every script and job (see db_access.py)
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url(DATABASE_URL)
+if not DATABASE_URL:
     # Align SQLAlchemy with the same SQLite file used by legacy helpers (leads.db)
     # This prevents split-brain between db.sqlite3 (ORM) and leads.db (raw sqlite3)
-    default_sqlite_name = os.getenv('SQLITE_DB_NAME', 'leads.db')
-    sqlite_path = os.path.join(os.path.dirname(__file__), default_sqlite_name)
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{sqlite_path}"
+    sqlite_path = default_sqlite_path()
     try:
         # Ensure the file exists early to avoid path confusion in some environments
         if not os.path.exists(sqlite_path):
@@ -277,10 +268,7 @@ def _store_secure_file(user_id: int, file_storage, subdir: str = '', prefix: str
         pass
     return stored_path, stored_name
 
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
-}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
 # --- Restored global configuration constants ---
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '').strip()
@@ -355,6 +343,90 @@ app.config['ADMIN_SESSION_LIFETIME'] = timedelta(hours=48)  # Admin sessions las
 
 db = SQLAlchemy(app)
 
+# Scripts, jobs and generators running in this process share the app's pool (see db_access.py)
+with app.app_context():
+    register_engine(db.engine)
+
+# Shared (cross-worker) rate limiter; backend chosen by RATE_LIMIT_BACKEND
+from rate_limiter import build_rate_limiter
+rate_limiter = build_rate_limiter(lambda: db.engine)
+
+# Per-user plan/feature snapshot shared by all gated routes (see entitlements.py)
+from entitlements import EntitlementService
+entitlement_service = EntitlementService(lambda: db.engine)
+
+# Shared cleaning-relevance vocabulary for ingest and cleanup jobs (see relevance.py)
+from relevance import classify as classify_relevance, classify_batch as classify_relevance_batch, title_exclusion_sql
+
+# Quick Wins rows with display fields and priority precomputed at ingest (see quick_wins_feed.py)
+from quick_wins_feed import QuickWinsFeed
+quick_wins_feed = QuickWinsFeed(lambda: db.engine)
+
+# Uploaded RFPs/capability statements are parsed once per SHA-256 in the background (see document_extraction.py)
+from document_extraction import DocumentExtractor
+document_extractor = DocumentExtractor(lambda: db.engine, os.path.join(os.path.dirname(__file__), 'user_docs', '_extracted'))
+EXTRACTION_WAIT_SECONDS = 5  # bounded wait for text in request handlers; partial pages are used after that
+CAPABILITY_TEXT_CHARS = 15000
+
+# City procurement portals fetched concurrently and parsed once with lxml (see city_portals.py)
+from city_portals import CityPortalFetcher
+city_portal_fetcher = CityPortalFetcher()
+CITY_SEARCH_BUDGET_SECONDS = 12  # portal tier of a city search returns what is done by then
+CUSTOM_CITY_SEARCH_BUDGET_SECONDS = 120  # AI custom search (the page gives up after 180s)
+
+# Last good state/city RFP search results, refreshed in the background (see result_cache.py)
+from result_cache import ResultCache
+rfp_result_cache = ResultCache(lambda: db.engine, context=app.app_context)
+CITY_RFPS_MAX_AGE_SECONDS = 6 * 3600
+STATE_RFPS_MAX_AGE_SECONDS = 1800
+
+# Versioned requirement catalog scored in one pass with page citations (see compliance_engine.py)
+from compliance_engine import compliance_engine
+
+# Streaming CSV/NDJSON exports of leads and contracts (see lead_exports.py)
+from lead_exports import LeadExporter
+lead_exporter = LeadExporter(lambda: db.engine)
+EXPORT_EMAIL_ATTACHMENT_BYTES = 8 * 1024 * 1024  # larger lead exports are emailed as a download link
+
+# Chunked, de-duplicated bulk loads for admin CSV uploads and seed imports (see bulk_import.py)
+from bulk_import import BulkImporter
+bulk_importer = BulkImporter(lambda: db.engine)
+
+# Cross-source near-duplicate clustering of lead tables (see lead_dedup.py)
+from lead_dedup import LeadDeduplicator
+lead_deduplicator = LeadDeduplicator(lambda: db.engine)
+
+def cluster_new_leads():
+    """Fold rows added by an ingest job into near-duplicate clusters (incremental)."""
+    try:
+        with app.app_context():
+            results = lead_deduplicator.ingest_new()
+        processed = sum(r.get('processed', 0) for r in results.values())
+        duplicates = sum(r.get('duplicates', 0) for r in results.values())
+        if processed:
+            print(f"🧬 Clustered {processed} new leads ({duplicates} near-duplicates hidden)")
+        return results
+    except Exception as e:
+        print(f"⚠️ Lead clustering failed: {e}")
+        return {}
+
+def refresh_quick_wins(sources=None):
+    """Rebuild precomputed Quick Wins rows after supply/commercial/contract writes."""
+    try:
+        with app.app_context():
+            return quick_wins_feed.refresh(sources)
+    except Exception as e:
+        print(f"⚠️ Quick Wins refresh failed: {e}")
+        return {}
+
+def current_entitlements():
+    """Entitlements of the signed-in user, resolved at most once per request."""
+    ent = getattr(g, '_entitlements', None)
+    if ent is None:
+        ent = entitlement_service.get(session.get('user_id'), is_admin=session.get('is_admin', False))
+        g._entitlements = ent
+    return ent
+
 def ensure_twofa_columns():
     """Guarantee two-factor columns exist on the leads table (idempotent)."""
     ctx = None
@@ -676,11 +748,18 @@ with app.app_context():
                 stored_path TEXT,
                 file_size INTEGER,
                 extracted_text TEXT,
+                document_sha256 TEXT,
                 uploaded_at TIMESTAMP DEFAULT {ts_default}
             )'''))
             db.session.commit()
         except Exception as _ud_err:
             print(f"[BOOTSTRAP] user_documents table init warning: {_ud_err}")
+        try:
+            db.session.execute(text('ALTER TABLE user_documents ADD COLUMN document_sha256 TEXT'))
+            db.session.commit()
+        except Exception:
+            # Ignore if already exists (SQLite lacks IF NOT EXISTS for ADD COLUMN)
+            db.session.rollback()
 
         # Optional dev-only seed (controlled by SEED_TEST_USER=1)
         if os.getenv('SEED_TEST_USER', '').lower() in ('1','true','yes','on'):
@@ -738,6 +817,7 @@ def _ensure_proposal_wizard_tables():
             file_size INTEGER,
             uploaded_at TIMESTAMP DEFAULT {ts_default},
             parsed_text TEXT,
+            document_sha256 TEXT,
             sector TEXT,
             naics_codes TEXT,
             summary TEXT,
@@ -773,26 +853,20 @@ def _ensure_proposal_wizard_tables():
         db.session.execute(text(ddl_proposal))
         db.session.execute(text(ddl_compliance))
         db.session.commit()
+        try:
+            db.session.execute(text('ALTER TABLE capability_statements ADD COLUMN document_sha256 TEXT'))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()  # already present
     except Exception as e:
         db.session.rollback()
         print(f"DDL proposal wizard error: {e}")
 
-def _extract_pdf_text(file_path: str) -> str:
-    """Extract text from PDF using PyPDF2 if available; graceful fallback."""
-    try:
-        import PyPDF2  # type: ignore
-        with open(file_path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            pages = []
-            for pg in reader.pages:
-                try:
-                    pages.append(pg.extract_text() or '')
-                except Exception:
-                    pass
-        return '\n'.join(pages)[:15000]
-    except Exception as e:
-        print(f"PDF parse error ({file_path}): {e}")
-        return ''
+def _capability_text(parsed_text, document_sha256, wait: float = 0.0) -> str:
+    """Capability statement text: legacy parsed_text, else the cached extraction."""
+    if parsed_text:
+        return parsed_text
+    return document_extractor.text(document_sha256, max_chars=CAPABILITY_TEXT_CHARS, wait=wait)
 
 def _ai_generate_quote_and_proposal(parsed_text: str, sector: str) -> dict:
     """Generate AI proposal & quote drafts or placeholders if AI unavailable."""
@@ -835,21 +909,6 @@ def _ai_generate_quote_and_proposal(parsed_text: str, sector: str) -> dict:
         print(f"AI generation error: {e}")
         return {'quote': 'AI generation failed; add quote manually.', 'proposal': 'AI generation failed; draft proposal manually.', 'disclaimer': disclaimer + ' (Error)'}
 
-def _compute_compliance(parsed_text: str, proposal_text: str) -> dict:
-    """Simple keyword compliance scoring; placeholder for future rule engine."""
-    tokens = ['quality assurance','staffing','training','schedule','safety','green cleaning','equipment','experience','past performance','supervision','inspection','reporting','pricing','transition','scope']
-    blob = (parsed_text + '\n' + proposal_text).lower()
-    matched = [t for t in tokens if t in blob]
-    missing = [t for t in tokens if t not in matched]
-    coverage = round((len(matched)/len(tokens))*100.0, 2) if tokens else 0.0
-    ambiguous = [t for t in matched if blob.count(t) == 1]
-    recs = []
-    if 'safety' not in matched: recs.append('Add safety & OSHA compliance section.')
-    if 'green cleaning' not in matched: recs.append('Include sustainable / green cleaning practices section.')
-    if 'past performance' not in matched: recs.append('Add measurable past performance examples.')
-    if not recs: recs.append('Consider KPIs & service levels for stronger evaluation.')
-    return {'total': len(tokens), 'matched': len(matched), 'coverage': coverage, 'missing': missing, 'ambiguous': ambiguous, 'recommendations': recs}
-
 # Routes for Proposal Wizard moved below after login_required is defined
 
 
@@ -1665,7 +1724,7 @@ def send_bid_notification(business_email, contractor_info, bid_info):
 # Initialize lead generator for automated updates (only if using SQLite)
 lead_generator = None
 if not DATABASE_URL or 'sqlite' in app.config['SQLALCHEMY_DATABASE_URI']:
-    lead_generator = LeadGenerator('leads.db')
+    lead_generator = LeadGenerator()
 
 # Global variables for scheduling
 scheduler_thread = None
@@ -1774,6 +1833,31 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Per-user budget shared by all AI endpoints (OpenAI-backed and assistant)
+AI_RATE_LIMIT = _env_int('AI_RATE_LIMIT', 30)
+AI_RATE_WINDOW_SECONDS = _env_int('AI_RATE_WINDOW_SECONDS', 300)
+
+def ai_rate_limited(f):
+    """Throttle AI endpoints per user (or per IP when anonymous) across all workers."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if session.get('is_admin'):
+            return f(*args, **kwargs)
+        who = session.get('user_id') or request.remote_addr
+        result = rate_limiter.hit(f'ai:{who}', AI_RATE_LIMIT, AI_RATE_WINDOW_SECONDS)
+        if not result.allowed:
+            retry = int(math.ceil(result.retry_after))
+            message = f'AI request limit reached. Please try again in {retry} seconds.'
+            if request.method == 'POST' or request.path.startswith('/api/'):
+                resp = jsonify({'success': False, 'error': message})
+                resp.status_code = 429
+                resp.headers['Retry-After'] = str(retry)
+                return resp
+            flash(message, 'warning')
+            return redirect(request.referrer or url_for('customer_dashboard'))
+        return f(*args, **kwargs)
+    return decorated_function
+
 def paid_or_limited_access(f):
     """Allow 3 free views, then blur content for non-subscribers"""
     @wraps(f)
@@ -1783,14 +1867,8 @@ def paid_or_limited_access(f):
             return f(*args, **kwargs)
         
         # Check if user is paid subscriber
-        if 'user_id' in session:
-            user_id = session['user_id']
-            result = db.session.execute(text('''
-                SELECT subscription_status FROM leads WHERE id = :user_id
-            '''), {'user_id': user_id}).fetchone()
-            
-            if result and result[0] == 'paid':
-                return f(*args, **kwargs)
+        if 'user_id' in session and current_entitlements().is_paid:
+            return f(*args, **kwargs)
         
         # Track free clicks (for non-logged-in or unpaid users)
         if 'contract_clicks' not in session:
@@ -1828,9 +1906,10 @@ def proposal_wizard_upload():
     # Store under per-user directory with random name and tight perms
     stored, _stored_name = _store_secure_file(session['user_id'], file, subdir='capability', prefix='cap_')
     size = os.path.getsize(stored)
-    parsed = _extract_pdf_text(stored)
-    db.session.execute(text('''INSERT INTO capability_statements (user_id, original_filename, stored_path, file_size, parsed_text) VALUES (:uid,:fn,:sp,:sz,:pt)'''),
-                       {'uid': session['user_id'], 'fn': secure_filename(file.filename), 'sp': stored, 'sz': size, 'pt': parsed})
+    # Parsed in the background; later wizard steps read the cached pages
+    doc_sha = document_extractor.submit(stored, file.filename, owner=session['user_id'])
+    db.session.execute(text('''INSERT INTO capability_statements (user_id, original_filename, stored_path, file_size, document_sha256) VALUES (:uid,:fn,:sp,:sz,:sha)'''),
+                       {'uid': session['user_id'], 'fn': secure_filename(file.filename), 'sp': stored, 'sz': size, 'sha': doc_sha})
     db.session.commit()
     new_id = db.session.execute(text('SELECT MAX(id) FROM capability_statements WHERE user_id=:uid'), {'uid': session['user_id']}).scalar()
     return redirect(url_for('proposal_wizard_select', capability_id=new_id))
@@ -1850,12 +1929,14 @@ def proposal_wizard_select(capability_id):
 
 @app.route('/proposal-wizard/generate/<int:capability_id>')
 @login_required
+@ai_rate_limited
 def proposal_wizard_generate(capability_id):
-    cap = db.session.execute(text('SELECT id, parsed_text, sector FROM capability_statements WHERE id=:cid'), {'cid': capability_id}).fetchone()
+    cap = db.session.execute(text('SELECT id, parsed_text, document_sha256, sector FROM capability_statements WHERE id=:cid'), {'cid': capability_id}).fetchone()
     if not cap:
         flash('Capability statement not found.', 'danger')
         return redirect(url_for('proposal_wizard_upload'))
-    ai = _ai_generate_quote_and_proposal(cap.parsed_text or '', cap.sector or '')
+    parsed_text = _capability_text(cap.parsed_text, cap.document_sha256, wait=EXTRACTION_WAIT_SECONDS)
+    ai = _ai_generate_quote_and_proposal(parsed_text, cap.sector or '')
     db.session.execute(text('''INSERT INTO ai_generated_proposals (capability_id, user_id, proposal_type, generated_quote, generated_proposal, generation_model, disclaimer) VALUES (:cid,:uid,'rfp-response',:quote,:proposal,:model,:disc)'''),
                        {'cid': capability_id, 'uid': session['user_id'], 'quote': ai['quote'], 'proposal': ai['proposal'], 'model': os.getenv('OPENAI_MODEL', 'gpt-4'), 'disc': ai['disclaimer']})
     db.session.commit()
@@ -1865,11 +1946,12 @@ def proposal_wizard_generate(capability_id):
 @app.route('/proposal-wizard/compliance/<int:proposal_id>')
 @login_required
 def proposal_wizard_compliance(proposal_id):
-    row = db.session.execute(text('''SELECT p.id as pid, p.generated_proposal, c.parsed_text, c.id as cid FROM ai_generated_proposals p JOIN capability_statements c ON p.capability_id=c.id WHERE p.id=:pid AND p.user_id=:uid'''), {'pid': proposal_id, 'uid': session['user_id']}).fetchone()
+    row = db.session.execute(text('''SELECT p.id as pid, p.generated_proposal, c.parsed_text, c.document_sha256, c.id as cid FROM ai_generated_proposals p JOIN capability_statements c ON p.capability_id=c.id WHERE p.id=:pid AND p.user_id=:uid'''), {'pid': proposal_id, 'uid': session['user_id']}).fetchone()
     if not row:
         flash('Proposal draft not found.', 'danger')
         return redirect(url_for('proposal_wizard_upload'))
-    comp = _compute_compliance(row.parsed_text or '', row.generated_proposal or '')
+    comp = compliance_engine.evaluate(_capability_text(row.parsed_text, row.document_sha256),
+                                      row.generated_proposal or '', checklist='proposal').as_coverage()
     db.session.execute(text('''INSERT INTO compliance_reports (capability_id, proposal_id, user_id, total_requirements, matched_requirements, coverage_percent, missing_items, ambiguous_items, recommendations) VALUES (:cid,:pid,:uid,:total,:matched,:cov,:missing,:ambig,:recs)'''),
                        {'cid': row.cid, 'pid': row.pid, 'uid': session['user_id'], 'total': comp['total'], 'matched': comp['matched'], 'cov': comp['coverage'], 'missing': ','.join(comp['missing']), 'ambig': ','.join(comp['ambiguous']), 'recs': '\n'.join(comp['recommendations'])})
     db.session.commit()
@@ -1941,6 +2023,7 @@ def update_federal_contracts_from_samgov():
             
             db.session.commit()
             print(f"✅ Updated {new_count} real federal contracts from {source}")
+        cluster_new_leads()
             
     except Exception as e:
         print(f"❌ Error updating federal contracts from {source}: {e}")
@@ -1999,6 +2082,8 @@ def update_local_gov_contracts():
             
             db.session.commit()
             print(f"✅ Updated {new_count} real local government contracts from Virginia cities")
+        cluster_new_leads()
+        refresh_quick_wins(['government'])
             
     except Exception as e:
         print(f"❌ Error updating local government contracts: {e}")
@@ -2075,6 +2160,7 @@ def update_federal_contracts_from_datagov():
             
             db.session.commit()
             print(f"✅ Data.gov bulk update: {new_count} new contracts, {updated_count} updated")
+            cluster_new_leads()
             
             # Auto-populate URLs for new leads (if OpenAI is available)
             if new_federal_ids and len(new_federal_ids) <= 10:
@@ -2287,6 +2373,7 @@ def update_contracts_from_usaspending():
             print(f"✅ Inserted {new_count} new contracts, skipped {skip_count} duplicates")
             print(f"✅ USAspending update complete: {new_count} new contracts added")
             print("="*70 + "\n")
+            cluster_new_leads()
             return new_count
         else:
             print("⚠️  No contracts fetched from API")
@@ -2312,14 +2399,7 @@ def _extract_city_from_location(loc: str | None) -> str | None:
         return None
 
 def _matches_cleaning_keywords(text_value: str | None) -> bool:
-    if not text_value:
-        return False
-    t = text_value.lower()
-    keywords = [
-        'janitorial', 'custodial', 'cleaning', 'housekeeping', 'porter',
-        'trash', 'sanitation', 'floor care', 'carpet', 'window cleaning', 'disinfect'
-    ]
-    return any(k in t for k in keywords)
+    return classify_relevance(text_value).relevant
 
 def identify_stale_federal_contracts(limit: int = 200):
     try:
@@ -2403,22 +2483,23 @@ def auto_refresh_stale_federal_contracts(limit: int = 200):
 
 def cleanup_federal_relevance(apply: bool = False, limit: int = 1000):
     try:
-        rows = db.session.execute(text('''
-            SELECT id, naics_code, description FROM federal_contracts
-            WHERE (naics_code IS NULL OR naics_code <> '561720')
-              AND (
-                description IS NULL OR (
-                  lower(description) NOT LIKE '%janitorial%'
-                  AND lower(description) NOT LIKE '%custodial%'
-                  AND lower(description) NOT LIKE '%cleaning%'
-                  AND lower(description) NOT LIKE '%housekeeping%'
-                  AND lower(description) NOT LIKE '%porter%'
-                )
-              )
-            LIMIT :limit
-        '''), {'limit': limit}).fetchall()
+        to_remove = []
+        last_id = 0
+        while len(to_remove) < limit:
+            rows = db.session.execute(text('''
+                SELECT id, naics_code, description FROM federal_contracts
+                WHERE (naics_code IS NULL OR naics_code <> '561720') AND id > :last_id
+                ORDER BY id
+                LIMIT :batch
+            '''), {'last_id': last_id, 'batch': 2000}).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            verdicts = classify_relevance_batch([{'description': r[2], 'naics_code': r[1]} for r in rows])
+            # Deletes are irreversible: only drop rows that mention no cleaning term at all
+            to_remove.extend(r[0] for r, v in zip(rows, verdicts) if not (v.relevant or v.matched))
+        to_remove = to_remove[:limit]
 
-        to_remove = [r.id if hasattr(r, 'id') else r[0] for r in rows]
         count = len(to_remove)
 
         if apply and count:
@@ -2491,7 +2572,7 @@ def fetch_instantmarkets_leads():
     try:
         print("🌐 Fetching leads from instantmarkets.com...")
         import requests
-        from bs4 import BeautifulSoup
+        from html_parsing import make_soup
         
         # Instantmarkets URL for cleaning/janitorial services
         base_url = "https://www.instantmarkets.com"
@@ -2504,7 +2585,7 @@ def fetch_instantmarkets_leads():
         response = requests.get(search_url, headers=headers, timeout=15)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
         
         # Parse leads from instantmarkets
         leads = []
@@ -2610,7 +2691,9 @@ def fetch_instantmarkets_leads():
             
             db.session.commit()
             print(f"✅ Instantmarkets.com update complete: {inserted_count} new leads added, {skipped_count} duplicates skipped")
-            return inserted_count
+        cluster_new_leads()
+        refresh_quick_wins(['supply'])
+        return inserted_count
         
     except requests.exceptions.RequestException as e:
         print(f"❌ Network error fetching from instantmarkets.com: {e}")
@@ -2982,44 +3065,38 @@ def check_low_credits(email):
 def allocate_monthly_credits():
     """Allocate monthly credits to active subscribers"""
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Get active subscribers who need monthly credits
-        current_date = datetime.now().date()
-        c.execute('''SELECT s.email, s.monthly_credits, l.credits_balance 
-                     FROM subscriptions s 
-                     JOIN leads l ON s.email = l.email 
-                     WHERE s.status = 'active' 
-                     AND (s.last_credits_allocated_date IS NULL 
-                          OR date(s.last_credits_allocated_date) < date(?))''', 
-                  (current_date.isoformat(),))
-        
-        subscribers = c.fetchall()
-        
-        for email, monthly_credits, current_balance in subscribers:
-            # Add monthly credits
-            new_balance = current_balance + monthly_credits
-            
-            c.execute('''UPDATE leads 
-                         SET credits_balance = ?, low_credits_alert_sent = ?
-                         WHERE email = ?''', 
-                      (new_balance, False, email))
-            
-            c.execute('''UPDATE subscriptions 
-                         SET last_credits_allocated_date = ?
-                         WHERE email = ?''', 
-                      (current_date.isoformat(), email))
+        # App database (Postgres or SQLite) through the shared pool; works outside a request too
+        current_date = datetime.now().date().isoformat()
+        with get_engine().begin() as conn:
+            # Get active subscribers who need monthly credits
+            subscribers = conn.execute(text('''SELECT s.email, s.monthly_credits
+                         FROM subscriptions s 
+                         JOIN leads l ON s.email = l.email 
+                         WHERE s.status = 'active' 
+                         AND (s.last_credits_allocated_date IS NULL 
+                              OR date(s.last_credits_allocated_date) < date(:today))'''),
+                      {'today': current_date}).fetchall()
+            if not subscribers:
+                return 0
+            
+            # Add monthly credits (one executemany per statement)
+            conn.execute(text('''UPDATE leads 
+                         SET credits_balance = COALESCE(credits_balance, 0) + :credits, low_credits_alert_sent = :alert
+                         WHERE email = :email'''),
+                         [{'credits': credits, 'alert': False, 'email': email} for email, credits in subscribers])
+            
+            conn.execute(text('''UPDATE subscriptions 
+                         SET last_credits_allocated_date = :today
+                         WHERE email = :email'''),
+                         [{'today': current_date, 'email': email} for email, _ in subscribers])
             
             # Log the credit allocation
-            c.execute('''INSERT INTO credits_purchases 
+            conn.execute(text('''INSERT INTO credits_purchases 
                          (user_email, credits_purchased, amount_paid, purchase_type, transaction_id, purchase_date)
-                         VALUES (?, ?, ?, ?, ?, ?)''',
-                      (email, monthly_credits, 25.00, 'monthly_subscription', f'monthly_{current_date}', 
-                       datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+                         VALUES (:email, :credits, :amount, :type, :transaction_id, :purchase_date)'''),
+                         [{'email': email, 'credits': credits, 'amount': 25.00, 'type': 'monthly_subscription',
+                           'transaction_id': f'monthly_{current_date}', 'purchase_date': datetime.now().isoformat()}
+                          for email, credits in subscribers])
         
         return len(subscribers)
         
@@ -3212,75 +3289,44 @@ Virginia Contracts Team
         return False
 
 def send_all_existing_leads_email():
-    """Send all existing customer/lead data to info@eliteecocareservices.com"""
+    """Send all existing customer/lead data to info@eliteecocareservices.com
+
+    The gzipped Excel-ready CSV is spooled through the lead export stream and
+    attached; past EXPORT_EMAIL_ATTACHMENT_BYTES a download link is sent instead.
+    """
     try:
-        # Get all leads from database
-        leads = db.session.execute(text('''
-            SELECT company_name, contact_name, email, phone, state, 
-                   experience_years, certifications, registration_date, 
-                   subscription_status, credits_balance
-            FROM leads 
-            ORDER BY registration_date DESC
-        ''')).fetchall()
-        
-        if not leads:
-            return {'success': False, 'message': 'No leads found in database'}
-        
-        # Build email body
-        subject = f"📊 Complete Lead Database Export - {len(leads)} Total Registrations"
-        
-        body = f"""
+        filename = lead_exporter.filename('leads', 'excel', compress=True)
+        with tempfile.SpooledTemporaryFile(max_size=EXPORT_EMAIL_ATTACHMENT_BYTES) as spool:
+            count = lead_exporter.write(spool, 'leads', 'excel', compress=True)
+            if not count:
+                return {'success': False, 'message': 'No leads found in database'}
+            size = spool.tell()
+
+            subject = f"📊 Complete Lead Database Export - {count} Total Registrations"
+            body = f"""
 COMPLETE LEAD DATABASE EXPORT
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
-Total Registrations: {len(leads)}
-
-{'='*80}
-ALL REGISTERED LEADS:
-{'='*80}
-
-"""
-        
-        for idx, lead in enumerate(leads, 1):
-            company_name, contact_name, email, phone, state, experience, certs, reg_date, sub_status, credits = lead
-            body += f"""
-LEAD #{idx}
--------------------------------------------
-Company: {company_name}
-Contact: {contact_name}
-Email: {email}
-Phone: {phone or 'Not provided'}
-State: {state}
-Experience: {experience} years
-Certifications: {certs or 'None listed'}
-Registration Date: {reg_date}
-Subscription Status: {sub_status}
-Credits Balance: {credits}
-
+Total Registrations: {count}
 """
-        
-        body += f"""
-{'='*80}
-SUMMARY:
-{'='*80}
-Total Leads: {len(leads)}
-Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
+            msg = Message(subject=subject, recipients=['info@eliteecocareservices.com'])
+            if size <= EXPORT_EMAIL_ATTACHMENT_BYTES:
+                spool.seek(0)
+                msg.attach(filename, 'application/gzip', spool.read())
+                body += f"Attached: {filename} (gzipped CSV, opens in Excel)\n"
+            else:
+                link = url_for('api_export', source='leads', format='excel', gzip=1, _external=True)
+                body += f"The export is {size // (1024 * 1024)} MB; download it (admin login required):\n{link}\n"
+            msg.body = body + """
 This is a complete export of all customer/lead data from the Virginia Government Contracts Lead Generation System.
 
 ---
 Virginia Government Contracts Lead Generation System
-        """
-        
-        msg = Message(
-            subject=subject,
-            recipients=['info@eliteecocareservices.com'],
-            body=body
-        )
-        
+"""
+
         mail.send(msg)
-        print(f"✅ Successfully sent {len(leads)} leads to info@eliteecocareservices.com")
-        return {'success': True, 'count': len(leads)}
+        print(f"✅ Successfully sent {count} leads to info@eliteecocareservices.com")
+        return {'success': True, 'count': count}
         
     except Exception as e:
         print(f"❌ Failed to send existing leads email: {e}")
@@ -3288,11 +3334,8 @@ Virginia Government Contracts Lead Generation System
 
 # Database setup
 def get_db_connection():
-    db_path = os.environ.get('DATABASE_URL', 'leads.db')
-    # Handle PostgreSQL URL format if needed
-    if db_path.startswith('postgresql://'):
-        db_path = 'leads.db'  # Fallback to SQLite for now
-    return sqlite3.connect(db_path)
+    """Pooled DB-API connection to the app's SQLite file for legacy ``?`` queries; close() returns it to the pool"""
+    return get_engine(f"sqlite:///{default_sqlite_path()}").raw_connection()
 
 def init_postgres_db():
     """Initialize PostgreSQL database with proper syntax"""
@@ -4740,6 +4783,7 @@ def init_db():
                 print("   Contracts will be fetched on next scheduled update.")
         
         conn.close()
+        clear_column_cache()  # the ALTERs above ran on a raw connection, outside the DDL listener
         print("✅ Database initialization complete - ready for real leads!")
         print("💡 Commercial/Residential leads will appear as users submit request forms")
         print("📡 Federal contracts are being fetched from SAM.gov API...")
@@ -5374,6 +5418,7 @@ def ensure_proposal_reviews_table():
         finally:
             if conn:
                 conn.close()
+            clear_column_cache(table_name='proposal_reviews')
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -5489,6 +5534,10 @@ def beta_tester_count():
             'remaining': 0
         }), 500
 
+# Failed sign-ins allowed per client IP + username before a cool-down
+SIGNIN_MAX_FAILURES = _env_int('SIGNIN_MAX_FAILURES', 10)
+SIGNIN_WINDOW_SECONDS = 900
+
 @app.route('/signin', methods=['GET', 'POST'])
 def signin():
     try:
@@ -5507,6 +5556,10 @@ def signin():
                     print(f"[AUTH] Logging error: {_log_e}")
             username = (request.form.get('username') or '').strip()
             password = request.form.get('password') or ''
+            signin_key = f"signin:{request.remote_addr}:{username.lower()}"
+            if not rate_limiter.peek(signin_key, SIGNIN_MAX_FAILURES, SIGNIN_WINDOW_SECONDS).allowed:
+                flash('Too many failed sign-in attempts. Please wait a few minutes and try again.', 'error')
+                return redirect(url_for('auth'))
             
             # Check for admin login first (superadmin) — only if admin creds are configured
             if ADMIN_ENABLED and username == ADMIN_USERNAME and password == ADMIN_PASSWORD:
@@ -5672,6 +5725,7 @@ def signin():
                             {'status': 'unpaid', 'user_id': result[0]}
                         )
                         db.session.commit()
+                        entitlement_service.bump(user_id=result[0])
                 
                 # Check if 2FA required
                 twofa_enabled = bool(result[10]) if len(result) > 10 else False
@@ -5736,6 +5790,7 @@ def signin():
             else:
                 if AUTH_DEBUG:
                     print('[AUTH] Invalid credentials for', username)
+                rate_limiter.hit(signin_key, SIGNIN_MAX_FAILURES, SIGNIN_WINDOW_SECONDS)
                 flash('Invalid username or password. Please try again.', 'error')
                 return redirect(url_for('auth'))
         
@@ -6055,6 +6110,9 @@ def verify_2fa():
         if not code:
             flash('Enter your 6-digit code.', 'error')
             return redirect(url_for('verify_2fa'))
+        if too_many_twofa_attempts(session['pending_2fa_user_id']):
+            flash('Too many invalid codes. Try again in a few minutes.', 'error')
+            return redirect(url_for('auth'))
         # Fetch secret securely
         row = db.session.execute(text('SELECT twofa_secret FROM leads WHERE id = :i'), {'i': session['pending_2fa_user_id']}).fetchone()
         if not row or not row[0]:
@@ -7278,6 +7336,7 @@ def cancel_subscription():
             'user_id': session['user_id']
         })
         db.session.commit()
+        entitlement_service.bump(user_id=session['user_id'])
         
         # Update session
         session['subscription_status'] = 'cancelled'
@@ -7605,6 +7664,7 @@ def subscription_success():
                 'email': user_email
             })
             db.session.commit()
+            entitlement_service.bump(email=user_email)
             
             # Log promo code usage for analytics
             if promo_code_used:
@@ -7650,6 +7710,7 @@ def paypal_webhook():
                 WHERE paypal_subscription_id = :sub_id
             '''), {'sub_id': subscription_id})
             db.session.commit()
+            entitlement_service.bump(paypal_subscription_id=subscription_id)
             print(f"✅ Subscription {subscription_id} marked as cancelled")
         
         elif event_type == 'PAYMENT.SALE.COMPLETED':
@@ -7666,6 +7727,7 @@ def paypal_webhook():
                     'payment_date': datetime.now().strftime('%Y-%m-%d')
                 })
                 db.session.commit()
+                entitlement_service.bump(paypal_subscription_id=billing_agreement_id)
                 print(f"✅ Payment recorded for subscription {billing_agreement_id}")
         
         elif event_type == 'BILLING.SUBSCRIPTION.SUSPENDED':
@@ -7677,6 +7739,7 @@ def paypal_webhook():
                 WHERE paypal_subscription_id = :sub_id
             '''), {'sub_id': subscription_id})
             db.session.commit()
+            entitlement_service.bump(paypal_subscription_id=subscription_id)
             print(f"⚠️  Subscription {subscription_id} suspended")
         
         return jsonify({'status': 'success'}), 200
@@ -8248,137 +8311,95 @@ def get_city_procurement_portals(state_code):
     return portals.get(state_code, {})
 
 
-def scrape_city_portals(portals, state_code, state_name):
+def scrape_city_portals(portals, state_code, state_name, budget=CITY_SEARCH_BUDGET_SECONDS, on_city=None):
     """
     Scrapes procurement portals directly using hardcoded URLs.
-    Returns list of discovered RFPs and cities checked.
+    Portals are fetched concurrently (see city_portals.py); cities that are
+    not done within ``budget`` seconds are returned as pending and finish
+    into the fetcher's cache for the next search.
+    Returns (discovered RFPs, cities checked, cities pending).
+    ``on_city(result, rfps)`` is called as each city completes.
     """
-    from bs4 import BeautifulSoup
-    import requests
-    from time import sleep
-    
     discovered_rfps = []
     cities_checked = []
+    rows = []
+    
+    search = city_portal_fetcher.search({city: info.get('url') for city, info in portals.items()}, budget)
+    for result in search:
+        cities_checked.append(result.city)
+        city_rfps = []
+        if result.status == 'http_error':
+            print(f"    ⚠️  HTTP {result.http_status} for {result.city}")
+        elif result.status == 'timeout':
+            print(f"    ⏱️  Timeout for {result.city}")
+        elif result.status == 'error':
+            print(f"    ❌ Error scraping {result.city}: {result.error}")
+        elif not result.keywords:
+            print(f"    ℹ️  No cleaning keywords found in {result.city}")
+        else:
+            print(f"    ✅ {result.city}: found keywords {', '.join(result.keywords[:3])}"
+                  f"{' (cached)' if result.from_cache else ''}")
+            for listing in result.listings:
+                snippet = listing['text']
+                rfp_data = {
+                    'city_name': result.city,
+                    'rfp_title': snippet[:200] if snippet else 'Cleaning Services Opportunity',
+                    'rfp_number': '',
+                    'description': snippet[:500] if len(snippet) > 200 else '',
+                    'deadline': '',
+                    'estimated_value': '',
+                    'department': '',
+                    'contact_email': '',
+                    'contact_phone': '',
+                    'rfp_url': listing['url']
+                }
+                city_rfps.append(rfp_data)
+                rows.append({
+                    'sc': state_code.upper(),
+                    'sn': state_name,
+                    'cn': result.city,
+                    'title': rfp_data['rfp_title'],
+                    'num': f"SCRAPED-{result.city[:3].upper()}-{len(discovered_rfps) + len(city_rfps)}",
+                    'desc': rfp_data['description'],
+                    'dl': '',
+                    'val': '',
+                    'dept': '',
+                    'email': '',
+                    'phone': '',
+                    'url': rfp_data['rfp_url'],
+                    'source': 'direct_portal_scraper',
+                    'discovered': datetime.utcnow().isoformat()
+                })
+        discovered_rfps.extend(city_rfps)
+        if on_city:
+            on_city(result, city_rfps)
     
-    # Keywords to search for (expanded list)
-    keywords = [
-        'janitorial', 'custodial', 'cleaning', 'housekeeping',
-        'sanitation', 'porter', 'building maintenance', 'facilities',
-        'operations cleaning', 'environmental services', 'floor care',
-        'disinfection'
-    ]
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
+    if search.pending:
+        print(f"    ⏳ Still fetching after {budget}s: {', '.join(search.pending)}")
     
-    for city_name, portal_info in portals.items():
+    if rows:
         try:
-            print(f"  🔍 Scraping {city_name}, {state_code}...")
-            cities_checked.append(city_name)
-            
-            url = portal_info['url']
-            
-            # Fetch the portal page
-            response = requests.get(url, headers=headers, timeout=20)
-            if response.status_code != 200:
-                print(f"    ⚠️  HTTP {response.status_code} for {city_name}")
-                sleep(2)
-                continue
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            page_text = soup.get_text(separator=' ', strip=True).lower()
-            
-            # Search for any of our keywords
-            found_keywords = [kw for kw in keywords if kw in page_text]
-            
-            if found_keywords:
-                print(f"    ✅ Found keywords: {', '.join(found_keywords[:3])}")
-                
-                # Extract potential RFP listings (look for common patterns)
-                rfp_containers = soup.find_all(['tr', 'div', 'li'], class_=lambda c: c and any(
-                    term in str(c).lower() for term in ['bid', 'rfp', 'solicitation', 'opportunity']
-                ))
-                
-                for container in rfp_containers[:10]:  # Limit to first 10 matches
-                    text = container.get_text(separator=' ', strip=True)
-                    text_lower = text.lower()
-                    
-                    # Check if this container mentions cleaning/janitorial
-                    if any(kw in text_lower for kw in found_keywords):
-                        # Try to extract RFP details
-                        rfp_data = {
-                            'city_name': city_name,
-                            'rfp_title': text[:200] if text else 'Cleaning Services Opportunity',
-                            'rfp_number': '',
-                            'description': text[:500] if len(text) > 200 else '',
-                            'deadline': '',
-                            'estimated_value': '',
-                            'department': '',
-                            'contact_email': '',
-                            'contact_phone': '',
-                            'rfp_url': url
-                        }
-                        
-                        # Try to find links within container
-                        link = container.find('a', href=True)
-                        if link and link['href']:
-                            if link['href'].startswith('http'):
-                                rfp_data['rfp_url'] = link['href']
-                            elif link['href'].startswith('/'):
-                                from urllib.parse import urljoin
-                                rfp_data['rfp_url'] = urljoin(url, link['href'])
-                        
-                        # Save to database
-                        try:
-                            db.session.execute(text(
-                                '''INSERT INTO city_rfps 
-                                   (state_code, state_name, city_name, rfp_title, rfp_number, 
-                                    description, deadline, estimated_value, department, 
-                                    contact_email, contact_phone, rfp_url, data_source, discovered_at)
-                                   VALUES (:sc, :sn, :cn, :title, :num, :desc, :dl, :val, :dept, 
-                                           :email, :phone, :url, :source, :discovered)'''
-                            ), {
-                                'sc': state_code.upper(),
-                                'sn': state_name,
-                                'cn': city_name,
-                                'title': rfp_data['rfp_title'],
-                                'num': rfp_data['rfp_number'] or f"SCRAPED-{city_name[:3].upper()}-{len(discovered_rfps)+1}",
-                                'desc': rfp_data['description'],
-                                'dl': rfp_data['deadline'],
-                                'val': rfp_data['estimated_value'],
-                                'dept': rfp_data['department'],
-                                'email': rfp_data['contact_email'],
-                                'phone': rfp_data['contact_phone'],
-                                'url': rfp_data['rfp_url'],
-                                'source': 'direct_portal_scraper',
-                                'discovered': datetime.utcnow().isoformat()
-                            })
-                            discovered_rfps.append(rfp_data)
-                            
-                        except Exception as db_err:
-                            print(f"    ⚠️  Database error: {db_err}")
-                            continue
-            else:
-                print(f"    ℹ️  No cleaning keywords found in {city_name}")
-            
-            # Rate limiting - be respectful to government servers
-            sleep(3)
-            
-        except requests.exceptions.Timeout:
-            print(f"    ⏱️  Timeout for {city_name}")
-            continue
-        except Exception as e:
-            print(f"    ❌ Error scraping {city_name}: {e}")
-            continue
-    
-    try:
-        db.session.commit()
-    except Exception as commit_err:
-        print(f"❌ Database commit error: {commit_err}")
-        db.session.rollback()
+            # Portal pages are re-read on every search; skip listings already stored
+            existing = {(r[0], r[1]) for r in db.session.execute(text(
+                "SELECT city_name, rfp_title FROM city_rfps "
+                "WHERE state_code = :sc AND data_source = 'direct_portal_scraper'"
+            ), {'sc': state_code.upper()}).fetchall()}
+            new_rows = [r for r in rows if (r['cn'], r['title']) not in existing]
+            if new_rows:
+                db.session.execute(text(
+                    '''INSERT INTO city_rfps 
+                       (state_code, state_name, city_name, rfp_title, rfp_number, 
+                        description, deadline, estimated_value, department, 
+                        contact_email, contact_phone, rfp_url, data_source, discovered_at)
+                       VALUES (:sc, :sn, :cn, :title, :num, :desc, :dl, :val, :dept, 
+                               :email, :phone, :url, :source, :discovered)'''
+                ), new_rows)
+            db.session.commit()
+        except Exception as db_err:
+            print(f"❌ Database error saving portal RFPs: {db_err}")
+            db.session.rollback()
     
-    return discovered_rfps, cities_checked
+    return discovered_rfps, cities_checked, search.pending
 
 
 def find_rfps_with_openai(client, state_name, state_code):
@@ -8387,7 +8408,7 @@ def find_rfps_with_openai(client, state_name, state_code):
     Fallback option when direct scraping doesn't find results.
     """
     import json
-    from bs4 import BeautifulSoup
+    from html_parsing import make_soup
     import requests
     from time import sleep
     
@@ -8452,7 +8473,7 @@ Return ONLY valid JSON array, no explanations:
                 print(f"    ⚠️  HTTP {webpage_response.status_code}")
                 continue
             
-            soup = BeautifulSoup(webpage_response.text, 'html.parser')
+            soup = make_soup(webpage_response.text)
             page_text = soup.get_text(separator='\n', strip=True)[:15000]
             
             # AI RFP extraction
@@ -8642,401 +8663,471 @@ def search_demandstar_by_city(city_name, state_code):
     
     return []
 
-@app.route('/api/find-city-rfps', methods=['POST'])
-@login_required
-def find_city_rfps():
-    """Enhanced multi-source city RFP finder
+def _major_cities(state_code):
+    """Cities offered for custom search: known portals, else the largest cities."""
+    CITY_PORTALS = get_city_procurement_portals(state_code)
+    major_cities = list(CITY_PORTALS.keys()) if CITY_PORTALS else []
+    
+    # If no predefined cities, use common major cities by state
+    if not major_cities:
+        common_cities = {
+            'CA': ['Los Angeles', 'San Diego', 'San Francisco', 'San Jose', 'Sacramento'],
+            'TX': ['Houston', 'Dallas', 'Austin', 'San Antonio', 'Fort Worth'],
+            'FL': ['Miami', 'Tampa', 'Orlando', 'Jacksonville', 'St Petersburg'],
+            'NY': ['New York', 'Buffalo', 'Rochester', 'Syracuse', 'Albany'],
+            'VA': ['Richmond', 'Norfolk', 'Virginia Beach', 'Chesapeake', 'Newport News'],
+            'AK': ['Anchorage', 'Fairbanks', 'Juneau', 'Sitka', 'Ketchikan']
+        }
+        major_cities = common_cities.get(state_code, [])[:5]  # Limit to 5 cities
+    return major_cities
+
+
+def _city_rfps_seed(state_code, state_name):
+    """Local-only answer for a state the result cache has not seen yet."""
+    # Rows stored by earlier searches (< 3 days old)
+    cache_cutoff = datetime.now() - timedelta(days=3)
+    
+    # Try to query with created_at, fallback if column doesn't exist
+    try:
+        cached_rfps = db.session.execute(text(
+            '''SELECT city_name, rfp_title, rfp_number, description, deadline, 
+                      estimated_value, department, contact_email, contact_phone, rfp_url
+               FROM city_rfps 
+               WHERE state_code = :sc 
+               AND created_at >= :cutoff
+               ORDER BY created_at DESC'''
+        ), {'sc': state_code, 'cutoff': cache_cutoff}).fetchall()
+    except Exception as e:
+        # Fallback: created_at column might not exist (old database)
+        if 'created_at' in str(e).lower() or 'column' in str(e).lower():
+            print(f"⚠️  created_at column not found, using discovered_at fallback")
+            try:
+                cached_rfps = db.session.execute(text(
+                    '''SELECT city_name, rfp_title, rfp_number, description, deadline, 
+                              estimated_value, department, contact_email, contact_phone, rfp_url
+                       FROM city_rfps 
+                       WHERE state_code = :sc 
+                       AND discovered_at >= :cutoff
+                       ORDER BY discovered_at DESC'''
+                ), {'sc': state_code, 'cutoff': cache_cutoff}).fetchall()
+            except Exception:
+                # Last resort: no timestamp filtering
+                cached_rfps = db.session.execute(text(
+                    '''SELECT city_name, rfp_title, rfp_number, description, deadline, 
+                              estimated_value, department, contact_email, contact_phone, rfp_url
+                       FROM city_rfps 
+                       WHERE state_code = :sc 
+                       ORDER BY id DESC
+                       LIMIT 50'''
+                ), {'sc': state_code}).fetchall()
+        else:
+            raise  # Re-raise if it's a different error
     
-    NEW Search Strategy (priority order):
-    1. Database cache (< 3 days) - INSTANT
-    2. SAM.gov API (federal opportunities by city) - RELIABLE ✅ NEW
-    3. DemandStar RSS feeds (municipal opportunities) - RELIABLE ✅ NEW
-    4. Direct portal scraping (known city portals) - MODERATE
-    5. Show helpful resources if nothing found
+    if not cached_rfps:
+        return None
+    print(f"✅ Found {len(cached_rfps)} cached RFPs (< 3 days old)")
+    return {
+        'success': True,
+        'message': f'Found {len(cached_rfps)} recent RFPs in {state_name} (from cache)',
+        'rfps': [dict(rfp._mapping) for rfp in cached_rfps],
+        'cities_checked': list(set([rfp.city_name for rfp in cached_rfps])),
+        'cities_searched': len(set([rfp.city_name for rfp in cached_rfps])),
+        'available_cities': _major_cities(state_code),  # NEW: Cities user can search
+        'state': state_name,
+        'source': 'database_cache'
+    }
+
+
+def _search_city_rfps(state_code, state_name):
+    """
+    Live multi-source city RFP search; runs on a result-cache refresh worker.
     
-    This approach is much more efficient than AI-based searching.
+    Sources (priority order):
+    1. National procurement scrapers + SAM.gov API / DemandStar RSS by city
+    2. Direct portal scraping (known city portals)
+    3. Helpful resources if nothing found
     """
+    print(f"🔍 Finding city RFPs for {state_name} ({state_code})...")
+    major_cities = _major_cities(state_code)
+    
+    # TIER 2: Use National Procurement Scrapers + SAM.gov/DemandStar APIs
+    discovered_rfps = []
+    cities_checked = []
+    
+    print(f"🚀 Using National Procurement Engine for {state_name}...")
+    
+    # NEW: Use national scrapers for state-level opportunities
     try:
-        # Guard: Check if requests library is available (already imported at top)
-        if requests is None:
-            return jsonify({
-                'success': False, 
-                'error': 'API search unavailable. Please contact support.',
-                'message': 'The requests library is not available.'
-            }), 500
-        
-        from bs4 import BeautifulSoup
-        import json
-        import re
-        from datetime import datetime, timedelta
-        from time import sleep
-        
-        data = request.get_json() or {}
-        state_name = data.get('state_name', '')
-        state_code = data.get('state_code', '').upper()
-        
-        if not state_name or not state_code:
-            return jsonify({'success': False, 'error': 'State name and code required'}), 400
-        
-        user_email = session.get('user_email')
-        
-        print(f"🔍 Finding city RFPs for {state_name} ({state_code})...")
-        
-        # TIER 1: Check database cache (< 3 days old for fresher results)
-        cache_cutoff = datetime.now() - timedelta(days=3)
-        
-        # Try to query with created_at, fallback if column doesn't exist
-        try:
-            cached_rfps = db.session.execute(text(
-                '''SELECT city_name, rfp_title, rfp_number, description, deadline, 
-                          estimated_value, department, contact_email, contact_phone, rfp_url
-                   FROM city_rfps 
-                   WHERE state_code = :sc 
-                   AND created_at >= :cutoff
-                   ORDER BY created_at DESC'''
-            ), {'sc': state_code, 'cutoff': cache_cutoff}).fetchall()
-        except Exception as e:
-            # Fallback: created_at column might not exist (old database)
-            if 'created_at' in str(e).lower() or 'column' in str(e).lower():
-                print(f"⚠️  created_at column not found, using discovered_at fallback")
-                try:
-                    cached_rfps = db.session.execute(text(
-                        '''SELECT city_name, rfp_title, rfp_number, description, deadline, 
-                                  estimated_value, department, contact_email, contact_phone, rfp_url
-                           FROM city_rfps 
-                           WHERE state_code = :sc 
-                           AND discovered_at >= :cutoff
-                           ORDER BY discovered_at DESC'''
-                    ), {'sc': state_code, 'cutoff': cache_cutoff}).fetchall()
-                except Exception:
-                    # Last resort: no timestamp filtering
-                    cached_rfps = db.session.execute(text(
-                        '''SELECT city_name, rfp_title, rfp_number, description, deadline, 
-                                  estimated_value, department, contact_email, contact_phone, rfp_url
-                           FROM city_rfps 
-                           WHERE state_code = :sc 
-                           ORDER BY id DESC
-                           LIMIT 50'''
-                    ), {'sc': state_code}).fetchall()
-            else:
-                raise  # Re-raise if it's a different error
-        
-        # Get major cities for the state (before cache check so we can return available cities)
-        CITY_PORTALS = get_city_procurement_portals(state_code)
-        major_cities = list(CITY_PORTALS.keys()) if CITY_PORTALS else []
-        
-        # If no predefined cities, use common major cities by state
-        if not major_cities:
-            common_cities = {
-                'CA': ['Los Angeles', 'San Diego', 'San Francisco', 'San Jose', 'Sacramento'],
-                'TX': ['Houston', 'Dallas', 'Austin', 'San Antonio', 'Fort Worth'],
-                'FL': ['Miami', 'Tampa', 'Orlando', 'Jacksonville', 'St Petersburg'],
-                'NY': ['New York', 'Buffalo', 'Rochester', 'Syracuse', 'Albany'],
-                'VA': ['Richmond', 'Norfolk', 'Virginia Beach', 'Chesapeake', 'Newport News'],
-                'AK': ['Anchorage', 'Fairbanks', 'Juneau', 'Sitka', 'Ketchikan']
-            }
-            major_cities = common_cities.get(state_code, [])[:5]  # Limit to 5 cities
-        
-        if cached_rfps:
-            print(f"✅ Found {len(cached_rfps)} cached RFPs (< 3 days old)")
-            return jsonify({
-                'success': True,
-                'message': f'Found {len(cached_rfps)} recent RFPs in {state_name} (from cache)',
-                'rfps': [dict(rfp._mapping) for rfp in cached_rfps],
-                'cities_checked': list(set([rfp.city_name for rfp in cached_rfps])),
-                'cities_searched': len(set([rfp.city_name for rfp in cached_rfps])),
-                'available_cities': major_cities,  # NEW: Cities user can search
-                'state': state_name,
-                'source': 'database_cache'
-            })
+        from national_scrapers import (
+            SymphonyScraper,
+            DemandStarScraper,
+            BidExpressScraper,
+            COMBUYSScraper,
+            EMarylandScraper,
+            NewHampshireScraper,
+            RhodeIslandScraper
+        )
         
-        # TIER 2: Use National Procurement Scrapers + SAM.gov/DemandStar APIs
-        discovered_rfps = []
-        cities_checked = []
+        # Determine which scraper covers this state
+        scrapers_to_run = []
         
-        print(f"🚀 Using National Procurement Engine for {state_name}...")
+        # States with direct portal access (covers 47 states now!)
+        direct_portal_states = [
+            'AK', 'AL', 'AR', 'AZ', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 
+            'HI', 'IA', 'ID', 'IL', 'IN', 'KS', 'KY', 'LA', 'ME', 'MI', 
+            'MN', 'MO', 'MS', 'MT', 'NC', 'ND', 'NE', 'NJ', 'NM', 'NV', 
+            'NY', 'OH', 'OK', 'OR', 'PA', 'SC', 'SD', 'TN', 'TX', 'UT', 
+            'VA', 'VT', 'WA', 'WI', 'WV', 'WY'
+        ]
         
-        # NEW: Use national scrapers for state-level opportunities
-        try:
-            from national_scrapers import (
-                SymphonyScraper,
-                DemandStarScraper,
-                BidExpressScraper,
-                COMBUYSScraper,
-                EMarylandScraper,
-                NewHampshireScraper,
-                RhodeIslandScraper
-            )
-            
-            # Determine which scraper covers this state
-            scrapers_to_run = []
-            
-            # States with direct portal access (covers 47 states now!)
-            direct_portal_states = [
-                'AK', 'AL', 'AR', 'AZ', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 
-                'HI', 'IA', 'ID', 'IL', 'IN', 'KS', 'KY', 'LA', 'ME', 'MI', 
-                'MN', 'MO', 'MS', 'MT', 'NC', 'ND', 'NE', 'NJ', 'NM', 'NV', 
-                'NY', 'OH', 'OK', 'OR', 'PA', 'SC', 'SD', 'TN', 'TX', 'UT', 
-                'VA', 'VT', 'WA', 'WI', 'WV', 'WY'
-            ]
-            
-            # Use direct state portal scraper (bypasses Symphony 403 blocks)
-            if state_code in direct_portal_states:
-                print(f"  🎯 Using direct state portal for {state_code}")
-                try:
-                    from national_scrapers.multistate_direct_scraper import MultiStateDirectScraper
-                    direct_scraper = MultiStateDirectScraper()
-                    state_contracts = direct_scraper.scrape(states=[state_code])
-                    
-                    for contract in state_contracts:
-                        discovered_rfps.append({
-                            'city_name': contract.get('agency', f'{state_code} State'),
-                            'rfp_title': contract['title'],
-                            'rfp_number': contract.get('solicitation_number', 'N/A'),
-                            'description': contract.get('title', ''),
-                            'deadline': contract.get('due_date', 'Not specified'),
-                            'estimated_value': 'TBD',
-                            'department': contract.get('agency', 'State Agency'),
-                            'contact_email': '',
-                            'contact_phone': '',
-                            'rfp_url': contract.get('link', '')
-                        })
-                    print(f"  ✅ Direct portal found {len(state_contracts)} opportunities for {state_code}")
-                except Exception as e:
-                    print(f"  ⚠️  Direct portal error for {state_code}: {e}")
-            
-            # DemandStar (all states - local governments)
-            print(f"  🎯 Using DemandStar scraper (local governments)")
-            demandstar_scraper = DemandStarScraper()
-            demandstar_contracts = demandstar_scraper.scrape(limit=100)
-            
-            # Filter for this state
-            for contract in demandstar_contracts:
-                if contract.get('state') == state_code:
+        # Use direct state portal scraper (bypasses Symphony 403 blocks)
+        if state_code in direct_portal_states:
+            print(f"  🎯 Using direct state portal for {state_code}")
+            try:
+                from national_scrapers.multistate_direct_scraper import MultiStateDirectScraper
+                direct_scraper = MultiStateDirectScraper()
+                state_contracts = direct_scraper.scrape(states=[state_code])
+                
+                for contract in state_contracts:
                     discovered_rfps.append({
-                        'city_name': contract.get('agency', 'Local Government'),
+                        'city_name': contract.get('agency', f'{state_code} State'),
                         'rfp_title': contract['title'],
                         'rfp_number': contract.get('solicitation_number', 'N/A'),
-                        'description': contract.get('description', contract.get('title', '')),
+                        'description': contract.get('title', ''),
                         'deadline': contract.get('due_date', 'Not specified'),
                         'estimated_value': 'TBD',
-                        'department': contract.get('agency', 'Municipal'),
+                        'department': contract.get('agency', 'State Agency'),
                         'contact_email': '',
                         'contact_phone': '',
                         'rfp_url': contract.get('link', '')
                     })
-            print(f"  ✅ DemandStar found {len([c for c in demandstar_contracts if c.get('state') == state_code])} opportunities")
-            
-            # State-specific scrapers
-            if state_code == 'MA':
-                print(f"  🎯 Using COMMBUYS scraper for Massachusetts")
-                commbuys = COMBUYSScraper()
-                ma_contracts = commbuys.scrape()
-                for contract in ma_contracts:
-                    discovered_rfps.append({
-                        'city_name': contract.get('agency', 'Massachusetts'),
-                        'rfp_title': contract['title'],
-                        'rfp_number': contract.get('solicitation_number', 'N/A'),
-                        'description': contract.get('title', ''),
-                        'deadline': contract.get('due_date', 'Not specified'),
-                        'estimated_value': 'TBD',
-                        'department': contract.get('agency', 'State Agency'),
-                        'contact_email': '',
-                        'contact_phone': '',
-                        'rfp_url': contract.get('link', '')
-                    })
-                print(f"  ✅ COMMBUYS found {len(ma_contracts)} opportunities")
-            
-            elif state_code == 'MD':
-                print(f"  🎯 Using eMaryland scraper")
-                emaryland = EMarylandScraper()
-                md_contracts = emaryland.scrape()
-                for contract in md_contracts:
-                    discovered_rfps.append({
-                        'city_name': contract.get('agency', 'Maryland'),
-                        'rfp_title': contract['title'],
-                        'rfp_number': contract.get('solicitation_number', 'N/A'),
-                        'description': contract.get('title', ''),
-                        'deadline': contract.get('due_date', 'Not specified'),
-                        'estimated_value': 'TBD',
-                        'department': contract.get('agency', 'State Agency'),
-                        'contact_email': '',
-                        'contact_phone': '',
-                        'rfp_url': contract.get('link', '')
-                    })
-                print(f"  ✅ eMaryland found {len(md_contracts)} opportunities")
-            
-            elif state_code == 'NH':
-                print(f"  🎯 Using New Hampshire scraper")
-                nh = NewHampshireScraper()
-                nh_contracts = nh.scrape()
-                for contract in nh_contracts:
-                    discovered_rfps.append({
-                        'city_name': contract.get('agency', 'New Hampshire'),
-                        'rfp_title': contract['title'],
-                        'rfp_number': contract.get('solicitation_number', 'N/A'),
-                        'description': contract.get('title', ''),
-                        'deadline': contract.get('due_date', 'Not specified'),
-                        'estimated_value': 'TBD',
-                        'department': contract.get('agency', 'State Agency'),
-                        'contact_email': '',
-                        'contact_phone': '',
-                        'rfp_url': contract.get('link', '')
-                    })
-                print(f"  ✅ New Hampshire found {len(nh_contracts)} opportunities")
-            
-            elif state_code == 'RI':
-                print(f"  🎯 Using Rhode Island scraper")
-                ri = RhodeIslandScraper()
-                ri_contracts = ri.scrape()
-                for contract in ri_contracts:
-                    discovered_rfps.append({
-                        'city_name': contract.get('agency', 'Rhode Island'),
-                        'rfp_title': contract['title'],
-                        'rfp_number': contract.get('solicitation_number', 'N/A'),
-                        'description': contract.get('title', ''),
-                        'deadline': contract.get('due_date', 'Not specified'),
-                        'estimated_value': 'TBD',
-                        'department': contract.get('agency', 'State Agency'),
-                        'contact_email': '',
-                        'contact_phone': '',
-                        'rfp_url': contract.get('link', '')
-                    })
-                print(f"  ✅ Rhode Island found {len(ri_contracts)} opportunities")
-            
-            # BidExpress (multi-state, try for all)
-            print(f"  🎯 Using BidExpress scraper")
-            bidexpress = BidExpressScraper()
-            bidexpress_contracts = bidexpress.scrape()
-            for contract in bidexpress_contracts:
-                if contract.get('state') == state_code:
-                    discovered_rfps.append({
-                        'city_name': contract.get('agency', 'DOT'),
-                        'rfp_title': contract['title'],
-                        'rfp_number': contract.get('solicitation_number', 'N/A'),
-                        'description': contract.get('description', contract.get('title', '')),
-                        'deadline': contract.get('due_date', 'Not specified'),
-                        'estimated_value': 'TBD',
-                        'department': 'Department of Transportation',
-                        'contact_email': '',
-                        'contact_phone': '',
-                        'rfp_url': contract.get('link', '')
-                    })
-            print(f"  ✅ BidExpress found {len([c for c in bidexpress_contracts if c.get('state') == state_code])} opportunities")
-            
-        except Exception as scraper_error:
-            print(f"  ⚠️  National scraper error: {scraper_error}")
-            import traceback
-            traceback.print_exc()
+                print(f"  ✅ Direct portal found {len(state_contracts)} opportunities for {state_code}")
+            except Exception as e:
+                print(f"  ⚠️  Direct portal error for {state_code}: {e}")
+        
+        # DemandStar (all states - local governments)
+        print(f"  🎯 Using DemandStar scraper (local governments)")
+        demandstar_scraper = DemandStarScraper()
+        demandstar_contracts = demandstar_scraper.scrape(limit=100)
+        
+        # Filter for this state
+        for contract in demandstar_contracts:
+            if contract.get('state') == state_code:
+                discovered_rfps.append({
+                    'city_name': contract.get('agency', 'Local Government'),
+                    'rfp_title': contract['title'],
+                    'rfp_number': contract.get('solicitation_number', 'N/A'),
+                    'description': contract.get('description', contract.get('title', '')),
+                    'deadline': contract.get('due_date', 'Not specified'),
+                    'estimated_value': 'TBD',
+                    'department': contract.get('agency', 'Municipal'),
+                    'contact_email': '',
+                    'contact_phone': '',
+                    'rfp_url': contract.get('link', '')
+                })
+        print(f"  ✅ DemandStar found {len([c for c in demandstar_contracts if c.get('state') == state_code])} opportunities")
+        
+        # State-specific scrapers
+        if state_code == 'MA':
+            print(f"  🎯 Using COMMBUYS scraper for Massachusetts")
+            commbuys = COMBUYSScraper()
+            ma_contracts = commbuys.scrape()
+            for contract in ma_contracts:
+                discovered_rfps.append({
+                    'city_name': contract.get('agency', 'Massachusetts'),
+                    'rfp_title': contract['title'],
+                    'rfp_number': contract.get('solicitation_number', 'N/A'),
+                    'description': contract.get('title', ''),
+                    'deadline': contract.get('due_date', 'Not specified'),
+                    'estimated_value': 'TBD',
+                    'department': contract.get('agency', 'State Agency'),
+                    'contact_email': '',
+                    'contact_phone': '',
+                    'rfp_url': contract.get('link', '')
+                })
+            print(f"  ✅ COMMBUYS found {len(ma_contracts)} opportunities")
+        
+        elif state_code == 'MD':
+            print(f"  🎯 Using eMaryland scraper")
+            emaryland = EMarylandScraper()
+            md_contracts = emaryland.scrape()
+            for contract in md_contracts:
+                discovered_rfps.append({
+                    'city_name': contract.get('agency', 'Maryland'),
+                    'rfp_title': contract['title'],
+                    'rfp_number': contract.get('solicitation_number', 'N/A'),
+                    'description': contract.get('title', ''),
+                    'deadline': contract.get('due_date', 'Not specified'),
+                    'estimated_value': 'TBD',
+                    'department': contract.get('agency', 'State Agency'),
+                    'contact_email': '',
+                    'contact_phone': '',
+                    'rfp_url': contract.get('link', '')
+                })
+            print(f"  ✅ eMaryland found {len(md_contracts)} opportunities")
+        
+        elif state_code == 'NH':
+            print(f"  🎯 Using New Hampshire scraper")
+            nh = NewHampshireScraper()
+            nh_contracts = nh.scrape()
+            for contract in nh_contracts:
+                discovered_rfps.append({
+                    'city_name': contract.get('agency', 'New Hampshire'),
+                    'rfp_title': contract['title'],
+                    'rfp_number': contract.get('solicitation_number', 'N/A'),
+                    'description': contract.get('title', ''),
+                    'deadline': contract.get('due_date', 'Not specified'),
+                    'estimated_value': 'TBD',
+                    'department': contract.get('agency', 'State Agency'),
+                    'contact_email': '',
+                    'contact_phone': '',
+                    'rfp_url': contract.get('link', '')
+                })
+            print(f"  ✅ New Hampshire found {len(nh_contracts)} opportunities")
+        
+        elif state_code == 'RI':
+            print(f"  🎯 Using Rhode Island scraper")
+            ri = RhodeIslandScraper()
+            ri_contracts = ri.scrape()
+            for contract in ri_contracts:
+                discovered_rfps.append({
+                    'city_name': contract.get('agency', 'Rhode Island'),
+                    'rfp_title': contract['title'],
+                    'rfp_number': contract.get('solicitation_number', 'N/A'),
+                    'description': contract.get('title', ''),
+                    'deadline': contract.get('due_date', 'Not specified'),
+                    'estimated_value': 'TBD',
+                    'department': contract.get('agency', 'State Agency'),
+                    'contact_email': '',
+                    'contact_phone': '',
+                    'rfp_url': contract.get('link', '')
+                })
+            print(f"  ✅ Rhode Island found {len(ri_contracts)} opportunities")
+        
+        # BidExpress (multi-state, try for all)
+        print(f"  🎯 Using BidExpress scraper")
+        bidexpress = BidExpressScraper()
+        bidexpress_contracts = bidexpress.scrape()
+        for contract in bidexpress_contracts:
+            if contract.get('state') == state_code:
+                discovered_rfps.append({
+                    'city_name': contract.get('agency', 'DOT'),
+                    'rfp_title': contract['title'],
+                    'rfp_number': contract.get('solicitation_number', 'N/A'),
+                    'description': contract.get('description', contract.get('title', '')),
+                    'deadline': contract.get('due_date', 'Not specified'),
+                    'estimated_value': 'TBD',
+                    'department': 'Department of Transportation',
+                    'contact_email': '',
+                    'contact_phone': '',
+                    'rfp_url': contract.get('link', '')
+                })
+        print(f"  ✅ BidExpress found {len([c for c in bidexpress_contracts if c.get('state') == state_code])} opportunities")
         
-        # FALLBACK: Search SAM.gov and DemandStar APIs for major cities
-        print(f"🔎 Supplementing with SAM.gov/DemandStar city search for {len(major_cities)} major cities...")
+    except Exception as scraper_error:
+        print(f"  ⚠️  National scraper error: {scraper_error}")
+        import traceback
+        traceback.print_exc()
+    
+    # FALLBACK: Search SAM.gov and DemandStar APIs for major cities
+    print(f"🔎 Supplementing with SAM.gov/DemandStar city search for {len(major_cities)} major cities...")
+    
+    for city_name in major_cities[:5]:  # Search top 5 cities
+        cities_checked.append(city_name)
         
-        for city_name in major_cities[:5]:  # Search top 5 cities
-            cities_checked.append(city_name)
-            
-            # Search SAM.gov
-            sam_rfps = search_sam_gov_by_city(city_name, state_code)
-            discovered_rfps.extend(sam_rfps)
-            
-            # Search DemandStar (API fallback)
-            demandstar_rfps = search_demandstar_by_city(city_name, state_code)
-            discovered_rfps.extend(demandstar_rfps)
-            
-            # Save to database for caching
-            for rfp in (sam_rfps + demandstar_rfps):
-                try:
-                    db.session.execute(text('''
-                        INSERT INTO city_rfps 
-                        (state_code, state_name, city_name, rfp_title, rfp_number, 
-                         description, deadline, estimated_value, department, 
-                         contact_email, contact_phone, rfp_url, data_source, discovered_at, created_at)
-                        VALUES (:sc, :sn, :cn, :title, :num, :desc, :dl, :val, :dept, 
-                                :email, :phone, :url, :source, :discovered, :created)
-                        ON CONFLICT (state_code, city_name, rfp_number) DO NOTHING
-                    '''), {
-                        'sc': state_code,
-                        'sn': state_name,
-                        'cn': rfp['city_name'],
-                        'title': rfp['rfp_title'],
-                        'num': rfp['rfp_number'],
-                        'desc': rfp['description'],
-                        'dl': rfp['deadline'],
-                        'val': rfp['estimated_value'],
-                        'dept': rfp['department'],
-                        'email': rfp['contact_email'],
-                        'phone': rfp['contact_phone'],
-                        'url': rfp['rfp_url'],
-                        'source': 'sam_gov' if 'sam.gov' in rfp['rfp_url'] else 'demandstar',
-                        'discovered': datetime.utcnow(),
-                        'created': datetime.utcnow()
-                    })
-                except Exception as db_err:
-                    print(f"  DB save error: {db_err}")
+        # Search SAM.gov
+        sam_rfps = search_sam_gov_by_city(city_name, state_code)
+        discovered_rfps.extend(sam_rfps)
         
-        try:
-            db.session.commit()
-        except:
-            db.session.rollback()
+        # Search DemandStar (API fallback)
+        demandstar_rfps = search_demandstar_by_city(city_name, state_code)
+        discovered_rfps.extend(demandstar_rfps)
         
-        if discovered_rfps:
-            print(f"✅ Found {len(discovered_rfps)} RFPs from SAM.gov and DemandStar")
-            return jsonify({
+        # Save to database for caching
+        for rfp in (sam_rfps + demandstar_rfps):
+            try:
+                db.session.execute(text('''
+                    INSERT INTO city_rfps 
+                    (state_code, state_name, city_name, rfp_title, rfp_number, 
+                     description, deadline, estimated_value, department, 
+                     contact_email, contact_phone, rfp_url, data_source, discovered_at, created_at)
+                    VALUES (:sc, :sn, :cn, :title, :num, :desc, :dl, :val, :dept, 
+                            :email, :phone, :url, :source, :discovered, :created)
+                    ON CONFLICT (state_code, city_name, rfp_number) DO NOTHING
+                '''), {
+                    'sc': state_code,
+                    'sn': state_name,
+                    'cn': rfp['city_name'],
+                    'title': rfp['rfp_title'],
+                    'num': rfp['rfp_number'],
+                    'desc': rfp['description'],
+                    'dl': rfp['deadline'],
+                    'val': rfp['estimated_value'],
+                    'dept': rfp['department'],
+                    'email': rfp['contact_email'],
+                    'phone': rfp['contact_phone'],
+                    'url': rfp['rfp_url'],
+                    'source': 'sam_gov' if 'sam.gov' in rfp['rfp_url'] else 'demandstar',
+                    'discovered': datetime.utcnow(),
+                    'created': datetime.utcnow()
+                })
+            except Exception as db_err:
+                print(f"  DB save error: {db_err}")
+    
+    try:
+        db.session.commit()
+        lead_deduplicator.ingest_new(['city_rfps'])
+    except:
+        db.session.rollback()
+    
+    if discovered_rfps:
+        print(f"✅ Found {len(discovered_rfps)} RFPs from SAM.gov and DemandStar")
+        return {
+            'success': True,
+            'message': f'Found {len(discovered_rfps)} active RFPs in {state_name}',
+            'rfps': discovered_rfps,
+            'cities_checked': cities_checked,
+            'cities_searched': len(cities_checked),
+            'available_cities': major_cities,  # NEW: Cities user can search
+            'state': state_name,
+            'source': 'sam_gov_demandstar'
+        }
+    
+    # TIER 3: Try direct portal scraping as fallback
+    print(f"📍 Attempting direct portal scraping...")
+    portals_discovered_rfps = []
+    portals_cities_checked = []
+    portals_pending = []
+    
+    try:
+        # Major cities by state with known procurement portals
+        CITY_PORTALS_FOR_SCRAPING = get_city_procurement_portals(state_code)
+        
+        if CITY_PORTALS_FOR_SCRAPING:
+            print(f"📍 Found {len(CITY_PORTALS_FOR_SCRAPING)} known portals for {state_name}")
+            portals_discovered_rfps, portals_cities_checked, portals_pending = scrape_city_portals(
+                CITY_PORTALS_FOR_SCRAPING, state_code, state_name)
+        
+        # If direct scraping found results, return them
+        if portals_discovered_rfps:
+            print(f"✅ Direct scraping found {len(portals_discovered_rfps)} RFPs")
+            return {
                 'success': True,
-                'message': f'Found {len(discovered_rfps)} active RFPs in {state_name}',
-                'rfps': discovered_rfps,
-                'cities_checked': cities_checked,
-                'cities_searched': len(cities_checked),
+                'message': f'Found {len(portals_discovered_rfps)} active RFPs in {state_name}',
+                'rfps': portals_discovered_rfps,
+                'cities_checked': portals_cities_checked,
+                'cities_searched': len(portals_cities_checked),
+                'pending_cities': portals_pending,  # still loading; a repeat search is served from cache
                 'available_cities': major_cities,  # NEW: Cities user can search
                 'state': state_name,
-                'source': 'sam_gov_demandstar'
-            })
+                'source': 'direct_scraping'
+            }
+    except Exception as scraping_error:
+        print(f"⚠️  Web scraping error: {scraping_error}")
+        # Continue to no results message
+    
+    # No RFPs found through any method
+    print(f"⚠️  No RFPs found for {state_name} through any method")
+    return {
+        'success': True,
+        'message': f'No active cleaning RFPs currently available in {state_name}. Try checking back in a few days or explore nearby states.',
+        'rfps': [],
+        'cities_checked': cities_checked if cities_checked else ['Unable to access city portals'],
+        'cities_searched': len(cities_checked),
+        'available_cities': major_cities,  # NEW: Cities user can search
+        'state': state_name,
+        'source': 'none',
+        'suggestion': 'Check the state procurement portal page for statewide opportunities, or try a neighboring state.'
+    }
+
+
+def _stream_city_portal_rfps(state_code, state_name):
+    """Live portal scrape as NDJSON: one line per city as it completes, then a summary line."""
+    import queue
+    
+    portals = get_city_procurement_portals(state_code)
+    major_cities = _major_cities(state_code)
+    
+    def stream_portal_results():
+        lines = queue.Queue()
         
-        # TIER 3: Try direct portal scraping as fallback
-        print(f"📍 Attempting direct portal scraping...")
-        portals_discovered_rfps = []
-        portals_cities_checked = []
+        def run():
+            with app.app_context():
+                try:
+                    rfps, checked, pending = scrape_city_portals(
+                        portals, state_code, state_name,
+                        on_city=lambda result, city_rfps: lines.put(
+                            {'type': 'city', 'city': result.city, 'status': result.status, 'rfps': city_rfps}))
+                    lines.put({'type': 'done', 'success': True, 'rfps_found': len(rfps),
+                               'cities_checked': checked, 'pending_cities': pending,
+                               'available_cities': major_cities, 'state': state_name,
+                               'source': 'direct_scraping'})
+                except Exception as stream_err:
+                    lines.put({'type': 'done', 'success': False, 'error': str(stream_err)})
+        
+        threading.Thread(target=run, daemon=True).start()
+        while True:
+            line = lines.get()
+            yield json.dumps(line) + '\n'
+            if line['type'] == 'done':
+                break
+    
+    return Response(stream_portal_results(), mimetype='application/x-ndjson')
+
+
+@app.route('/api/find-city-rfps', methods=['POST'])
+@login_required
+def find_city_rfps():
+    """Enhanced multi-source city RFP finder
+    
+    Answers from the per-state result cache (see result_cache.py) and never
+    waits on external sources: a stale entry is served immediately while one
+    background refresh runs _search_city_rfps. A state seen for the first
+    time is answered from city_rfps rows < 3 days old when there are any.
+    The response carries a ``cache`` freshness block.
+    
+    {"stream": true} skips the cache and streams a live portal scrape as
+    NDJSON, one line per city.
+    """
+    try:
+        # Guard: Check if requests library is available (already imported at top)
+        if requests is None:
+            return jsonify({
+                'success': False, 
+                'error': 'API search unavailable. Please contact support.',
+                'message': 'The requests library is not available.'
+            }), 500
         
-        try:
-            # Major cities by state with known procurement portals
-            CITY_PORTALS_FOR_SCRAPING = get_city_procurement_portals(state_code)
-            
-            if CITY_PORTALS_FOR_SCRAPING:
-                print(f"📍 Found {len(CITY_PORTALS_FOR_SCRAPING)} known portals for {state_name}")
-                portals_discovered_rfps, portals_cities_checked = scrape_city_portals(CITY_PORTALS_FOR_SCRAPING, state_code, state_name)
-            
-            # If direct scraping found results, return them
-            if portals_discovered_rfps:
-                print(f"✅ Direct scraping found {len(portals_discovered_rfps)} RFPs")
-                return jsonify({
-                    'success': True,
-                    'message': f'Found {len(portals_discovered_rfps)} active RFPs in {state_name}',
-                    'rfps': portals_discovered_rfps,
-                    'cities_checked': portals_cities_checked,
-                    'cities_searched': len(portals_cities_checked),
-                    'available_cities': major_cities,  # NEW: Cities user can search
-                    'state': state_name,
-                    'source': 'direct_scraping'
-                })
-        except Exception as scraping_error:
-            print(f"⚠️  Web scraping error: {scraping_error}")
-            # Continue to no results message
+        data = request.get_json() or {}
+        state_name = data.get('state_name', '')
+        state_code = data.get('state_code', '').upper()
         
-        # No RFPs found through any method
-        print(f"⚠️  No RFPs found for {state_name} through any method")
-        return jsonify({
+        if not state_name or not state_code:
+            return jsonify({'success': False, 'error': 'State name and code required'}), 400
+        
+        if data.get('stream'):
+            return _stream_city_portal_rfps(state_code, state_name)
+        
+        result = rfp_result_cache.get(
+            f'city_rfps:{state_code}',
+            compute=lambda: _search_city_rfps(state_code, state_name),
+            max_age=CITY_RFPS_MAX_AGE_SECONDS,
+            seed=lambda: _city_rfps_seed(state_code, state_name)
+        )
+        # Copy: the cached dict is shared with every other request
+        payload = dict(result.payload or {
             'success': True,
-            'message': f'No active cleaning RFPs currently available in {state_name}. Try checking back in a few days or explore nearby states.',
+            'message': f'Searching procurement sources for {state_name}. Check back in a minute.',
             'rfps': [],
-            'cities_checked': cities_checked if cities_checked else ['Unable to access city portals'],
-            'cities_searched': len(cities_checked),
-            'available_cities': major_cities,  # NEW: Cities user can search
+            'cities_checked': [],
+            'cities_searched': 0,
+            'available_cities': _major_cities(state_code),
             'state': state_name,
-            'source': 'none',
-            'suggestion': 'Check the state procurement portal page for statewide opportunities, or try a neighboring state.'
+            'source': 'pending'
         })
-        
-        
+        payload['cache'] = result.freshness()
+        return jsonify(payload)
+    
     except Exception as e:
         print(f"❌ City RFP finder error: {e}")
         import traceback
@@ -9057,12 +9148,192 @@ RFP_KEYWORDS = [
     'terminal cleaning', 'airport cleaning', 'housekeeping', 'sanitation'
 ]
 
+def _state_rfps_payload(state_code, state_name, live=True):
+    """
+    State-wide RFP lookup; runs on a result-cache refresh worker.
+    
+    Combines state-level federal_contracts and city_rfps rows from the last
+    RFP_SEARCH_DAYS days, and runs the live state portal scraper when fewer
+    than 5 are found. ``live=False`` skips the scraper (cold-cache answer).
+    """
+    print(f"🔍 Enhanced RFP search for {state_name} ({state_code}) - {RFP_SEARCH_DAYS} day window")
+    
+    all_rfps = []
+    cities_checked = []
+    
+    # STEP 1: Check database cache (extended 90-day window)
+    cache_cutoff = datetime.now() - timedelta(days=RFP_SEARCH_DAYS)
+    
+    try:
+        # Query federal_contracts table (state-level opportunities)
+        state_contracts = db.session.execute(text('''
+            SELECT title, agency, value, deadline, url, notice_id, data_source, posted_date
+            FROM federal_contracts
+            WHERE state = :state
+            AND posted_date >= :cutoff
+            AND (
+                LOWER(title) LIKE '%janitorial%' OR
+                LOWER(title) LIKE '%custodial%' OR
+                LOWER(title) LIKE '%cleaning%' OR
+                LOWER(title) LIKE '%facility maintenance%' OR
+                LOWER(title) LIKE '%facilities%' OR
+                LOWER(title) LIKE '%building maintenance%' OR
+                LOWER(title) LIKE '%day porter%' OR
+                LOWER(title) LIKE '%environmental services%' OR
+                LOWER(title) LIKE '%housekeeping%' OR
+                LOWER(title) LIKE '%sanitation%'
+            )
+            ORDER BY posted_date DESC
+            LIMIT 50
+        '''), {'state': state_code, 'cutoff': cache_cutoff}).fetchall()
+        
+        print(f"  ✅ Found {len(state_contracts)} state-level contracts in database")
+        
+        for contract in state_contracts:
+            all_rfps.append({
+                'title': contract.title,
+                'agency': contract.agency or f'{state_name} State Agency',
+                'location': f'{state_name} (Statewide)',
+                'deadline': contract.deadline or 'Not specified',
+                'value': contract.value or 'TBD',
+                'link': contract.url or '',
+                'notice_id': contract.notice_id or 'N/A',
+                'source': contract.data_source or 'SAM.gov',
+                'type': 'State-Level'
+            })
+    except Exception as db_err:
+        print(f"  ⚠️  Database query error: {db_err}")
+    
+    # STEP 2: Check city_rfps table (city-level opportunities)
+    try:
+        city_rfps = db.session.execute(text('''
+            SELECT city_name, rfp_title, rfp_number, description, deadline,
+                   estimated_value, department, contact_email, contact_phone, rfp_url, discovered_at
+            FROM city_rfps
+            WHERE state_code = :state
+            AND discovered_at >= :cutoff
+            ORDER BY discovered_at DESC
+            LIMIT 100
+        '''), {'state': state_code, 'cutoff': cache_cutoff}).fetchall()
+        
+        print(f"  ✅ Found {len(city_rfps)} city-level RFPs in database")
+        
+        for rfp in city_rfps:
+            cities_checked.append(rfp.city_name)
+            all_rfps.append({
+                'title': rfp.rfp_title,
+                'agency': rfp.department or f'{rfp.city_name} City',
+                'location': f'{rfp.city_name}, {state_code}',
+                'deadline': rfp.deadline or 'Not specified',
+                'value': rfp.estimated_value or 'TBD',
+                'link': rfp.rfp_url or '',
+                'notice_id': rfp.rfp_number or 'N/A',
+                'source': 'City Portal',
+                'type': 'City-Level',
+                'contact_email': rfp.contact_email,
+                'contact_phone': rfp.contact_phone
+            })
+    except Exception as city_err:
+        print(f"  ⚠️  City RFPs query error: {city_err}")
+    
+    # STEP 3: Live search if database has few results (< 5)
+    if live and len(all_rfps) < 5:
+        print(f"  🚀 Database results limited ({len(all_rfps)}), running live search...")
+        
+        # Use national scrapers for fresh data
+        try:
+            direct_portal_states = [
+                'AK', 'AL', 'AR', 'AZ', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+                'HI', 'IA', 'ID', 'IL', 'IN', 'KS', 'KY', 'LA', 'ME', 'MI',
+                'MN', 'MO', 'MS', 'MT', 'NC', 'ND', 'NE', 'NJ', 'NM', 'NV',
+                'NY', 'OH', 'OK', 'OR', 'PA', 'SC', 'SD', 'TN', 'TX', 'UT',
+                'VA', 'VT', 'WA', 'WI', 'WV', 'WY'
+            ]
+            
+            if state_code in direct_portal_states:
+                from national_scrapers.multistate_direct_scraper import MultiStateDirectScraper
+                scraper = MultiStateDirectScraper()
+                live_contracts = scraper.scrape(states=[state_code])
+                
+                print(f"  ✅ Live scraper found {len(live_contracts)} opportunities")
+                
+                for contract in live_contracts:
+                    all_rfps.append({
+                        'title': contract['title'],
+                        'agency': contract.get('agency', f'{state_name} Agency'),
+                        'location': f'{state_name}',
+                        'deadline': contract.get('due_date', 'Not specified'),
+                        'value': 'TBD',
+                        'link': contract.get('link', ''),
+                        'notice_id': contract.get('solicitation_number', 'N/A'),
+                        'source': 'State Portal (Live)',
+                        'type': 'State-Level'
+                    })
+        except Exception as scraper_err:
+            print(f"  ⚠️  Live scraper error: {scraper_err}")
+    
+    # STEP 4: Major cities search (from predefined list)
+    major_cities_data = get_city_procurement_portals(state_code)
+    if major_cities_data:
+        cities_checked.extend(list(major_cities_data.keys()))
+    
+    # Deduplicate cities_checked
+    cities_checked = list(set(cities_checked))
+    
+    # STEP 5: Format and return results
+    if all_rfps:
+        # Remove duplicates based on title + agency
+        seen = set()
+        unique_rfps = []
+        for rfp in all_rfps:
+            key = (rfp['title'].lower(), rfp['agency'].lower())
+            if key not in seen:
+                seen.add(key)
+                unique_rfps.append(rfp)
+        
+        print(f"✅ Total: {len(unique_rfps)} unique RFPs for {state_name}")
+        
+        return {
+            'success': True,
+            'rfps': unique_rfps,
+            'total': len(unique_rfps),
+            'state': state_name,
+            'state_code': state_code,
+            'cities_checked': cities_checked[:10],  # Limit display
+            'search_days': RFP_SEARCH_DAYS,
+            'keywords_used': len(RFP_KEYWORDS),
+            'source': 'enhanced_search'
+        }
+    else:
+        # FALLBACK: Show message with helpful resources
+        print(f"  ⚠️  No RFPs found for {state_name}")
+        
+        return {
+            'success': True,
+            'rfps': [],
+            'total': 0,
+            'state': state_name,
+            'state_code': state_code,
+            'cities_checked': cities_checked,
+            'search_days': RFP_SEARCH_DAYS,
+            'message': f'No active cleaning/janitorial RFPs found in {state_name} in the last {RFP_SEARCH_DAYS} days.',
+            'fallback_suggestion': f'Try Google search: "{state_name} procurement RFP janitorial"',
+            'source': 'no_results'
+        }
+
+
 @app.route('/api/fetch-rfps-by-state', methods=['POST'])
 @login_required
 def fetch_rfps_by_state():
     """
     Enhanced state-wide RFP lookup with comprehensive search.
     
+    Served from the per-state result cache (see result_cache.py): the last
+    result is returned immediately with a ``cache`` freshness block, and a
+    stale one triggers a single background refresh per state. A state's
+    first request is answered from the database alone while the live
+    search runs.
+    
     Improvements:
     - Extended 90-day search window (configurable)
     - Expanded keyword list (14 keywords vs 2-3)
@@ -9074,9 +9345,6 @@ def fetch_rfps_by_state():
     Returns formatted RFP list with all required fields.
     """
     try:
-        from datetime import datetime, timedelta
-        from sqlalchemy import text
-        
         data = request.get_json() or {}
         state_name = data.get('state_name', '')
         state_code = data.get('state_code', '').upper()
@@ -9084,171 +9352,25 @@ def fetch_rfps_by_state():
         if not state_name or not state_code:
             return jsonify({'success': False, 'error': 'State name and code required'}), 400
         
-        user_email = session.get('user_email')
-        print(f"🔍 Enhanced RFP search for {state_name} ({state_code}) - {RFP_SEARCH_DAYS} day window")
-        
-        all_rfps = []
-        cities_checked = []
-        
-        # STEP 1: Check database cache (extended 90-day window)
-        cache_cutoff = datetime.now() - timedelta(days=RFP_SEARCH_DAYS)
-        
-        try:
-            # Query federal_contracts table (state-level opportunities)
-            state_contracts = db.session.execute(text('''
-                SELECT title, agency, value, deadline, url, notice_id, data_source, posted_date
-                FROM federal_contracts
-                WHERE state = :state
-                AND posted_date >= :cutoff
-                AND (
-                    LOWER(title) LIKE '%janitorial%' OR
-                    LOWER(title) LIKE '%custodial%' OR
-                    LOWER(title) LIKE '%cleaning%' OR
-                    LOWER(title) LIKE '%facility maintenance%' OR
-                    LOWER(title) LIKE '%facilities%' OR
-                    LOWER(title) LIKE '%building maintenance%' OR
-                    LOWER(title) LIKE '%day porter%' OR
-                    LOWER(title) LIKE '%environmental services%' OR
-                    LOWER(title) LIKE '%housekeeping%' OR
-                    LOWER(title) LIKE '%sanitation%'
-                )
-                ORDER BY posted_date DESC
-                LIMIT 50
-            '''), {'state': state_code, 'cutoff': cache_cutoff}).fetchall()
-            
-            print(f"  ✅ Found {len(state_contracts)} state-level contracts in database")
-            
-            for contract in state_contracts:
-                all_rfps.append({
-                    'title': contract.title,
-                    'agency': contract.agency or f'{state_name} State Agency',
-                    'location': f'{state_name} (Statewide)',
-                    'deadline': contract.deadline or 'Not specified',
-                    'value': contract.value or 'TBD',
-                    'link': contract.url or '',
-                    'notice_id': contract.notice_id or 'N/A',
-                    'source': contract.data_source or 'SAM.gov',
-                    'type': 'State-Level'
-                })
-        except Exception as db_err:
-            print(f"  ⚠️  Database query error: {db_err}")
-        
-        # STEP 2: Check city_rfps table (city-level opportunities)
-        try:
-            city_rfps = db.session.execute(text('''
-                SELECT city_name, rfp_title, rfp_number, description, deadline,
-                       estimated_value, department, contact_email, contact_phone, rfp_url, discovered_at
-                FROM city_rfps
-                WHERE state_code = :state
-                AND discovered_at >= :cutoff
-                ORDER BY discovered_at DESC
-                LIMIT 100
-            '''), {'state': state_code, 'cutoff': cache_cutoff}).fetchall()
-            
-            print(f"  ✅ Found {len(city_rfps)} city-level RFPs in database")
-            
-            for rfp in city_rfps:
-                cities_checked.append(rfp.city_name)
-                all_rfps.append({
-                    'title': rfp.rfp_title,
-                    'agency': rfp.department or f'{rfp.city_name} City',
-                    'location': f'{rfp.city_name}, {state_code}',
-                    'deadline': rfp.deadline or 'Not specified',
-                    'value': rfp.estimated_value or 'TBD',
-                    'link': rfp.rfp_url or '',
-                    'notice_id': rfp.rfp_number or 'N/A',
-                    'source': 'City Portal',
-                    'type': 'City-Level',
-                    'contact_email': rfp.contact_email,
-                    'contact_phone': rfp.contact_phone
-                })
-        except Exception as city_err:
-            print(f"  ⚠️  City RFPs query error: {city_err}")
-        
-        # STEP 3: Live search if database has few results (< 5)
-        if len(all_rfps) < 5:
-            print(f"  🚀 Database results limited ({len(all_rfps)}), running live search...")
-            
-            # Use national scrapers for fresh data
-            try:
-                direct_portal_states = [
-                    'AK', 'AL', 'AR', 'AZ', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
-                    'HI', 'IA', 'ID', 'IL', 'IN', 'KS', 'KY', 'LA', 'ME', 'MI',
-                    'MN', 'MO', 'MS', 'MT', 'NC', 'ND', 'NE', 'NJ', 'NM', 'NV',
-                    'NY', 'OH', 'OK', 'OR', 'PA', 'SC', 'SD', 'TN', 'TX', 'UT',
-                    'VA', 'VT', 'WA', 'WI', 'WV', 'WY'
-                ]
-                
-                if state_code in direct_portal_states:
-                    from national_scrapers.multistate_direct_scraper import MultiStateDirectScraper
-                    scraper = MultiStateDirectScraper()
-                    live_contracts = scraper.scrape(states=[state_code])
-                    
-                    print(f"  ✅ Live scraper found {len(live_contracts)} opportunities")
-                    
-                    for contract in live_contracts:
-                        all_rfps.append({
-                            'title': contract['title'],
-                            'agency': contract.get('agency', f'{state_name} Agency'),
-                            'location': f'{state_name}',
-                            'deadline': contract.get('due_date', 'Not specified'),
-                            'value': 'TBD',
-                            'link': contract.get('link', ''),
-                            'notice_id': contract.get('solicitation_number', 'N/A'),
-                            'source': 'State Portal (Live)',
-                            'type': 'State-Level'
-                        })
-            except Exception as scraper_err:
-                print(f"  ⚠️  Live scraper error: {scraper_err}")
-        
-        # STEP 4: Major cities search (from predefined list)
-        major_cities_data = get_city_procurement_portals(state_code)
-        if major_cities_data:
-            cities_checked.extend(list(major_cities_data.keys()))
-        
-        # Deduplicate cities_checked
-        cities_checked = list(set(cities_checked))
-        
-        # STEP 5: Format and return results
-        if all_rfps:
-            # Remove duplicates based on title + agency
-            seen = set()
-            unique_rfps = []
-            for rfp in all_rfps:
-                key = (rfp['title'].lower(), rfp['agency'].lower())
-                if key not in seen:
-                    seen.add(key)
-                    unique_rfps.append(rfp)
-            
-            print(f"✅ Total: {len(unique_rfps)} unique RFPs for {state_name}")
-            
-            return jsonify({
-                'success': True,
-                'rfps': unique_rfps,
-                'total': len(unique_rfps),
-                'state': state_name,
-                'state_code': state_code,
-                'cities_checked': cities_checked[:10],  # Limit display
-                'search_days': RFP_SEARCH_DAYS,
-                'keywords_used': len(RFP_KEYWORDS),
-                'source': 'enhanced_search'
-            })
-        else:
-            # FALLBACK: Show message with helpful resources
-            print(f"  ⚠️  No RFPs found for {state_name}")
-            
-            return jsonify({
-                'success': True,
-                'rfps': [],
-                'total': 0,
-                'state': state_name,
-                'state_code': state_code,
-                'cities_checked': cities_checked,
-                'search_days': RFP_SEARCH_DAYS,
-                'message': f'No active cleaning/janitorial RFPs found in {state_name} in the last {RFP_SEARCH_DAYS} days.',
-                'fallback_suggestion': f'Try Google search: "{state_name} procurement RFP janitorial"',
-                'source': 'no_results'
-            })
+        result = rfp_result_cache.get(
+            f'state_rfps:{state_code}',
+            compute=lambda: _state_rfps_payload(state_code, state_name),
+            max_age=STATE_RFPS_MAX_AGE_SECONDS,
+            seed=lambda: _state_rfps_payload(state_code, state_name, live=False)
+        )
+        # Copy: the cached dict is shared with every other request
+        payload = dict(result.payload or {
+            'success': True,
+            'message': f'Searching procurement sources for {state_name}. Check back in a minute.',
+            'rfps': [],
+            'total': 0,
+            'state': state_name,
+            'state_code': state_code,
+            'cities_checked': [],
+            'source': 'pending'
+        })
+        payload['cache'] = result.freshness()
+        return jsonify(payload)
     
     except Exception as e:
         print(f"❌ Enhanced RFP search error: {e}")
@@ -9731,6 +9853,7 @@ def get_state_cities(state_code):
 
 @app.route('/api/find-city-rfps-custom', methods=['POST'])
 @login_required
+@ai_rate_limited
 def find_city_rfps_custom():
     """Search user-specified cities for RFPs using AI
     
@@ -9738,9 +9861,8 @@ def find_city_rfps_custom():
     automatic top-3 search returns no results.
     """
     try:
-        import requests
-        from bs4 import BeautifulSoup
         import json
+        from concurrent.futures import ThreadPoolExecutor, wait
         
         data = request.get_json() or {}
         state_name = data.get('state_name', '')
@@ -9767,17 +9889,23 @@ def find_city_rfps_custom():
         discovered_rfps = []
         cities_checked = []
         
-        # For each custom city, get procurement URL and search
-        for city_name in custom_cities:
-            city_name = city_name.strip()
-            if not city_name:
-                continue
-                
-            cities_checked.append(city_name)
-            
-            try:
-                # Use AI to find the city's procurement URL
-                url_prompt = f"""For {city_name}, {state_name}, provide the most likely procurement/purchasing website URL.
+        def ask_json(prompt, temperature, max_tokens):
+            reply = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            ).choices[0].message.content.strip()
+            if '```json' in reply:
+                reply = reply.split('```json')[1].split('```')[0].strip()
+            elif '```' in reply:
+                reply = reply.split('```')[1].split('```')[0].strip()
+            return json.loads(reply)
+        
+        def search_city(city_name):
+            """Runs on a worker thread: find the portal, fetch it, extract RFPs. No DB access."""
+            # Use AI to find the city's procurement URL
+            url_prompt = f"""For {city_name}, {state_name}, provide the most likely procurement/purchasing website URL.
 
 Return ONLY a JSON object with no explanations:
 {{
@@ -9786,45 +9914,21 @@ Return ONLY a JSON object with no explanations:
 }}
 
 If unsure, provide best guesses for typical city government procurement pages."""
-
-                url_response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": url_prompt}],
-                    temperature=0.3,
-                    max_tokens=300
-                )
-                
-                url_text = url_response.choices[0].message.content.strip()
-                if '```json' in url_text:
-                    url_text = url_text.split('```json')[1].split('```')[0].strip()
-                elif '```' in url_text:
-                    url_text = url_text.split('```')[1].split('```')[0].strip()
+            url_data = ask_json(url_prompt, 0.3, 300)
+            
+            # Try primary URL first
+            for try_url in [url_data.get('procurement_url', ''), url_data.get('alternate_url', '')]:
+                if not try_url:
+                    continue
                 
-                url_data = json.loads(url_text)
-                procurement_url = url_data.get('procurement_url', '')
-                alternate_url = url_data.get('alternate_url', '')
+                print(f"  🔍 Checking {city_name} at {try_url}")
+                page = city_portal_fetcher.fetch(city_name, try_url)
+                if page.status != 'ok':
+                    print(f"    ⚠️  {page.status} {page.http_status or page.error} for {city_name}")
+                    continue
                 
-                # Try primary URL first
-                for try_url in [procurement_url, alternate_url]:
-                    if not try_url:
-                        continue
-                        
-                    try:
-                        print(f"  🔍 Checking {city_name} at {try_url}")
-                        
-                        headers = {'User-Agent': 'ContractLink.ai Bot/1.0 (Procurement Intelligence)'}
-                        webpage_response = requests.get(try_url, headers=headers, timeout=15)
-                        
-                        if webpage_response.status_code != 200:
-                            print(f"    ⚠️  HTTP {webpage_response.status_code} for {city_name}")
-                            continue
-                        
-                        # Parse HTML
-                        soup = BeautifulSoup(webpage_response.text, 'html.parser')
-                        page_text = soup.get_text(separator='\n', strip=True)[:10000]
-                        
-                        # Use GPT-4 to extract RFPs
-                        rfp_prompt = f"""You are analyzing a procurement webpage for {city_name}, {state_name}.
+                # Use GPT-4 to extract RFPs
+                rfp_prompt = f"""You are analyzing a procurement webpage for {city_name}, {state_name}.
 
 Extract any active janitorial, cleaning, or facilities maintenance RFPs/bids from this text. For each opportunity found, provide:
 - rfp_title: Title of the RFP
@@ -9839,104 +9943,93 @@ Extract any active janitorial, cleaning, or facilities maintenance RFPs/bids fro
 Return ONLY a JSON array, no explanations. If no relevant RFPs found, return empty array []:
 [
   {{"rfp_title": "...", "rfp_number": "...", "description": "...", "deadline": "...", "estimated_value": "...", "department": "...", "contact_email": "...", "contact_phone": "..."}},
-  ...
-]
-
-WEBPAGE TEXT:
-{page_text}"""
-
-                        rfp_response = client.chat.completions.create(
-                            model="gpt-4o-mini",
-                            messages=[{"role": "user", "content": rfp_prompt}],
-                            temperature=0.2,
-                            max_tokens=2000
-                        )
-                        
-                        rfps_text = rfp_response.choices[0].message.content.strip()
-                        if '```json' in rfps_text:
-                            rfps_text = rfps_text.split('```json')[1].split('```')[0].strip()
-                        elif '```' in rfps_text:
-                            rfps_text = rfps_text.split('```')[1].split('```')[0].strip()
-                        
-                        city_rfps = json.loads(rfps_text)
-                        
-                        if city_rfps:
-                            print(f"    ✅ Found {len(city_rfps)} RFPs in {city_name}")
-                            
-                            # Save to database
-                            for rfp in city_rfps:
-                                try:
-                                    rfp_number = rfp.get('rfp_number', '')
-                                    existing = db.session.execute(text(
-                                        '''SELECT id FROM city_rfps 
-                                           WHERE state_code = :sc AND city_name = :cn AND rfp_number = :num'''
-                                    ), {
-                                        'sc': state_code.upper(),
-                                        'cn': city_name,
-                                        'num': rfp_number
-                                    }).fetchone()
-                                    
-                                    if existing:
-                                        print(f"    ℹ️  RFP {rfp_number} already exists, skipping")
-                                        continue
-                                    
-                                    # Insert new RFP
-                                    db.session.execute(text(
-                                        '''INSERT INTO city_rfps 
-                                           (state_code, state_name, city_name, rfp_title, rfp_number, 
-                                            description, deadline, estimated_value, department, 
-                                            contact_email, contact_phone, rfp_url, data_source)
-                                           VALUES (:sc, :sn, :cn, :title, :num, :desc, :dl, :val, :dept, 
-                                                   :email, :phone, :url, :source)'''
-                                    ), {
-                                        'sc': state_code.upper(),
-                                        'sn': state_name,
-                                        'cn': city_name,
-                                        'title': rfp.get('rfp_title', 'Untitled RFP'),
-                                        'num': rfp_number,
-                                        'desc': rfp.get('description', ''),
-                                        'dl': rfp.get('deadline', ''),
-                                        'val': rfp.get('estimated_value', ''),
-                                        'dept': rfp.get('department', ''),
-                                        'email': rfp.get('contact_email', ''),
-                                        'phone': rfp.get('contact_phone', ''),
-                                        'url': try_url,
-                                        'source': 'openai_gpt4_custom_search'
-                                    })
-                                    
-                                    rfp['city_name'] = city_name
-                                    discovered_rfps.append(rfp)
-                                    
-                                except Exception as db_err:
-                                    print(f"    ⚠️  Database insert error: {db_err}")
-                                    continue
-                            
-                            break  # Found RFPs, don't try alternate URL
-                        else:
-                            print(f"    ℹ️  No cleaning RFPs found in {city_name}")
-                        
-                    except requests.exceptions.Timeout:
-                        print(f"    ⏱️  Timeout fetching {city_name} webpage")
-                        continue
-                    except requests.exceptions.RequestException as req_err:
-                        print(f"    🌐 Request error for {city_name}: {req_err}")
-                        continue
-                    except json.JSONDecodeError as json_err:
-                        print(f"    ❌ JSON parse error for {city_name}: {json_err}")
-                        continue
-                        
+  ...
+]
+
+WEBPAGE TEXT:
+{page.text}"""
+                try:
+                    city_rfps = ask_json(rfp_prompt, 0.2, 2000)
+                except json.JSONDecodeError as json_err:
+                    print(f"    ❌ JSON parse error for {city_name}: {json_err}")
+                    continue
+                
+                if city_rfps:
+                    print(f"    ✅ Found {len(city_rfps)} RFPs in {city_name}")
+                    return try_url, city_rfps  # Found RFPs, don't try alternate URL
+                print(f"    ℹ️  No cleaning RFPs found in {city_name}")
+            return None, []
+        
+        # Cities are searched concurrently; results are saved here, on the request thread
+        city_names = [c.strip() for c in custom_cities if c and c.strip()]
+        pool = ThreadPoolExecutor(max_workers=min(len(city_names), 5) or 1)
+        futures = {pool.submit(search_city, city_name): city_name for city_name in city_names}
+        done, not_done = wait(futures, timeout=CUSTOM_CITY_SEARCH_BUDGET_SECONDS)
+        pool.shutdown(wait=False, cancel_futures=True)
+        pending_cities = [futures[f] for f in not_done]
+        
+        found = {}
+        for future in done:
+            city_name = futures[future]
+            cities_checked.append(city_name)
+            try:
+                found[city_name] = future.result()
             except Exception as city_err:
                 print(f"    ❌ Error processing {city_name}: {city_err}")
-                continue
         
+        existing = set()
+        if found:
+            existing = {(r[0], r[1]) for r in db.session.execute(text(
+                'SELECT city_name, rfp_number FROM city_rfps WHERE state_code = :sc'
+            ), {'sc': state_code.upper()}).fetchall()}
+        
+        rows = []
+        for city_name in city_names:
+            try_url, city_rfps = found.get(city_name, (None, []))
+            for rfp in city_rfps:
+                rfp_number = rfp.get('rfp_number', '')
+                if (city_name, rfp_number) in existing:
+                    print(f"    ℹ️  RFP {rfp_number} already exists, skipping")
+                    continue
+                existing.add((city_name, rfp_number))
+                rows.append({
+                    'sc': state_code.upper(),
+                    'sn': state_name,
+                    'cn': city_name,
+                    'title': rfp.get('rfp_title', 'Untitled RFP'),
+                    'num': rfp_number,
+                    'desc': rfp.get('description', ''),
+                    'dl': rfp.get('deadline', ''),
+                    'val': rfp.get('estimated_value', ''),
+                    'dept': rfp.get('department', ''),
+                    'email': rfp.get('contact_email', ''),
+                    'phone': rfp.get('contact_phone', ''),
+                    'url': try_url,
+                    'source': 'openai_gpt4_custom_search'
+                })
+                rfp['city_name'] = city_name
+                discovered_rfps.append(rfp)
+        
+        if rows:
+            db.session.execute(text(
+                '''INSERT INTO city_rfps 
+                   (state_code, state_name, city_name, rfp_title, rfp_number, 
+                    description, deadline, estimated_value, department, 
+                    contact_email, contact_phone, rfp_url, data_source)
+                   VALUES (:sc, :sn, :cn, :title, :num, :desc, :dl, :val, :dept, 
+                           :email, :phone, :url, :source)'''
+            ), rows)
         db.session.commit()
         
+        if pending_cities:
+            print(f"⏳ Custom search budget spent; still searching: {', '.join(pending_cities)}")
         print(f"🎉 Custom search complete: {len(discovered_rfps)} RFPs found across {len(cities_checked)} cities")
         
         return jsonify({
             'success': True,
             'message': f'Found {len(discovered_rfps)} RFPs in custom city search',
             'cities_checked': cities_checked,
+            'pending_cities': pending_cities,
             'rfps': discovered_rfps,
             'cities_searched': len(cities_checked),
             'state': state_name
@@ -10028,11 +10121,7 @@ def educational_contracts():
         is_paid_subscriber = False
         
         if not is_admin and 'user_id' in session:
-            result = db.session.execute(text(
-                "SELECT subscription_status FROM leads WHERE id = :user_id"
-            ), {'user_id': session['user_id']}).fetchone()
-            if result and result[0] == 'paid':
-                is_paid_subscriber = True
+            is_paid_subscriber = current_entitlements().is_paid
         
         if is_admin:
             is_paid_subscriber = True
@@ -10167,12 +10256,7 @@ def industry_days():
         is_paid_subscriber = False
         
         if not is_admin and 'user_id' in session:
-            result = db.session.execute(
-                text("SELECT subscription_status FROM leads WHERE id = :user_id"),
-                {'user_id': session['user_id']}
-            ).fetchone()
-            if result and result[0] == 'paid':
-                is_paid_subscriber = True
+            is_paid_subscriber = current_entitlements().is_paid
         
         if is_admin:
             is_paid_subscriber = True
@@ -10223,7 +10307,6 @@ def federal_contracts():
     is_paid_subscriber = False
     is_annual_subscriber = False
     clicks_remaining = 3
-    user_email = session.get('email')
     
     # Admin gets unlimited access
     if is_admin:
@@ -10231,23 +10314,9 @@ def federal_contracts():
         is_annual_subscriber = True
         clicks_remaining = 999
     elif 'user_id' in session:
-        user_id = session['user_id']
-        result = db.session.execute(text('''
-            SELECT subscription_status FROM leads WHERE id = :user_id
-        '''), {'user_id': user_id}).fetchone()
-        
-        if result and result[0] == 'paid':
-            is_paid_subscriber = True
-            
-            if user_email:
-                sub_result = db.session.execute(text('''
-                    SELECT plan_type FROM subscriptions 
-                    WHERE email = :email AND status = 'active'
-                    ORDER BY created_at DESC LIMIT 1
-                '''), {'email': user_email}).fetchone()
-                
-                if sub_result and sub_result[0] == 'annual':
-                    is_annual_subscriber = True
+        entitlements = current_entitlements()
+        is_paid_subscriber = entitlements.is_paid
+        is_annual_subscriber = entitlements.is_annual
     
     # Track clicks for non-subscribers
     if not is_paid_subscriber and not is_admin:
@@ -10267,17 +10336,9 @@ def federal_contracts():
             FROM federal_contracts 
             WHERE deadline IS NOT NULL 
             AND deadline >= :today
-            AND LOWER(title) NOT LIKE '%award%'
-            AND LOWER(title) NOT LIKE '%cancel%'
-            AND LOWER(title) NOT LIKE '%inactive%'
-            AND LOWER(title) NOT LIKE '%construction%'
-            AND LOWER(title) NOT LIKE '%engineering%'
-            AND LOWER(title) NOT LIKE '%launcher%'
-            AND LOWER(title) NOT LIKE '%vehicle%'
-            AND LOWER(title) NOT LIKE '%research%'
-            AND LOWER(title) NOT LIKE '%development%'
-            AND LOWER(title) NOT LIKE '%accelerator%'
         '''
+        base_sql += ' AND ' + title_exclusion_sql('title')
+        base_sql += ' AND ' + lead_deduplicator.exclude_duplicates_sql('federal_contracts')
         params = {'today': today}
         
         # Add department filter if provided
@@ -11654,10 +11715,7 @@ def track_click():
 def college_university_leads():
     """College and University cleaning contract leads - Premium Feature"""
     # Check if user is paid subscriber or admin
-    subscription_status = session.get('subscription_status', 'free')
-    is_admin = session.get('is_admin', False)
-    
-    if subscription_status != 'paid' and not is_admin:
+    if not current_entitlements().allows('premium_leads'):
         flash('⚠️ College & University leads are a premium feature. Please upgrade your subscription to access this content.', 'warning')
         return redirect(url_for('subscription'))
     
@@ -13097,10 +13155,7 @@ def college_university_leads():
 def k12_school_leads():
     """K-12 School cleaning contract leads - Premium Feature"""
     # Check if user is paid subscriber or admin
-    subscription_status = session.get('subscription_status', 'free')
-    is_admin = session.get('is_admin', False)
-    
-    if subscription_status != 'paid' and not is_admin:
+    if not current_entitlements().allows('premium_leads'):
         flash('⚠️ K-12 School leads are a premium feature. Please upgrade your subscription to access this content.', 'warning')
         return redirect(url_for('subscription'))
     
@@ -14454,6 +14509,40 @@ def send_existing_leads():
         </html>
         """
 
+@app.route('/api/export/<source>')
+@login_required
+def api_export(source):
+    """Stream leads (admin) or contracts (subscribers) as CSV, Excel-ready CSV or NDJSON.
+
+    Query params: format=csv|excel|ndjson, gzip=1, plus the source's filters
+    (e.g. state=VA&q=janitorial&posted_since=2025-01-01). See lead_exports.py.
+    """
+    try:
+        spec = lead_exporter.source(source)
+    except ValueError:
+        abort(404)
+    if spec.admin_only and not session.get('is_admin'):
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    if not spec.admin_only and not current_entitlements().allows('export'):
+        return jsonify({
+            'success': False,
+            'message': 'Exports are available for subscribers only',
+            'requires_subscription': True
+        }), 403
+
+    fmt = request.args.get('format', 'csv')
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    filters = {k: v for k, v in request.args.items() if k not in ('format', 'gzip')}
+    try:
+        chunks = lead_exporter.stream(source, fmt, filters, compress=compress)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    response = Response(chunks, mimetype=lead_exporter.mimetype(fmt, compress))
+    response.headers['Content-Disposition'] = f'attachment; filename="{lead_exporter.filename(source, fmt, compress)}"'
+    response.headers['X-Accel-Buffering'] = 'no'  # let proxies pass chunks through as they are produced
+    return response
+
 @app.route('/admin-login', methods=['GET', 'POST'])
 def admin_login():
     """Admin authentication"""
@@ -14723,6 +14812,7 @@ def admin_update_payment_status():
             {'status': status, 'user_id': user_id}
         )
         db.session.commit()
+        entitlement_service.bump(user_id=user_id)
         
         return jsonify({'success': True, 'message': f'Payment status updated to {status}'})
         
@@ -14986,7 +15076,12 @@ def admin_upload_lead():
 @login_required
 @admin_required
 def admin_upload_csv():
-    """Upload CSV file to bulk import contracts"""
+    """Upload CSV file to bulk import contracts
+
+    The upload is saved to disk and imported in the background (see
+    bulk_import.py); poll the returned status_url for progress and the
+    per-row error report.
+    """
     try:
         # Check if file is in request
         if 'csv_file' not in request.files:
@@ -15001,110 +15096,35 @@ def admin_upload_csv():
         if not file.filename.endswith('.csv'):
             return jsonify({'success': False, 'error': 'File must be a CSV'}), 400
         
-        # Read CSV file
-        import csv
-        import io
-        
-        stream = io.StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-        
-        inserted_count = 0
-        errors = []
-        
-        for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 (1 is header)
-            try:
-                # Insert based on contract type
-                if contract_type == 'contracts':
-                    # Local/State Government Contracts
-                    db.session.execute(text('''
-                        INSERT INTO contracts 
-                        (title, agency, location, value, deadline, description, url, posted_date)
-                        VALUES (:title, :agency, :location, :value, :deadline, :description, :url, :posted_date)
-                    '''), {
-                        'title': row.get('title', ''),
-                        'agency': row.get('agency', ''),
-                        'location': row.get('location', ''),
-                        'value': row.get('value', ''),
-                        'deadline': row.get('deadline', ''),
-                        'description': row.get('description', ''),
-                        'url': row.get('url', ''),
-                        'posted_date': row.get('posted_date', datetime.now().strftime('%Y-%m-%d'))
-                    })
-                    
-                elif contract_type == 'federal_contracts':
-                    # Federal Contracts
-                    db.session.execute(text('''
-                        INSERT INTO federal_contracts 
-                        (title, agency, location, value, deadline, description, sam_gov_url, notice_id, 
-                         naics_code, posted_date)
-                        VALUES (:title, :agency, :location, :value, :deadline, :description, :url, :notice_id,
-                                :naics_code, :posted_date)
-                    '''), {
-                        'title': row.get('title', ''),
-                        'agency': row.get('agency', ''),
-                        'location': row.get('location', ''),
-                        'value': row.get('value', ''),
-                        'deadline': row.get('deadline', ''),
-                        'description': row.get('description', ''),
-                        'url': row.get('url', ''),
-                        'notice_id': row.get('notice_id', ''),
-                        'naics_code': row.get('naics_code', '561720'),
-                        'posted_date': row.get('posted_date', datetime.now().strftime('%Y-%m-%d'))
-                    })
-                    
-                elif contract_type == 'supply_contracts':
-                    # Supply Contracts
-                    db.session.execute(text('''
-                        INSERT INTO supply_contracts 
-                        (title, agency, location, product_category, estimated_value, bid_deadline, 
-                         description, website_url, contact_name, contact_email, contact_phone, 
-                         is_quick_win, status, posted_date)
-                        VALUES (:title, :agency, :location, :category, :value, :deadline,
-                                :description, :url, :contact_name, :contact_email, :contact_phone,
-                                :is_quick_win, :status, :posted_date)
-                    '''), {
-                        'title': row.get('title', ''),
-                        'agency': row.get('agency', ''),
-                        'location': row.get('location', ''),
-                        'category': row.get('product_category', 'General Supplies'),
-                        'value': row.get('estimated_value', ''),
-                        'deadline': row.get('bid_deadline', ''),
-                        'description': row.get('description', ''),
-                        'url': row.get('website_url', ''),
-                        'contact_name': row.get('contact_name', ''),
-                        'contact_email': row.get('contact_email', ''),
-                        'contact_phone': row.get('contact_phone', ''),
-                        'is_quick_win': row.get('is_quick_win', 'false').lower() == 'true',
-                        'status': row.get('status', 'open'),
-                        'posted_date': row.get('posted_date', datetime.now().strftime('%Y-%m-%d'))
-                    })
-                
-                inserted_count += 1
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-                continue
-        
-        db.session.commit()
-        
-        result_message = f"Successfully imported {inserted_count} contracts"
-        if errors:
-            result_message += f" ({len(errors)} errors)"
+        fd, path = tempfile.mkstemp(prefix='upload-', suffix='.csv')
+        os.close(fd)
+        file.save(path)
+        try:
+            job = bulk_importer.start_job(contract_type, path, filename=file.filename,
+                                          on_complete=lambda result: refresh_quick_wins())
+        except ValueError as e:
+            os.remove(path)
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        return jsonify({
-            'success': True,
-            'message': result_message,
-            'inserted': inserted_count,
-            'errors': errors[:10]  # Return first 10 errors only
-        })
+        return jsonify({'success': True, 'job': job,
+                        'status_url': url_for('api_import_job', job_id=job['job_id'])}), 202
         
     except Exception as e:
-        db.session.rollback()
         print(f"CSV upload error: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/admin/imports/<job_id>', methods=['GET'])
+@login_required
+@admin_required
+def api_import_job(job_id):
+    """API endpoint to poll a background CSV import"""
+    job = bulk_importer.get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify({'success': True, 'job': job})
+
 @app.route('/admin-import-600-buyers', methods=['POST'])
 def admin_import_600_buyers():
     """Generate and import 600 supply buyers directly into database"""
@@ -15141,7 +15161,7 @@ def admin_import_600_buyers():
             ('Manufacturing Plant', 'Manufacturing', '$800,000 - $2,500,000')
         ]
         
-        inserted = 0
+        rows = []
         errors = []
         deadline = (datetime.now() + timedelta(days=90)).strftime('%Y-%m-%d')
         posted_date = datetime.now().strftime('%Y-%m-%d')
@@ -15256,24 +15276,15 @@ def admin_import_600_buyers():
                     location = f"{capitals.get(state_code, state_name)}, {state_code}"
                     title = f"{vendor_name} - Janitorial Supply Contract"
                     
-                    # Insert into database
-                    db.session.execute(text('''
-                        INSERT INTO supply_contracts 
-                        (title, agency, location, product_category, estimated_value, bid_deadline, 
-                         description, website_url, contact_name, contact_email, contact_phone, 
-                         is_quick_win, status, posted_date)
-                        VALUES (:title, :agency, :location, :category, :value, :deadline,
-                                :description, :url, :contact_name, :contact_email, :contact_phone,
-                                :is_quick_win, :status, :posted_date)
-                    '''), {
+                    rows.append({
                         'title': title,
                         'agency': vendor_name,
                         'location': location,
-                        'category': category,
-                        'value': value,
-                        'deadline': deadline,
+                        'product_category': category,
+                        'estimated_value': value,
+                        'bid_deadline': deadline,
                         'description': description,
-                        'url': website,
+                        'website_url': website,
                         'contact_name': contact_name,
                         'contact_email': email,
                         'contact_phone': phone,
@@ -15281,25 +15292,21 @@ def admin_import_600_buyers():
                         'status': 'open',
                         'posted_date': posted_date
                     })
-                    
-                    inserted += 1
-                    
-                    # Commit every 50 records
-                    if inserted % 50 == 0:
-                        db.session.commit()
-                        print(f"✅ Inserted {inserted} records...")
                         
                 except Exception as e:
                     errors.append(f"{vendor_name}: {str(e)}")
                     continue
         
-        # Final commit
-        db.session.commit()
+        # One chunked, de-duplicated load; buyers imported earlier are skipped (see bulk_import.py)
+        result = bulk_importer.import_rows('supply_contracts', rows)
+        inserted = result['inserted']
+        errors += [f"{rows[e['row'] - 1]['agency']}: {e['error']}" for e in result['errors']]
+        refresh_quick_wins(['supply'])
         
         # Get total count
         total = db.session.execute(text('SELECT COUNT(*) FROM supply_contracts')).scalar()
         
-        print(f"🎉 SUCCESS: Inserted {inserted} supply contracts!")
+        print(f"🎉 SUCCESS: Inserted {inserted} supply contracts ({result['duplicates']} already present)")
         print(f"📊 Total supply contracts in database: {total}")
         
         return jsonify({
@@ -15328,49 +15335,21 @@ def admin_scrape_janitorial_buyers():
     - Educational institutions
     - Healthcare facilities
     - Commercial property managers
+    
+    Runs in the background (see scrapers/janitorial_supply_buyers_scraper.py);
+    returns a job handle to poll for per-phase timings and results.
     """
     try:
-        print("\n" + "="*60)
-        print("🧹 STARTING JANITORIAL SUPPLY BUYERS SCRAPER")
-        print("="*60)
-        
-        # Import the scraper
-        from scrapers.janitorial_supply_buyers_scraper import JanitorialSupplyBuyersScraper
-        
-        # Initialize and run scraper
-        scraper = JanitorialSupplyBuyersScraper()
-        buyers = scraper.scrape_all_sources()
-        
-        # Save to database
-        saved_count = scraper.save_to_database(db.session)
-        
-        # Get total count
-        total = db.session.execute(text('SELECT COUNT(*) FROM supply_contracts')).scalar()
-        
-        print("\n" + "="*60)
-        print(f"✅ SCRAPING COMPLETE")
-        print(f"📊 Found: {len(buyers)} buyers")
-        print(f"💾 Saved: {saved_count} to database")
-        print(f"📊 Total supply_contracts: {total}")
-        print("="*60)
+        from scrapers.janitorial_supply_buyers_scraper import start_buyer_scrape_job
         
+        job = start_buyer_scrape_job(db.engine)
         return jsonify({
             'success': True,
-            'message': f'Successfully scraped and imported {saved_count} janitorial supply buyers',
-            'found': len(buyers),
-            'saved': saved_count,
-            'total': total,
-            'sources': {
-                'sam_gov': 'Federal supply requests',
-                'state_portals': '10 major states',
-                'education': '5 major school districts',
-                'healthcare': '4 major hospital systems',
-                'property_mgmt': '4 national companies'
-            }
-        })
+            'job': job,
+            'status_url': url_for('admin_janitorial_buyers_job', job_id=job['job_id'])
+        }), 202
         
     except Exception as e:
-        db.session.rollback()
         print(f"❌ Scraper error: {e}")
         import traceback
         traceback.print_exc()
@@ -15380,6 +15359,18 @@ def admin_scrape_janitorial_buyers():
             'traceback': traceback.format_exc()
         }), 500
 
+@app.route('/admin-scrape-janitorial-buyers/jobs/<job_id>', methods=['GET'])
+@login_required
+@admin_required
+def admin_janitorial_buyers_job(job_id):
+    """Poll a janitorial supply buyer scrape job"""
+    from scrapers.janitorial_supply_buyers_scraper import get_buyer_scrape_job
+    
+    job = get_buyer_scrape_job(job_id, db.engine)
+    if not job:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify({'success': True, 'job': job})
+
 @app.route('/admin-clear-fake-contracts', methods=['POST'])
 def admin_clear_fake_contracts():
     """Delete all sample/demo/fake contracts from the contracts table"""
@@ -16730,7 +16721,7 @@ def admin_enhanced():
             # Scraper management section
             if SCRAPERS_AVAILABLE:
                 try:
-                    scraper_manager = get_scraper_manager('leads.db')
+                    scraper_manager = get_scraper_manager(lambda: db.engine)
                     
                     # Get scraper statistics
                     stats = scraper_manager.get_scraper_stats()
@@ -17444,6 +17435,7 @@ def admin_toggle_subscription():
         log_admin_action('subscription_change', f'Changed subscription to {new_status}', user_id)
         
         db.session.commit()
+        entitlement_service.bump(user_id=user_id)
         
         return jsonify({'success': True, 'message': 'Subscription updated'})
         
@@ -17602,6 +17594,7 @@ def admin_update_lead():
         })
         
         db.session.commit()
+        entitlement_service.bump(user_id=lead_id)
         
         return jsonify({'success': True, 'message': 'Lead updated successfully'})
         
@@ -20454,8 +20447,7 @@ def admin_seed_industry_days():
                 :contact_name, :contact_email, :contact_phone, :topics, :is_virtual, :virtual_link, :attachments, :status
             )
         ''')
-        for ev in verified_events:
-            db.session.execute(insert_sql, ev)
+        db.session.execute(insert_sql, verified_events)
         db.session.commit()
         flash(f'Seeded {len(verified_events)} industry events successfully.', 'success')
     except Exception as e:
@@ -20831,10 +20823,10 @@ def check_lead_access():
                 'message': 'Please sign in to view leads'
             })
         
-        subscription_status = session.get('subscription_status', 'free')
+        entitlements = current_entitlements()
         
         # Admin and paid users have unlimited access
-        if session.get('is_admin') or subscription_status == 'paid':
+        if entitlements.allows('unlimited_leads'):
             return jsonify({
                 'success': True,
                 'can_view': True,
@@ -20845,7 +20837,7 @@ def check_lead_access():
         
         # Free users - check click count
         clicks_used = session.get('lead_clicks_used', 0)
-        FREE_LEAD_LIMIT = 3
+        FREE_LEAD_LIMIT = entitlements.limit('free_lead_views', 3)
         remaining = FREE_LEAD_LIMIT - clicks_used
         
         can_view = clicks_used < FREE_LEAD_LIMIT
@@ -20885,8 +20877,7 @@ def search_site():
         
         # Check if user is subscriber
         user_email = session.get('user_email')
-        subscription_status = session.get('subscription_status', 'free')
-        is_subscriber = subscription_status == 'paid' or session.get('is_admin', False)
+        is_subscriber = current_entitlements().allows('search')
         
         if not is_subscriber:
             return jsonify({
@@ -21057,8 +21048,7 @@ def get_search_suggestions():
                 'message': 'Authentication required'
             }), 401
         
-        subscription_status = session.get('subscription_status', 'free')
-        is_subscriber = subscription_status == 'paid' or session.get('is_admin', False)
+        is_subscriber = current_entitlements().allows('search')
         
         if not is_subscriber:
             return jsonify({
@@ -21959,6 +21949,7 @@ def admin_fetch_international_quick_wins():
             db.session.execute(text(insert_sql), rec)
             inserted += 1
         db.session.commit()
+        refresh_quick_wins(['supply'])
 
         if inserted:
             clear_all_dashboard_cache()
@@ -21974,6 +21965,14 @@ def admin_fetch_international_quick_wins():
         flash(f'❌ International fetch failed: {str(e)}', 'danger')
         return redirect(url_for('quick_wins'))
 
+@app.route('/api/admin/international-sources/metrics', methods=['GET'])
+@login_required
+@admin_required
+def api_international_source_metrics():
+    """Per-source latency, yield and circuit-breaker state of the international adapters"""
+    from integrations.international_sources import get_source_metrics
+    return jsonify({'success': True, 'sources': get_source_metrics()})
+
 @app.route('/cron/supply-daily')
 def cron_supply_daily():
     """Cron endpoint: refresh supply_contracts once per day using a secret token.
@@ -22081,6 +22080,7 @@ def admin_add_commercial_lead():
             })
             
             db.session.commit()
+            refresh_quick_wins(['commercial'])
             flash(f'✅ Commercial lead "{business_name}" added successfully!', 'success')
             return redirect(url_for('admin_add_commercial_lead'))
             
@@ -22685,21 +22685,19 @@ def api_run_scraper():
         if not scraper_name:
             return jsonify({'success': False, 'error': 'Scraper name required'}), 400
         
-        scraper_manager = get_scraper_manager('leads.db')
+        scraper_manager = get_scraper_manager(lambda: db.engine)
         
         # Valid scraper names
-        valid_scrapers = ['eva_virginia', 'state_portals', 'city_county', 'all']
+        valid_scrapers = list(scraper_manager.scrapers) + ['all']
         
         if scraper_name not in valid_scrapers:
             return jsonify({'success': False, 'error': f'Invalid scraper. Choose from: {", ".join(valid_scrapers)}'}), 400
         
-        # Run scraper
-        if scraper_name == 'all':
-            result = scraper_manager.run_all_scrapers(save_to_db=True)
-        else:
-            result = scraper_manager.run_scraper(scraper_name, save_to_db=True)
+        # Scrapers run in parallel in the background; poll /api/admin/scrapers/jobs/<job_id>
+        job = scraper_manager.start_job([scraper_name], save_to_db=True)
         
-        return jsonify(result)
+        return jsonify({'success': True, 'job': job,
+                        'status_url': url_for('api_scraper_job', job_id=job['job_id'])}), 202
         
     except Exception as e:
         print(f"Error running scraper: {e}")
@@ -22708,6 +22706,32 @@ def api_run_scraper():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/admin/scrapers/jobs/<job_id>', methods=['GET'])
+@login_required
+@admin_required
+def api_scraper_job(job_id):
+    """API endpoint to poll a background scraper job"""
+    if not SCRAPERS_AVAILABLE:
+        return jsonify({'success': False, 'error': 'Scraper system not available'}), 503
+    
+    job = get_scraper_manager(lambda: db.engine).get_job(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/api/admin/scrapers/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+@admin_required
+def api_cancel_scraper_job(job_id):
+    """API endpoint to stop a running scraper job at its scrapers' next request"""
+    if not SCRAPERS_AVAILABLE:
+        return jsonify({'success': False, 'error': 'Scraper system not available'}), 503
+    
+    cancelled = get_scraper_manager(lambda: db.engine).cancel_job(job_id)
+    return jsonify({'success': cancelled})
+
+
 @app.route('/api/admin/scrapers/logs', methods=['GET'])
 @login_required
 @admin_required
@@ -22718,7 +22742,7 @@ def api_scraper_logs():
     
     try:
         limit = request.args.get('limit', 50, type=int)
-        scraper_manager = get_scraper_manager('leads.db')
+        scraper_manager = get_scraper_manager(lambda: db.engine)
         logs = scraper_manager.get_scraper_logs(limit=limit)
         
         # Convert to dict for JSON serialization
@@ -22733,6 +22757,11 @@ def api_scraper_logs():
                 'contracts_found': log['contracts_found'],
                 'contracts_saved': log['contracts_saved'],
                 'error_message': log['error_message'],
+                'job_id': log.get('job_id'),
+                'pages_fetched': log.get('pages_fetched') or 0,
+                'bytes_fetched': log.get('bytes_fetched') or 0,
+                'duration_seconds': log.get('duration_seconds'),
+                'phase_timings': log.get('phase_timings') or {},
                 'created_at': str(log['created_at'])
             })
         
@@ -22751,7 +22780,7 @@ def api_scraper_stats():
         return jsonify({'success': False, 'error': 'Scraper system not available'}), 503
     
     try:
-        scraper_manager = get_scraper_manager('leads.db')
+        scraper_manager = get_scraper_manager(lambda: db.engine)
         stats = scraper_manager.get_scraper_stats()
         
         return jsonify({'success': True, 'stats': stats})
@@ -23397,15 +23426,19 @@ def proposal_review():
             rfp_file.save(rfp_path)
             proposal_file.save(proposal_path)
             
-            # Process files (for now, return mock analysis)
-            analysis = analyze_proposal_compliance(rfp_path, proposal_path)
-            
-            # Clean up files
+            # Register both documents for background extraction (content-addressed copies)
             try:
-                os.remove(rfp_path)
-                os.remove(proposal_path)
-            except Exception:
-                pass
+                rfp_doc = document_extractor.submit(rfp_path, rfp_file.filename, owner=session.get('user_id'))
+                proposal_doc = document_extractor.submit(proposal_path, proposal_file.filename,
+                                                         owner=session.get('user_id'))
+            finally:
+                for tmp_path in (rfp_path, proposal_path):
+                    try:
+                        os.remove(tmp_path)
+                    except Exception:
+                        pass
+            
+            analysis = analyze_proposal_compliance(rfp_doc, proposal_doc)
             
             return jsonify({
                 'success': True,
@@ -23418,32 +23451,34 @@ def proposal_review():
     
     return render_template('proposal_review.html')
 
-def analyze_proposal_compliance(rfp_path, proposal_path):
-    """Analyze proposal compliance with RFP requirements (placeholder for AI integration)"""
-    # This is a placeholder - in production, integrate with OpenAI or Claude API
+def analyze_proposal_compliance(rfp_doc, proposal_doc):
+    """Crosswalk the RFP's requirements against the proposal using the compliance catalog.
+
+    ``rfp_doc``/``proposal_doc`` are document_extractor SHA-256 ids; pages are
+    read from the extraction cache rather than re-parsing the files.
+    """
+    for doc in (rfp_doc, proposal_doc):
+        document_extractor.wait(doc, EXTRACTION_WAIT_SECONDS)
+    result = compliance_engine.crosswalk(document_extractor.pages(rfp_doc), document_extractor.pages(proposal_doc))
+    rfp_report, proposal_report = result['solicitation'], result['response']
+    strengths = [f"Addresses {r.label} (RFP p. {rfp_report.first_page(r.id)}, proposal p. {proposal_report.first_page(r.id)})"
+                 for r in result['addressed']]
+    weaknesses = [f"{r.label} is required by the RFP (p. {rfp_report.first_page(r.id)}) but not addressed"
+                  for r in result['missing']]
+    suggestions = [r.recommendation for r in result['missing'] if r.recommendation]
+    if rfp_report.clause_count:
+        suggestions.append(f"The RFP contains {rfp_report.clause_count} shall/must statements; "
+                           "confirm each one is answered in your compliance matrix.")
+    if not result['required']:
+        weaknesses.append('No standard requirements were detected in the RFP text; check that the file is not a scanned image.')
     return {
-        'compliance_score': 85,
-        'strengths': [
-            'Clear executive summary addressing key requirements',
-            'Detailed pricing breakdown included',
-            'Past performance examples provided',
-            'All required certifications mentioned'
-        ],
-        'weaknesses': [
-            'Missing specific response to Section 3.2 technical requirements',
-            'Staffing plan lacks detail on quality control procedures',
-            'Timeline could be more specific with milestones'
-        ],
-        'suggestions': [
-            'Add a detailed organizational chart showing reporting structure',
-            'Include specific examples of similar-sized projects completed',
-            'Expand on your green cleaning capabilities if RFP mentions sustainability',
-            'Add a risk management section addressing potential challenges'
-        ],
-        'missing_sections': [
-            'Safety program documentation',
-            'Insurance certificates (mention where they will be provided)'
-        ]
+        'documents': {'rfp': rfp_doc, 'proposal': proposal_doc},
+        'catalog_version': result['catalog_version'],
+        'compliance_score': round(result['coverage']),
+        'strengths': strengths,
+        'weaknesses': weaknesses,
+        'suggestions': suggestions,
+        'missing_sections': [r.label for r in result['missing']],
     }
 
 @app.route('/pricing-calculator')
@@ -23512,6 +23547,7 @@ def ai_assistant():
     return response
 
 @app.route('/api/ai-assistant-reply', methods=['POST'])
+@ai_rate_limited
 def ai_assistant_reply():
     """AI Assistant KB endpoint.
     
@@ -23737,7 +23773,7 @@ def import_contract_from_url():
         
         # Import required libraries
         import requests
-        from bs4 import BeautifulSoup
+        from html_parsing import make_soup
         import re
         from datetime import datetime
         
@@ -23749,7 +23785,7 @@ def import_contract_from_url():
         response = requests.get(url, headers=headers, timeout=15)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
         
         # Extract contract data (multiple patterns for different sites)
         extracted_data = {
@@ -23885,52 +23921,6 @@ def import_contract_from_url():
 # -----------------------------
 # RFP Upload & Compliance Check
 # -----------------------------
-def _extract_text_from_pdf(path):
-    try:
-        import PyPDF2
-        text = ''
-        with open(path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                txt = page.extract_text() or ''
-                text += (txt + '\n')
-        return text
-    except Exception as e:
-        print(f"PDF extract error: {e}")
-        return ''
-
-def _extract_text_from_docx(path):
-    try:
-        from docx import Document
-        doc = Document(path)
-        return '\n'.join(p.text for p in doc.paragraphs)
-    except Exception as e:
-        print(f"DOCX extract error: {e}")
-        return ''
-
-def _check_compliance(text: str):
-    """Shallow compliance scan for common janitorial RFP requirements."""
-    lower = (text or '').lower()
-    checks = [
-        ('Scope of Work', any(k in lower for k in ['scope of work', 'statement of work', 'sow'])),
-        ('NAICS 561720 (Janitorial)', '561720' in lower or 'janitorial' in lower),
-        ('SAM.gov Registration', any(k in lower for k in ['sam.gov', 'sam registration', 'uei'])),
-        ('Insurance Requirements', any(k in lower for k in ['insurance', 'general liability', 'workers’ compensation', 'workers compensation'])),
-        ('Bonding (if required)', any(k in lower for k in ['bid bond', 'performance bond', 'payment bond'])),
-        ('Quality Control Plan', any(k in lower for k in ['quality control', 'quality assurance'])),
-        ('Safety/OSHA', any(k in lower for k in ['osha', 'safety plan', 'safety procedures'])),
-        ('Background Checks', any(k in lower for k in ['background check', 'clearance'])),
-        ('Green/Sustainable Cleaning', any(k in lower for k in ['green cleaning', 'epa safer choice', 'environmentally friendly'])),
-        ('Schedule / Hours', any(k in lower for k in ['work schedule', 'hours', 'after hours'])),
-    ]
-    passed = sum(1 for _, ok in checks if ok)
-    total = len(checks)
-    return {
-        'passed': passed,
-        'total': total,
-        'matrix': [{'item': name, 'ok': bool(ok)} for name, ok in checks]
-    }
-
 @app.route('/api/upload-rfp', methods=['POST'])
 @login_required
 def upload_rfp_api():
@@ -23953,23 +23943,44 @@ def upload_rfp_api():
         tmpdir = tempfile.mkdtemp()
         path = os.path.join(tmpdir, filename)
         file.save(path)
-        text = ''
-        if ext == '.pdf':
-            text = _extract_text_from_pdf(path)
-        elif ext == '.docx':
-            text = _extract_text_from_docx(path)
-        else:
-            # Attempt raw read; many .doc files not supported
-            try:
-                text = open(path, 'r', errors='ignore').read()
-            except:
-                text = ''
-        comp = _check_compliance(text)
-        return jsonify({'success': True, 'extracted_text': text[:10000], 'compliance': comp})
+        try:
+            doc_sha = document_extractor.submit(path, filename, owner=session['user_id'])
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        return jsonify(_document_extraction_payload(doc_sha, wait=EXTRACTION_WAIT_SECONDS))
     except Exception as e:
         print(f"upload_rfp_api error: {e}")
         return jsonify({'success': False, 'error': 'Server error'}), 500
 
+def _document_extraction_payload(doc_sha: str, wait: float = 0.0) -> dict:
+    info = document_extractor.wait(doc_sha, wait) or {}
+    pages = document_extractor.pages(doc_sha)
+    extracted = '\n'.join(pages)[:10000]
+    return {
+        'success': info.get('status') != 'failed',
+        'document_id': doc_sha,
+        'status': info.get('status'),
+        'pages_done': info.get('pages_done'),
+        'page_count': info.get('page_count'),
+        'sections': document_extractor.sections(doc_sha)[:100],
+        'extracted_text': extracted,
+        'compliance': compliance_engine.evaluate(pages).as_checklist(),
+        **({'error': 'Could not extract text from this document'} if info.get('status') == 'failed' else {}),
+    }
+
+@app.route('/api/documents/<doc_sha>')
+@login_required
+def document_extraction_status(doc_sha):
+    """Poll a background extraction started by /api/upload-rfp."""
+    if not re.fullmatch(r'[0-9a-f]{64}', doc_sha or ''):
+        return jsonify({'success': False, 'error': 'Invalid document id'}), 400
+    # Identical uploads share one extraction, so only the users who submitted it may read it
+    if not session.get('is_admin') and not document_extractor.owned_by(doc_sha, session.get('user_id')):
+        return jsonify({'success': False, 'error': 'Document not found'}), 404
+    if not document_extractor.status(doc_sha):
+        return jsonify({'success': False, 'error': 'Document not found'}), 404
+    return jsonify(_document_extraction_payload(doc_sha))
+
 @app.route('/api/check-compliance', methods=['POST'])
 @login_required
 def check_compliance_api():
@@ -23977,7 +23988,7 @@ def check_compliance_api():
     try:
         data = request.get_json() or {}
         text = data.get('text') or data.get('description') or ''
-        comp = _check_compliance(text)
+        comp = compliance_engine.evaluate(text).as_checklist()
         return jsonify({'success': True, 'compliance': comp})
     except Exception as e:
         print(f"check_compliance_api error: {e}")
@@ -24073,18 +24084,10 @@ def upload_bid_docs():
                 fname = secure_filename(file.filename)
                 # Store securely with randomized filename
                 path, stored_name = _store_secure_file(user_id, file, subdir='bid_docs', prefix='doc_')
-                # Extract text for heuristics
-                text = ''
+                # Text for readiness heuristics is extracted in the background
+                doc_sha = None
                 try:
-                    if ext == '.pdf' or stored_name.lower().endswith('.pdf'):
-                        text = _extract_text_from_pdf(path)
-                    elif ext == '.docx' or stored_name.lower().endswith('.docx'):
-                        text = _extract_text_from_docx(path)
-                    else:
-                        try:
-                            text = open(path, 'r', errors='ignore').read()
-                        except:
-                            text = ''
+                    doc_sha = document_extractor.submit(path, stored_name, owner=user_id)
                 except Exception as et:
                     print(f"extract text error: {et}")
                 size = None
@@ -24093,9 +24096,9 @@ def upload_bid_docs():
                 except:
                     size = None
                 db.session.execute(text(
-                    'INSERT INTO user_documents (user_id, doc_type, original_filename, stored_path, file_size, extracted_text) '
-                    'VALUES (:u, :t, :of, :sp, :sz, :xt)'
-                ), {'u': user_id, 't': dtype, 'of': fname, 'sp': path, 'sz': size, 'xt': text})
+                    'INSERT INTO user_documents (user_id, doc_type, original_filename, stored_path, file_size, document_sha256) '
+                    'VALUES (:u, :t, :of, :sp, :sz, :sha)'
+                ), {'u': user_id, 't': dtype, 'of': fname, 'sp': path, 'sz': size, 'sha': doc_sha})
                 saved.append({'filename': fname, 'doc_type': dtype})
         db.session.commit()
         if total_files < 3:
@@ -24109,7 +24112,7 @@ def upload_bid_docs():
 def _compute_bid_readiness(user_id: int):
     """Heuristic readiness score using retained docs and keyword coverage."""
     rows = db.session.execute(text(
-        'SELECT doc_type, length(COALESCE(extracted_text, "")) as len, extracted_text '
+        'SELECT doc_type, length(COALESCE(extracted_text, "")) as len, extracted_text, document_sha256 '
         'FROM user_documents WHERE user_id = :u ORDER BY uploaded_at DESC LIMIT 50'
     ), {'u': user_id}).fetchall()
     counts = {'resume':0,'past_performance':0,'capability':0,'other':0}
@@ -24117,7 +24120,7 @@ def _compute_bid_readiness(user_id: int):
     for r in rows:
         dt = r.doc_type or 'other'
         counts[dt] = counts.get(dt,0)+1
-        txt = (r.extracted_text or '').lower()
+        txt = (r.extracted_text or document_extractor.text(r.document_sha256)).lower()
         if any(k in txt for k in ['cbls', 'cleaning', 'janitorial', 'porter']):
             coverage['experience'] = True
         if any(k in txt for k in ['naics 561720', '561720', 'naics']):
@@ -24222,6 +24225,7 @@ def generate_capability_api():
 
 @app.route('/api/generate-proposal', methods=['POST'])
 @login_required
+@ai_rate_limited
 def generate_proposal_api():
     """Generate AI proposal from contract data"""
     try:
@@ -25293,12 +25297,7 @@ def quick_wins():
         else:
             # Check if regular user is paid subscriber
             if 'user_id' in session:
-                result = db.session.execute(
-                    text("SELECT subscription_status FROM leads WHERE id = :user_id"),
-                    {'user_id': session['user_id']}
-                ).fetchone()
-                if result and result[0] == 'paid':
-                    is_paid = True
+                is_paid = current_entitlements().allows('quick_wins')
             
             # Redirect non-subscribers to pricing page
             if not is_paid:
@@ -25309,13 +25308,30 @@ def quick_wins():
         state_filter = request.args.get('state', '')
         city_filter = request.args.get('city', '')
         min_value_filter = request.args.get('min_value', '')
-        page = 1  # Single page showing all results
-        per_page = 999999  # No pagination limit - show everything
-        
-        # Get ALL supply contracts (national - show state on each lead)
+        page = request.args.get('page', 1, type=int)
+        per_page = 25
+        try:
+            min_value = float(min_value_filter) if min_value_filter else None
+        except ValueError:
+            min_value = None
+        
+        # Display fields and priority are precomputed at ingest (see quick_wins_feed.py)
+        feed = quick_wins_feed.page(state=state_filter or None, city=city_filter or None,
+                                    min_value=min_value, page=page, per_page=per_page)
+        paginated_leads = feed['items']
+        total_count = feed['total']
+        page = feed['page']
+        total_pages = feed['total_pages']
+        expiring_7days_count = feed['counts']['expiring_7days']
+        urgent_count = feed['counts']['urgent']
+        quick_win_count = feed['counts']['quick_win']
+        print(f"✅ Quick Wins page {page}/{total_pages}: {len(paginated_leads)} of {total_count} (after filters)")
+        
+        # Supply vendor directory shows the first 12 open supply contracts plus a total
         supply_contracts_data = []
+        supply_contracts_total = 0
         try:
-            supply_sql = (
+            supply_contracts_data = db.session.execute(text(
                 "SELECT "
                 "id, title, agency, location, product_category, estimated_value, "
                 "bid_deadline, description, website_url, is_small_business_set_aside, "
@@ -25324,279 +25340,19 @@ def quick_wins():
                 "WHERE status = 'open' "
                 "ORDER BY "
                 "    CASE WHEN is_quick_win THEN 0 ELSE 1 END, "
-                "    bid_deadline ASC"
-            )
-            supply_contracts_data = db.session.execute(text(supply_sql)).fetchall()
-            print(f"📦 Found {len(supply_contracts_data)} supply contracts (national)")
+                "    bid_deadline ASC "
+                "LIMIT 12"
+            )).fetchall()
+            supply_contracts_total = db.session.execute(text(
+                "SELECT COUNT(*) FROM supply_contracts WHERE status = 'open'"
+            )).scalar() or 0
         except Exception as e:
             print(f"❌ Supply contracts error: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        # Get urgent commercial requests (national)
-        urgent_commercial = []
-        try:
-            urgent_comm_sql = (
-                "SELECT "
-                "id, business_name, city, business_type, services_needed, "
-                "budget_range, urgency, created_at, contact_person, email, phone "
-                "FROM commercial_lead_requests "
-                "WHERE urgency IN ('emergency', 'urgent') AND status = 'open' "
-                "ORDER BY "
-                "    CASE urgency "
-                "        WHEN 'emergency' THEN 1 "
-                "        WHEN 'urgent' THEN 2 "
-                "        ELSE 3 "
-                "    END, "
-                "    created_at DESC"
-            )
-            urgent_commercial = db.session.execute(text(urgent_comm_sql)).fetchall()
-            print(f"🚨 Found {len(urgent_commercial)} urgent commercial requests (national)")
-        except Exception as e:
-            print(f"❌ Commercial requests error: {e}")
-        
-        # Get regular contracts with upcoming deadlines (as fallback quick wins) - national
-        urgent_contracts = []
-        try:
-            urgent_contracts_sql = (
-                "SELECT "
-                "id, title, agency, location, value, deadline, "
-                "description, naics_code, set_aside, posted_date, solicitation_number, website_url "
-                "FROM contracts "
-                "WHERE deadline IS NOT NULL "
-                "AND deadline != '' "
-                "AND deadline != 'Rolling' "
-                "ORDER BY deadline ASC "
-                "LIMIT 20"
-            )
-            urgent_contracts = db.session.execute(text(urgent_contracts_sql)).fetchall()
-            print(f"📋 Found {len(urgent_contracts)} government contracts with deadlines (national)")
-        except Exception as e:
-            print(f"❌ Regular contracts error: {e}")
-        
-        # Combine all leads
-        all_quick_wins = []
-        
-        # Phone sanitizer: reject placeholders like 555-XXXX and clearly invalid numbers
-        import re as _re
-        def _sanitize_phone(p):
-            if not p:
-                return 'N/A'
-            s = str(p).strip()
-            # Remove non-digits for validation
-            digits = ''.join(ch for ch in s if ch.isdigit())
-            if len(digits) < 10:
-                return 'N/A'
-            # Reject North American 555 exchange placeholders
-            if _re.match(r'^\D*\(?\d{3}\)?\D*555\D*\d{4}\D*$', s):
-                return 'N/A'
-            return s
-
-        # Helpers: normalize deadline strings to display-friendly format
-        def _norm_deadline(s):
-            try:
-                if not s or s in ('ASAP', 'Not specified'):
-                    return s or 'Not specified'
-                st = str(s)
-                # Handle ISO timestamps like 2025-11-02T00:00:00Z
-                if 'T' in st or st.endswith('Z'):
-                    try:
-                        from datetime import datetime as _dt
-                        return _dt.fromisoformat(st.replace('Z', '+00:00')).strftime('%m/%d/%Y')
-                    except Exception:
-                        pass
-                for fmt in ('%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d', '%d/%m/%Y'):
-                    try:
-                        from datetime import datetime as _dt
-                        return _dt.strptime(st, fmt).strftime('%m/%d/%Y')
-                    except ValueError:
-                        continue
-                return st
-            except Exception:
-                return 'Not specified'
-        
-        # Helper: Extract state from location string
-        def _extract_state(location_str):
-            if not location_str:
-                return 'Unknown'
-            location = str(location_str)
-            
-            # US state abbreviations mapping
-            states = {
-                'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
-                'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'FL': 'Florida', 'GA': 'Georgia',
-                'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa',
-                'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
-                'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi', 'MO': 'Missouri',
-                'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada', 'NH': 'New Hampshire', 'NJ': 'New Jersey',
-                'NM': 'New Mexico', 'NY': 'New York', 'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio',
-                'OK': 'Oklahoma', 'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
-                'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont',
-                'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
-                'DC': 'Washington DC'
-            }
-            
-            # Check for state abbreviation (like "Hampton, VA" or "VA")
-            for abbr, full_name in states.items():
-                if f', {abbr}' in location or f' {abbr} ' in location or location.endswith(f' {abbr}'):
-                    return abbr
-                # Check for full state name
-                if full_name in location:
-                    return abbr
-            
-            # If no state found, return the last part of location (might be city name)
-            parts = location.split(',')
-            if len(parts) >= 2:
-                return parts[-1].strip()
-            
-            return 'Unknown'
-        
-        # Add supply contracts
-        for supply in supply_contracts_data:
-            # Determine urgency level based on quick_win status and deadline
-            is_quick_win = supply[13] if len(supply) > 13 else False
-            urgency_level = 'quick-win' if is_quick_win else 'normal'
-            # Normalize deadline if needed
-            normalized_deadline = _norm_deadline(supply[6])
-            # Extract state from location
-            state = _extract_state(supply[3])
-            
-            all_quick_wins.append({
-                'id': f"supply_{supply[0]}",
-                'title': supply[1],
-                'agency': supply[2],
-                'location': supply[3],
-                'state': state,
-                'category': supply[4],
-                'value': supply[5],
-                'deadline': normalized_deadline,
-                'description': supply[7],
-                'website_url': supply[8],
-                'is_small_business': supply[9],
-                'contact_name': supply[10] or 'Procurement Office',
-                'email': supply[11] or 'N/A',
-                'phone': _sanitize_phone(supply[12]),
-                'lead_type': 'Supply Contract' + (' - Quick Win' if is_quick_win else ''),
-                'urgency_level': urgency_level,
-                'source': 'supply'
-            })
+            db.session.rollback()
         
         # If admin and no supply contracts, show helpful message
-        if is_admin and len(supply_contracts_data) == 0:
+        if is_admin and supply_contracts_total == 0:
             flash('No supply contracts found. Visit /admin/populate-if-empty to populate the database.', 'info')
-        
-        # Add commercial requests
-        for comm in urgent_commercial:
-            # Extract state from city (commercial requests have city field)
-            state = _extract_state(comm[2])
-            
-            all_quick_wins.append({
-                'id': f"commercial_{comm[0]}",
-                'title': f"Commercial Cleaning - {comm[1]}",
-                'agency': comm[3],
-                'location': comm[2],
-                'state': state,
-                'category': comm[4],
-                'value': comm[5],
-                'deadline': 'ASAP',
-                'description': f"Urgency: {comm[6]}",
-                'contact_name': comm[8] or 'Business Contact',
-                'email': comm[9] or 'N/A',
-                'phone': _sanitize_phone(comm[10]),
-                'website_url': None,
-                'is_small_business': False,
-                'lead_type': 'Commercial Request',
-                'urgency_level': comm[6],
-                'source': 'commercial'
-            })
-        
-        # Add regular contracts with upcoming deadlines
-        for contract in urgent_contracts:
-            # Extract state from location
-            state = _extract_state(contract[3])
-            
-            all_quick_wins.append({
-                'id': f"contract_{contract[0]}",
-                'title': contract[1],
-                'agency': contract[2],
-                'location': contract[3],
-                'state': state,
-                'category': contract[7] or 'Janitorial Services',
-                'value': contract[4],
-                'deadline': contract[5],
-                'description': contract[6][:200] if contract[6] else 'Government cleaning contract',
-                'website_url': contract[11] if len(contract) > 11 else None,
-                'is_small_business': bool(contract[8]),
-                'contact_name': 'Procurement Office',
-                'email': 'See contract details',
-                'phone': 'See contract details',
-                'lead_type': 'Government Contract' + (' - Small Business Set-Aside' if contract[8] else ''),
-                'urgency_level': 'quick-win',
-                'source': 'government',
-                'solicitation_number': contract[10] or 'N/A'
-            })
-        
-        # Apply filters if provided
-        filtered_leads = all_quick_wins
-        
-        # Filter by state if requested
-        if state_filter:
-            filtered_leads = [l for l in filtered_leads if l.get('state', '').upper() == state_filter.upper()]
-        
-        # Filter by city if requested
-        if city_filter:
-            filtered_leads = [l for l in filtered_leads if city_filter.lower() in l.get('location', '').lower()]
-        
-        # Filter by minimum value if requested
-        if min_value_filter:
-            try:
-                min_val = float(min_value_filter)
-                # Parse value strings like "$150,000" to numbers
-                def parse_value(val_str):
-                    try:
-                        if isinstance(val_str, (int, float)):
-                            return float(val_str)
-                        # Remove $, commas, and other non-numeric chars except decimal
-                        cleaned = ''.join(c for c in str(val_str) if c.isdigit() or c == '.')
-                        return float(cleaned) if cleaned else 0
-                    except:
-                        return 0
-                
-                filtered_leads = [l for l in filtered_leads if parse_value(l.get('value', '$0')) >= min_val]
-            except:
-                pass
-        
-        total_count = len(filtered_leads)
-        print(f"✅ Total Quick Wins (after filters): {total_count} (Supply: {len(supply_contracts_data)}, Commercial: {len(urgent_commercial)}, Gov: {len(urgent_contracts)})")
-        
-        # No pagination - show all filtered results at once
-        total_pages = 1
-        paginated_leads = filtered_leads  # Show everything
-        
-        # Get counts for badges - count from FILTERED leads
-        from datetime import datetime, timedelta
-        seven_days_from_now = datetime.now() + timedelta(days=7)
-        
-        # Count contracts expiring in 7 days
-        expiring_7days_count = 0
-        for lead in filtered_leads:
-            deadline_str = lead.get('deadline', '')
-            if deadline_str and deadline_str != 'ASAP' and deadline_str != 'Not specified':
-                try:
-                    for fmt in ['%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d', '%d/%m/%Y']:
-                        try:
-                            deadline_date = datetime.strptime(deadline_str, fmt)
-                            if deadline_date <= seven_days_from_now:
-                                expiring_7days_count += 1
-                            break
-                        except ValueError:
-                            continue
-                except:
-                    pass
-        
-        # Calculate all counts from filtered list
-        urgent_count = len([l for l in filtered_leads if l.get('urgency_level') == 'urgent'])
-        quick_win_count = len([l for l in filtered_leads if l.get('urgency_level') == 'quick-win'])
 
         # Even if no supply contracts exist, show the page with other opportunities
         return render_template('quick_wins.html',
@@ -25609,7 +25365,8 @@ def quick_wins():
                              total_pages=total_pages,
                              is_paid_subscriber=is_paid,
                              is_admin=is_admin,
-                             supply_contracts=supply_contracts_data if supply_contracts_data else [])
+                             supply_contracts=supply_contracts_data if supply_contracts_data else [],
+                             supply_contracts_total=supply_contracts_total)
     except Exception as e:
         print(f"❌ Quick Wins error: {e}")
         import traceback
@@ -25646,9 +25403,7 @@ def supply_contracts():
         if is_admin:
             is_paid_subscriber = True
         elif 'user_id' in session:
-            row = db.session.execute(text("SELECT subscription_status FROM leads WHERE id = :uid"), {'uid': session['user_id']}).fetchone()
-            if row and row[0] == 'paid':
-                is_paid_subscriber = True
+            is_paid_subscriber = current_entitlements().is_paid
 
         # Query params
         location = request.args.get('location', '').strip()
@@ -25660,7 +25415,7 @@ def supply_contracts():
         per_page = 12
         offset = (page - 1) * per_page
 
-        where = ["status = 'open'"]
+        where = ["status = 'open'", lead_deduplicator.exclude_duplicates_sql('supply_contracts')]
         params = {}
         if location:
             where.append("location = :location")
@@ -25749,12 +25504,7 @@ def global_opportunities():
         if is_admin:
             is_paid = True
         elif 'user_id' in session:
-            result = db.session.execute(
-                text("SELECT subscription_status FROM leads WHERE id = :user_id"),
-                {'user_id': session['user_id']}
-            ).fetchone()
-            if result and result[0] == 'paid':
-                is_paid = True
+            is_paid = current_entitlements().is_paid
         
         # Get filter parameters
         region_filter = request.args.get('region', '')
@@ -25826,12 +25576,7 @@ def property_management_companies():
         is_admin = session.get('is_admin', False)
         is_paid = False
         if not is_admin and 'user_id' in session:
-            result = db.session.execute(
-                text("SELECT subscription_status FROM leads WHERE id = :user_id"),
-                {'user_id': session['user_id']}
-            ).fetchone()
-            if result and result[0] == 'paid':
-                is_paid = True
+            is_paid = current_entitlements().is_paid
         
         # Admin gets full access
         if is_admin:
@@ -26628,6 +26373,7 @@ def submit_cleaning_request():
             ":special_requirements, :budget_range, :start_date, :urgency, 'pending_review')"
         ), data)
         db.session.commit()
+        refresh_quick_wins(['commercial'])
         
         # Send confirmation email to requester
         send_request_confirmation_email('commercial', data)
@@ -28404,6 +28150,7 @@ def populate_supply_contracts(force=False):
                 continue
         
         db.session.commit()
+        refresh_quick_wins(['supply'])
         
         # Record last population timestamp
         try:
@@ -28719,22 +28466,11 @@ def get_historical_award(contract_id):
     # Check if user is annual subscriber
     is_annual_subscriber = False
     is_admin = session.get('is_admin', False)
-    user_email = session.get('email')
     
     if is_admin:
         is_annual_subscriber = True
-    elif user_email:
-        try:
-            select_query = (
-                "SELECT plan_type FROM subscriptions WHERE email = :email AND status = 'active' "
-                "ORDER BY created_at DESC LIMIT 1"
-            )
-            result = db.session.execute(text(select_query), {'email': user_email}).fetchone()
-            
-            if result and result[0] == 'annual':
-                is_annual_subscriber = True
-        except Exception as e:
-            print(f"Error checking subscription: {e}")
+    elif 'user_id' in session:
+        is_annual_subscriber = current_entitlements().allows('historical_awards')
     
     # Return error if not annual subscriber
     if not is_annual_subscriber:
@@ -29142,29 +28878,9 @@ def send_message_to_admin():
 # EXTERNAL EMAIL API - Admin-only email sending to external addresses
 # ============================================================================
 
-# Rate limiting tracker (in-memory for simplicity, use Redis for production)
-from collections import defaultdict
-from datetime import timedelta
-email_rate_limits = defaultdict(list)
-
 def check_rate_limit(user_id: int, limit: int = 10, window_minutes: int = 60) -> bool:
-    """Check if user has exceeded rate limit"""
-    now = datetime.utcnow()
-    cutoff = now - timedelta(minutes=window_minutes)
-    
-    # Clean old entries
-    email_rate_limits[user_id] = [
-        timestamp for timestamp in email_rate_limits[user_id]
-        if timestamp > cutoff
-    ]
-    
-    # Check limit
-    if len(email_rate_limits[user_id]) >= limit:
-        return False
-    
-    # Add current request
-    email_rate_limits[user_id].append(now)
-    return True
+    """Consume one external-email send for the user; False once the shared limit is reached"""
+    return rate_limiter.hit(f'external_email:{user_id}', limit, window_minutes * 60).allowed
 
 
 @app.route('/send-external-email', methods=['POST'])
@@ -30801,7 +30517,7 @@ if __name__ == '__main__':
     # Initialize scraper manager and schedule daily scraping
     if SCRAPERS_AVAILABLE:
         try:
-            scraper_manager = get_scraper_manager('leads.db')
+            scraper_manager = get_scraper_manager(lambda: db.engine)
             # Schedule daily scraping at 2:00 AM
             scraper_manager.schedule_daily_scrape(hour=2, minute=0)
             print("✅ Scraper system initialized with daily 2:00 AM schedule")
@@ -30932,6 +30648,7 @@ def create_stripe_subscription():
         """, (customer.id, subscription.id, plan_type, datetime.now(), user_email))
         conn.commit()
         conn.close()
+        entitlement_service.bump(email=user_email)
         
         # Track promo usage
         if promo_code:
@@ -30983,6 +30700,7 @@ def paypal_subscription_success():
         """, (subscription_id, plan_type, datetime.now(), user_email))
         conn.commit()
         conn.close()
+        entitlement_service.bump(email=user_email)
         
         # Track promo usage
         if promo_code:
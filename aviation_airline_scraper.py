@@ -5,12 +5,14 @@ These pages are public, frequently updated, and contain base location data.
 """
 
 import requests
-from bs4 import BeautifulSoup
 import json
 import time
 from datetime import datetime
 import re
 
+from html_parsing import make_soup
+from relevance import classify
+
 # ---------------------------------------
 # AIRLINE CAREER & FACILITY PAGES
 # ---------------------------------------
@@ -87,7 +89,7 @@ def scrape_airline_page(url, airline_name):
             print(f"    ⚠️ HTTP {response.status_code}")
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = make_soup(response.text)
         
         # Extract all text
         page_text = soup.get_text(" ", strip=True)
@@ -106,8 +108,7 @@ def scrape_airline_page(url, airline_name):
                 facilities_found.append(keyword)
         
         # Look for cleaning-related mentions
-        cleaning_keywords = ['cleaning', 'janitorial', 'custodial', 'sanitation', 'facility services']
-        cleaning_mentions = [k for k in cleaning_keywords if k.lower() in page_text.lower()]
+        cleaning_mentions = list(classify(page_text).matched)
         
         return {
             "emails": list(set(emails))[:5],  # First 5 unique emails
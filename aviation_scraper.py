@@ -5,13 +5,15 @@ for janitorial, custodial, and aircraft cleaning contract opportunities.
 """
 
 import requests
-from bs4 import BeautifulSoup
 import json
 import time
 import urllib.parse
 from datetime import datetime
 import re
 
+from html_parsing import make_soup
+from relevance import classify
+
 # ---------------------------------------
 # ✈️ SCRAPING PROMPT (SYSTEM INSTRUCTIONS)
 # ---------------------------------------
@@ -105,7 +107,7 @@ def google_search(query, num_results=5):
         }
 
         response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = make_soup(response.text)
 
         links = []
         for g in soup.select("a"):
@@ -168,7 +170,7 @@ def scrape_page(url):
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
         response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = make_soup(response.text)
 
         # Get page title
         title = soup.title.string if soup.title else url.split('//')[-1].split('/')[0]
@@ -178,11 +180,11 @@ def scrape_page(url):
         text_lower = text.lower()
 
         # Detection filters
-        cleaning_keywords = ["janitorial", "custodial", "cleaning", "sanitation", "housekeeping", "porter"]
+        cleaning_keywords = list(classify(text_lower).matched)
         contract_keywords = ["rfp", "rfq", "bid", "solicitation", "proposal", "contract", "vendor", "supplier"]
         
         # Check if page contains both cleaning and contract keywords
-        has_cleaning = any(k in text_lower for k in cleaning_keywords)
+        has_cleaning = bool(cleaning_keywords)
         has_contract = any(k in contract_keywords for k in contract_keywords)
         
         # Filter out job posting sites
@@ -2,16 +2,46 @@
 Aviation Cleaning Lead Scraper V2
 Scrapes directly from airport procurement pages, airline vendor portals, and ground handler websites
 Bypasses Google search limitations by using known procurement URLs
+
+Sources are swept concurrently through one pooled session, one request per
+host at a time and HOST_INTERVAL seconds apart. Each page is parsed once with
+lxml; the text of every anchor and anchor parent is computed once and matched
+against one compiled keyword pattern. Pass ``engine`` to scrape_all_v2 to
+upsert each source's results into aviation_cleaning_leads as it finishes.
 """
 
-import requests
-from bs4 import BeautifulSoup
 import json
-import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import re
 from urllib.parse import urljoin, urlparse
 
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import func
+
+from city_portals import HostGate
+from db_access import upsert
+from html_parsing import parse_html
+from relevance import classify, trie_pattern
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+MAX_WORKERS = 6
+HOST_INTERVAL = 2.0  # seconds between requests to one host (was a sleep after every source)
+REQUEST_TIMEOUT = 15
+
+# Keywords to detect opportunities; substring matches, like the ``in`` checks they replace
+OPPORTUNITY_KEYWORDS = ('rfp', 'rfq', 'bid', 'solicitation', 'proposal', 'procurement',
+                        'vendor registration', 'contract')
+_OPPORTUNITY_PATTERN = re.compile(trie_pattern(OPPORTUNITY_KEYWORDS))
+
+session = requests.Session()
+session.headers['User-Agent'] = USER_AGENT
+session.mount('http://', HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
+session.mount('https://', HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
+host_gate = HostGate(per_host=1, interval=HOST_INTERVAL)
+
 # ---------------------------------------
 # DIRECT PROCUREMENT URLS
 # ---------------------------------------
@@ -141,6 +171,93 @@ def extract_deadline(text):
     return None
 
 
+# Text of one DOM node, scanned once: opportunity keyword hits and relevance verdict
+_NodeScan = namedtuple('_NodeScan', 'text opportunity relevance')
+
+
+def _scanner():
+    """Per-page memo of node -> _NodeScan, so a parent shared by many links is read once."""
+    scans = {}
+
+    def scan(node):
+        result = scans.get(node)
+        if result is None:
+            node_text = ' '.join(part.strip() for part in node.itertext() if part.strip())
+            lower = node_text.lower()
+            result = _NodeScan(node_text, set(_OPPORTUNITY_PATTERN.findall(lower)), classify(lower))
+            scans[node] = result
+        return result
+
+    return scan
+
+
+def extract_opportunities(content, url, source_name, category, location_info):
+    """
+    Find opportunity links in one fetched page.
+    
+    A link qualifies when its text, or failing that its parent's text,
+    mentions an opportunity keyword or is cleaning related. When no link
+    qualifies, the page itself is reported if it mentions either.
+    """
+    doc = parse_html(content)
+    if doc is None:
+        return []
+
+    scan = _scanner()
+    base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
+    common = {
+        "category": category,
+        "source": source_name,
+        "state": location_info.get('state', 'Unknown'),
+        "city": location_info.get('city', 'Unknown'),
+        "discovered_at": datetime.now().isoformat(),
+        "data_source": "direct_url_scraping"
+    }
+    opportunities = []
+
+    for link in doc.iterfind('.//a[@href]'):
+        own = scan(link)
+        parent = link.getparent()
+        around = scan(parent) if parent is not None else own
+        if not (own.opportunity or own.relevance.relevant
+                or around.opportunity or around.relevance.relevant):
+            continue
+
+        context = around.text[:500]
+        contacts = extract_contact_info(context)
+        detected = own.opportunity | around.opportunity
+        detected.update(own.relevance.matched + around.relevance.matched)
+        opportunities.append(dict(common, **{
+            "title": own.text or "Procurement Opportunity",
+            "url": urljoin(base_url, link.get('href')),
+            "summary": context,
+            "detected_keywords": sorted(detected),
+            "contact_email": contacts.get('email'),
+            "contact_phone": contacts.get('phone'),
+            "deadline": extract_deadline(context),
+        }))
+
+    # If no specific links found, check if the main page itself is an opportunity
+    if not opportunities:
+        page = scan(doc)
+        if page.opportunity or page.relevance.matched:
+            page_title = (doc.findtext('.//title') or '').strip() or source_name
+            summary = page.text[:1000]
+            contacts = extract_contact_info(summary)
+            detected = sorted(page.opportunity) + list(page.relevance.matched)
+            opportunities.append(dict(common, **{
+                "title": f"{source_name} - {page_title}",
+                "url": url,
+                "summary": summary,
+                "detected_keywords": detected[:10],
+                "contact_email": contacts.get('email'),
+                "contact_phone": contacts.get('phone'),
+                "deadline": extract_deadline(summary),
+            }))
+
+    return opportunities
+
+
 def scrape_direct_url(url, source_name, category, location_info):
     """
     Scrape opportunities directly from a procurement/vendor page.
@@ -157,190 +274,124 @@ def scrape_direct_url(url, source_name, category, location_info):
     opportunities = []
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        
         print(f"  📄 Scraping: {source_name}")
-        response = requests.get(url, headers=headers, timeout=15)
+        slot = host_gate.acquire(urlparse(url).netloc)
+        try:
+            response = session.get(url, timeout=REQUEST_TIMEOUT)
+        finally:
+            slot.release()
         
         if response.status_code != 200:
-            print(f"    ⚠️ HTTP {response.status_code}")
+            print(f"    ⚠️ {source_name}: HTTP {response.status_code}")
             return opportunities
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        page_text = soup.get_text(" ", strip=True).lower()
-        
-        # Keywords to detect opportunities
-        opportunity_keywords = ['rfp', 'rfq', 'bid', 'solicitation', 'proposal', 'procurement', 'vendor registration', 'contract']
-        cleaning_keywords = ['janitorial', 'custodial', 'cleaning', 'sanitation', 'housekeeping', 'porter', 'maintenance']
-        
-        # Find all links that might be opportunities
-        base_url = f"{urlparse(url).scheme}://{urlparse(url).netloc}"
-        
-        for link in soup.find_all('a', href=True):
-            link_text = link.get_text(" ", strip=True).lower()
-            link_href = link.get('href')
-            
-            # Check if link text contains opportunity keywords
-            has_opportunity = any(keyword in link_text for keyword in opportunity_keywords)
-            has_cleaning = any(keyword in link_text for keyword in cleaning_keywords)
-            
-            # Also check surrounding text
-            if not (has_opportunity or has_cleaning):
-                parent_text = link.parent.get_text(" ", strip=True).lower() if link.parent else ""
-                has_opportunity = any(keyword in parent_text for keyword in opportunity_keywords)
-                has_cleaning = any(keyword in parent_text for keyword in cleaning_keywords)
-            
-            if has_opportunity or has_cleaning:
-                # Build full URL
-                full_url = urljoin(base_url, link_href)
-                
-                # Get context around the link
-                context = link.parent.get_text(" ", strip=True) if link.parent else link_text
-                context = context[:500]
-                
-                # Extract contacts from context
-                contacts = extract_contact_info(context)
-                deadline = extract_deadline(context)
-                
-                # Detect keywords
-                detected = [k for k in opportunity_keywords + cleaning_keywords if k in (link_text + " " + context).lower()]
-                
-                opportunity = {
-                    "title": link.get_text(strip=True) or "Procurement Opportunity",
-                    "url": full_url,
-                    "category": category,
-                    "source": source_name,
-                    "summary": context,
-                    "detected_keywords": list(set(detected)),
-                    "contact_email": contacts.get('email'),
-                    "contact_phone": contacts.get('phone'),
-                    "deadline": deadline,
-                    "state": location_info.get('state', 'Unknown'),
-                    "city": location_info.get('city', 'Unknown'),
-                    "discovered_at": datetime.now().isoformat(),
-                    "data_source": "direct_url_scraping"
-                }
-                
-                opportunities.append(opportunity)
-                print(f"    ✅ Found: {opportunity['title'][:60]}")
-        
-        # If no specific links found, check if the main page itself is an opportunity
-        if not opportunities:
-            has_opportunity_content = any(keyword in page_text for keyword in opportunity_keywords)
-            has_cleaning_content = any(keyword in page_text for keyword in cleaning_keywords)
-            
-            if has_opportunity_content or has_cleaning_content:
-                page_title = soup.title.string if soup.title else source_name
-                detected = [k for k in opportunity_keywords + cleaning_keywords if k in page_text]
-                
-                # Get first 1000 chars as summary
-                summary = soup.get_text(" ", strip=True)[:1000]
-                contacts = extract_contact_info(summary)
-                deadline = extract_deadline(summary)
-                
-                opportunity = {
-                    "title": f"{source_name} - {page_title}",
-                    "url": url,
-                    "category": category,
-                    "source": source_name,
-                    "summary": summary,
-                    "detected_keywords": list(set(detected[:10])),
-                    "contact_email": contacts.get('email'),
-                    "contact_phone": contacts.get('phone'),
-                    "deadline": deadline,
-                    "state": location_info.get('state', 'Unknown'),
-                    "city": location_info.get('city', 'Unknown'),
-                    "discovered_at": datetime.now().isoformat(),
-                    "data_source": "direct_url_scraping"
-                }
-                
-                opportunities.append(opportunity)
-                print(f"    ✅ Page contains opportunity info")
-        
+        opportunities = extract_opportunities(response.content, url, source_name, category, location_info)
+        for opportunity in opportunities:
+            print(f"    ✅ Found: {opportunity['title'][:60]}")
         if not opportunities:
-            print(f"    ℹ️ No opportunities detected")
+            print(f"    ℹ️ {source_name}: no opportunities detected")
         
     except requests.exceptions.Timeout:
-        print(f"    ⏱️ Timeout")
+        print(f"    ⏱️ {source_name}: timeout")
     except Exception as e:
-        print(f"    ❌ Error: {str(e)[:50]}")
+        print(f"    ❌ {source_name}: {str(e)[:50]}")
     
     return opportunities
 
 
+# ---------------------------------------
+# DATABASE
+# ---------------------------------------
+
+COMPANY_TYPES = {
+    "airport": "Airport",
+    "airline": "Commercial Airline",
+    "ground_handler": "Ground Handler",
+}
+
+def upsert_aviation_leads(engine, opportunities):
+    """Insert or refresh opportunities in aviation_cleaning_leads with one executemany; returns rows written."""
+    rows = []
+    for opp in opportunities:
+        rows.append({
+            'company_name': f"{opp['source']} - {opp['title']}"[:200],
+            'company_type': COMPANY_TYPES.get(opp.get('category'), 'Aviation'),
+            'city': opp.get('city') or 'Unknown',
+            'state': opp.get('state') or 'Unknown',
+            'contact_email': opp.get('contact_email'),
+            'contact_phone': opp.get('contact_phone'),
+            'website_url': opp.get('url', ''),
+            'services_needed': ', '.join(opp.get('detected_keywords') or []) or 'Aviation cleaning',
+            'notes': opp.get('summary', ''),
+            'data_source': 'aviation_scraper_v2',
+            'discovered_via': 'web_scraper',
+        })
+    if not rows:
+        return 0
+    with engine.begin() as conn:
+        return upsert(conn, 'aviation_cleaning_leads', rows, conflict=('company_name', 'city', 'state'),
+                      update=('contact_email', 'contact_phone', 'website_url', 'notes'),
+                      keep_stored=('contact_email', 'contact_phone'),
+                      touch={'last_verified': func.current_timestamp()})
+
+
 # ---------------------------------------
 # MAIN SCRAPER FUNCTIONS
 # ---------------------------------------
 
-def scrape_airports(max_sources=None):
+def _airport_sources(max_sources=None):
+    return [(info['url'], name, "airport", {"state": info['state'], "city": info['city']})
+            for name, info in list(AIRPORT_PROCUREMENT_URLS.items())[:max_sources or None]]
+
+
+def _airline_sources(max_sources=None):
+    return [(info['url'], name, "airline", {"state": "National", "city": "Multiple"})
+            for name, info in list(AIRLINE_VENDOR_URLS.items())[:max_sources or None]]
+
+
+def _ground_handler_sources(max_sources=None):
+    return [(info['url'], name, "ground_handler", {"state": "National", "city": "Multiple"})
+            for name, info in list(GROUND_HANDLER_URLS.items())[:max_sources or None]]
+
+
+def sweep(sources, max_workers=MAX_WORKERS):
+    """
+    Scrape ``(url, source_name, category, location_info)`` tuples concurrently.
+    
+    Yields ``(source_name, opportunities)`` as each source finishes;
+    ``max_workers=1`` sweeps them one at a time.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aviation-v2') as pool:
+        futures = {pool.submit(scrape_direct_url, *source): source[1] for source in sources}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _sweep_in_order(sources, max_workers=MAX_WORKERS):
+    found = dict(sweep(sources, max_workers))
+    return [opp for source in sources for opp in found.get(source[1], [])]
+
+
+def scrape_airports(max_sources=None, max_workers=MAX_WORKERS):
     """Scrape airport procurement pages."""
     print("\n🏢 Scraping Airport Procurement Pages...\n")
-    all_opportunities = []
-    
-    sources = list(AIRPORT_PROCUREMENT_URLS.items())
-    if max_sources:
-        sources = sources[:max_sources]
-    
-    for airport_name, info in sources:
-        opportunities = scrape_direct_url(
-            url=info['url'],
-            source_name=airport_name,
-            category="airport",
-            location_info={"state": info['state'], "city": info['city']}
-        )
-        all_opportunities.extend(opportunities)
-        time.sleep(2)  # Rate limiting
-    
-    return all_opportunities
+    return _sweep_in_order(_airport_sources(max_sources), max_workers)
 
 
-def scrape_airlines(max_sources=None):
+def scrape_airlines(max_sources=None, max_workers=MAX_WORKERS):
     """Scrape airline vendor portals."""
     print("\n✈️ Scraping Airline Vendor Portals...\n")
-    all_opportunities = []
-    
-    sources = list(AIRLINE_VENDOR_URLS.items())
-    if max_sources:
-        sources = sources[:max_sources]
-    
-    for airline_name, info in sources:
-        opportunities = scrape_direct_url(
-            url=info['url'],
-            source_name=airline_name,
-            category="airline",
-            location_info={"state": "National", "city": "Multiple"}
-        )
-        all_opportunities.extend(opportunities)
-        time.sleep(2)
-    
-    return all_opportunities
+    return _sweep_in_order(_airline_sources(max_sources), max_workers)
 
 
-def scrape_ground_handlers(max_sources=None):
+def scrape_ground_handlers(max_sources=None, max_workers=MAX_WORKERS):
     """Scrape ground handling company pages."""
     print("\n🔧 Scraping Ground Handler Websites...\n")
-    all_opportunities = []
-    
-    sources = list(GROUND_HANDLER_URLS.items())
-    if max_sources:
-        sources = sources[:max_sources]
-    
-    for company_name, info in sources:
-        opportunities = scrape_direct_url(
-            url=info['url'],
-            source_name=company_name,
-            category="ground_handler",
-            location_info={"state": "National", "city": "Multiple"}
-        )
-        all_opportunities.extend(opportunities)
-        time.sleep(2)
-    
-    return all_opportunities
+    return _sweep_in_order(_ground_handler_sources(max_sources), max_workers)
 
 
-def scrape_all_v2(max_airports=None, max_airlines=None, max_ground_handlers=None):
+def scrape_all_v2(max_airports=None, max_airlines=None, max_ground_handlers=None,
+                  max_workers=MAX_WORKERS, engine=None):
     """
     Scrape all aviation opportunities using direct URLs.
     
@@ -348,28 +399,35 @@ def scrape_all_v2(max_airports=None, max_airlines=None, max_ground_handlers=None
         max_airports: Limit airport sources (None = all 7)
         max_airlines: Limit airline sources (None = all 4)
         max_ground_handlers: Limit ground handler sources (None = all 3)
+        max_workers: Sources fetched at once (1 = one at a time)
+        engine: SQLAlchemy engine; when given, each source's results are
+            upserted into aviation_cleaning_leads as soon as it finishes
     
     Returns:
-        List of all opportunities found
+        List of all opportunities found, in source order
     """
-    all_opportunities = []
-    
-    # Scrape airports
+    sources = []
     if max_airports != 0:
-        airport_opps = scrape_airports(max_sources=max_airports)
-        all_opportunities.extend(airport_opps)
-    
-    # Scrape airlines
+        sources += _airport_sources(max_airports)
     if max_airlines != 0:
-        airline_opps = scrape_airlines(max_sources=max_airlines)
-        all_opportunities.extend(airline_opps)
-    
-    # Scrape ground handlers
+        sources += _airline_sources(max_airlines)
     if max_ground_handlers != 0:
-        ground_opps = scrape_ground_handlers(max_sources=max_ground_handlers)
-        all_opportunities.extend(ground_opps)
+        sources += _ground_handler_sources(max_ground_handlers)
+    
+    print(f"\n✈️ Sweeping {len(sources)} aviation sources ({max_workers} at a time)...\n")
+    found = {}
+    saved = 0
+    for source_name, opportunities in sweep(sources, max_workers):
+        found[source_name] = opportunities
+        if engine is not None and opportunities:
+            try:
+                saved += upsert_aviation_leads(engine, opportunities)
+            except Exception as e:
+                print(f"    ❌ {source_name}: save failed: {str(e)[:80]}")
+    if engine is not None:
+        print(f"💾 Upserted {saved} aviation leads")
     
-    return all_opportunities
+    return [opp for source in sources for opp in found.get(source[1], [])]
 
 
 # ---------------------------------------
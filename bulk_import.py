@@ -0,0 +1,452 @@
+"""Chunked bulk import of contract and supply-buyer rows.
+
+Admin CSV uploads, the 600-buyer seed and the command-line import tools
+all go through this module. Rows are processed in ``chunk_rows`` batches:
+1. Each row is normalized and validated.
+2. Rows are de-duplicated within the file, then against the keys already
+   in the table. Those keys are read once, at the start of the import.
+3. Each chunk is loaded with one multi-row INSERT. On Postgres via
+   psycopg2, ``COPY ... FROM STDIN`` is used instead (db_access.bulk_insert).
+4. If the database rejects a chunk, the chunk is retried row by row under
+   savepoints. That way one bad row costs one row, and the error report
+   names it.
+A 100k-row upload is therefore about a hundred round trips instead of
+100k.
+
+Usage:
+from bulk_import import BulkImporter
+importer = BulkImporter(lambda: db.engine)
+job = importer.start_job('contracts', saved_upload_path, filename='bids.csv')   # background
+importer.get_job(job['job_id'])             # progress, counts and per-row errors
+importer.import_rows('supply_contracts', [{'title': ..., 'agency': ..., 'location': ...}])  # blocking
+
+Design:
+- Input can be CSV headers or column names. Each target maps a column to
+  the headers it accepts, e.g. ``url`` fills ``website_url``.
+- Only columns that exist in the connected table are written.
+- Dates are stored as ISO strings. Whitespace in names is collapsed.
+  Emails and dates are validated. A missing required field is a row
+  error, not a failed import.
+- Job progress is kept in memory and mirrored to ``import_jobs`` after
+  every chunk, so any worker can answer a status poll.
+"""
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import column, inspect, table, text
+from sqlalchemy.exc import DBAPIError, NoSuchTableError
+
+from db_access import bulk_insert
+
+CHUNK_ROWS = 1000
+MAX_REPORTED_ERRORS = 500
+MAX_FINISHED_JOBS = 50
+
+_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_ISO_DATE = re.compile(r'^\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\d|3[01])$')
+_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d', '%b %d, %Y', '%B %d, %Y')
+_TRUE = {'true', '1', 'yes', 'y', 't'}
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _name(value: Any) -> Optional[str]:
+    value = _text(value)
+    return ' '.join(value.split()) if value else None
+
+
+def _date(value: Any) -> Optional[str]:
+    if isinstance(value, (datetime, date)):
+        return value.strftime('%Y-%m-%d')
+    value = _text(value)
+    if not value:
+        return None
+    if _ISO_DATE.match(value):
+        return value
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognized date '{value}'")
+
+
+def _bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return (_text(value) or '').lower() in _TRUE
+
+
+def _email(value: Any) -> Optional[str]:
+    value = _text(value)
+    if value and not _EMAIL.match(value):
+        raise ValueError(f"invalid email '{value}'")
+    return value
+
+
+def _today(row: Dict) -> str:
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def _notice_id(row: Dict) -> str:
+    # Stable per title + agency, so re-uploading the same sheet de-duplicates
+    digest = hashlib.sha1(f"{row.get('title')}|{row.get('agency')}".lower().encode()).hexdigest()
+    return f"CSV-{digest[:16]}"
+
+
+@dataclass(frozen=True)
+class ImportTarget:
+    table: str
+    fields: Dict[str, Tuple[Tuple[str, ...], Callable[[Any], Any]]]  # column -> (extra headers, parser)
+    key: Tuple[str, ...]
+    required: Tuple[str, ...] = ('title', 'agency')
+    defaults: Dict[str, Callable[[Dict], Any]] = field(default_factory=dict)
+
+
+IMPORT_TARGETS = {
+    'contracts': ImportTarget(
+        'contracts',
+        {'title': ((), _name), 'agency': ((), _name), 'location': ((), _name), 'value': ((), _text),
+         'deadline': ((), _date), 'description': ((), _text), 'naics_code': ((), _text),
+         'website_url': (('url',), _text), 'status': ((), _text)},
+        key=('title', 'agency'),
+        defaults={'status': lambda row: 'open'},
+    ),
+    'federal_contracts': ImportTarget(
+        'federal_contracts',
+        {'title': ((), _name), 'agency': ((), _name), 'department': ((), _name), 'location': ((), _name),
+         'value': ((), _text), 'deadline': ((), _date), 'description': ((), _text), 'naics_code': ((), _text),
+         'sam_gov_url': (('url',), _text), 'notice_id': ((), _text), 'set_aside': ((), _text),
+         'posted_date': ((), _date)},
+        key=('notice_id',),
+        defaults={'naics_code': lambda row: '561720', 'sam_gov_url': lambda row: '',
+                  'notice_id': _notice_id, 'posted_date': _today},
+    ),
+    'supply_contracts': ImportTarget(
+        'supply_contracts',
+        {'title': ((), _name), 'agency': ((), _name), 'location': ((), _name),
+         'product_category': (('category',), _name), 'estimated_value': (('value',), _text),
+         'bid_deadline': (('deadline',), _date), 'description': ((), _text), 'website_url': (('url',), _text),
+         'contact_name': ((), _name), 'contact_email': ((), _email), 'contact_phone': ((), _text),
+         'is_quick_win': ((), _bool), 'status': ((), _text), 'posted_date': ((), _date)},
+        key=('agency', 'title', 'location'),
+        required=('title', 'agency', 'location'),
+        defaults={'product_category': lambda row: 'General Supplies', 'is_quick_win': lambda row: False,
+                  'status': lambda row: 'open', 'posted_date': _today},
+    ),
+}
+
+
+def _header(name: str) -> str:
+    return '_'.join((name or '').strip().lower().replace('-', ' ').split())
+
+
+def _row_key(target: ImportTarget, row: Dict) -> Tuple[str, ...]:
+    return tuple(' '.join(str(row.get(c) or '').lower().split()) for c in target.key)
+
+
+class BulkImporter:
+    """Validating, de-duplicating bulk loader with background jobs"""
+
+    def __init__(self, engine_getter: Callable, chunk_rows: int = CHUNK_ROWS):
+        self._engine_getter = engine_getter
+        self.chunk_rows = chunk_rows
+        self._columns: Dict[str, List[str]] = {}
+        self._plans: Dict[Tuple, List] = {}
+        self.jobs: Dict[str, Dict] = {}
+        self._jobs_lock = threading.Lock()
+        self._jobs_table_ready = False
+
+    @property
+    def engine(self):
+        return self._engine_getter()
+
+    def target(self, name: str) -> ImportTarget:
+        try:
+            return IMPORT_TARGETS[name]
+        except KeyError:
+            raise ValueError(f"unknown import target '{name}'; choose from {', '.join(IMPORT_TARGETS)}") from None
+
+    def _table_columns(self, engine, target: ImportTarget) -> List[str]:
+        if target.table not in self._columns:
+            try:
+                existing = {c['name'] for c in inspect(engine).get_columns(target.table)}
+            except NoSuchTableError:
+                raise ValueError(f"table '{target.table}' does not exist yet") from None
+            self._columns[target.table] = [c for c in target.fields if c in existing]
+        return self._columns[target.table]
+
+    def _plan(self, target: ImportTarget, headers: Tuple[str, ...]) -> List[Tuple[str, Tuple[str, ...], Callable]]:
+        """Per column, the input keys to read (in priority order); resolved once per header set"""
+        cache_key = (target.table, headers)
+        plan = self._plans.get(cache_key)
+        if plan is None:
+            by_name: Dict[str, List[str]] = {}
+            for raw_key in headers:
+                if raw_key:
+                    by_name.setdefault(_header(raw_key), []).append(raw_key)
+            plan = [(col, tuple(k for name in (col,) + names for k in by_name.get(name, ())), parse)
+                    for col, (names, parse) in target.fields.items()]
+            self._plans[cache_key] = plan
+        return plan
+
+    def normalize(self, target: ImportTarget, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """One input row as a column dict; raises ValueError naming the bad field"""
+        row = {}
+        for col, sources, parse in self._plan(target, tuple(raw)):
+            value = None
+            for source in sources:
+                value = raw[source]
+                if value not in (None, ''):
+                    break
+            try:
+                row[col] = parse(value)
+            except ValueError as e:
+                raise ValueError(f"{col}: {e}") from None
+        missing = [c for c in target.required if not row.get(c)]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        for col, default in target.defaults.items():
+            if row.get(col) is None:
+                row[col] = default(row)
+        return row
+
+    def _existing_keys(self, conn, target: ImportTarget) -> Set[Tuple[str, ...]]:
+        """Normalized keys already stored; read once per import in a single pass"""
+        rows = conn.execute(text(f"SELECT {', '.join(target.key)} FROM {target.table}"))
+        return {_row_key(target, dict(zip(target.key, r))) for r in rows}
+
+    def _load(self, conn, target: ImportTarget, columns: List[str],
+              rows: List[Tuple[int, Dict]]) -> Tuple[int, List[Dict]]:
+        """Insert ``rows``; falls back to per-row savepoints to isolate failures"""
+        records = [{c: row[c] for c in columns} for _, row in rows]
+        try:
+            with conn.begin_nested():
+                bulk_insert(conn, target.table, records, columns=columns, chunk_size=len(records))
+            return len(records), []
+        except (DBAPIError, conn.dialect.dbapi.Error):
+            pass  # COPY runs on the raw psycopg2 cursor, so its errors arrive unwrapped
+        insert = table(target.table, *[column(c) for c in columns]).insert()
+        inserted, errors = 0, []
+        for (row_num, _), record in zip(rows, records):
+            try:
+                with conn.begin_nested():
+                    conn.execute(insert, record)
+                inserted += 1
+            except DBAPIError as e:
+                errors.append({'row': row_num, 'error': str(getattr(e, 'orig', e)).splitlines()[0]})
+        return inserted, errors
+
+    def import_rows(self, target_name: str, rows: Iterable[Dict[str, Any]], first_row: int = 1,
+                    progress: Optional[Callable[[Dict], None]] = None, engine=None) -> Dict:
+        """
+        Import dict rows (CSV headers or column names) in chunks
+
+        Args:
+            target_name: Key of IMPORT_TARGETS
+            rows: Any iterable; consumed lazily
+            first_row: Number reported for the first row (2 for a CSV with a header)
+            progress: Called with the running result after each chunk
+
+        Returns:
+            {'target', 'rows', 'inserted', 'duplicates', 'failed', 'errors', 'seconds'}
+        """
+        target = self.target(target_name)
+        engine = engine or self.engine
+        columns = self._table_columns(engine, target)
+        result = {'target': target_name, 'rows': 0, 'inserted': 0, 'duplicates': 0, 'failed': 0, 'errors': []}
+        started = time.monotonic()
+        seen: Set[Tuple[str, ...]] = set()
+        existing: Optional[Set[Tuple[str, ...]]] = None
+
+        def fail(row_num, message):
+            result['failed'] += 1
+            if len(result['errors']) < MAX_REPORTED_ERRORS:
+                result['errors'].append({'row': row_num, 'error': message})
+
+        numbered = enumerate(rows, start=first_row)
+        while True:
+            chunk = list(islice(numbered, self.chunk_rows))
+            if not chunk:
+                break
+            result['rows'] += len(chunk)
+            valid = []
+            for row_num, raw in chunk:
+                try:
+                    row = self.normalize(target, raw)
+                except ValueError as e:
+                    fail(row_num, str(e))
+                    continue
+                key = _row_key(target, row)
+                if key in seen:
+                    result['duplicates'] += 1
+                    continue
+                seen.add(key)
+                valid.append((row_num, key, row))
+
+            with engine.begin() as conn:
+                if existing is None:
+                    existing = self._existing_keys(conn, target)
+                new = [(row_num, row) for row_num, key, row in valid if key not in existing]
+                result['duplicates'] += len(valid) - len(new)
+                if new:
+                    inserted, errors = self._load(conn, target, columns, new)
+                    result['inserted'] += inserted
+                    for error in errors:
+                        fail(error['row'], error['error'])
+            result['seconds'] = round(time.monotonic() - started, 3)
+            if progress:
+                progress(result)
+        result['seconds'] = round(time.monotonic() - started, 3)
+        return result
+
+    def import_file(self, target_name: str, path: str, progress: Optional[Callable[[Dict], None]] = None,
+                    engine=None) -> Dict:
+        """Stream a CSV file (UTF-8, optional BOM) through import_rows"""
+        size = os.path.getsize(path) or 1
+        with open(path, 'rb') as raw:
+            reader = csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline=''))
+
+            def report(result):
+                result['percent'] = min(100, round(100 * raw.tell() / size))
+                if progress:
+                    progress(result)
+
+            result = self.import_rows(target_name, reader, first_row=2, progress=report, engine=engine)
+        result['percent'] = 100
+        result['ignored_columns'] = [h for h in reader.fieldnames or [] if not self._accepts(target_name, h)]
+        return result
+
+    def _accepts(self, target_name: str, header: str) -> bool:
+        name = _header(header)
+        return any(name == col or name in headers for col, (headers, _) in self.target(target_name).fields.items())
+
+    # -- background jobs -------------------------------------------------
+
+    def _ensure_jobs_table(self, engine):
+        if self._jobs_table_ready:
+            return
+        with engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE IF NOT EXISTS import_jobs
+                         (job_id TEXT PRIMARY KEY,
+                          target TEXT,
+                          filename TEXT,
+                          status TEXT,
+                          progress TEXT,
+                          started_at TEXT,
+                          completed_at TEXT)'''))
+        self._jobs_table_ready = True
+
+    def _persist(self, engine, job: Dict):
+        try:
+            with engine.begin() as conn:
+                params = {'job_id': job['job_id'], 'target': job['target'], 'filename': job['filename'],
+                          'status': job['status'], 'progress': json.dumps(job['result']),
+                          'started_at': job['started_at'], 'completed_at': job['completed_at']}
+                updated = conn.execute(text('''UPDATE import_jobs SET status = :status, progress = :progress,
+                                               completed_at = :completed_at WHERE job_id = :job_id'''), params)
+                if not updated.rowcount:
+                    conn.execute(text('''INSERT INTO import_jobs
+                                         (job_id, target, filename, status, progress, started_at, completed_at)
+                                         VALUES (:job_id, :target, :filename, :status, :progress,
+                                                 :started_at, :completed_at)'''), params)
+        except Exception as e:
+            print(f"⚠️ Could not record import job {job['job_id']}: {e}")
+
+    def start_job(self, target_name: str, path: str, filename: Optional[str] = None,
+                  on_complete: Optional[Callable[[Dict], None]] = None, remove_file: bool = True) -> Dict:
+        """
+        Import a saved CSV in the background and return a job handle immediately
+
+        Args:
+            target_name: Key of IMPORT_TARGETS
+            path: CSV already written to disk (removed afterwards unless remove_file=False)
+            filename: Original upload name, for display
+            on_complete: Called with the final result when the import succeeds
+
+        Returns:
+            Job dictionary (job_id, status, result, ...)
+        """
+        self.target(target_name)
+        engine = self.engine  # resolve in the caller's app context before handing off
+        self._table_columns(engine, self.target(target_name))
+        self._ensure_jobs_table(engine)
+
+        job = {
+            'job_id': uuid.uuid4().hex[:12],
+            'target': target_name,
+            'filename': filename or os.path.basename(path),
+            'status': 'running',
+            'started_at': datetime.now().isoformat(),
+            'completed_at': None,
+            'result': {'rows': 0, 'inserted': 0, 'duplicates': 0, 'failed': 0, 'errors': [], 'percent': 0},
+        }
+        with self._jobs_lock:
+            self.jobs[job['job_id']] = job
+            self._prune_jobs()
+        self._persist(engine, job)
+
+        def progress(result):
+            job['result'] = dict(result, errors=list(result['errors']))
+            self._persist(engine, job)
+
+        def run():
+            try:
+                job['result'] = self.import_file(target_name, path, progress=progress, engine=engine)
+                job['status'] = 'completed'
+            except Exception as e:
+                print(f"❌ Import job {job['job_id']} failed: {e}")
+                job['status'] = 'error'
+                job['result'] = dict(job['result'], error=str(e))
+            finally:
+                if remove_file:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            job['completed_at'] = datetime.now().isoformat()
+            self._persist(engine, job)
+            if job['status'] == 'completed' and on_complete:
+                on_complete(job['result'])
+
+        threading.Thread(target=run, daemon=True, name=f"import-job-{job['job_id']}").start()
+        return dict(job)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Job status from this worker, or from import_jobs if another worker ran it"""
+        job = self.jobs.get(job_id)
+        if job:
+            return dict(job)
+        engine = self.engine
+        self._ensure_jobs_table(engine)
+        with engine.connect() as conn:
+            row = conn.execute(text('''SELECT job_id, target, filename, status, progress, started_at, completed_at
+                                       FROM import_jobs WHERE job_id = :job_id'''), {'job_id': job_id}).fetchone()
+        if not row:
+            return None
+        job = dict(row._mapping)
+        job['result'] = json.loads(job.pop('progress') or '{}')
+        return job
+
+    def _prune_jobs(self):
+        finished = [j for j in self.jobs.values() if j['status'] != 'running']
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job['job_id']]
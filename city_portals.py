@@ -0,0 +1,261 @@
+"""Concurrent fetcher and lxml parser for city procurement portals.
+
+``scrape_city_portals`` and the custom city search used to fetch each city
+with ``requests.get`` in turn, inside the user's request, with sleeps
+between cities. Every page was parsed with BeautifulSoup's html.parser and
+then scanned again for listing containers. This module fetches a state's
+portals concurrently and parses each page once with lxml. The search
+returns whatever has finished when its latency budget runs out.
+
+Usage:
+from city_portals import CityPortalFetcher
+fetcher = CityPortalFetcher()
+search = fetcher.search({'Norfolk': 'https://...', 'Richmond': 'https://...'}, budget=10)
+for result in search:            # PortalResult, in completion order
+    result.keywords, result.listings
+search.pending                   # cities still running when the budget ran out
+
+Design:
+- One pooled ``requests.Session`` is shared by all workers. A host gate
+  allows ``per_host`` requests to a host at a time, at least
+  ``host_interval`` seconds apart, so a state whose cities share one
+  platform host is not hammered.
+- Fetches that miss the budget keep running in the pool and land in the
+  cache, so the next search for that state is served from it.
+- The cache has two levels. URL -> (time, content hash, validators) serves
+  repeat searches within ``fetch_ttl`` without network and sends
+  conditional GETs after that. (URL, content hash) -> parsed result skips
+  re-parsing pages that did not change.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from html_parsing import parse_html, xpath
+from relevance import classify, classify_batch
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+LISTING_TERMS = ('bid', 'rfp', 'solicitation', 'opportunity')
+MAX_LISTINGS = 10  # containers examined per page
+SNIPPET_CHARS = 500
+PAGE_TEXT_CHARS = 10000
+
+# tr/div/li whose class mentions a listing term (case-insensitive), in document order
+_LISTING_XPATH = '//*[self::tr or self::div or self::li][{}]'.format(' or '.join(
+    f"contains(translate(@class, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), '{t}')"
+    for t in LISTING_TERMS
+))
+
+
+@dataclass
+class PortalResult:
+    city: str
+    url: str
+    status: str                     # ok / http_error / timeout / error
+    http_status: Optional[int] = None
+    keywords: List[str] = field(default_factory=list)
+    listings: List[Dict[str, str]] = field(default_factory=list)  # relevant only: {'text', 'url'}
+    text: str = ''                  # first PAGE_TEXT_CHARS of visible text, one line per block
+    from_cache: bool = False
+    elapsed: float = 0.0
+    error: str = ''
+
+
+def _squash(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def parse_portal_page(content: bytes, url: str) -> Dict[str, list]:
+    """Parse a portal page once: keyword hits, relevant listing containers and page text."""
+    doc = parse_html(content)
+    if doc is None:
+        return {'keywords': [], 'listings': [], 'text': ''}
+
+    page_text = doc.text_content()
+    lines = (line.strip() for line in page_text.splitlines())
+    text = '\n'.join(line for line in lines if line)[:PAGE_TEXT_CHARS]
+    keywords = classify(page_text.lower()).matched
+    if not keywords:
+        return {'keywords': [], 'listings': [], 'text': text}
+
+    containers = xpath(doc, _LISTING_XPATH)[:MAX_LISTINGS]
+    snippets = [_squash(c.text_content()) for c in containers]
+    listings = []
+    for container, snippet, verdict in zip(containers, snippets, classify_batch(snippets)):
+        if not verdict.relevant:
+            continue
+        link_url = url
+        links = container.xpath('.//a[@href]')
+        if links:
+            href = links[0].get('href', '').strip()
+            if href.startswith('http'):
+                link_url = href
+            elif href.startswith('/'):
+                link_url = urljoin(url, href)
+        listings.append({'text': snippet[:SNIPPET_CHARS], 'url': link_url})
+    return {'keywords': list(keywords), 'listings': listings, 'text': text}
+
+
+class HostGate:
+    """Per-host concurrency limit plus minimum spacing between request starts."""
+
+    def __init__(self, per_host: int, interval: float):
+        self.per_host = per_host
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def acquire(self, host: str) -> threading.Semaphore:
+        with self._lock:
+            slot = self._slots.setdefault(host, threading.Semaphore(self.per_host))
+        slot.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+        return slot
+
+
+class PortalSearch:
+    """Iterator over one search's results; stops yielding when the budget is spent."""
+
+    def __init__(self, futures: List[Tuple[str, Future]], deadline: float):
+        self._cities: Dict[Future, List[str]] = {}  # one future may serve several cities
+        for city, future in futures:
+            self._cities.setdefault(future, []).append(city)
+        self._deadline = deadline
+        self.pending: List[str] = []
+
+    def __iter__(self) -> Iterator[PortalResult]:
+        remaining = set(self._cities)
+        while remaining:
+            timeout = self._deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            done, remaining = wait(remaining, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                # A URL shared by two cities is fetched once and reported for each
+                for city in self._cities[future]:
+                    yield result if result.city == city else replace(result, city=city)
+        self.pending = [city for f in remaining for city in self._cities[f]]
+
+    def collect(self) -> List[PortalResult]:
+        return list(self)
+
+
+class CityPortalFetcher:
+    """Shared, thread-safe portal fetcher; one instance per process."""
+
+    def __init__(self, max_workers: int = 8, per_host: int = 1, host_interval: float = 1.0,
+                 timeout: float = 15.0, fetch_ttl: float = 900.0, max_parsed: int = 512):
+        self.timeout = timeout
+        self.fetch_ttl = fetch_ttl
+        self.max_parsed = max_parsed
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._gate = HostGate(per_host, host_interval)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='city-portal')
+        self._lock = threading.Lock()
+        self._fetched: Dict[str, tuple] = {}  # url -> (fetched_at, content_hash, etag, last_modified)
+        self._parsed: 'OrderedDict[tuple, dict]' = OrderedDict()
+        self._inflight: Dict[str, object] = {}
+
+    def _cached_parse(self, url: str, digest: str) -> Optional[dict]:
+        with self._lock:
+            parsed = self._parsed.get((url, digest))
+            if parsed is not None:
+                self._parsed.move_to_end((url, digest))
+            return parsed
+
+    def _store(self, url: str, digest: str, parsed: dict, etag: str, last_modified: str):
+        with self._lock:
+            self._fetched[url] = (time.monotonic(), digest, etag, last_modified)
+            self._parsed[(url, digest)] = parsed
+            self._parsed.move_to_end((url, digest))
+            while len(self._parsed) > self.max_parsed:
+                self._parsed.popitem(last=False)
+
+    def fetch(self, city: str, url: str) -> PortalResult:
+        """Fetch and parse one portal, using the caches where possible."""
+        started = time.monotonic()
+        with self._lock:
+            cached = self._fetched.get(url)
+        if cached and started - cached[0] < self.fetch_ttl:
+            parsed = self._cached_parse(url, cached[1])
+            if parsed is not None:
+                return PortalResult(city, url, 'ok', 200, from_cache=True, **parsed)
+
+        headers = {}
+        if cached:
+            if cached[2]:
+                headers['If-None-Match'] = cached[2]
+            if cached[3]:
+                headers['If-Modified-Since'] = cached[3]
+
+        host = urlparse(url).netloc
+        slot = self._gate.acquire(host)
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.exceptions.Timeout:
+            return PortalResult(city, url, 'timeout', elapsed=time.monotonic() - started)
+        except Exception as e:
+            return PortalResult(city, url, 'error', error=str(e), elapsed=time.monotonic() - started)
+        finally:
+            slot.release()
+
+        if response.status_code == 304 and cached:
+            parsed = self._cached_parse(url, cached[1])
+            if parsed is not None:
+                self._store(url, cached[1], parsed, cached[2], cached[3])
+                return PortalResult(city, url, 'ok', 304, from_cache=True,
+                                    elapsed=time.monotonic() - started, **parsed)
+        if response.status_code != 200:
+            return PortalResult(city, url, 'http_error', response.status_code,
+                                elapsed=time.monotonic() - started)
+
+        content = response.content
+        digest = hashlib.sha1(content).hexdigest()
+        parsed = self._cached_parse(url, digest)
+        from_cache = parsed is not None
+        if parsed is None:
+            parsed = parse_portal_page(content, url)
+        self._store(url, digest, parsed, response.headers.get('ETag', ''),
+                    response.headers.get('Last-Modified', ''))
+        return PortalResult(city, url, 'ok', 200, from_cache=from_cache,
+                            elapsed=time.monotonic() - started, **parsed)
+
+    def submit(self, city: str, url: str):
+        """Schedule a fetch, sharing one in-flight future per URL."""
+        with self._lock:
+            future = self._inflight.get(url)
+            if future is None:
+                future = self._pool.submit(self.fetch, city, url)
+                self._inflight[url] = future
+                future.add_done_callback(lambda f, u=url: self._inflight.pop(u, None))
+        return future
+
+    def search(self, portals: Dict[str, str], budget: float) -> PortalSearch:
+        """
+        Fetch ``{city: url}`` concurrently; iterate the result for completed
+        cities until ``budget`` seconds have passed.
+        """
+        deadline = time.monotonic() + budget
+        futures = [(city, self.submit(city, url)) for city, url in portals.items() if url]
+        return PortalSearch(futures, deadline)
@@ -0,0 +1,361 @@
+"""Rule-based compliance matrix for solicitations and proposal drafts.
+
+The RFP upload check and the proposal wizard each carried a short hardcoded
+token list and scanned the lowercased document once per token (``t in blob``
+plus ``blob.count(t)``). This module keeps one declarative, versioned
+requirement catalog and compiles every term of every requirement -- plus the
+"shall"/"must" clause markers -- into a single trie-shaped regular expression,
+so a 500-page solicitation is read in one linear pass.
+
+Usage:
+from compliance_engine import compliance_engine
+report = compliance_engine.evaluate(pages, checklist='rfp')   # pages: list of page texts
+report.as_checklist()    # {'passed', 'total', 'matrix': [...], 'clauses', ...}
+report.as_coverage()     # {'total', 'matched', 'coverage', 'missing', 'ambiguous', 'recommendations'}
+compliance_engine.crosswalk(rfp_pages, proposal_pages)   # RFP requirements the proposal misses
+
+Every hit carries its 1-based page number and character offset within that
+page. Terms match whole words (an optional plural "s" is allowed) and spaces
+inside a term match any run of whitespace, so phrases split across PDF line
+breaks are still found.
+
+Bump ``CATALOG_VERSION`` whenever ``CATALOG`` changes; reports record the
+version they were scored against.
+
+Run ``python compliance_engine.py`` for a benchmark against the old scan.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from relevance import trie_pattern
+
+CATALOG_VERSION = '2026.10.1'
+
+MAX_HITS_PER_REQUIREMENT = 25
+MAX_CLAUSES = 500
+CLAUSE_WINDOW = 240
+_SENTENCE_END = re.compile(r'[.;](?=\s|$)|\n')
+DEFAULT_RECOMMENDATION = 'Consider KPIs & service levels for stronger evaluation.'
+
+# Markers of binding requirement statements in a solicitation
+CLAUSE_TERMS = ('shall', 'must', 'is required to', 'are required to', 'will be required to')
+
+
+@dataclass(frozen=True)
+class Requirement:
+    id: str
+    label: str
+    category: str
+    terms: Tuple[str, ...]
+    checklists: Tuple[str, ...] = ('rfp',)
+    recommendation: Optional[str] = None
+
+
+CATALOG: Tuple[Requirement, ...] = (
+    # -- solicitation structure (SOW / Section L / Section M) --
+    Requirement('scope_of_work', 'Scope of Work', 'sow',
+                ('scope of work', 'statement of work', 'scope of services', 'performance work statement',
+                 'sow', 'pws', 'section c'),
+                ('rfp', 'proposal'), 'Mirror the RFP scope of work section by section.'),
+    Requirement('submission_instructions', 'Submission Instructions', 'sow',
+                ('instructions to offerors', 'instructions to bidders', 'section l', 'submission requirements',
+                 'proposal due', 'proposals are due', 'due date'),
+                ('rfp',), 'Follow the submission instructions (format, page limits, due date) exactly.'),
+    Requirement('evaluation_criteria', 'Evaluation Criteria', 'sow',
+                ('evaluation criteria', 'evaluation factors', 'section m', 'best value',
+                 'lowest price technically acceptable', 'lpta'),
+                ('rfp',), 'Organize the response around the stated evaluation factors.'),
+    Requirement('pricing', 'Pricing / Bid Schedule', 'sow',
+                ('pricing', 'price schedule', 'bid schedule', 'bid form', 'price proposal', 'cost proposal', 'clin'),
+                ('rfp', 'proposal'), 'Complete the price schedule for every line item.'),
+    # -- eligibility --
+    Requirement('naics', 'NAICS 561720 (Janitorial)', 'eligibility',
+                ('561720', 'janitorial'),
+                ('rfp',), 'Confirm NAICS 561720 is listed in your SAM.gov registration.'),
+    Requirement('sam_registration', 'SAM.gov Registration', 'eligibility',
+                ('sam.gov', 'sam registration', 'system for award management', 'uei', 'unique entity id',
+                 'unique entity identifier', 'cage code'),
+                ('rfp',), 'Include your UEI and CAGE code and keep SAM.gov registration active.'),
+    Requirement('set_aside', 'Small Business Set-Aside', 'eligibility',
+                ('set-aside', 'set aside', 'small business', '8(a)', 'hubzone', 'sdvosb', 'wosb'),
+                ('rfp',), 'State which set-aside certifications you hold.'),
+    Requirement('wage_determination', 'Wage Determination / SCA', 'eligibility',
+                ('wage determination', 'service contract act', 'prevailing wage', 'davis-bacon', 'living wage'),
+                ('rfp',), 'Price labor at or above the applicable wage determination.'),
+    # -- risk --
+    Requirement('insurance', 'Insurance Requirements', 'insurance',
+                ('insurance', 'general liability', 'workers compensation', "workers' compensation",
+                 'workers’ compensation', 'certificate of insurance', 'additional insured'),
+                ('rfp', 'proposal'), 'State your insurance coverage and where certificates will be provided.'),
+    Requirement('bonding', 'Bonding (if required)', 'bonding',
+                ('bid bond', 'performance bond', 'payment bond', 'surety', 'bonding'),
+                ('rfp',), 'Confirm bonding capacity and attach the surety letter.'),
+    Requirement('safety', 'Safety/OSHA', 'safety',
+                ('osha', 'safety plan', 'safety procedures', 'safety program', 'safety', 'sds', 'safety data sheet'),
+                ('rfp', 'proposal'), 'Add safety & OSHA compliance section.'),
+    Requirement('background_checks', 'Background Checks', 'staffing',
+                ('background check', 'clearance', 'e-verify', 'fingerprint', 'drug screen'),
+                ('rfp',), 'Describe employee background check and badging procedures.'),
+    # -- staffing & performance --
+    Requirement('staffing', 'Staffing Plan', 'staffing',
+                ('staffing', 'key personnel', 'fte', 'full-time equivalent', 'labor hours', 'personnel'),
+                ('rfp', 'proposal'), 'Describe the staffing plan with headcount per shift.'),
+    Requirement('supervision', 'Supervision', 'staffing',
+                ('supervision', 'supervisor', 'project manager', 'site manager', 'on-site manager'),
+                ('proposal',), 'Name the on-site supervisor and escalation path.'),
+    Requirement('training', 'Training', 'staffing',
+                ('training', 'certification', 'cims', 'iso 9001'),
+                ('proposal',), 'Describe onboarding and recurring staff training.'),
+    Requirement('quality_control', 'Quality Control Plan', 'performance',
+                ('quality control', 'quality assurance', 'qcp', 'qasp', 'quality control plan'),
+                ('rfp', 'proposal'), 'Add a quality control plan with inspection cadence.'),
+    Requirement('inspection', 'Inspections', 'performance',
+                ('inspection', 'walkthrough', 'walk-through', 'site visit'),
+                ('rfp', 'proposal'), 'Explain how and how often work is inspected.'),
+    Requirement('reporting', 'Reporting', 'performance',
+                ('reporting', 'report', 'deliverable'),
+                ('proposal',), 'List the reports delivered to the contracting officer.'),
+    Requirement('schedule', 'Schedule / Hours', 'performance',
+                ('work schedule', 'schedule', 'hours', 'after hours', 'service frequency', 'frequency'),
+                ('rfp', 'proposal'), 'Give the service schedule and frequencies.'),
+    Requirement('green_cleaning', 'Green/Sustainable Cleaning', 'performance',
+                ('green cleaning', 'epa safer choice', 'environmentally friendly', 'environmentally preferable',
+                 'green seal', 'sustainable'),
+                ('rfp', 'proposal'), 'Include sustainable / green cleaning practices section.'),
+    Requirement('equipment', 'Equipment & Supplies', 'performance',
+                ('equipment', 'supplies', 'consumables'),
+                ('proposal',), 'List equipment and who furnishes supplies.'),
+    Requirement('transition', 'Transition / Phase-In', 'performance',
+                ('transition', 'phase-in', 'phase in', 'mobilization', 'start-up'),
+                ('proposal',), 'Add a transition / phase-in plan.'),
+    # -- qualifications --
+    Requirement('experience', 'Experience', 'qualifications',
+                ('experience', 'years in business'),
+                ('proposal',), 'Summarize relevant experience.'),
+    Requirement('past_performance', 'Past Performance', 'qualifications',
+                ('past performance', 'reference', 'cpars'),
+                ('rfp', 'proposal'), 'Add measurable past performance examples.'),
+)
+
+PageInput = Union[str, Sequence[str], Sequence[Tuple[int, str]]]
+
+
+@dataclass(frozen=True)
+class Hit:
+    term: str
+    page: int
+    offset: int
+
+
+@dataclass(frozen=True)
+class Clause:
+    page: int
+    offset: int
+    text: str
+
+
+@dataclass
+class ComplianceReport:
+    checklist: Optional[str]
+    version: str
+    requirements: Tuple[Requirement, ...]
+    hits: Dict[str, List[Hit]]
+    counts: Dict[str, int]
+    clauses: List[Clause] = field(default_factory=list)
+    clause_count: int = 0
+    pages_scanned: int = 0
+
+    @property
+    def matched(self) -> List[Requirement]:
+        return [r for r in self.requirements if self.counts.get(r.id)]
+
+    @property
+    def missing(self) -> List[Requirement]:
+        return [r for r in self.requirements if not self.counts.get(r.id)]
+
+    @property
+    def coverage(self) -> float:
+        total = len(self.requirements)
+        return round(len(self.matched) / total * 100.0, 2) if total else 0.0
+
+    def first_page(self, requirement_id: str) -> Optional[int]:
+        hits = self.hits.get(requirement_id)
+        return hits[0].page if hits else None
+
+    def as_checklist(self, max_hits: int = 5) -> dict:
+        """Pass/fail matrix with page citations (RFP upload & check APIs)."""
+        matrix = [{
+            'id': r.id,
+            'item': r.label,
+            'category': r.category,
+            'ok': bool(self.counts.get(r.id)),
+            'count': self.counts.get(r.id, 0),
+            'hits': [{'term': h.term, 'page': h.page, 'offset': h.offset} for h in self.hits.get(r.id, [])[:max_hits]],
+        } for r in self.requirements]
+        return {
+            'passed': len(self.matched),
+            'total': len(self.requirements),
+            'coverage': self.coverage,
+            'matrix': matrix,
+            'clause_count': self.clause_count,
+            'clauses': [{'page': c.page, 'offset': c.offset, 'text': c.text} for c in self.clauses[:50]],
+            'catalog_version': self.version,
+        }
+
+    def as_coverage(self) -> dict:
+        """Coverage summary stored in compliance_reports (proposal wizard)."""
+        missing = self.missing
+        recs = [r.recommendation for r in missing if r.recommendation] or [DEFAULT_RECOMMENDATION]
+        return {
+            'total': len(self.requirements),
+            'matched': len(self.matched),
+            'coverage': self.coverage,
+            'missing': [r.label for r in missing],
+            'ambiguous': [r.label for r in self.matched if self.counts[r.id] == 1],
+            'recommendations': recs,
+            'catalog_version': self.version,
+        }
+
+
+def _normalize_pages(pages: PageInput) -> List[Tuple[int, str]]:
+    if pages is None:
+        return []
+    if isinstance(pages, str):
+        return [(1, pages)]
+    out = []
+    for i, page in enumerate(pages, start=1):
+        if isinstance(page, tuple):
+            out.append((int(page[0]), page[1] or ''))
+        else:
+            out.append((i, page or ''))
+    return out
+
+
+def _clause_text(page: str, offset: int) -> str:
+    """The sentence around a clause marker, bounded to ``CLAUSE_WINDOW`` chars each way."""
+    lo = max(0, offset - CLAUSE_WINDOW)
+    start = lo
+    for m in _SENTENCE_END.finditer(page, lo, offset):
+        start = m.end()
+    end = _SENTENCE_END.search(page, offset, min(len(page), offset + CLAUSE_WINDOW))
+    return ' '.join(page[start:end.end() if end else offset + CLAUSE_WINDOW].split())
+
+
+class ComplianceEngine:
+    """Requirement catalog compiled into one multi-pattern matcher."""
+
+    def __init__(self, catalog: Iterable[Requirement] = CATALOG, version: str = CATALOG_VERSION,
+                 clause_terms: Iterable[str] = CLAUSE_TERMS):
+        self.catalog = tuple(catalog)
+        self.version = version
+        self._by_id = {r.id: r for r in self.catalog}
+        # term -> ids of the requirements it evidences (empty for clause markers)
+        self._owners: Dict[str, List[str]] = {}
+        for req in self.catalog:
+            for term in req.terms:
+                owners = self._owners.setdefault(term.lower(), [])
+                if req.id not in owners:
+                    owners.append(req.id)
+        self._clause_terms = {t.lower() for t in clause_terms}
+        for term in self._clause_terms:
+            self._owners.setdefault(term, [])
+        self._pattern = re.compile(r'(?<![a-z0-9])(' + trie_pattern(self._owners, space=r'\s+') + r')s?(?![a-z0-9])')
+
+    def requirements(self, checklist: Optional[str] = None) -> Tuple[Requirement, ...]:
+        if checklist is None:
+            return self.catalog
+        return tuple(r for r in self.catalog if checklist in r.checklists)
+
+    def scan(self, pages: PageInput, requirement_ids: Optional[Iterable[str]] = None,
+             checklist: Optional[str] = None) -> ComplianceReport:
+        """One pass over every page; collects hits for the selected requirements."""
+        if requirement_ids is not None:
+            reqs = tuple(self._by_id[i] for i in requirement_ids)
+        else:
+            reqs = self.requirements(checklist)
+        wanted = {r.id for r in reqs}
+        hits: Dict[str, List[Hit]] = {r.id: [] for r in reqs}
+        counts: Dict[str, int] = {r.id: 0 for r in reqs}
+        clauses: List[Clause] = []
+        clause_count = 0
+        normalized = _normalize_pages(pages)
+        for page_no, page in normalized:
+            for m in self._pattern.finditer(page.lower()):
+                term = ' '.join(m.group(1).split())
+                offset = m.start()
+                if term in self._clause_terms:
+                    clause_count += 1
+                    if len(clauses) < MAX_CLAUSES:
+                        clauses.append(Clause(page_no, offset, _clause_text(page, offset)))
+                for rid in self._owners.get(term, ()):
+                    if rid in wanted:
+                        counts[rid] += 1
+                        if len(hits[rid]) < MAX_HITS_PER_REQUIREMENT:
+                            hits[rid].append(Hit(term, page_no, offset))
+        return ComplianceReport(checklist, self.version, reqs, hits, counts, clauses, clause_count, len(normalized))
+
+    def evaluate(self, *documents: PageInput, checklist: Optional[str] = 'rfp') -> ComplianceReport:
+        """Score one or more documents (their pages are concatenated) against a checklist."""
+        pages: List[str] = []
+        for doc in documents:
+            pages.extend(text for _, text in _normalize_pages(doc))
+        return self.scan(pages, checklist=checklist)
+
+    def crosswalk(self, solicitation: PageInput, response: PageInput, checklist: Optional[str] = 'rfp') -> dict:
+        """Which requirements the solicitation raises and whether the response addresses them."""
+        required = self.scan(solicitation, checklist=checklist)
+        raised = required.matched
+        answered = self.scan(response, requirement_ids=[r.id for r in raised])
+        addressed = [r for r in raised if answered.counts[r.id]]
+        missing = [r for r in raised if not answered.counts[r.id]]
+        return {
+            'catalog_version': self.version,
+            'required': raised,
+            'addressed': addressed,
+            'missing': missing,
+            'coverage': round(len(addressed) / len(raised) * 100.0, 2) if raised else 0.0,
+            'solicitation': required,
+            'response': answered,
+        }
+
+
+compliance_engine = ComplianceEngine()
+
+
+def benchmark(pages: int = 500, repeat: int = 3) -> dict:
+    """Time one engine pass against the old per-token scan on a synthetic solicitation."""
+    import random
+    import time
+
+    rng = random.Random(11)
+    words = ('the', 'contractor', 'government', 'building', 'floor', 'area', 'office', 'daily', 'weekly',
+             'provide', 'all', 'labor', 'materials', 'in', 'accordance', 'with', 'restroom', 'lobby')
+    terms = [t for r in CATALOG for t in r.terms] + list(CLAUSE_TERMS)
+    sample = []
+    for _ in range(pages):
+        tokens = [rng.choice(words) for _ in range(450)]
+        for _ in range(8):
+            tokens.insert(rng.randrange(len(tokens)), rng.choice(terms))
+        sample.append(' '.join(tokens))
+
+    def legacy(doc):
+        blob = '\n'.join(doc).lower()
+        return {t: blob.count(t) for t in terms if t in blob}
+
+    timings = {}
+    for name, fn in (('legacy_scan', legacy), ('engine', lambda doc: compliance_engine.scan(doc))):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(sample)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = round(best * 1000, 1)
+    chars = sum(len(p) for p in sample)
+    return {'pages': pages, 'chars': chars, 'terms': len(terms), 'milliseconds': timings}
+
+
+if __name__ == '__main__':
+    print(benchmark())
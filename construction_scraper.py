@@ -4,13 +4,13 @@ Scrapes real construction projects requiring final cleanup from multiple sources
 """
 
 import requests
-from bs4 import BeautifulSoup
 import time
 import json
 from datetime import datetime, timedelta
 import random
 from database import get_db_connection
 import re
+from html_parsing import make_soup
 
 class ConstructionLeadsScraper:
     def __init__(self):
@@ -82,7 +82,7 @@ class ConstructionLeadsScraper:
                 try:
                     response = requests.get(site, headers=self.headers, timeout=15)
                     if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
+                        soup = make_soup(response.content)
                         
                         # Find project announcements
                         project_articles = soup.find_all(['article', 'div'], class_=re.compile(r'project|construction|building'))
@@ -115,7 +115,7 @@ class ConstructionLeadsScraper:
                 try:
                     response = requests.get(site, headers=self.headers, timeout=15)
                     if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
+                        soup = make_soup(response.content)
                         
                         # Find development projects
                         properties = soup.find_all(['div', 'article'], class_=re.compile(r'property|listing|development'))
@@ -148,7 +148,7 @@ class ConstructionLeadsScraper:
                 try:
                     response = requests.get(site, headers=self.headers, timeout=15)
                     if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
+                        soup = make_soup(response.content)
                         
                         # Find bid listings
                         bids = soup.find_all(['div', 'li', 'article'], class_=re.compile(r'bid|project|opportunity'))
@@ -11,6 +11,8 @@ import io
 from datetime import datetime, timedelta
 import logging
 
+from relevance import INCLUDE_TERMS, is_cleaning_related
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -35,11 +37,8 @@ class DataGovBulkFetcher:
             '561790',  # Other Services to Buildings and Dwellings
         ]
         
-        # Strict cleaning keywords for description filtering
-        self.cleaning_keywords = [
-            'janitor', 'cleaning', 'custodial', 'housekeeping',
-            'sanitiz', 'disinfect', 'sweeping', 'mopping'
-        ]
+        # Cleaning terms for description filtering (shared relevance classifier)
+        self.cleaning_keywords = INCLUDE_TERMS
         
         # Virginia state codes
         self.va_state_codes = ['VA', 'Virginia']
@@ -137,8 +136,8 @@ class DataGovBulkFetcher:
                     # PRIORITY 2: Other cleaning NAICS codes
                     elif naics and any(naics.startswith(code) for code in self.naics_codes):
                         cleaning_contracts.append(contract)
-                    # PRIORITY 3: Strict cleaning keywords in description
-                    elif any(keyword in naics_desc or keyword in title for keyword in self.cleaning_keywords):
+                    # PRIORITY 3: Cleaning terms in description (shared relevance classifier)
+                    elif is_cleaning_related(f"{title} {naics_desc}"):
                         cleaning_contracts.append(contract)
                     # PRIORITY 4: Related service contracts (landscaping/grounds)
                     elif 'landscap' in naics_desc or 'grounds' in naics_desc or naics.startswith('5617'):
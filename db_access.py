@@ -0,0 +1,349 @@
+"""Shared, pooled database access for the app, background jobs and scripts.
+
+Every caller resolves the database the same way:
+1. an explicit URL;
+2. otherwise ``DATABASE_URL`` (``postgres://`` is accepted);
+3. otherwise the app's SQLite file, ``SQLITE_DB_NAME`` next to app.py.
+
+Every caller also gets the same engine options: pre-ping, recycle, and a
+busy timeout for SQLite. Engines are created once per URL and cached. The
+app registers its Flask-SQLAlchemy engine at startup, so code that runs
+inside the app process (jobs, schedulers, generators) shares that engine's
+pool. Out-of-app scripts build one pool on first use.
+
+Usage:
+from db_access import get_engine, bulk_insert, upsert, clear_column_cache
+engine = get_engine()                                    # or get_engine('postgresql://...')
+with engine.begin() as conn:
+    bulk_insert(conn, 'contracts', rows)                 # multi-row INSERT / COPY, existing columns only
+    upsert(conn, 'national_contracts', rows, conflict=('state', 'solicitation_number'),
+           update=('title', 'due_date'), touch={'scraped_at': func.now()})
+raw = get_engine().raw_connection()                      # pooled DB-API connection for legacy ? SQL
+clear_column_cache(engine, 'contracts')                  # after an ALTER on a raw connection (SQLAlchemy DDL clears it)
+
+Benchmark (connection acquisition and bulk write throughput):
+python db_access.py [--url URL] [--rows 5000] [--acquisitions 500] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import column, create_engine, event, func, inspect, table, text
+from sqlalchemy.engine import Engine, make_url
+
+BULK_CHUNK = 1000
+SQLITE_BUSY_TIMEOUT = 30  # seconds a writer waits for another process's lock
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+_DDL = re.compile(r'\s*(ALTER|CREATE|DROP)\s', re.IGNORECASE)
+_columns: 'weakref.WeakKeyDictionary[Engine, Dict[str, List[str]]]' = weakref.WeakKeyDictionary()
+
+
+def sqlite_path() -> str:
+    """Absolute path of the app's SQLite file (``SQLITE_DB_NAME``, default leads.db)"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), os.getenv('SQLITE_DB_NAME', 'leads.db'))
+
+
+def database_url(url: Optional[str] = None) -> str:
+    """The URL to connect to: ``url``, else DATABASE_URL, else the app's SQLite file"""
+    url = (url or os.environ.get('DATABASE_URL', '')).strip()
+    if not url:
+        return f"sqlite:///{sqlite_path()}"
+    if url.startswith('postgres://'):
+        url = url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """create_engine keyword arguments shared by the app and every script"""
+    options: Dict[str, Any] = {'pool_pre_ping': True, 'pool_recycle': 300}
+    if make_url(url).get_backend_name() == 'sqlite':
+        options['connect_args'] = {'timeout': SQLITE_BUSY_TIMEOUT, 'check_same_thread': False}
+    else:
+        options['pool_size'] = int(os.getenv('DB_POOL_SIZE', '5'))
+        options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    return options
+
+
+def _key(url) -> str:
+    return make_url(url).render_as_string(hide_password=False)
+
+
+def register_engine(engine: Engine) -> Engine:
+    """Make get_engine() return ``engine`` for its URL (the app registers db.engine)"""
+    with _engines_lock:
+        _engines[_key(engine.url)] = engine
+    return engine
+
+
+def get_engine(url: Optional[str] = None) -> Engine:
+    """Pooled engine for ``url`` (see database_url), created once per process"""
+    url = database_url(url)
+    key = _key(url)
+    engine = _engines.get(key)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                engine = _engines[key] = create_engine(url, **engine_options(url))
+    return engine
+
+
+def existing_columns(conn, table_name: str) -> List[str]:
+    """Column names of ``table_name``, reflected once per engine (see clear_column_cache)"""
+    tables = _columns.setdefault(conn.engine, {})
+    if table_name not in tables:
+        tables[table_name] = [c['name'] for c in inspect(conn).get_columns(table_name)]
+    return tables[table_name]
+
+
+def clear_column_cache(engine: Optional[Engine] = None, table_name: Optional[str] = None):
+    """
+    Forget reflected columns after a schema change
+
+    DDL sent through SQLAlchemy clears its engine's entry on its own (see
+    _forget_columns_on_ddl); call this after ALTERs made on a raw DB-API
+    connection. Defaults to every engine and every table.
+    """
+    for cached, tables in list(_columns.items()):
+        if engine is not None and cached is not engine:
+            continue
+        if table_name is None:
+            tables.clear()
+        else:
+            tables.pop(table_name, None)
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _forget_columns_on_ddl(conn, cursor, statement, parameters, context, executemany):
+    if _DDL.match(statement) and conn.engine in _columns:
+        clear_column_cache(conn.engine)
+
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+
+def _copy(conn, table_name: str, columns: Sequence[str], records: List[Dict]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        writer.writerow([_copy_value(record.get(c)) for c in columns])
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                           buffer)
+    finally:
+        cursor.close()
+
+
+def bulk_insert(conn, table_name: str, rows: Iterable[Dict[str, Any]], columns: Optional[Sequence[str]] = None,
+                chunk_size: int = BULK_CHUNK, copy: bool = True) -> int:
+    """
+    Insert dict rows in multi-row batches on ``conn`` (caller owns the transaction)
+
+    Only columns that exist in the table are written. On Postgres via
+    psycopg2 each batch is sent with COPY unless ``copy`` is False.
+
+    Returns:
+        Number of rows written
+    """
+    present = set(existing_columns(conn, table_name))
+    use_copy = copy and conn.dialect.name == 'postgresql' and conn.dialect.driver == 'psycopg2'
+    written, batch, insert, cols = 0, [], None, None
+
+    def flush():
+        if use_copy:
+            _copy(conn, table_name, cols, batch)
+        else:
+            conn.execute(insert, [{c: r.get(c) for c in cols} for r in batch])
+
+    for row in rows:
+        if cols is None:
+            cols = [c for c in (columns or row) if c in present]
+            insert = table(table_name, *[column(c) for c in cols]).insert()
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            flush()
+            written += len(batch)
+            batch = []
+    if batch:
+        flush()
+        written += len(batch)
+    return written
+
+
+def upsert(conn, table_name: str, rows: Sequence[Dict[str, Any]], conflict: Sequence[str],
+           update: Optional[Sequence[str]] = None, touch: Optional[Dict[str, Any]] = None,
+           keep_stored: Sequence[str] = (), chunk_size: int = BULK_CHUNK) -> int:
+    """
+    INSERT ... ON CONFLICT for Postgres and SQLite
+
+    Args:
+        conflict: Columns of the unique constraint to upsert on
+        update: Columns refreshed from the incoming row on conflict; None or
+            empty means keep the stored row (DO NOTHING)
+        touch: Extra SET expressions on conflict, e.g. {'scraped_at': func.now()}
+        keep_stored: Columns of ``update`` that keep the stored value when the
+            incoming one is NULL
+
+    Rows repeating a conflict key within the call are collapsed (last one
+    wins); Postgres rejects a statement that hits the same row twice.
+
+    Returns:
+        Number of distinct rows sent
+    """
+    rows = list({tuple(r.get(c) for c in conflict): r for r in rows}.values())
+    if not rows:
+        return 0
+    dialect = conn.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"upsert is not supported on {dialect}")
+
+    present = set(existing_columns(conn, table_name))
+    cols = [c for c in rows[0] if c in present]
+    touched = [c for c in touch or () if c not in cols]
+    target = table(table_name, *[column(c) for c in cols + touched])
+    stmt = dialect_insert(target)
+    if update or touch:
+        refresh = {c: func.coalesce(stmt.excluded[c], target.c[c]) if c in keep_stored else stmt.excluded[c]
+                   for c in update or () if c in cols}
+        stmt = stmt.on_conflict_do_update(index_elements=list(conflict), set_=dict(refresh, **(touch or {})))
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict))
+    for start in range(0, len(rows), chunk_size):
+        conn.execute(stmt, [{c: r.get(c) for c in cols} for r in rows[start:start + chunk_size]])
+    return len(rows)
+
+
+# -- benchmark -----------------------------------------------------------
+
+BENCH_TABLE = '_db_access_bench'
+
+
+def _raw_connect(url: str) -> Callable[[], Any]:
+    """A fresh, unpooled DB-API connection per call, the way the scripts used to connect"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == 'sqlite':
+        return lambda: sqlite3.connect(parsed.database or ':memory:')
+    import psycopg2
+    dsn = parsed.set(drivername='postgresql').render_as_string(hide_password=False)
+    return lambda: psycopg2.connect(dsn)
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return time.perf_counter() - started
+
+
+def benchmark(url: Optional[str] = None, rows: int = 5000, acquisitions: int = 500) -> Dict[str, Any]:
+    """
+    Time connection acquisition (fresh vs pooled) and write throughput
+    (row-by-row vs bulk_insert vs upsert) against a scratch table
+
+    Returns:
+        {'database', 'connect_ms': {...}, 'rows_per_second': {...}}
+    """
+    url = database_url(url)
+    engine = get_engine(url)
+    connect = _raw_connect(url)
+
+    def fresh():
+        conn = connect()
+        conn.cursor().execute('SELECT 1')
+        conn.close()
+
+    def pooled():
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+
+    pooled()  # warm the pool
+    report = {
+        'database': make_url(url).get_backend_name(),
+        'connect_ms': {
+            'fresh': round(1000 * _timed(fresh, acquisitions) / acquisitions, 3),
+            'pooled': round(1000 * _timed(pooled, acquisitions) / acquisitions, 3),
+        },
+        'rows_per_second': {},
+    }
+
+    data = [{'id': i, 'title': f'Bench contract {i}', 'agency': f'Agency {i % 50}', 'value': str(i * 10)}
+            for i in range(rows)]
+    pk = 'INTEGER PRIMARY KEY' if report['database'] == 'sqlite' else 'BIGINT PRIMARY KEY'
+
+    def reset():
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS {BENCH_TABLE}'))
+            conn.execute(text(f'CREATE TABLE {BENCH_TABLE} (id {pk}, title TEXT, agency TEXT, value TEXT)'))
+
+    def row_by_row():
+        with engine.begin() as conn:
+            for row in data:
+                conn.execute(text(f'INSERT INTO {BENCH_TABLE} (id, title, agency, value) '
+                                  f'VALUES (:id, :title, :agency, :value)'), row)
+
+    def bulk():
+        with engine.begin() as conn:
+            bulk_insert(conn, BENCH_TABLE, data)
+
+    def upsert_existing():
+        with engine.begin() as conn:
+            upsert(conn, BENCH_TABLE, data, conflict=('id',), update=('title', 'value'))
+
+    try:
+        for name, write, fresh_table in [('row_by_row', row_by_row, True), ('bulk_insert', bulk, True),
+                                         ('upsert_update', upsert_existing, False)]:
+            if fresh_table:
+                reset()
+            seconds = _timed(write, 1)
+            report['rows_per_second'][name] = round(rows / seconds) if seconds else None
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS {BENCH_TABLE}'))
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"database: {report['database']}", 'connection acquisition (ms):']
+    lines += [f"  {name:<14}{ms:>10.3f}" for name, ms in report['connect_ms'].items()]
+    lines.append('write throughput (rows/s):')
+    lines += [f"  {name:<14}{rate:>10}" for name, rate in report['rows_per_second'].items()]
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark pooled connections and bulk writes')
+    parser.add_argument('--url', help='Database URL (default: DATABASE_URL or the app SQLite file)')
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--acquisitions', type=int, default=500)
+    parser.add_argument('--json', action='store_true', help='Print the raw report as JSON')
+    args = parser.parse_args(argv)
+    report = benchmark(args.url, rows=args.rows, acquisitions=args.acquisitions)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,331 @@
+"""Content-addressed text extraction for uploaded RFPs and capability statements.
+
+Uploads used to be parsed with PyPDF2/python-docx inside the request. A large
+solicitation blocked the web worker, and the same file was parsed again at
+every proposal wizard step. Here each file is keyed by its SHA-256 and parsed
+once by a background worker. Per-page text and a section index are stored,
+so later steps only read rows.
+
+Usage:
+from document_extraction import DocumentExtractor
+extractor = DocumentExtractor(lambda: db.engine, store_dir)
+sha = extractor.submit(path, filename)       # returns immediately
+info = extractor.wait(sha, timeout=3)        # optional bounded wait
+text = extractor.text(sha)                   # pages extracted so far, in order
+extractor.sections(sha)                      # [{'title', 'page', 'offset'}]
+extractor.owned_by(sha, user_id)             # after submit(path, filename, owner=user_id)
+
+Design:
+- ``submit`` copies the file into ``store_dir/<sha[:2]>/<sha><ext>``, so the
+  worker never depends on a temp upload that the request deletes.
+- ``document_extractions`` holds one row per hash with status
+  (pending/processing/done/failed), page counters and the JSON section index.
+- ``document_pages`` holds one row per page. Pages are committed as they are
+  parsed, so readers can use the first pages of a 200-page RFP before the
+  rest is done.
+- A worker claims a document with a conditional UPDATE. Several processes
+  can submit the same file, but only one parses it. A claim is a lease that
+  every committed page renews; once it is ``stale_seconds`` old (the worker
+  died or restarted), the next ``submit`` or ``status`` poll in any process
+  claims the document again and resumes it.
+- ``document_owners`` records who submitted each hash. The same bytes
+  uploaded by two users share one extraction, so callers check ``owned_by``
+  before showing a document to a user.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+
+CHUNK_CHARS = 4000  # pseudo-page size for DOCX/TXT, which have no pages
+HASH_BLOCK = 1 << 20
+
+_HEADING_PATTERNS = [
+    re.compile(r'^(?:SECTION|PART|ARTICLE|ATTACHMENT|EXHIBIT|APPENDIX)\s+[A-Z0-9IVX]+\b.{0,100}$', re.I),
+    re.compile(r'^[A-Z]?\d{0,2}(?:\.\d+)+\.?\s+[A-Z][^.]{2,100}$'),
+    re.compile(r'^[A-Z]\.\s?\d*\s+[A-Z][A-Za-z].{2,100}$'),
+    re.compile(r'^\d{1,2}\.\s+[A-Z][^.]{2,100}$'),
+    re.compile(r'^[A-Z][A-Z0-9 ,&/\-]{5,80}$'),
+]
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _chunks(content: str, size: int) -> Iterator[str]:
+    """Split text into ~size-character pieces on line boundaries."""
+    buf, length = [], 0
+    for line in content.splitlines():
+        buf.append(line)
+        length += len(line) + 1
+        if length >= size:
+            yield '\n'.join(buf)
+            buf, length = [], 0
+    if buf:
+        yield '\n'.join(buf)
+
+
+def iter_pages(path: str, ext: str, chunk_chars: int = CHUNK_CHARS) -> Iterator[str]:
+    """Yield the text of each page (PDF) or chunk (DOCX/TXT) as it is parsed."""
+    ext = (ext or '').lower()
+    if ext == '.pdf':
+        import PyPDF2  # type: ignore
+        with open(path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            for page in reader.pages:
+                try:
+                    yield page.extract_text() or ''
+                except Exception:
+                    yield ''
+    elif ext == '.docx':
+        from docx import Document
+        doc = Document(path)
+        yield from _chunks('\n'.join(p.text for p in doc.paragraphs), chunk_chars)
+    else:
+        with open(path, 'r', errors='ignore') as f:
+            yield from _chunks(f.read(), chunk_chars)
+
+
+def pdf_page_count(path: str) -> Optional[int]:
+    try:
+        import PyPDF2  # type: ignore
+        with open(path, 'rb') as f:
+            return len(PyPDF2.PdfReader(f).pages)
+    except Exception:
+        return None
+
+
+def find_sections(page_text: str, page_no: int) -> List[Dict]:
+    """Heading-like lines on a page: "SECTION C", "3.2 Technical Approach", ALL CAPS titles."""
+    sections, offset = [], 0
+    for line in page_text.splitlines(keepends=True):
+        stripped = line.strip()
+        if 3 <= len(stripped) <= 120 and any(p.match(stripped) for p in _HEADING_PATTERNS):
+            sections.append({'title': stripped, 'page': page_no, 'offset': offset + line.index(stripped[0])})
+        offset += len(line)
+    return sections
+
+
+class DocumentExtractor:
+    DOCS_TABLE = 'document_extractions'
+    PAGES_TABLE = 'document_pages'
+    OWNERS_TABLE = 'document_owners'
+
+    def __init__(self, engine_getter: Callable, store_dir: str, max_workers: int = 2,
+                 stale_seconds: float = 600.0, chunk_chars: int = CHUNK_CHARS,
+                 clock: Callable[[], float] = time.time):
+        self._engine_getter = engine_getter
+        self.store_dir = store_dir
+        self.stale_seconds = stale_seconds
+        self.chunk_chars = chunk_chars
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='doc-extract')
+        self._ready = False
+
+    @property
+    def engine(self):
+        return self._engine_getter()
+
+    def ensure_tables(self):
+        if self._ready:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(text(f'''CREATE TABLE IF NOT EXISTS {self.DOCS_TABLE} (
+                sha256 VARCHAR(64) PRIMARY KEY,
+                original_filename TEXT,
+                stored_path TEXT,
+                ext VARCHAR(10),
+                file_size INTEGER,
+                status VARCHAR(12) NOT NULL DEFAULT 'pending',
+                page_count INTEGER,
+                pages_done INTEGER NOT NULL DEFAULT 0,
+                sections TEXT,
+                error TEXT,
+                created_at REAL,
+                updated_at REAL
+            )'''))
+            conn.execute(text(f'''CREATE TABLE IF NOT EXISTS {self.PAGES_TABLE} (
+                sha256 VARCHAR(64) NOT NULL,
+                page_no INTEGER NOT NULL,
+                text TEXT,
+                PRIMARY KEY (sha256, page_no)
+            )'''))
+            conn.execute(text(f'''CREATE TABLE IF NOT EXISTS {self.OWNERS_TABLE} (
+                sha256 VARCHAR(64) NOT NULL,
+                owner VARCHAR(64) NOT NULL,
+                PRIMARY KEY (sha256, owner)
+            )'''))
+        self._ready = True
+
+    # -- submission -----------------------------------------------------
+
+    def _blob_path(self, sha: str, ext: str) -> str:
+        return os.path.join(self.store_dir, sha[:2], f'{sha}{ext}')
+
+    def submit(self, path: str, filename: Optional[str] = None, owner=None) -> str:
+        """Register a file (for ``owner``) and schedule extraction if it was never parsed. Returns its SHA-256."""
+        self.ensure_tables()
+        ext = os.path.splitext(filename or path)[1].lower()
+        sha = file_sha256(path)
+        blob = self._blob_path(sha, ext)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            tmp = f'{blob}.{os.getpid()}.{threading.get_ident()}.tmp'
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, blob)
+        now = self._clock()
+        with self.engine.begin() as conn:
+            conn.execute(text(f'''INSERT INTO {self.DOCS_TABLE}
+                (sha256, original_filename, stored_path, ext, file_size, status, created_at, updated_at)
+                VALUES (:s, :fn, :p, :ext, :sz, 'pending', :now, :now)
+                ON CONFLICT (sha256) DO NOTHING'''),
+                {'s': sha, 'fn': filename, 'p': blob, 'ext': ext, 'sz': os.path.getsize(blob), 'now': now})
+            if owner is not None:
+                conn.execute(text(f'''INSERT INTO {self.OWNERS_TABLE} (sha256, owner) VALUES (:s, :o)
+                    ON CONFLICT (sha256, owner) DO NOTHING'''), {'s': sha, 'o': str(owner)})
+        self._start(sha, retry_failed=True)
+        return sha
+
+    def _claim(self, sha: str, retry_failed: bool = False) -> bool:
+        now = self._clock()
+        claimable = "'pending', 'failed'" if retry_failed else "'pending'"
+        with self.engine.begin() as conn:
+            result = conn.execute(text(f'''UPDATE {self.DOCS_TABLE}
+                SET status = 'processing', updated_at = :now, error = NULL
+                WHERE sha256 = :s AND (status IN ({claimable})
+                    OR (status = 'processing' AND updated_at < :stale))'''),
+                {'s': sha, 'now': now, 'stale': now - self.stale_seconds})
+            return result.rowcount == 1
+
+    def _start(self, sha: str, retry_failed: bool = False):
+        if self._claim(sha, retry_failed):
+            # Resolve the engine here: the getter may need the caller's app context
+            self._executor.submit(self._extract, sha, self.engine)
+
+    def owned_by(self, sha: Optional[str], owner) -> bool:
+        """Whether ``owner`` submitted this document."""
+        if not sha or owner is None:
+            return False
+        self.ensure_tables()
+        with self.engine.connect() as conn:
+            return conn.execute(text(f'SELECT 1 FROM {self.OWNERS_TABLE} WHERE sha256 = :s AND owner = :o'),
+                                {'s': sha, 'o': str(owner)}).fetchone() is not None
+
+    # -- worker -----------------------------------------------------------
+
+    def _extract(self, sha: str, engine=None):
+        engine = engine or self.engine
+        try:
+            with engine.connect() as conn:
+                row = conn.execute(text(f'SELECT stored_path, ext FROM {self.DOCS_TABLE} WHERE sha256 = :s'),
+                                   {'s': sha}).fetchone()
+            path, ext = row[0], row[1]
+            page_count = pdf_page_count(path) if ext == '.pdf' else None
+            with engine.begin() as conn:
+                conn.execute(text(f'DELETE FROM {self.PAGES_TABLE} WHERE sha256 = :s'), {'s': sha})
+                conn.execute(text(f'UPDATE {self.DOCS_TABLE} SET page_count = :pc, pages_done = 0 WHERE sha256 = :s'),
+                             {'s': sha, 'pc': page_count})
+            sections: List[Dict] = []
+            page_no = 0
+            for page_no, page_text in enumerate(iter_pages(path, ext, self.chunk_chars), start=1):
+                sections.extend(find_sections(page_text, page_no))
+                with engine.begin() as conn:
+                    conn.execute(text(f'INSERT INTO {self.PAGES_TABLE} (sha256, page_no, text) VALUES (:s, :n, :t)'),
+                                 {'s': sha, 'n': page_no, 't': page_text})
+                    conn.execute(text(f'UPDATE {self.DOCS_TABLE} SET pages_done = :n, updated_at = :now WHERE sha256 = :s'),
+                                 {'s': sha, 'n': page_no, 'now': self._clock()})
+            with engine.begin() as conn:
+                conn.execute(text(f'''UPDATE {self.DOCS_TABLE}
+                    SET status = 'done', page_count = :n, sections = :sec, updated_at = :now
+                    WHERE sha256 = :s'''),
+                    {'s': sha, 'n': page_no, 'sec': json.dumps(sections), 'now': self._clock()})
+        except Exception as e:
+            print(f"⚠️ Document extraction failed ({sha[:12]}): {e}")
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"UPDATE {self.DOCS_TABLE} SET status = 'failed', error = :e, updated_at = :now WHERE sha256 = :s"),
+                                 {'s': sha, 'e': str(e)[:500], 'now': self._clock()})
+            except Exception:
+                pass
+
+    # -- readers ----------------------------------------------------------
+
+    def status(self, sha: Optional[str]) -> Optional[Dict]:
+        """Extraction progress. A pending document or an expired claim is taken over here."""
+        if not sha:
+            return None
+        self.ensure_tables()
+        with self.engine.connect() as conn:
+            row = conn.execute(text(f'''SELECT sha256, original_filename, status, page_count, pages_done, error,
+                updated_at FROM {self.DOCS_TABLE} WHERE sha256 = :s'''), {'s': sha}).mappings().fetchone()
+        if not row:
+            return None
+        info = dict(row)
+        if info['status'] == 'pending' or (info['status'] == 'processing'
+                                           and (info['updated_at'] or 0) < self._clock() - self.stale_seconds):
+            self._start(sha)
+        return info
+
+    def wait(self, sha: Optional[str], timeout: float = 0.0, poll: float = 0.1) -> Optional[Dict]:
+        """Status after waiting up to ``timeout`` seconds for extraction to finish."""
+        deadline = time.monotonic() + timeout
+        while True:
+            info = self.status(sha)
+            if not info or info['status'] in ('done', 'failed') or time.monotonic() >= deadline:
+                return info
+            time.sleep(poll)
+
+    def pages(self, sha: Optional[str]) -> List[str]:
+        if not sha:
+            return []
+        self.ensure_tables()
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(f'SELECT text FROM {self.PAGES_TABLE} WHERE sha256 = :s ORDER BY page_no'),
+                                {'s': sha}).fetchall()
+        return [r[0] or '' for r in rows]
+
+    def _extracted_chars(self, sha: str) -> int:
+        with self.engine.connect() as conn:
+            return int(conn.execute(text(f'SELECT COALESCE(SUM(LENGTH(text)), 0) FROM {self.PAGES_TABLE} WHERE sha256 = :s'),
+                                    {'s': sha}).scalar() or 0)
+
+    def text(self, sha: Optional[str], max_chars: Optional[int] = None, wait: float = 0.0) -> str:
+        """Joined text of the pages extracted so far.
+
+        With ``wait``, block up to that many seconds until extraction finishes
+        or, when ``max_chars`` is given, until that much text is available.
+        """
+        if sha and wait:
+            deadline = time.monotonic() + wait
+            while True:
+                info = self.status(sha)
+                if not info or info['status'] in ('done', 'failed') or time.monotonic() >= deadline:
+                    break
+                if max_chars and self._extracted_chars(sha) >= max_chars:
+                    break
+                time.sleep(0.1)
+        joined = '\n'.join(self.pages(sha))
+        return joined[:max_chars] if max_chars else joined
+
+    def sections(self, sha: Optional[str]) -> List[Dict]:
+        if not sha:
+            return []
+        self.ensure_tables()
+        with self.engine.connect() as conn:
+            raw = conn.execute(text(f'SELECT sections FROM {self.DOCS_TABLE} WHERE sha256 = :s'),
+                               {'s': sha}).scalar()
+        return json.loads(raw) if raw else []
@@ -0,0 +1,222 @@
+"""Per-user entitlement snapshots for gated routes.
+
+Gated routes used to query ``leads.subscription_status`` (and often the latest
+active ``subscriptions.plan_type``) on every request. This module computes a
+user's plan, limits and feature flags once and caches the result together
+with a per-user version number.
+
+Usage:
+from entitlements import EntitlementService
+service = EntitlementService(lambda: db.engine)
+ent = service.get(user_id, is_admin=session.get('is_admin'))
+if ent.allows('quick_wins'):
+    ...
+service.bump(email=user_email)   # after any subscription change
+
+Design:
+- ``entitlement_versions`` holds one integer per user; every subscription
+  change (webhooks, admin toggles, cancellations) bumps it.
+- Each worker keeps a bounded LRU of snapshots. A snapshot is trusted for
+  ``recheck_seconds``; after that a single primary-key lookup of the version
+  decides whether the cached snapshot is still valid. Bumps made in the same
+  worker drop the cached entry immediately.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Optional
+
+from sqlalchemy import text
+
+FREE_LEAD_LIMIT = 3
+
+# Feature flags granted per tier
+PAID_FEATURES = frozenset({
+    'unlimited_leads', 'quick_wins', 'premium_leads', 'search', 'contact_details', 'export',
+})
+ANNUAL_FEATURES = PAID_FEATURES | frozenset({'historical_awards'})
+
+
+@dataclass(frozen=True)
+class Entitlements:
+    user_id: Optional[int]
+    is_admin: bool = False
+    subscription_status: str = 'free'
+    plan_type: Optional[str] = None
+    version: int = 0
+    features: FrozenSet[str] = frozenset()
+    limits: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def is_paid(self) -> bool:
+        return self.is_admin or self.subscription_status == 'paid'
+
+    @property
+    def is_annual(self) -> bool:
+        return 'historical_awards' in self.features
+
+    def allows(self, feature: str) -> bool:
+        return self.is_admin or feature in self.features
+
+    def limit(self, name: str, default: int = 0) -> int:
+        """Numeric limit for ``name``; -1 means unlimited."""
+        return self.limits.get(name, default)
+
+
+ANONYMOUS = Entitlements(user_id=None, limits={'free_lead_views': FREE_LEAD_LIMIT})
+
+
+def build_entitlements(user_id: Optional[int], is_admin: bool, subscription_status: Optional[str],
+                       plan_type: Optional[str], version: int = 0) -> Entitlements:
+    """Derive feature flags and limits from the raw subscription fields."""
+    status = subscription_status or 'free'
+    plan = (plan_type or '').lower() or None
+    if is_admin:
+        features = ANNUAL_FEATURES
+    elif status == 'paid':
+        features = ANNUAL_FEATURES if plan and plan.startswith('annual') else PAID_FEATURES
+    else:
+        features = frozenset()
+    unlimited = is_admin or status == 'paid'
+    limits = {'free_lead_views': -1 if unlimited else FREE_LEAD_LIMIT}
+    return Entitlements(user_id, bool(is_admin), status, plan, version, features, limits)
+
+
+class EntitlementService:
+    VERSION_TABLE = 'entitlement_versions'
+
+    def __init__(self, engine_getter: Callable, recheck_seconds: float = 30.0,
+                 max_entries: int = 5000, clock: Callable[[], float] = time.monotonic):
+        self._engine_getter = engine_getter
+        self.recheck_seconds = recheck_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._cache: 'OrderedDict[int, tuple]' = OrderedDict()  # user_id -> (snapshot, checked_at)
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @property
+    def engine(self):
+        return self._engine_getter()
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(text(f'''CREATE TABLE IF NOT EXISTS {self.VERSION_TABLE} (
+                user_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )'''))
+        self._ready = True
+
+    def _read_version(self, conn, user_id: int) -> int:
+        row = conn.execute(text(f'SELECT version FROM {self.VERSION_TABLE} WHERE user_id = :u'),
+                           {'u': user_id}).fetchone()
+        return int(row[0]) if row else 0
+
+    def _compute(self, user_id: int, is_admin: bool) -> Entitlements:
+        with self.engine.connect() as conn:
+            version = self._read_version(conn, user_id)
+            row = conn.execute(text('SELECT email, subscription_status FROM leads WHERE id = :u'),
+                               {'u': user_id}).fetchone()
+            if not row:
+                return build_entitlements(user_id, is_admin, 'free', None, version)
+            email, status = row[0], row[1]
+            plan = None
+            if email and status == 'paid':
+                try:
+                    plan_row = conn.execute(text(
+                        "SELECT plan_type FROM subscriptions WHERE email = :email AND status = 'active' "
+                        "ORDER BY created_at DESC LIMIT 1"
+                    ), {'email': email}).fetchone()
+                    plan = plan_row[0] if plan_row else None
+                except Exception:
+                    conn.rollback()  # plan_type column missing on older databases
+                if not plan:
+                    try:
+                        plan_row = conn.execute(text('SELECT subscription_plan FROM leads WHERE id = :u'),
+                                                {'u': user_id}).fetchone()
+                        plan = plan_row[0] if plan_row else None
+                    except Exception:
+                        conn.rollback()
+        return build_entitlements(user_id, is_admin, status, plan, version)
+
+    def get(self, user_id: Optional[int], is_admin: bool = False) -> Entitlements:
+        """Return the cached snapshot for ``user_id``, revalidating it when due."""
+        if not user_id:
+            return build_entitlements(None, True, 'paid', None) if is_admin else ANONYMOUS
+        is_admin = bool(is_admin)
+        now = self._clock()
+        with self._lock:
+            cached = self._cache.get(user_id)
+        try:
+            self._ensure_table()
+            if cached:
+                snapshot, checked_at = cached
+                if snapshot.is_admin == is_admin:
+                    if now - checked_at < self.recheck_seconds:
+                        return snapshot
+                    with self.engine.connect() as conn:
+                        current = self._read_version(conn, user_id)
+                    if current == snapshot.version:
+                        self._store(user_id, snapshot, now)
+                        return snapshot
+            snapshot = self._compute(user_id, is_admin)
+        except Exception as e:
+            print(f"⚠️ Entitlement lookup failed for user {user_id}: {e}")
+            if cached:
+                return cached[0]
+            return build_entitlements(user_id, is_admin, 'free', None)
+        self._store(user_id, snapshot, now)
+        return snapshot
+
+    def _store(self, user_id: int, snapshot: Entitlements, checked_at: float):
+        with self._lock:
+            self._cache[user_id] = (snapshot, checked_at)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None):
+        with self._lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def bump(self, user_id: Optional[int] = None, email: Optional[str] = None,
+             paypal_subscription_id: Optional[str] = None) -> int:
+        """Bump the entitlement version of every user matching the given key.
+
+        Call after the subscription change has been committed. Returns the
+        number of users bumped; never raises.
+        """
+        if user_id is not None:
+            where, params = 'id = :v', {'v': user_id}
+        elif email:
+            where, params = 'LOWER(email) = LOWER(:v)', {'v': email}
+        elif paypal_subscription_id:
+            where, params = 'paypal_subscription_id = :v', {'v': paypal_subscription_id}
+        else:
+            return 0
+        try:
+            self._ensure_table()
+            with self.engine.begin() as conn:
+                ids = [r[0] for r in conn.execute(text(f'SELECT id FROM leads WHERE {where}'), params)]
+                for uid in ids:
+                    conn.execute(text(f'''INSERT INTO {self.VERSION_TABLE} (user_id, version, updated_at)
+                        VALUES (:u, 1, CURRENT_TIMESTAMP)
+                        ON CONFLICT (user_id) DO UPDATE SET
+                            version = {self.VERSION_TABLE}.version + 1,
+                            updated_at = CURRENT_TIMESTAMP'''), {'u': uid})
+        except Exception as e:
+            print(f"⚠️ Entitlement version bump failed: {e}")
+            self.invalidate()
+            return 0
+        for uid in ids:
+            self.invalidate(uid)
+        return len(ids)
@@ -0,0 +1,161 @@
+"""Shared lxml-backed HTML parsing for every scraper.
+
+Scrapers used to build ``BeautifulSoup(content, 'html.parser')`` trees, the
+slowest parser bs4 offers, for pages they then walked once. This module gives
+them two ways onto lxml:
+
+- ``make_soup`` keeps the BeautifulSoup API (``find_all``, ``get_text``) but
+  builds the tree with lxml, optionally keeping only listing regions
+  (``only=LISTING_REGIONS`` or any ``SoupStrainer``). Existing scrapers migrate
+  by swapping one call.
+- ``parse_html`` returns a plain lxml document for new code, queried with
+  ``css``/``xpath`` (selectors compiled once and cached) and ``text_of``.
+  city_portals and aviation_scraper_v2 parse this way.
+
+Usage:
+from html_parsing import LISTING_REGIONS, css, make_soup, parse_html, text_of
+soup = make_soup(response.content, only=LISTING_REGIONS)
+doc = parse_html(response.content, base_url=response.url)
+for row in css(doc, 'table.bids tr'):
+    print(text_of(row))
+
+Run ``python html_parsing.py [cassette.json ...]`` to time the parsers per page
+on recorded portals (see http_cassette.py); without cassettes a generated
+listing page is used.
+"""
+from __future__ import annotations
+
+import glob
+import os
+from functools import lru_cache
+from typing import Iterable, List, Optional, Union
+
+import lxml.html
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+
+Content = Union[bytes, str]
+
+# Containers that hold bid/contract listings on procurement portals. Parsing
+# only these skips navigation chrome, scripts and footers.
+LISTING_REGIONS = SoupStrainer(['table', 'ul', 'ol', 'article', 'main', 'section'])
+
+_NOISE = etree.XPath('//script|//style|//noscript|//comment()')
+
+
+def _as_bytes(content: Content) -> bytes:
+    # lxml rejects str input carrying an XML encoding declaration
+    return content.encode('utf-8') if isinstance(content, str) else content
+
+
+def make_soup(content: Content, only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """BeautifulSoup tree built by lxml; ``only`` restricts it to matching regions."""
+    return BeautifulSoup(content or b'', 'lxml', parse_only=only)
+
+
+def parse_html(content: Content, base_url: Optional[str] = None,
+               drop_noise: bool = True) -> Optional[lxml.html.HtmlElement]:
+    """Parse a page with lxml, or return None for an empty or unparseable body.
+
+    With ``base_url`` every link is made absolute. ``drop_noise`` removes
+    script/style/noscript and comments so ``text_of`` sees only visible text.
+    """
+    if not content:
+        return None
+    try:
+        doc = lxml.html.fromstring(_as_bytes(content))
+    except (ValueError, etree.ParserError):
+        return None
+    if drop_noise:
+        for node in _NOISE(doc):
+            node.drop_tree()
+    if base_url:
+        doc.make_links_absolute(base_url, handle_failures='ignore')
+    return doc
+
+
+@lru_cache(maxsize=256)
+def _compiled_css(selector: str) -> etree.XPath:
+    from lxml.cssselect import CSSSelector
+    return CSSSelector(selector, translator='html')
+
+
+@lru_cache(maxsize=256)
+def _compiled_xpath(expression: str) -> etree.XPath:
+    return etree.XPath(expression)
+
+
+def css(node, selector: str) -> List[lxml.html.HtmlElement]:
+    """Elements under ``node`` matching a CSS selector."""
+    return _compiled_css(selector)(node)
+
+
+def xpath(node, expression: str) -> list:
+    """Results of an XPath expression evaluated at ``node``."""
+    return _compiled_xpath(expression)(node)
+
+
+def first(node, selector: str) -> Optional[lxml.html.HtmlElement]:
+    found = css(node, selector)
+    return found[0] if found else None
+
+
+def text_of(node) -> str:
+    """Visible text of a node with whitespace runs collapsed."""
+    return ' '.join(node.text_content().split()) if node is not None else ''
+
+
+def _recorded_pages(paths: Iterable[str]) -> List[bytes]:
+    from http_cassette import Cassette, entry_content
+
+    pages = []
+    for path in paths:
+        for entry in Cassette(path).interactions:
+            content_type = {k.lower(): v for k, v in entry.get('headers', {}).items()}.get('content-type', '')
+            if entry['status'] == 200 and 'html' in content_type:
+                pages.append(entry_content(entry))
+    return pages
+
+
+def _generated_page(rows: int = 400) -> bytes:
+    nav = ''.join(f'<li><a href="/nav/{i}">Menu item {i}</a></li>' for i in range(60))
+    body = ''.join(f'<tr><td><a href="/bid/{i}">Solicitation {i}: custodial services</a></td>'
+                   f'<td>Public Works</td><td>12/{i % 28 + 1:02d}/2025</td></tr>' for i in range(rows))
+    return (f'<html><head><script>{"var x = 1;" * 200}</script></head><body><nav><ul>{nav}</ul></nav>'
+            f'<table class="bids">{body}</table><footer>{"<p>Footer text</p>" * 50}</footer></body></html>').encode()
+
+
+def benchmark(paths: Optional[List[str]] = None, repeat: int = 3) -> dict:
+    """Per-page parse + link extraction time for each parser, best of ``repeat``."""
+    import time
+
+    if paths is None:
+        from scraper_benchmark import CASSETTE_DIR
+        paths = sorted(glob.glob(os.path.join(CASSETTE_DIR, '*.json')))
+    pages = _recorded_pages(paths) or [_generated_page()]
+
+    variants = (
+        ('bs4_html_parser', lambda p: BeautifulSoup(p, 'html.parser').find_all('a')),
+        ('bs4_lxml', lambda p: make_soup(p).find_all('a')),
+        ('bs4_lxml_regions', lambda p: make_soup(p, only=LISTING_REGIONS).find_all('a')),
+        ('lxml', lambda p: css(parse_html(p), 'a')),
+    )
+    timings = {}
+    for name, fn in variants:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for page in pages:
+                fn(page)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = round(best * 1000 / len(pages), 3)
+    return {'pages': len(pages), 'ms_per_page': timings}
+
+
+if __name__ == '__main__':
+    import sys
+
+    result = benchmark(sys.argv[1:] or None)
+    print(f"{result['pages']} pages")
+    for name, ms in result['ms_per_page'].items():
+        print(f"  {name:<18} {ms:>9.3f} ms/page")
@@ -0,0 +1,290 @@
+"""Record/replay HTTP responses so scrapers can run without the network.
+
+A cassette is a JSON file of real responses captured once from the live
+portals. In replay mode every request a scraper makes is answered from the
+cassette, so parsers can be exercised, tested and benchmarked offline with the
+exact bytes the portals served.
+
+Usage:
+from http_cassette import use_cassette
+with use_cassette('benchmarks/cassettes/demandstar.json', mode='record'):
+    DemandStarScraper().scrape()          # live; responses are saved on exit
+with use_cassette('benchmarks/cassettes/demandstar.json') as cassette:
+    DemandStarScraper().scrape()          # offline
+print(cassette.stats)
+
+Design:
+- ``use_cassette`` patches ``requests.Session.get_adapter``, so ``requests.get``,
+  every scraper session and ``BaseScraper.fetch_page`` go through the cassette
+  without code changes. When httpx is installed its sync and async transports
+  are patched the same way. ``attach`` wires a single session instead.
+- Requests match on method, URL (query sorted) and a hash of the body. A query
+  that differs only in volatile values falls back to method + host + path.
+  Repeated requests are answered in recorded order; the last answer repeats.
+- A replay miss raises ``CassetteMiss`` (a ``requests.ConnectionError``), which
+  the scrapers already treat as a failed fetch.
+- Credentials never reach the file: ``REDACTED_PARAMS`` query values are masked
+  and ``Set-Cookie`` is dropped along with transport-level headers.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+try:
+    import httpx
+except ImportError:  # httpx is optional; only requests sessions are patched then
+    httpx = None
+
+MODES = ('replay', 'record')
+REDACTED_PARAMS = {'api_key', 'apikey', 'key', 'token', 'access_token', 'client_secret'}
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length', 'set-cookie'}
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Raised in replay mode for a request the cassette has no answer for."""
+
+
+def normalize_url(url: str) -> str:
+    """URL with sorted query parameters and credentials masked."""
+    parts = urlsplit(url)
+    query = sorted((k, '***' if k.lower() in REDACTED_PARAMS else v)
+                   for k, v in parse_qsl(parts.query, keep_blank_values=True))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or '/', urlencode(query), ''))
+
+
+def _body_hash(body: Any) -> str:
+    if not body:
+        return ''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    elif not isinstance(body, (bytes, bytearray)):
+        return 'stream'
+    return hashlib.sha1(body).hexdigest()
+
+
+def _path_key(method: str, url: str) -> Tuple[str, str]:
+    parts = urlsplit(url)
+    return method.upper(), f"{parts.netloc.lower()}{parts.path or '/'}"
+
+
+class Cassette:
+    """Recorded interactions for one scraper run plus replay/record counters."""
+
+    def __init__(self, path: str, mode: str = 'replay'):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.interactions: List[Dict[str, Any]] = []
+        self.stats = {'hits': 0, 'misses': 0, 'recorded': 0, 'bytes': 0, 'http_seconds': 0.0,
+                      'http_cpu_seconds': 0.0}
+        self._lock = threading.Lock()
+        self._exact: Dict[Tuple[str, str, str], List[int]] = defaultdict(list)
+        self._loose: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        self._played: Dict[Any, int] = defaultdict(int)
+        if mode == 'replay' or os.path.exists(path):
+            self.load()
+
+    def load(self):
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        for entry in data.get('interactions', []):
+            self._index(entry)
+
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                       'interactions': self.interactions}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def _index(self, entry: Dict[str, Any]):
+        position = len(self.interactions)
+        self.interactions.append(entry)
+        self._exact[(entry['method'], entry['url'], entry['body_sha1'])].append(position)
+        self._loose[_path_key(entry['method'], entry['url'])].append(position)
+
+    def _next(self, key, positions: List[int]) -> Dict[str, Any]:
+        served = self._played[key]
+        self._played[key] = served + 1
+        return self.interactions[positions[min(served, len(positions) - 1)]]
+
+    def play(self, method: str, url: str, body: Any) -> Dict[str, Any]:
+        """Recorded response for a request, or ``CassetteMiss``."""
+        method, normalized = method.upper(), normalize_url(url)
+        exact = (method, normalized, _body_hash(body))
+        with self._lock:
+            if self._exact.get(exact):
+                entry = self._next(exact, self._exact[exact])
+            elif self._loose.get(_path_key(method, normalized)):
+                loose = _path_key(method, normalized)
+                entry = self._next(loose, self._loose[loose])
+            else:
+                self.stats['misses'] += 1
+                raise CassetteMiss(f"{method} {normalized} is not in cassette {self.path}")
+            self.stats['hits'] += 1
+            self.stats['bytes'] += len(entry.get('body') or entry.get('body_base64') or '')
+        return entry
+
+    def record(self, method: str, url: str, body: Any, status: int, reason: str,
+               headers: Dict[str, str], content: bytes):
+        entry = {
+            'method': method.upper(),
+            'url': normalize_url(url),
+            'body_sha1': _body_hash(body),
+            'status': status,
+            'reason': reason or '',
+            'headers': {k: v for k, v in headers.items() if k.lower() not in DROPPED_HEADERS},
+        }
+        try:
+            entry['body'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_base64'] = base64.b64encode(content).decode('ascii')
+        with self._lock:
+            self._index(entry)
+            self.stats['recorded'] += 1
+            self.stats['bytes'] += len(content)
+
+    def add_http_time(self, seconds: float, cpu_seconds: float = 0.0):
+        with self._lock:
+            self.stats['http_seconds'] += seconds
+            self.stats['http_cpu_seconds'] += cpu_seconds
+
+
+def entry_content(entry: Dict[str, Any]) -> bytes:
+    if 'body_base64' in entry:
+        return base64.b64decode(entry['body_base64'])
+    return (entry.get('body') or '').encode('utf-8')
+
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter that answers from, or records into, a cassette."""
+
+    def __init__(self, cassette: Cassette, real: Optional[BaseAdapter] = None):
+        super().__init__()
+        self.cassette = cassette
+        self.real = real or HTTPAdapter()
+
+    def send(self, request, **kwargs):
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            if self.cassette.mode == 'record':
+                response = self.real.send(request, **kwargs)
+                self.cassette.record(request.method, request.url, request.body, response.status_code,
+                                     response.reason, dict(response.headers), response.content)
+                return response
+            return self._build(request, self.cassette.play(request.method, request.url, request.body))
+        finally:
+            self.cassette.add_http_time(time.perf_counter() - started,
+                                        time.thread_time() - cpu_started)
+
+    @staticmethod
+    def _build(request, entry: Dict[str, Any]) -> requests.Response:
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason', '')
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry_content(entry)
+        response.url, response.request = request.url, request
+        return response
+
+    def close(self):
+        self.real.close()
+
+
+def attach(session: requests.Session, cassette: Cassette) -> requests.Session:
+    """Route one session's http(s) traffic through ``cassette``."""
+    for prefix in ('https://', 'http://'):
+        session.mount(prefix, CassetteAdapter(cassette, session.get_adapter(prefix)))
+    return session
+
+
+def _patch_httpx(cassette: Cassette) -> List[Tuple[Any, str, Any]]:
+    if httpx is None:
+        return []
+
+    def build(request, entry):
+        return httpx.Response(entry['status'], headers=entry.get('headers', {}),
+                              content=entry_content(entry), request=request)
+
+    def record(request, response):
+        cassette.record(request.method, str(request.url), request.content, response.status_code,
+                        response.reason_phrase, dict(response.headers), response.content)
+
+    original_sync = httpx.HTTPTransport.handle_request
+    original_async = httpx.AsyncHTTPTransport.handle_async_request
+
+    def handle_request(transport, request):
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            if cassette.mode == 'record':
+                response = original_sync(transport, request)
+                response.read()
+                record(request, response)
+                return response
+            return build(request, cassette.play(request.method, str(request.url), request.read()))
+        finally:
+            cassette.add_http_time(time.perf_counter() - started,
+                                   time.thread_time() - cpu_started)
+
+    async def handle_async_request(transport, request):
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            if cassette.mode == 'record':
+                response = await original_async(transport, request)
+                await response.aread()
+                record(request, response)
+                return response
+            return build(request, cassette.play(request.method, str(request.url), await request.aread()))
+        finally:
+            cassette.add_http_time(time.perf_counter() - started,
+                                   time.thread_time() - cpu_started)
+
+    httpx.HTTPTransport.handle_request = handle_request
+    httpx.AsyncHTTPTransport.handle_async_request = handle_async_request
+    return [(httpx.HTTPTransport, 'handle_request', original_sync),
+            (httpx.AsyncHTTPTransport, 'handle_async_request', original_async)]
+
+
+@contextmanager
+def use_cassette(path: str, mode: str = 'replay') -> Iterator[Cassette]:
+    """Send all requests/httpx traffic in the block through the cassette at ``path``.
+
+    In record mode the cassette is written on exit, even if the block raised,
+    so a partial sweep still leaves the pages it reached.
+    """
+    cassette = Cassette(path, mode)
+    original_get_adapter = requests.Session.get_adapter
+
+    def get_adapter(session, url):
+        return CassetteAdapter(cassette, original_get_adapter(session, url))
+
+    requests.Session.get_adapter = get_adapter
+    restore = _patch_httpx(cassette)
+    try:
+        yield cassette
+    finally:
+        requests.Session.get_adapter = original_get_adapter
+        for owner, name, original in restore:
+            setattr(owner, name, original)
+        if mode == 'record':
+            cassette.save()
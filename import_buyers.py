@@ -4,9 +4,10 @@ Import 600 buyers from buyers_list.txt directly into database
 Uses Flask app context for proper database connection
 """
 
-from app import app, db
+from app import app, db, bulk_importer
 from sqlalchemy import text
 from quick_research_contacts import generate_contacts
+from datetime import datetime, timedelta
 import sys
 
 def import_buyers():
@@ -44,74 +45,54 @@ def import_buyers():
             print(f"📥 Processing {len(lines)} buyer entries...")
             print("=" * 80)
             
-            inserted = 0
-            errors = []
+            deadline = (datetime.now() + timedelta(days=90)).strftime('%Y-%m-%d')
+            posted_date = datetime.now().strftime('%Y-%m-%d')
             
-            for idx, line in enumerate(lines, 1):
-                try:
+            def rows():
+                for line in lines:
                     parts = line.strip().split('\t')
-                    if len(parts) >= 2:
-                        vendor_name = parts[0]
-                        state = parts[-1]  # Last column is state code
-                        
-                        # Generate contact info
-                        contact_info = generate_contacts(vendor_name, state)
-                        
-                        # Map to SQL parameters
-                        from datetime import datetime, timedelta
-                        deadline = (datetime.now() + timedelta(days=90)).strftime('%Y-%m-%d')
-                        
-                        params = {
-                            'title': f'{vendor_name} - Janitorial Supply Contract',
-                            'agency': vendor_name,
-                            'location': contact_info['address'],
-                            'category': parts[2] if len(parts) > 2 else 'General Supplies',  # product_category
-                            'value': contact_info['estimated_value'],
-                            'deadline': deadline,
-                            'description': contact_info['description'],
-                            'url': contact_info['website'],
-                            'contact_name': contact_info['contact_name'],
-                            'contact_email': contact_info['email'],
-                            'contact_phone': contact_info['phone'],
-                            'is_quick_win': True,
-                            'status': 'open',
-                            'posted_date': datetime.now().strftime('%Y-%m-%d')
-                        }
-                        
-                        # Insert into database
-                        db.session.execute(text('''
-                            INSERT INTO supply_contracts 
-                            (title, agency, location, product_category, estimated_value, bid_deadline, 
-                             description, website_url, contact_name, contact_email, contact_phone, 
-                             is_quick_win, status, posted_date)
-                            VALUES (:title, :agency, :location, :category, :value, :deadline,
-                                    :description, :url, :contact_name, :contact_email, :contact_phone,
-                                    :is_quick_win, :status, :posted_date)
-                        '''), params)
-                        
-                        inserted += 1
-                        
-                        # Progress indicator
-                        if inserted % 50 == 0:
-                            db.session.commit()
-                            print(f"✅ Inserted {inserted}/{len(lines)} records...")
-                            
-                except Exception as e:
-                    errors.append(f"Row {idx} ({vendor_name[:50]}): {str(e)}")
-                    continue
+                    if len(parts) < 2:
+                        continue
+                    vendor_name = parts[0]
+                    state = parts[-1]  # Last column is state code
+                    
+                    # Generate contact info
+                    contact_info = generate_contacts(vendor_name, state)
+                    yield {
+                        'title': f'{vendor_name} - Janitorial Supply Contract',
+                        'agency': vendor_name,
+                        'location': contact_info['address'],
+                        'product_category': parts[2] if len(parts) > 2 else 'General Supplies',
+                        'estimated_value': contact_info['estimated_value'],
+                        'bid_deadline': deadline,
+                        'description': contact_info['description'],
+                        'website_url': contact_info['website'],
+                        'contact_name': contact_info['contact_name'],
+                        'contact_email': contact_info['email'],
+                        'contact_phone': contact_info['phone'],
+                        'is_quick_win': True,
+                        'status': 'open',
+                        'posted_date': posted_date
+                    }
             
-            # Final commit
-            db.session.commit()
+            def progress(result):
+                print(f"✅ Processed {result['rows']} records ({result['inserted']} inserted)...")
+            
+            # Chunked multi-row inserts; buyers already in the table are skipped
+            result = bulk_importer.import_rows('supply_contracts', rows(), progress=progress)
+            errors = result['errors']
             
             print("=" * 80)
-            print(f"\n🎉 SUCCESS: Inserted {inserted} supply contracts!")
+            print(f"\n🎉 SUCCESS: Inserted {result['inserted']} supply contracts!")
+            if result['duplicates']:
+                print(f"   ({result['duplicates']} already present, skipped)")
             
             if errors:
-                print(f"\n⚠️  {len(errors)} errors encountered:")
+                print(f"\n⚠️  {result['failed']} errors encountered:")
                 for error in errors[:10]:  # Show first 10 errors
-                    print(f"   - {error}")
-                if len(errors) > 10:
-                    print(f"   ... and {len(errors) - 10} more")
+                    print(f"   - Entry {error['row']}: {error['error']}")
+                if result['failed'] > 10:
+                    print(f"   ... and {result['failed'] - 10} more")
             
             # Verify count
             total = db.session.execute(text('SELECT COUNT(*) FROM supply_contracts')).scalar()
@@ -1,46 +1,46 @@
+"""International cleaning-opportunity sources for the supply Quick Wins.
+
+Each source is an adapter in ``SOURCE_ADAPTERS``. ``fetch_international_cleaning``
+runs them concurrently: one slow feed no longer holds up the others, and
+each adapter has its own timeout and circuit breaker. Feeds are fetched
+with conditional GETs (ETag / Last-Modified). Items already seen in a
+feed's previous response reuse their normalized record, so only new
+entries are mapped and classified. ``get_source_metrics()`` reports
+per-source latency, yield and breaker state.
+"""
 import os
 import logging
-import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from relevance import is_cleaning_related
+
 logger = logging.getLogger(__name__)
 
 UK_BASE = "https://www.contractsfinder.service.gov.uk"
 UK_SEARCH = UK_BASE + "/Published/Notices/OCDS/Search"
 
-# NAICS 561720 (Janitorial Services), 561790 (Other Services to Buildings), 561730 (Landscaping/Snow Removal)
-# Keywords that match cleaning/janitorial industry scope
-CLEANING_KEYWORDS = {
-    'cleaning', 'janitorial', 'custodial', 'housekeeping', 'sanitation',
-    'disinfection', 'hygiene', 'floor care', 'carpet cleaning', 'window cleaning',
-    'waste management', 'trash removal', 'facilities maintenance', 'building services',
-    'porter services', 'environmental services', 'grounds maintenance', 'snow removal'
-}
-
-# Exclude contracts that are NOT physical cleaning (IT, software, data, consulting, etc.)
-EXCLUDE_KEYWORDS = {
-    'data cleaning', 'data model', 'data management', 'database', 'data warehouse',
-    'software', 'IT services', 'cloud', 'digital', 'cyber', 'information technology',
-    'consulting', 'advisory', 'analytics', 'data science', 'machine learning',
-    'development', 'programming', 'coding', 'application', 'system integration',
-    'enterprise data', 'data governance', 'metadata', 'data quality',
-    'business intelligence', 'reporting', 'dashboard', 'ETL', 'data pipeline'
-}
+MAX_WORKERS = 8
+BREAKER_THRESHOLD = 3     # consecutive failures that open a source's breaker
+BREAKER_COOLDOWN = 300    # seconds an open breaker skips its source
+
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
+session.mount('https://', HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
 
 def _matches_cleaning_naics(text: str) -> bool:
-    """Check if text contains cleaning/janitorial keywords matching NAICS 561720/561790/561730.
+    """Check if text describes physical cleaning work (NAICS 561720/561790 scope).
     Excludes IT/software/data contracts that use 'cleaning' in non-physical context.
     """
-    if not text:
-        return False
-    text_lower = text.lower()
-    
-    # First check if any exclude keywords are present (IT, data, software)
-    if any(keyword in text_lower for keyword in EXCLUDE_KEYWORDS):
-        return False
-    
-    # Then check if valid cleaning keywords are present
-    return any(keyword in text_lower for keyword in CLEANING_KEYWORDS)
+    return is_cleaning_related(text)
 
 
 def _safe_get(d: dict, path: list, default=None):
@@ -101,160 +101,178 @@ def _normalize_deadline(raw: Any) -> str:
     return s  # Return original for visibility if we couldn't parse
 
 
+@dataclass
+class _FeedState:
+    etag: str = ''
+    last_modified: str = ''
+    order: List[str] = field(default_factory=list)
+    records: Dict[str, Optional[Dict[str, Any]]] = field(default_factory=dict)  # None = filtered out
+
+
+_feeds: Dict[str, _FeedState] = {}
+_feeds_lock = threading.Lock()
+
+
+def _fetch_feed(url: str, params: Optional[dict], timeout: float,
+                extract: Callable[[requests.Response], list],
+                key_of: Callable[[Any], str],
+                normalize: Callable[[Any], Optional[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Conditional GET of a feed; normalizes only items missing from its previous response.
+
+    Returns (records, new_item_count). Raises on network/HTTP errors.
+    """
+    feed_key = url + ('?' + urlencode(sorted(params.items())) if params else '')
+    with _feeds_lock:
+        state = _feeds.get(feed_key)
+    headers = {}
+    if state is not None:
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+
+    r = session.get(url, params=params, headers=headers, timeout=timeout)
+    if r.status_code == 304 and state is not None:
+        return [dict(state.records[k]) for k in state.order if state.records[k]], 0
+    r.raise_for_status()
+
+    previous = state.records if state is not None else {}
+    fresh = _FeedState(r.headers.get('ETag', ''), r.headers.get('Last-Modified', ''))
+    new = 0
+    for item in extract(r):
+        key = key_of(item)
+        if key in fresh.records:
+            continue
+        if key in previous:
+            fresh.records[key] = previous[key]
+        else:
+            fresh.records[key] = normalize(item)
+            new += 1
+        fresh.order.append(key)
+    with _feeds_lock:
+        _feeds[feed_key] = fresh
+    return [dict(fresh.records[k]) for k in fresh.order if fresh.records[k]], new
+
+
 def fetch_uk_contracts_finder_cleaning(limit: int = 50) -> List[Dict[str, Any]]:
     """
     Fetch open cleaning-related opportunities from UK Contracts Finder (OCDS Search API).
     Filters for NAICS 561720/561790/561730-related services (janitorial, facilities, building services).
     Returns a list of records mapped to supply_contracts fields.
     """
+    try:
+        return _fetch_uk(limit)[0]
+    except Exception:
+        logger.exception("UK CF: fetch failed")
+        return []
+
+
+def _uk_params(limit: int) -> Dict[str, str]:
     # Search with broader keywords to catch all cleaning/janitorial opportunities
     # UK Contracts Finder doesn't support multiple keywords, so we'll search and filter
-    params = {
+    return {
         "limit": str(max(1, min(limit, 200))),
         "noticetype": "Opportunity",
         "keyword": "cleaning janitorial",  # Combined search
     }
-    try:
-        r = requests.get(UK_SEARCH, params=params, timeout=20)
-        r.raise_for_status()
-        data = r.json()
-        releases = data.get("releases", [])
-        mapped = []
-        for rel in releases:
-            tender = rel.get("tender", {})
-            parties = rel.get("parties", [])
-            buyer = rel.get("buyer") or {}
-
-            # Contact details from buyer party if present
-            contact_name = None
-            contact_email = None
-            contact_phone = None
-            agency = buyer.get("name")
-
-            if parties:
-                for p in parties:
-                    roles = set(p.get("roles", []))
-                    if "buyer" in roles:
-                        agency = agency or p.get("name")
-                        cp = p.get("contactPoint", {})
-                        contact_name = cp.get("name") or contact_name
-                        contact_email = cp.get("email") or contact_email
-                        contact_phone = cp.get("telephone") or contact_phone
-                        if agency and (contact_email or contact_phone):
-                            break
-
-            # Value and deadlines
-            raw_value = _safe_get(tender, ["value", "amount"])  # could be str/float/int/None
-            value = _normalize_value(raw_value)
-            if value is None:
-                logger.warning("UK CF: missing/ambiguous value for '%s' (id=%s)", tender.get("title"), rel.get("id"))
-
-            raw_deadline = _safe_get(tender, ["tenderPeriod", "endDate"]) or ""
-            bid_deadline = _normalize_deadline(raw_deadline)
-            if not bid_deadline:
-                logger.warning("UK CF: missing deadline for '%s' (id=%s)", tender.get("title"), rel.get("id"))
-
-            # Main URL - prefer a document URL
-            url = None
-            docs = []
-            for sec in (rel.get("tender", {}), ) + tuple(rel.get(k, {}) for k in ("awards", "contracts")):
-                if isinstance(sec, dict):
-                    docs = sec.get("documents", []) or docs
-                elif isinstance(sec, list):
-                    for e in sec:
-                        docs = e.get("documents", []) or docs
-            if docs:
-                url = docs[0].get("url")
-            if not url:
-                # Fallback to Contracts Finder Notice if id present
-                rel_id = rel.get("id")
-                if rel_id:
-                    url = f"{UK_BASE}/Notice/{rel_id}"
-            if not url:
-                logger.warning("UK CF: missing URL for '%s' (id=%s)", tender.get("title"), rel.get("id"))
-
-            location = "United Kingdom"
-            # Try to derive region/country if present
-            items = tender.get("items", [])
-            if items:
-                addr = _safe_get(items[0], ["deliveryAddresses", 0, "countryName"]) or _safe_get(items[0], ["deliveryAddresses", 0, "region"]) 
-                if addr:
-                    location = addr
-
-            mapped.append({
-                "title": tender.get("title") or "Cleaning Services / Supplies",
-                "agency": agency or "UK Public Sector",
-                "location": location,
-                "product_category": "Cleaning Services",
-                "estimated_value": str(value) if value is not None else None,
-                "bid_deadline": bid_deadline or None,
-                "description": tender.get("description") or "",
-                "website_url": url,
-                "is_small_business_set_aside": False,
-                "contact_name": contact_name,
-                "contact_email": contact_email,
-                "contact_phone": contact_phone,
-                "is_quick_win": True,
-                "status": tender.get("status") or "open",
-                "posted_date": rel.get("date") or "",
-            })
-        
-        # Filter to only include contracts matching NAICS 561720/561790/561730 keywords
-        filtered_mapped = []
-        for contract in mapped:
-            title = contract.get('title', '')
-            description = contract.get('description', '')
-            combined_text = f"{title} {description}"
-            
-            if _matches_cleaning_naics(combined_text):
-                filtered_mapped.append(contract)
-            else:
-                logger.info("UK CF: Filtered out non-NAICS match: '%s'", title)
-        
-        logger.info("UK CF: Fetched %d contracts, %d match NAICS cleaning codes", len(mapped), len(filtered_mapped))
-        return filtered_mapped
-    except Exception:
-        logger.exception("UK CF: fetch failed")
-        return []
 
 
-def fetch_international_cleaning(limit_per_source: int = 50) -> List[Dict[str, Any]]:
-    """Aggregate multiple international sources (currently UK Contracts Finder)."""
-    results: List[Dict[str, Any]] = []
-    try:
-        results += fetch_uk_contracts_finder_cleaning(limit=limit_per_source)
-    except Exception:
-        pass
-    # Generic RSS adapter (configurable via env var INTERNATIONAL_RSS_URL)
-    try:
-        results += fetch_rss_cleaning_generic(limit=limit_per_source)
-    except Exception:
-        logger.warning("Generic RSS adapter failed; continuing with other sources")
-    # Optional: Multiple generic RSS URLs (comma-separated)
-    try:
-        urls = os.environ.get('INTERNATIONAL_RSS_URLS', '')
-        if urls:
-            for u in [s.strip() for s in urls.split(',') if s.strip()]:
-                results += fetch_rss_from_url(u, source_label='International RSS')[:limit_per_source]
-    except Exception:
-        logger.warning("Multi RSS adapter failed; continuing")
-    # Placeholder for additional sources to keep adapters small and testable
-    try:
-        results += fetch_canada_pspc_cleaning(limit=limit_per_source)
-    except Exception:
-        # Keep failure isolated to the source adapter
-        logger.warning("Canada PSPC adapter failed; continuing with other sources")
-    # EU RSS (if configured)
-    try:
-        results += fetch_rss_eu_cleaning(limit=limit_per_source)
-    except Exception:
-        logger.warning("EU RSS adapter failed; continuing")
-    # Canada RSS (if configured)
-    try:
-        results += fetch_rss_canada_cleaning(limit=limit_per_source)
-    except Exception:
-        logger.warning("Canada RSS adapter failed; continuing")
-    return results
+def _map_uk_release(rel: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map one OCDS release to a supply_contracts record; None when not cleaning work."""
+    tender = rel.get("tender", {})
+    parties = rel.get("parties", [])
+    buyer = rel.get("buyer") or {}
+
+    # Contact details from buyer party if present
+    contact_name = None
+    contact_email = None
+    contact_phone = None
+    agency = buyer.get("name")
+
+    if parties:
+        for p in parties:
+            roles = set(p.get("roles", []))
+            if "buyer" in roles:
+                agency = agency or p.get("name")
+                cp = p.get("contactPoint", {})
+                contact_name = cp.get("name") or contact_name
+                contact_email = cp.get("email") or contact_email
+                contact_phone = cp.get("telephone") or contact_phone
+                if agency and (contact_email or contact_phone):
+                    break
+
+    # Value and deadlines
+    raw_value = _safe_get(tender, ["value", "amount"])  # could be str/float/int/None
+    value = _normalize_value(raw_value)
+    if value is None:
+        logger.warning("UK CF: missing/ambiguous value for '%s' (id=%s)", tender.get("title"), rel.get("id"))
+
+    raw_deadline = _safe_get(tender, ["tenderPeriod", "endDate"]) or ""
+    bid_deadline = _normalize_deadline(raw_deadline)
+    if not bid_deadline:
+        logger.warning("UK CF: missing deadline for '%s' (id=%s)", tender.get("title"), rel.get("id"))
+
+    # Main URL - prefer a document URL
+    url = None
+    docs = []
+    for sec in (rel.get("tender", {}), ) + tuple(rel.get(k, {}) for k in ("awards", "contracts")):
+        if isinstance(sec, dict):
+            docs = sec.get("documents", []) or docs
+        elif isinstance(sec, list):
+            for e in sec:
+                docs = e.get("documents", []) or docs
+    if docs:
+        url = docs[0].get("url")
+    if not url:
+        # Fallback to Contracts Finder Notice if id present
+        rel_id = rel.get("id")
+        if rel_id:
+            url = f"{UK_BASE}/Notice/{rel_id}"
+    if not url:
+        logger.warning("UK CF: missing URL for '%s' (id=%s)", tender.get("title"), rel.get("id"))
+
+    location = "United Kingdom"
+    # Try to derive region/country if present
+    items = tender.get("items", [])
+    if items:
+        addr = _safe_get(items[0], ["deliveryAddresses", 0, "countryName"]) or _safe_get(items[0], ["deliveryAddresses", 0, "region"]) 
+        if addr:
+            location = addr
+
+    contract = {
+        "title": tender.get("title") or "Cleaning Services / Supplies",
+        "agency": agency or "UK Public Sector",
+        "location": location,
+        "product_category": "Cleaning Services",
+        "estimated_value": str(value) if value is not None else None,
+        "bid_deadline": bid_deadline or None,
+        "description": tender.get("description") or "",
+        "website_url": url,
+        "is_small_business_set_aside": False,
+        "contact_name": contact_name,
+        "contact_email": contact_email,
+        "contact_phone": contact_phone,
+        "is_quick_win": True,
+        "status": tender.get("status") or "open",
+        "posted_date": rel.get("date") or "",
+    }
+
+    # Filter to only include contracts matching NAICS 561720/561790/561730 keywords
+    if not _matches_cleaning_naics(f"{contract['title']} {contract['description']}"):
+        logger.info("UK CF: Filtered out non-NAICS match: '%s'", contract['title'])
+        return None
+    return contract
+
+
+def _fetch_uk(limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+    records, new = _fetch_feed(
+        UK_SEARCH, _uk_params(limit), 20,
+        extract=lambda r: r.json().get("releases", []),
+        key_of=lambda rel: f"{rel.get('id')}|{rel.get('date')}",
+        normalize=_map_uk_release,
+    )
+    logger.info("UK CF: %d contracts match NAICS cleaning codes (%d new releases)", len(records), new)
+    return records, new
 
 
 def fetch_canada_pspc_cleaning(limit: int = 50) -> List[Dict[str, Any]]:
@@ -272,6 +290,57 @@ def fetch_canada_pspc_cleaning(limit: int = 50) -> List[Dict[str, Any]]:
     return []
 
 
+def _rss_entries(r: requests.Response, limit: int) -> list:
+    import xml.etree.ElementTree as ET
+
+    root = ET.fromstring(r.content)
+    # Support both RSS 2.0 and Atom-ish structures
+    channel = root.find('channel')
+    entries = channel.findall('item') if channel is not None else root.findall('.//item')
+    return entries[:max(1, min(limit, 200))]
+
+
+def _rss_key(it) -> str:
+    return ((it.findtext('guid') or '').strip() or (it.findtext('link') or '').strip()
+            or f"{(it.findtext('title') or '').strip()}|{(it.findtext('pubDate') or '').strip()}")
+
+
+def _map_rss_item(it, source_label: str) -> Optional[Dict[str, Any]]:
+    title = (it.findtext('title') or '').strip()
+    link = (it.findtext('link') or '').strip()
+    description = (it.findtext('description') or '').strip()
+    pub_date = (it.findtext('pubDate') or '').strip()
+    # Filter by NAICS-relevant cleaning keywords
+    if not _matches_cleaning_naics(f"{title}\n{description}"):
+        return None
+    return {
+        'title': title or 'Cleaning Services / Supplies',
+        'agency': source_label,
+        'location': 'International',
+        'product_category': 'Cleaning Services',
+        'estimated_value': None,
+        'bid_deadline': _normalize_deadline(pub_date),
+        'description': description,
+        'website_url': link or None,
+        'is_small_business_set_aside': False,
+        'contact_name': None,
+        'contact_email': None,
+        'contact_phone': None,
+        'is_quick_win': True,
+        'status': 'open',
+        'posted_date': pub_date,
+    }
+
+
+def _fetch_rss(url: str, source_label: str, limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+    if not url:
+        return [], 0
+    return _fetch_feed(url, None, 20,
+                       extract=lambda r: _rss_entries(r, limit),
+                       key_of=_rss_key,
+                       normalize=lambda it: _map_rss_item(it, source_label))
+
+
 def fetch_rss_cleaning_generic(limit: int = 50) -> List[Dict[str, Any]]:
     """Fetch cleaning-related opportunities from a generic RSS feed.
 
@@ -279,70 +348,11 @@ def fetch_rss_cleaning_generic(limit: int = 50) -> List[Dict[str, Any]]:
     The function filters items whose title or description contains 'cleaning'.
     This is a flexible, real adapter that can be pointed at any public procurement RSS.
     """
-    import xml.etree.ElementTree as ET
-
     rss_url = os.environ.get('INTERNATIONAL_RSS_URL', '').strip()
     if not rss_url:
         logger.info("Generic RSS adapter disabled (INTERNATIONAL_RSS_URL not set)")
         return []
-
-    try:
-        r = requests.get(rss_url, timeout=20)
-        r.raise_for_status()
-        content = r.content
-        try:
-            root = ET.fromstring(content)
-        except Exception as e:
-            logger.exception("RSS parse error")
-            return []
-
-        ns = {
-            'rss': 'http://purl.org/rss/1.0/'
-        }
-        items: List[Dict[str, Any]] = []
-
-        # Support both RSS 2.0 and Atom-ish structures
-        channel = root.find('channel')
-        if channel is not None:
-            entries = channel.findall('item')
-        else:
-            entries = root.findall('.//item')
-
-        for it in entries[:max(1, min(limit, 200))]:
-            title = (it.findtext('title') or '').strip()
-            link = (it.findtext('link') or '').strip()
-            description = (it.findtext('description') or '').strip()
-            pub_date = (it.findtext('pubDate') or '').strip()
-
-            text_blob = f"{title}\n{description}"
-            # Filter by NAICS-relevant cleaning keywords
-            if not _matches_cleaning_naics(text_blob):
-                # Skip non-NAICS cleaning entries
-                continue
-
-            mapped: Dict[str, Any] = {
-                'title': title or 'Cleaning Services / Supplies',
-                'agency': 'International Procurement',
-                'location': 'International',
-                'product_category': 'Cleaning Services',
-                'estimated_value': None,
-                'bid_deadline': _normalize_deadline(pub_date),
-                'description': description,
-                'website_url': link or None,
-                'is_small_business_set_aside': False,
-                'contact_name': None,
-                'contact_email': None,
-                'contact_phone': None,
-                'is_quick_win': True,
-                'status': 'open',
-                'posted_date': pub_date,
-            }
-            items.append(mapped)
-
-        return items
-    except Exception:
-        logger.exception("Generic RSS fetch failed")
-        return []
+    return fetch_rss_from_url(rss_url, source_label='International Procurement', limit=limit)
 
 
 def fetch_rss_from_url(url: str, source_label: str = 'RSS', limit: int = 50) -> List[Dict[str, Any]]:
@@ -350,42 +360,8 @@ def fetch_rss_from_url(url: str, source_label: str = 'RSS', limit: int = 50) ->
 
     Filters by 'clean' in title/description.
     """
-    import xml.etree.ElementTree as ET
-    if not url:
-        return []
     try:
-        r = requests.get(url, timeout=20)
-        r.raise_for_status()
-        root = ET.fromstring(r.content)
-        channel = root.find('channel')
-        entries = channel.findall('item') if channel is not None else root.findall('.//item')
-        out: List[Dict[str, Any]] = []
-        for it in entries[:max(1, min(limit, 200))]:
-            title = (it.findtext('title') or '').strip()
-            link = (it.findtext('link') or '').strip()
-            description = (it.findtext('description') or '').strip()
-            pub_date = (it.findtext('pubDate') or '').strip()
-            # Filter by NAICS-relevant cleaning keywords
-            if not _matches_cleaning_naics(f"{title}\n{description}"):
-                continue
-            out.append({
-                'title': title or 'Cleaning Services / Supplies',
-                'agency': source_label,
-                'location': 'International',
-                'product_category': 'Cleaning Services',
-                'estimated_value': None,
-                'bid_deadline': _normalize_deadline(pub_date),
-                'description': description,
-                'website_url': link or None,
-                'is_small_business_set_aside': False,
-                'contact_name': None,
-                'contact_email': None,
-                'contact_phone': None,
-                'is_quick_win': True,
-                'status': 'open',
-                'posted_date': pub_date,
-            })
-        return out
+        return _fetch_rss(url, source_label, limit)[0]
     except Exception:
         logger.exception("RSS fetch failed for %s", url)
         return []
@@ -408,3 +384,162 @@ def fetch_rss_canada_cleaning(limit: int = 50) -> List[Dict[str, Any]]:
     if not url:
         return []
     return fetch_rss_from_url(url, source_label='Canada Procurement', limit=limit)
+
+
+# ---------------------------------------------------------------------------
+# Adapter registry
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SourceAdapter:
+    """One international source. ``fetch(limit)`` returns (records, new_item_count) and raises on failure."""
+    name: str
+    fetch: Callable[[int], Tuple[List[Dict[str, Any]], int]]
+    timeout: float = 25.0
+
+
+def _env_rss(var: str, source_label: str) -> Callable[[int], Tuple[List[Dict[str, Any]], int]]:
+    return lambda limit: _fetch_rss(os.environ.get(var, '').strip(), source_label, limit)
+
+
+SOURCE_ADAPTERS: List[SourceAdapter] = [
+    SourceAdapter('uk_contracts_finder', _fetch_uk),
+    # Generic RSS adapter (configurable via env var INTERNATIONAL_RSS_URL)
+    SourceAdapter('rss_generic', _env_rss('INTERNATIONAL_RSS_URL', 'International Procurement')),
+    SourceAdapter('canada_pspc', lambda limit: (fetch_canada_pspc_cleaning(limit), 0)),
+    SourceAdapter('eu_rss', _env_rss('EU_RSS_URL', 'EU Procurement')),
+    SourceAdapter('canada_rss', _env_rss('CANADA_RSS_URL', 'Canada Procurement')),
+]
+
+
+def _active_adapters() -> List[SourceAdapter]:
+    """Registered adapters plus one per INTERNATIONAL_RSS_URLS entry (comma-separated), after rss_generic."""
+    urls = [u.strip() for u in os.environ.get('INTERNATIONAL_RSS_URLS', '').split(',') if u.strip()]
+    extra = [SourceAdapter(f'rss:{u}', lambda limit, u=u: _fetch_rss(u, 'International RSS', limit))
+             for u in urls]
+    return SOURCE_ADAPTERS[:2] + extra + SOURCE_ADAPTERS[2:]
+
+
+class CircuitBreaker:
+    """Skips a source for ``cooldown`` seconds after ``threshold`` consecutive failures."""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'open' if time.monotonic() - self.opened_at < self.cooldown else 'half_open'
+
+    def allow(self) -> bool:
+        return self.state != 'open'
+
+    def record(self, ok: bool):
+        if ok:
+            self.failures, self.opened_at = 0, None
+            return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()  # a failed half-open trial re-opens it
+
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='intl-source')
+_state_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_running: Dict[str, Any] = {}
+_metrics: Dict[str, Dict[str, Any]] = {}
+
+
+def _record(name: str, outcome: str, seconds: float = 0.0, items: int = 0, new: int = 0, error: str = ''):
+    with _state_lock:
+        m = _metrics.setdefault(name, {'calls': 0, 'ok': 0, 'failures': 0, 'timeouts': 0, 'skipped': 0,
+                                       'total_seconds': 0.0, 'total_items': 0, 'total_new': 0})
+        m['last_outcome'] = outcome
+        m['last_run'] = datetime.utcnow().isoformat()
+        if outcome == 'skipped':
+            m['skipped'] += 1
+            return
+        if outcome == 'timeout':
+            # The fetch keeps running and records its own result when it finishes
+            m['timeouts'] += 1
+            m['last_error'] = error
+            return
+        m['calls'] += 1
+        m['total_seconds'] += seconds
+        m['last_seconds'] = round(seconds, 3)
+        if outcome == 'ok':
+            m['ok'] += 1
+            m['total_items'] += items
+            m['total_new'] += new
+            m['last_items'], m['last_new'], m['last_error'] = items, new, ''
+        else:
+            m['failures'] += 1
+            m['last_error'] = error[:200]
+
+
+def get_source_metrics() -> Dict[str, Dict[str, Any]]:
+    """Per-source counters: latency, records returned (yield), new items and breaker state."""
+    with _state_lock:
+        out = {}
+        for name, m in _metrics.items():
+            row = dict(m)
+            row['avg_seconds'] = round(m['total_seconds'] / m['calls'], 3) if m['calls'] else None
+            row['avg_items'] = round(m['total_items'] / m['ok'], 1) if m['ok'] else None
+            row['breaker'] = _breakers[name].state if name in _breakers else 'closed'
+            out[name] = row
+        return out
+
+
+def _run_adapter(adapter: SourceAdapter, limit: int):
+    started = time.monotonic()
+    try:
+        records, new = adapter.fetch(limit)
+    except Exception as e:
+        logger.warning("%s adapter failed; continuing with other sources: %s", adapter.name, e)
+        _record(adapter.name, 'error', time.monotonic() - started, error=str(e))
+        return None
+    _record(adapter.name, 'ok', time.monotonic() - started, len(records), new)
+    return records
+
+
+def fetch_international_cleaning(limit_per_source: int = 50) -> List[Dict[str, Any]]:
+    """Aggregate all registered international sources, concurrently.
+
+    Results keep registry order. A source that fails, times out or has an
+    open breaker contributes nothing; a timed-out fetch keeps running in
+    the background and is not started again until it finishes.
+    """
+    adapters = _active_adapters()
+    futures = {}
+    with _state_lock:
+        for adapter in adapters:
+            breaker = _breakers.setdefault(adapter.name, CircuitBreaker())
+            previous = _running.get(adapter.name)
+            if not breaker.allow() or (previous is not None and not previous.done()):
+                futures[adapter.name] = None
+                continue
+            future = _pool.submit(_run_adapter, adapter, limit_per_source)
+            _running[adapter.name] = future
+            futures[adapter.name] = (future, time.monotonic() + adapter.timeout)
+
+    results: List[Dict[str, Any]] = []
+    for adapter in adapters:
+        entry = futures[adapter.name]
+        if entry is None:
+            _record(adapter.name, 'skipped')
+            continue
+        future, deadline = entry
+        try:
+            records = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            logger.warning("%s adapter timed out after %ss", adapter.name, adapter.timeout)
+            _record(adapter.name, 'timeout', error='timeout')
+            records = None
+        with _state_lock:
+            _breakers[adapter.name].record(records is not None)
+        results += records or []
+    return results
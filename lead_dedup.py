@@ -0,0 +1,370 @@
+"""Cross-source near-duplicate detection for lead tables.
+
+The same opportunity regularly arrives from SAM.gov, USAspending, DemandStar
+RSS, city portal scrapes and manual uploads with slightly different titles or
+IDs, so exact ``state:solicitation_number`` matching misses most repeats.
+
+Usage:
+from lead_dedup import LeadDeduplicator
+dedup = LeadDeduplicator(lambda: db.engine)
+dedup.ingest_new()                       # after any ingest job
+sql += ' AND ' + dedup.exclude_duplicates_sql('federal_contracts')  # hide repeats
+
+from lead_dedup import cluster_records  # in-memory, e.g. one scraper batch
+clusters = cluster_records(contracts)
+
+Design:
+- Shingles: character 4-grams of normalized "title | agency | location".
+- MinHash signatures (64 permutations), banded LSH (16 bands x 4 rows) to
+  find candidates, then an estimated-Jaccard check (>= 0.6) plus state and
+  title-number guards.
+- Persistent state: ``lead_clusters`` (one canonical record per cluster),
+  ``lead_cluster_members`` (every source row with its URL and signature) and
+  ``lead_lsh_buckets`` (band hash -> member). Ingest is incremental: only
+  rows with an id above the last clustered id of each table are processed.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.6
+SHINGLE_SIZE = 4
+
+_PRIME = 4294967291  # largest prime below 2**32, keeps values in 8 hex digits
+_MAX_HASH = (1 << 32) - 1
+
+# Column mapping for each lead table; location may be a SQL expression.
+# Lower rank wins when choosing the canonical record of a cluster.
+LEAD_TABLES: Dict[str, Dict[str, Any]] = {
+    'federal_contracts': {'title': 'title', 'agency': 'agency', 'location': 'location',
+                          'url': 'sam_gov_url', 'rank': 0},
+    'contracts': {'title': 'title', 'agency': 'agency', 'location': 'location',
+                  'url': 'website_url', 'rank': 1},
+    'city_rfps': {'title': 'rfp_title', 'agency': 'department',
+                  'location': "city_name || ', ' || state_code", 'url': 'rfp_url', 'rank': 2},
+    'supply_contracts': {'title': 'title', 'agency': 'agency', 'location': 'location',
+                         'url': 'website_url', 'rank': 3},
+}
+
+_NOISE_WORDS = {
+    'the', 'of', 'and', 'for', 'a', 'an', 'to', 'in', 'at', 'on', 'rfp', 'rfq', 'ifb', 'bid',
+    'solicitation', 'request', 'proposal', 'proposals', 'quote', 'notice', 'services', 'service',
+}
+_ABBREVIATIONS = {'bldg': 'building', 'dept': 'department', 'svcs': 'services', 'svc': 'service',
+                  'maint': 'maintenance', 'co': 'county', 'cty': 'county'}
+_STATE_RE = re.compile(r'(?:^|[\s,])([A-Z]{2})(?:\s+\d{5}(?:-\d{4})?)?\s*$')
+
+
+def normalize_text(value: Optional[str]) -> str:
+    tokens = re.findall(r'[a-z0-9]+', (value or '').lower())
+    return ' '.join(_ABBREVIATIONS.get(t, t) for t in tokens if t not in _NOISE_WORDS)
+
+
+def extract_state(location: Optional[str]) -> Optional[str]:
+    match = _STATE_RE.search((location or '').strip())
+    return match.group(1) if match else None
+
+
+def title_numbers(title: Optional[str]) -> frozenset:
+    """Digit runs in a title (building, lot, fiscal year...); used as a hard guard."""
+    return frozenset(re.findall(r'\d+', title or ''))
+
+
+def shingle(title: Optional[str], agency: Optional[str] = '', location: Optional[str] = '') -> set:
+    """Character shingles of the normalized title+agency+location string."""
+    blob = ' | '.join(normalize_text(part) for part in (title, agency, location))
+    if len(blob) <= SHINGLE_SIZE:
+        return {blob} if blob.strip(' |') else set()
+    return {blob[i:i + SHINGLE_SIZE] for i in range(len(blob) - SHINGLE_SIZE + 1)}
+
+
+class MinHasher:
+    """Deterministic MinHash (stable across processes, unlike ``hash()``)."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingles: Iterable[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+        if not hashes:
+            return tuple([_MAX_HASH] * self.num_perm)
+        p = _PRIME
+        return tuple([min([(a * h + b) % p for h in hashes]) for a, b in self._params])
+
+
+def estimate_jaccard(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def band_keys(signature: Sequence[int], bands: int = BANDS) -> List[str]:
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        chunk = ','.join(str(v) for v in signature[band * rows:(band + 1) * rows])
+        digest = hashlib.blake2b(chunk.encode('ascii'), digest_size=8).hexdigest()
+        keys.append(f'{band}:{digest}')
+    return keys
+
+
+def encode_signature(signature: Sequence[int]) -> str:
+    return ''.join(f'{v:08x}' for v in signature)
+
+
+def decode_signature(value: str) -> Tuple[int, ...]:
+    return tuple(int(value[i:i + 8], 16) for i in range(0, len(value or ''), 8))
+
+
+def is_near_duplicate(sig_a, sig_b, state_a=None, state_b=None, numbers_a=frozenset(),
+                      numbers_b=frozenset(), threshold: float = SIMILARITY_THRESHOLD) -> bool:
+    """Similar signatures, no conflicting state, and no conflicting numbers
+    ("Building 12" vs "Building 14" are different opportunities)."""
+    if state_a and state_b and state_a != state_b:
+        return False
+    if numbers_a and numbers_b and not (numbers_a <= numbers_b or numbers_b <= numbers_a):
+        return False
+    if not sig_a or max(sig_a) == _MAX_HASH and min(sig_a) == _MAX_HASH:
+        return False  # nothing to compare (empty title/agency/location)
+    return estimate_jaccard(sig_a, sig_b) >= threshold
+
+
+class LSHIndex:
+    """In-memory banded LSH over MinHash signatures."""
+
+    def __init__(self, bands: int = BANDS):
+        self.bands = bands
+        self._buckets: Dict[str, List[Any]] = {}
+
+    def add(self, key: Any, signature: Sequence[int]):
+        for bk in band_keys(signature, self.bands):
+            self._buckets.setdefault(bk, []).append(key)
+
+    def candidates(self, signature: Sequence[int]) -> set:
+        found = set()
+        for bk in band_keys(signature, self.bands):
+            found.update(self._buckets.get(bk, ()))
+        return found
+
+
+def cluster_records(records: List[Dict[str, Any]], title_key: str = 'title', agency_key: str = 'agency',
+                    location_key: str = 'location', state_key: str = 'state',
+                    hasher: Optional[MinHasher] = None) -> List[List[int]]:
+    """Group near-duplicate dicts; returns clusters as lists of indexes (first = earliest)."""
+    hasher = hasher or MinHasher()
+    index = LSHIndex()
+    parent = list(range(len(records)))
+    signatures = []
+    states = []
+    numbers = []
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, rec in enumerate(records):
+        location = rec.get(location_key) or ''
+        sig = hasher.signature(shingle(rec.get(title_key), rec.get(agency_key), location))
+        state = (rec.get(state_key) or extract_state(location) or '').upper() or None
+        if state == 'US':  # scrapers' placeholder for "unknown state"
+            state = None
+        nums = title_numbers(rec.get(title_key))
+        signatures.append(sig)
+        states.append(state)
+        numbers.append(nums)
+        for j in index.candidates(sig):
+            if find(i) == find(j):
+                continue
+            if is_near_duplicate(sig, signatures[j], state, states[j], nums, numbers[j]):
+                ri, rj = find(i), find(j)
+                if ri != rj:
+                    parent[max(ri, rj)] = min(ri, rj)
+        index.add(i, sig)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(records)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+class LeadDeduplicator:
+    """Incremental, database-backed clustering across all lead tables."""
+
+    def __init__(self, engine_getter: Callable, tables: Optional[Dict[str, Dict[str, Any]]] = None,
+                 hasher: Optional[MinHasher] = None):
+        self._engine_getter = engine_getter
+        self.tables = tables or LEAD_TABLES
+        self.hasher = hasher or MinHasher()
+        self._ready = False
+
+    @property
+    def engine(self):
+        return self._engine_getter()
+
+    def ensure_tables(self):
+        if self._ready:
+            return
+        is_pg = self.engine.dialect.name == 'postgresql'
+        id_type = 'SERIAL PRIMARY KEY' if is_pg else 'INTEGER PRIMARY KEY AUTOINCREMENT'
+        with self.engine.begin() as conn:
+            conn.execute(text(f'''CREATE TABLE IF NOT EXISTS lead_clusters (
+                id {id_type},
+                canonical_table TEXT NOT NULL,
+                canonical_id INTEGER NOT NULL,
+                member_count INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )'''))
+            conn.execute(text('''CREATE TABLE IF NOT EXISTS lead_cluster_members (
+                lead_table TEXT NOT NULL,
+                lead_id INTEGER NOT NULL,
+                cluster_id INTEGER NOT NULL,
+                is_canonical INTEGER DEFAULT 0,
+                state TEXT,
+                title_numbers TEXT,
+                source_url TEXT,
+                signature TEXT NOT NULL,
+                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (lead_table, lead_id)
+            )'''))
+            conn.execute(text('''CREATE TABLE IF NOT EXISTS lead_lsh_buckets (
+                band_key TEXT NOT NULL,
+                lead_table TEXT NOT NULL,
+                lead_id INTEGER NOT NULL
+            )'''))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS idx_lead_lsh_band ON lead_lsh_buckets(band_key)'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS idx_lead_members_cluster ON lead_cluster_members(cluster_id)'))
+            conn.execute(text('CREATE INDEX IF NOT EXISTS idx_lead_members_dup ON lead_cluster_members(lead_table, is_canonical)'))
+        self._ready = True
+
+    def _last_clustered_id(self, conn, table: str) -> int:
+        row = conn.execute(text('SELECT MAX(lead_id) FROM lead_cluster_members WHERE lead_table = :t'),
+                           {'t': table}).fetchone()
+        return int(row[0] or 0)
+
+    def _fetch_new_rows(self, conn, table: str, after_id: int, limit: int):
+        cfg = self.tables[table]
+        return conn.execute(text(f'''SELECT id, {cfg['title']} AS title, {cfg['agency']} AS agency,
+                                            {cfg['location']} AS location, {cfg['url']} AS url
+                                     FROM {table} WHERE id > :after ORDER BY id LIMIT :lim'''),
+                            {'after': after_id, 'lim': limit}).fetchall()
+
+    def _find_cluster(self, conn, sig, state, numbers) -> Optional[int]:
+        keys = band_keys(sig)
+        params = {f'b{i}': k for i, k in enumerate(keys)}
+        placeholders = ', '.join(f':b{i}' for i in range(len(keys)))
+        rows = conn.execute(text(f'''SELECT DISTINCT m.cluster_id, m.signature, m.state, m.title_numbers
+                                     FROM lead_lsh_buckets b
+                                     JOIN lead_cluster_members m
+                                       ON m.lead_table = b.lead_table AND m.lead_id = b.lead_id
+                                     WHERE b.band_key IN ({placeholders})'''), params).fetchall()
+        best, best_score = None, 0.0
+        for cluster_id, other_sig, other_state, other_numbers in rows:
+            decoded = decode_signature(other_sig)
+            other_numbers = frozenset((other_numbers or '').split())
+            if not is_near_duplicate(sig, decoded, state, other_state, numbers, other_numbers):
+                continue
+            score = estimate_jaccard(sig, decoded)
+            if score > best_score:
+                best, best_score = cluster_id, score
+        return best
+
+    def _add_member(self, conn, table: str, row, sig, state) -> Tuple[int, bool]:
+        lead_id, url = row[0], row[4]
+        numbers = title_numbers(row[1])
+        cluster_id = self._find_cluster(conn, sig, state, numbers)
+        is_new = cluster_id is None
+        if is_new:
+            if self.engine.dialect.name == 'postgresql':
+                cluster_id = conn.execute(text('''INSERT INTO lead_clusters (canonical_table, canonical_id)
+                                                  VALUES (:t, :i) RETURNING id'''), {'t': table, 'i': lead_id}).scalar()
+            else:
+                cluster_id = conn.execute(text('''INSERT INTO lead_clusters (canonical_table, canonical_id)
+                                                  VALUES (:t, :i)'''), {'t': table, 'i': lead_id}).lastrowid
+            canonical = True
+        else:
+            current = conn.execute(text('SELECT canonical_table FROM lead_clusters WHERE id = :c'),
+                                   {'c': cluster_id}).fetchone()
+            current_rank = self.tables.get(current[0], {}).get('rank', 99) if current else 99
+            canonical = self.tables[table]['rank'] < current_rank
+            if canonical:
+                conn.execute(text('UPDATE lead_cluster_members SET is_canonical = 0 WHERE cluster_id = :c'),
+                             {'c': cluster_id})
+                conn.execute(text('''UPDATE lead_clusters SET canonical_table = :t, canonical_id = :i
+                                     WHERE id = :c'''), {'t': table, 'i': lead_id, 'c': cluster_id})
+            conn.execute(text('''UPDATE lead_clusters SET member_count = member_count + 1,
+                                     updated_at = CURRENT_TIMESTAMP WHERE id = :c'''), {'c': cluster_id})
+        conn.execute(text('''INSERT INTO lead_cluster_members
+                                 (lead_table, lead_id, cluster_id, is_canonical, state, title_numbers,
+                                  source_url, signature)
+                             VALUES (:t, :i, :c, :canon, :s, :n, :u, :sig)'''),
+                     {'t': table, 'i': lead_id, 'c': cluster_id, 'canon': 1 if canonical else 0,
+                      's': state, 'n': ' '.join(sorted(numbers)), 'u': url, 'sig': encode_signature(sig)})
+        conn.execute(text('''INSERT INTO lead_lsh_buckets (band_key, lead_table, lead_id)
+                             VALUES (:k, :t, :i)'''),
+                     [{'k': k, 't': table, 'i': lead_id} for k in band_keys(sig)])
+        return cluster_id, not is_new
+
+    def ingest_table(self, table: str, batch_size: int = 500, max_rows: Optional[int] = None) -> Dict[str, int]:
+        """Cluster rows of ``table`` that have not been clustered yet."""
+        self.ensure_tables()
+        stats = {'processed': 0, 'duplicates': 0}
+        while max_rows is None or stats['processed'] < max_rows:
+            with self.engine.begin() as conn:
+                after = self._last_clustered_id(conn, table)
+                rows = self._fetch_new_rows(conn, table, after, batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    sig = self.hasher.signature(shingle(row[1], row[2], row[3]))
+                    state = extract_state(row[3])
+                    _, duplicate = self._add_member(conn, table, row, sig, state)
+                    stats['processed'] += 1
+                    stats['duplicates'] += int(duplicate)
+            if len(rows) < batch_size:
+                break
+        return stats
+
+    def ingest_new(self, tables: Optional[Iterable[str]] = None, batch_size: int = 500) -> Dict[str, Dict[str, int]]:
+        """Incremental pass over every lead table; safe to call after each ingest job."""
+        results = {}
+        for table in (tables or self.tables):
+            try:
+                results[table] = self.ingest_table(table, batch_size=batch_size)
+            except Exception as e:
+                print(f"⚠️ Near-duplicate clustering failed for {table}: {e}")
+                results[table] = {'processed': 0, 'duplicates': 0, 'error': str(e)}
+        return results
+
+    def exclude_duplicates_sql(self, table: str, id_column: str = 'id') -> str:
+        """SQL predicate hiding non-canonical cluster members of ``table``."""
+        if table not in self.tables:
+            raise ValueError(f'Unknown lead table: {table}')
+        self.ensure_tables()
+        return (f"{id_column} NOT IN (SELECT lead_id FROM lead_cluster_members "
+                f"WHERE lead_table = '{table}' AND is_canonical = 0)")
+
+    def source_links(self, table: str, lead_id: int) -> List[Dict[str, Any]]:
+        """Every source row clustered with ``table``/``lead_id`` (canonical first)."""
+        self.ensure_tables()
+        with self.engine.connect() as conn:
+            rows = conn.execute(text('''SELECT m.lead_table, m.lead_id, m.source_url, m.is_canonical
+                                        FROM lead_cluster_members m
+                                        WHERE m.cluster_id = (SELECT cluster_id FROM lead_cluster_members
+                                                              WHERE lead_table = :t AND lead_id = :i)
+                                        ORDER BY m.is_canonical DESC, m.added_at'''),
+                                {'t': table, 'i': lead_id}).fetchall()
+        return [{'table': r[0], 'id': r[1], 'url': r[2], 'canonical': bool(r[3])} for r in rows]
@@ -0,0 +1,268 @@
+"""Streaming CSV/NDJSON exports of leads and contracts.
+
+Exports are read from a server-side cursor in ``batch_size`` partitions and
+written as ~64 KB chunks, optionally gzip-compressed on the fly, so memory
+stays flat however many rows match. The same stream backs the download
+endpoint and the emailed lead export.
+
+Usage:
+from lead_exports import LeadExporter
+exporter = LeadExporter(lambda: db.engine)
+chunks = exporter.stream('federal_contracts', 'csv', {'state': 'VA', 'q': 'janitorial'}, compress=True)
+return Response(chunks, mimetype='application/gzip')      # validated before the first chunk
+rows = exporter.write(fileobj, 'leads', 'excel')           # same bytes into a file
+
+Formats:
+- ``csv``: RFC 4180, UTF-8.
+- ``excel``: CSV that Excel opens cleanly. It starts with a UTF-8 BOM, and
+  cells starting with = + - @ are prefixed with ' so they are not run as
+  formulas.
+- ``ndjson``: one JSON object per line; dates as ISO strings.
+
+Each source lists its columns and allowed filters. Only the columns present
+in the connected database are selected, because SQLite and Postgres
+deployments differ. Unknown sources, formats or filters, malformed filter
+values and missing tables raise ``ValueError`` before streaming starts.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+import zlib
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import NoSuchTableError
+
+CHUNK_BYTES = 64 * 1024
+BATCH_SIZE = 1000
+
+FORMATS = {
+    # name: (mimetype, extension)
+    'csv': ('text/csv', 'csv'),
+    'excel': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+_STATE = re.compile(r'^[A-Za-z]{2}$')
+_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_FORMULA_START = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _state(value: str) -> str:
+    if not _STATE.match(value):
+        raise ValueError('state must be a two-letter code')
+    return value.upper()
+
+
+def _date(value: str) -> str:
+    if not _DATE.match(value):
+        raise ValueError('dates must be YYYY-MM-DD')
+    return value
+
+
+def _like(value: str) -> str:
+    return f"%{value.strip().lower()}%"
+
+
+# filter name -> (SQL clause, value parser); the clause binds :<filter name>
+CONTRACT_FILTERS = {
+    'q': ('(LOWER(title) LIKE :q OR LOWER(agency) LIKE :q)', _like),
+    'state': ("(UPPER(location) = :state OR UPPER(location) LIKE '%, ' || :state || '%')", _state),
+    'agency': ('LOWER(agency) LIKE :agency', _like),
+}
+
+
+@dataclass(frozen=True)
+class ExportSource:
+    table: str
+    columns: Tuple[str, ...]
+    order_by: str
+    filters: Dict[str, Tuple[str, Callable[[str], Any]]] = field(default_factory=dict)
+    admin_only: bool = False
+
+
+EXPORT_SOURCES = {
+    'leads': ExportSource(
+        'leads',
+        ('company_name', 'contact_name', 'email', 'phone', 'state', 'experience_years', 'certifications',
+         'registration_date', 'subscription_status', 'credits_balance'),
+        'registration_date DESC, id DESC',
+        {'state': ('UPPER(state) = :state', _state),
+         'status': ('subscription_status = :status', str),
+         'since': ('registration_date >= :since', _date)},
+        admin_only=True,
+    ),
+    'federal_contracts': ExportSource(
+        'federal_contracts',
+        ('title', 'agency', 'department', 'location', 'value', 'deadline', 'naics_code', 'set_aside',
+         'posted_date', 'notice_id', 'sam_gov_url'),
+        'posted_date DESC, id DESC',
+        dict(CONTRACT_FILTERS, naics=('naics_code = :naics', str),
+             posted_since=('posted_date >= :posted_since', _date),
+             deadline_after=('deadline >= :deadline_after', _date)),
+    ),
+    'contracts': ExportSource(
+        'contracts',
+        ('title', 'agency', 'location', 'value', 'deadline', 'naics_code', 'website_url', 'status'),
+        'deadline DESC, id DESC',
+        dict(CONTRACT_FILTERS, naics=('naics_code = :naics', str),
+             deadline_after=('deadline >= :deadline_after', _date)),
+    ),
+    'supply_contracts': ExportSource(
+        'supply_contracts',
+        ('title', 'agency', 'location', 'product_category', 'estimated_value', 'bid_deadline', 'website_url',
+         'contact_name', 'contact_email', 'contact_phone', 'status'),
+        'bid_deadline ASC, id ASC',
+        dict(CONTRACT_FILTERS, category=('LOWER(product_category) LIKE :category', _like),
+             status=('status = :status', str),
+             deadline_after=('bid_deadline >= :deadline_after', _date)),
+    ),
+}
+
+
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _excel_cell(value: Any) -> Any:
+    value = _cell(value)
+    if isinstance(value, str) and value.startswith(_FORMULA_START):
+        return "'" + value
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def encode_rows(columns: Sequence[str], rows: Iterable[Sequence[Any]], fmt: str) -> Iterator[str]:
+    """Text chunks of about CHUNK_BYTES for ``rows`` in ``fmt``, header first."""
+    buffer = io.StringIO()
+    if fmt == 'ndjson':
+        write = lambda row: buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default) + '\n')
+    else:
+        writer = csv.writer(buffer, lineterminator='\r\n')
+        cell = _excel_cell if fmt == 'excel' else _cell
+        if fmt == 'excel':
+            buffer.write('\ufeff')
+        writer.writerow(columns)
+        write = lambda row: writer.writerow([cell(v) for v in row])
+    for row in rows:
+        write(row)
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream incrementally into one gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+class LeadExporter:
+    """Filtered, constant-memory exports of the lead and contract tables."""
+
+    def __init__(self, engine_getter: Callable, batch_size: int = BATCH_SIZE):
+        self._engine_getter = engine_getter
+        self.batch_size = batch_size
+        self._columns: Dict[str, List[str]] = {}
+
+    @property
+    def engine(self):
+        return self._engine_getter()
+
+    def source(self, name: str) -> ExportSource:
+        try:
+            return EXPORT_SOURCES[name]
+        except KeyError:
+            raise ValueError(f"unknown export '{name}'") from None
+
+    @staticmethod
+    def filename(name: str, fmt: str, compress: bool = False) -> str:
+        stamp = datetime.now().strftime('%Y%m%d')
+        return f"{name}-{stamp}.{FORMATS[fmt][1]}" + ('.gz' if compress else '')
+
+    @staticmethod
+    def mimetype(fmt: str, compress: bool = False) -> str:
+        return 'application/gzip' if compress else FORMATS[fmt][0]
+
+    def _present_columns(self, engine, spec: ExportSource) -> List[str]:
+        if spec.table not in self._columns:
+            try:
+                existing = {c['name'] for c in inspect(engine).get_columns(spec.table)}
+            except NoSuchTableError:
+                raise ValueError(f"table '{spec.table}' does not exist yet") from None
+            self._columns[spec.table] = [c for c in spec.columns if c in existing]
+        return self._columns[spec.table]
+
+    def query(self, engine, name: str, filters: Optional[Dict[str, str]] = None) -> Tuple[List[str], str, Dict]:
+        """Column list, SQL and bound parameters for one export."""
+        spec = self.source(name)
+        columns = self._present_columns(engine, spec)
+        if not columns:
+            raise ValueError(f"table '{spec.table}' has none of the export columns")
+        clauses, params = [], {}
+        for key, value in (filters or {}).items():
+            if value in (None, ''):
+                continue
+            if key not in spec.filters:
+                raise ValueError(f"unknown filter '{key}' for {name}; allowed: {', '.join(sorted(spec.filters))}")
+            clause, parse = spec.filters[key]
+            clauses.append(clause)
+            params[key] = parse(value)
+        sql = f"SELECT {', '.join(columns)} FROM {spec.table}"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        return columns, f"{sql} ORDER BY {spec.order_by}", params
+
+    def _rows(self, engine, sql: str, params: Dict, stats: Dict[str, int]) -> Iterator[Sequence[Any]]:
+        with engine.connect() as conn:
+            result = conn.execution_options(yield_per=self.batch_size).execute(text(sql), params)
+            for partition in result.partitions():
+                stats['rows'] += len(partition)
+                yield from partition
+
+    def stream(self, name: str, fmt: str = 'csv', filters: Optional[Dict[str, str]] = None,
+               compress: bool = False, stats: Optional[Dict[str, int]] = None) -> Iterator[bytes]:
+        """Byte chunks of the export. Arguments are validated before this returns.
+
+        ``stats['rows']`` counts rows as they are written.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        engine = self.engine  # resolved here, in the caller's (request) context
+        columns, sql, params = self.query(engine, name, filters)
+        stats = stats if stats is not None else {}
+        stats['rows'] = 0
+        chunks = (chunk.encode('utf-8') for chunk in encode_rows(columns, self._rows(engine, sql, params, stats), fmt))
+        return gzip_chunks(chunks) if compress else chunks
+
+    def write(self, fileobj: IO[bytes], name: str, fmt: str = 'csv', filters: Optional[Dict[str, str]] = None,
+              compress: bool = False) -> int:
+        """Write the export to a binary file object; returns the row count."""
+        stats: Dict[str, int] = {}
+        for chunk in self.stream(name, fmt, filters, compress, stats):
+            fileobj.write(chunk)
+        return stats['rows']
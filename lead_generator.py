@@ -4,14 +4,19 @@ Generates realistic government and commercial leads daily
 """
 
 import random
-import sqlite3
 from datetime import datetime, timedelta
 import json
 import os
 
+from sqlalchemy import text
+
+from db_access import bulk_insert, get_engine
+
 class LeadGenerator:
-    def __init__(self, db_path):
+    def __init__(self, db_path=None):
+        # Shared pooled engine: the app database by default, or a specific SQLite file
         self.db_path = db_path
+        self.engine = get_engine(f"sqlite:///{db_path}" if db_path else None)
         # DMV Region Cities (Virginia, Maryland, DC, Richmond)
         self.virginia_cities = [
             # Hampton Roads (Original)
@@ -371,33 +376,16 @@ class LeadGenerator:
     def update_database(self, government_leads=[], commercial_leads=[]):
         """Update database with new leads"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            # Add government contracts
-            if government_leads:
-                for lead in government_leads:
-                    c.execute('''INSERT INTO contracts 
-                                 (title, agency, location, value, deadline, description, naics_code, website_url)
-                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                              (lead['title'], lead['agency'], lead['location'], lead['value'],
-                               lead['deadline'], lead['description'], lead['naics_code'],
-                               lead['website_url']))
-            
-            # Add commercial opportunities
-            if commercial_leads:
-                for lead in commercial_leads:
-                    c.execute('''INSERT INTO commercial_opportunities 
-                                 (business_name, business_type, address, location, square_footage, monthly_value,
-                                  frequency, services_needed, special_requirements, contact_type, description, size, website_url)
-                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                              (lead['business_name'], lead['business_type'], lead['address'], lead['location'],
-                               lead['square_footage'], lead['monthly_value'], lead['frequency'],
-                               lead['services_needed'], lead['special_requirements'], lead['contact_type'],
-                               lead['description'], lead['size'], lead['website_url']))
-            
-            conn.commit()
-            conn.close()
+            contract_fields = ('title', 'agency', 'location', 'value', 'deadline', 'description', 'naics_code',
+                               'website_url')
+            commercial_fields = ('business_name', 'business_type', 'address', 'location', 'square_footage',
+                                 'monthly_value', 'frequency', 'services_needed', 'special_requirements',
+                                 'contact_type', 'description', 'size', 'website_url')
+            with self.engine.begin() as conn:
+                # Add government contracts
+                bulk_insert(conn, 'contracts', government_leads, columns=contract_fields)
+                # Add commercial opportunities
+                bulk_insert(conn, 'commercial_opportunities', commercial_leads, columns=commercial_fields)
             
             print(f"✅ Successfully added {len(government_leads)} government leads and {len(commercial_leads)} commercial leads")
             return True
@@ -409,22 +397,17 @@ class LeadGenerator:
     def cleanup_old_leads(self, days_old=90):
         """Remove leads older than specified days"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
             # Calculate cutoff date
             cutoff_date = (datetime.now() - timedelta(days=days_old)).strftime('%Y-%m-%d')
             
-            # Remove old government contracts
-            c.execute('DELETE FROM contracts WHERE created_at < ?', (cutoff_date,))
-            gov_deleted = c.rowcount
+            with self.engine.begin() as conn:
+                # Remove old government contracts
+                gov_deleted = conn.execute(text('DELETE FROM contracts WHERE created_at < :cutoff'),
+                                           {'cutoff': cutoff_date}).rowcount
             
             # For commercial leads, we'll just mark them as old rather than delete
             # since they don't have explicit posting dates
             
-            conn.commit()
-            conn.close()
-            
             print(f"🧹 Cleaned up {gov_deleted} old government contracts")
             return True
             
@@ -467,25 +450,19 @@ class LeadGenerator:
     def get_lead_statistics(self):
         """Get current lead statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            # Get government contract stats
-            c.execute('SELECT COUNT(*) FROM contracts')
-            total_gov = c.fetchone()[0]
-            
-            c.execute('SELECT COUNT(*) FROM contracts WHERE created_at >= date("now", "-7 days")')
-            recent_gov = c.fetchone()[0]
-            
-            # Get commercial opportunity stats
-            c.execute('SELECT COUNT(*) FROM commercial_opportunities')
-            total_commercial = c.fetchone()[0]
+            week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+            with self.engine.connect() as conn:
+                # Get government contract stats
+                total_gov = conn.execute(text('SELECT COUNT(*) FROM contracts')).scalar()
+                recent_gov = conn.execute(text('SELECT COUNT(*) FROM contracts WHERE created_at >= :since'),
+                                          {'since': week_ago}).scalar()
+                
+                # Get commercial opportunity stats
+                total_commercial = conn.execute(text('SELECT COUNT(*) FROM commercial_opportunities')).scalar()
             
             # Get recent commercial (we'll consider all as recent since they don't have dates)
             recent_commercial = min(total_commercial, 50)  # Assume recent ones
             
-            conn.close()
-            
             return {
                 'total_government': total_gov,
                 'total_commercial': total_commercial,
@@ -500,9 +477,7 @@ class LeadGenerator:
 
 def main():
     """Main function for testing lead generation"""
-    db_path = '/Users/chinneaquamatthews/Lead Generartion for Cleaning Contracts (VA) ELITE/leads.db'
-    
-    generator = LeadGenerator(db_path)
+    generator = LeadGenerator()  # DATABASE_URL, else the app's SQLite file
     
     # Test lead generation
     print("🧪 Testing lead generation...")
@@ -3,12 +3,14 @@ Local Virginia Government Website Scraper
 Fetches real cleaning contract opportunities from city/county procurement pages
 """
 import requests
-from bs4 import BeautifulSoup
 import re
 from datetime import datetime, timedelta
 import logging
 from urllib.parse import urljoin
 
+from html_parsing import make_soup
+from relevance import INCLUDE_TERMS, RelevanceClassifier
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -21,6 +23,8 @@ class VirginiaLocalGovScraper:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
+        self._classifiers = {}
+
         # Virginia cities and their procurement URLs
         self.government_sites = {
             'Hampton': {
@@ -102,15 +106,13 @@ class VirginiaLocalGovScraper:
             response = requests.get(info['url'], headers=self.headers, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
             
             # Look for contract listings (common patterns in government sites)
             contract_elements = self._find_contract_elements(soup)
             
-            for element in contract_elements:
-                contract = self._parse_contract_element(element, city, info)
-                if contract and self._is_cleaning_related(contract, info['keywords']):
-                    contracts.append(contract)
+            parsed = [self._parse_contract_element(element, city, info) for element in contract_elements]
+            contracts = self._relevance(info['keywords']).filter([c for c in parsed if c])
             
         except Exception as e:
             logger.error(f"Error scraping {city}: {e}")
@@ -282,20 +284,13 @@ class VirginiaLocalGovScraper:
             return urljoin(normalized_base, href)
         
         return base_url
-    
-    def _is_cleaning_related(self, contract, keywords):
-        """Check if contract is related to cleaning services"""
-        title = contract.get('title', '').lower()
-        description = contract.get('description', '').lower()
-        
-        combined_text = f"{title} {description}"
-        
-        # Check if any cleaning-related keyword is present
-        for keyword in keywords:
-            if keyword in combined_text:
-                return True
-        
-        return False
+
+    def _relevance(self, keywords):
+        """Shared vocabulary plus the site's own keywords (e.g. maintenance, facility)"""
+        key = tuple(keywords)
+        if key not in self._classifiers:
+            self._classifiers[key] = RelevanceClassifier(include=INCLUDE_TERMS + key)
+        return self._classifiers[key]
 
 
 if __name__ == '__main__':
@@ -8,10 +8,12 @@ import sys
 from typing import List, Dict, Any, Set
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import psycopg2
-from psycopg2.extras import execute_values
 import os
 
+from sqlalchemy import func, text
+
+from db_access import get_engine, upsert
+
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -24,6 +26,7 @@ from national_scrapers import (
     NewHampshireScraper,
     RhodeIslandScraper
 )
+from lead_dedup import cluster_records
 
 # Configure logging
 logging.basicConfig(
@@ -195,13 +198,14 @@ class NationalProcurementScraper:
     
     def _deduplicate(self, contracts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Remove duplicate contracts by solicitation number + state.
+        Remove duplicate contracts by solicitation number + state, then collapse
+        near-duplicates (same opportunity, slightly different title/ID) across sources.
         
         Args:
             contracts: List of contracts
             
         Returns:
-            Deduplicated list
+            Deduplicated list; each kept contract lists the other copies in 'source_links'
         """
         seen: Set[str] = set()
         unique = []
@@ -212,11 +216,23 @@ class NationalProcurementScraper:
                 seen.add(key)
                 unique.append(contract)
         
-        duplicates_removed = len(contracts) - len(unique)
-        if duplicates_removed > 0:
-            logger.info(f"Removed {duplicates_removed} duplicate contracts")
+        exact_removed = len(contracts) - len(unique)
+        
+        canonical = []
+        for cluster in cluster_records(unique):
+            keep = unique[cluster[0]]
+            keep['source_links'] = [
+                {'source': unique[i].get('source'), 'link': unique[i].get('link'),
+                 'solicitation_number': unique[i].get('solicitation_number')}
+                for i in cluster[1:]
+            ]
+            canonical.append(keep)
+        
+        near_removed = len(unique) - len(canonical)
+        if exact_removed or near_removed:
+            logger.info(f"Removed {exact_removed} exact and {near_removed} near-duplicate contracts")
         
-        return unique
+        return canonical
     
     def _validate_contracts(self, contracts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -308,69 +324,48 @@ class NationalProcurementScraper:
             return 0
         
         try:
-            conn = psycopg2.connect(self.db_url)
-            cursor = conn.cursor()
-            
-            # Create table if not exists
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS national_contracts (
-                    id SERIAL PRIMARY KEY,
-                    state VARCHAR(2) NOT NULL,
-                    title TEXT NOT NULL,
-                    solicitation_number VARCHAR(255),
-                    due_date VARCHAR(50),
-                    link TEXT,
-                    agency TEXT,
-                    source VARCHAR(50) NOT NULL,
-                    scraped_at TIMESTAMP DEFAULT NOW(),
-                    description TEXT,
-                    organization_type VARCHAR(100),
-                    UNIQUE(state, solicitation_number)
-                )
-            """)
-            conn.commit()
+            # Pooled engine shared with the app and other jobs (see db_access.py)
+            engine = get_engine(self.db_url)
             
-            # Prepare data for insertion
-            values = [
-                (
-                    contract['state'],
-                    contract['title'],
-                    contract.get('solicitation_number', 'N/A'),
-                    contract.get('due_date', ''),
-                    contract.get('link', ''),
-                    contract.get('agency', 'N/A'),
-                    contract['source'],
-                    contract.get('description', ''),
-                    contract.get('organization_type', '')
-                )
+            rows = [
+                {
+                    'state': contract['state'],
+                    'title': contract['title'],
+                    'solicitation_number': contract.get('solicitation_number', 'N/A'),
+                    'due_date': contract.get('due_date', ''),
+                    'link': contract.get('link', ''),
+                    'agency': contract.get('agency', 'N/A'),
+                    'source': contract['source'],
+                    'description': contract.get('description', ''),
+                    'organization_type': contract.get('organization_type', '')
+                }
                 for contract in contracts
             ]
             
-            # Insert with ON CONFLICT UPDATE
-            execute_values(
-                cursor,
-                """
-                INSERT INTO national_contracts 
-                (state, title, solicitation_number, due_date, link, agency, source, description, organization_type)
-                VALUES %s
-                ON CONFLICT (state, solicitation_number) 
-                DO UPDATE SET
-                    title = EXCLUDED.title,
-                    due_date = EXCLUDED.due_date,
-                    link = EXCLUDED.link,
-                    agency = EXCLUDED.agency,
-                    scraped_at = NOW()
-                """,
-                values
-            )
+            with engine.begin() as conn:
+                # Create table if not exists
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS national_contracts (
+                        id SERIAL PRIMARY KEY,
+                        state VARCHAR(2) NOT NULL,
+                        title TEXT NOT NULL,
+                        solicitation_number VARCHAR(255),
+                        due_date VARCHAR(50),
+                        link TEXT,
+                        agency TEXT,
+                        source VARCHAR(50) NOT NULL,
+                        scraped_at TIMESTAMP DEFAULT NOW(),
+                        description TEXT,
+                        organization_type VARCHAR(100),
+                        UNIQUE(state, solicitation_number)
+                    )
+                """))
+                
+                # Insert with ON CONFLICT UPDATE
+                saved = upsert(conn, 'national_contracts', rows, conflict=('state', 'solicitation_number'),
+                               update=('title', 'due_date', 'link', 'agency'), touch={'scraped_at': func.now()})
             
-            conn.commit()
-            saved = len(values)
             logger.info(f"✅ Saved {saved} contracts to PostgreSQL")
-            
-            cursor.close()
-            conn.close()
-            
             return saved
             
         except Exception as e:
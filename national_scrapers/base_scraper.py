@@ -14,6 +14,9 @@ import json
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from html_parsing import make_soup
+from relevance import INCLUDE_TERMS, classify
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,12 +36,7 @@ class BaseScraper:
         'Upgrade-Insecure-Requests': '1'
     }
     
-    CLEANING_KEYWORDS = [
-        'janitorial', 'custodial', 'cleaning', 'housekeeping', 
-        'sanitation', 'facilities maintenance', 'building maintenance',
-        'floor care', 'carpet cleaning', 'window cleaning',
-        'disinfection', 'environmental services', 'porter'
-    ]
+    CLEANING_KEYWORDS = INCLUDE_TERMS
     
     NAICS_CODES = {
         '561720': 'Janitorial Services',
@@ -143,7 +141,7 @@ class BaseScraper:
             BeautifulSoup object or None
         """
         try:
-            return BeautifulSoup(response.content, 'html.parser')
+            return make_soup(response.content)
         except Exception as e:
             logger.error(f"Failed to parse HTML: {e}")
             return None
@@ -183,21 +181,18 @@ class BaseScraper:
             logger.error(f"Failed to parse RSS feed {url}: {e}")
             return None
     
-    def is_cleaning_related(self, text: str) -> bool:
+    def is_cleaning_related(self, text: str, naics_code: Optional[str] = None) -> bool:
         """
-        Check if text contains cleaning-related keywords.
+        Check if text is cleaning-related using the shared relevance classifier.
         
         Args:
             text: Text to search
+            naics_code: Optional NAICS code; janitorial codes always match
             
         Returns:
             True if cleaning-related
         """
-        if not text:
-            return False
-        
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.CLEANING_KEYWORDS)
+        return classify(text, naics_code).relevant
     
     def get_naics_description(self, naics_code: str) -> Optional[str]:
         """
@@ -0,0 +1,393 @@
+"""Precomputed Quick Wins feed.
+
+The Quick Wins page used to load every open supply contract, every urgent
+commercial request and the 20 nearest government deadlines on each request.
+It then sanitized phones, trial-parsed deadlines and guessed states row by row
+in Python before filtering and counting in memory. This module does that work
+once per ingest and stores the display-ready rows in ``quick_win_items``.
+The page then reads one indexed, paginated query.
+
+Usage:
+from quick_wins_feed import QuickWinsFeed
+feed = QuickWinsFeed(lambda: db.engine)
+feed.refresh()                      # after ingest jobs (or feed.refresh(['commercial']))
+result = feed.page(state='VA', city='norfolk', min_value=25000, page=2)
+result['items'], result['total'], result['total_pages'], result['counts']
+
+Each source is rebuilt in its own transaction (delete + insert), so readers
+never see a half-built source. The same transaction stamps the source in
+``quick_win_refreshes``, so a source with no rows still counts as fresh.
+``refresh_if_stale`` rebuilds the feed when it is older than
+``max_age_seconds``; this catches writers that do not call ``refresh``
+themselves. Only the very first build runs inside the request. Later
+rebuilds run on a background thread, one at a time per process, and readers
+are served the previous rows meanwhile.
+"""
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+STATES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
+    'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'FL': 'Florida', 'GA': 'Georgia',
+    'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa',
+    'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi', 'MO': 'Missouri',
+    'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada', 'NH': 'New Hampshire', 'NJ': 'New Jersey',
+    'NM': 'New Mexico', 'NY': 'New York', 'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio',
+    'OK': 'Oklahoma', 'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont',
+    'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming',
+    'DC': 'Washington DC'
+}
+
+DEADLINE_FORMATS = ('%m/%d/%Y', '%m/%d/%y', '%Y-%m-%d', '%d/%m/%Y')
+_PLACEHOLDER_PHONE = re.compile(r'^\D*\(?\d{3}\)?\D*555\D*\d{4}\D*$')
+_AMOUNT = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([kKmM])?')
+
+# Base priority per urgency level; higher is shown first
+URGENCY_PRIORITY = {'emergency': 100, 'urgent': 90, 'quick-win': 70, 'normal': 40}
+SMALL_BUSINESS_BONUS = 5
+
+SOURCES = ('supply', 'commercial', 'government')
+
+SOURCE_SQL = {
+    'supply': (
+        "SELECT id, title, agency, location, product_category, estimated_value, "
+        "bid_deadline, description, website_url, is_small_business_set_aside, "
+        "contact_name, contact_email, contact_phone, is_quick_win "
+        "FROM supply_contracts WHERE status = 'open'"
+    ),
+    'commercial': (
+        "SELECT id, business_name, city, business_type, services_needed, "
+        "budget_range, urgency, created_at, contact_person, email, phone "
+        "FROM commercial_lead_requests "
+        "WHERE urgency IN ('emergency', 'urgent') AND status = 'open'"
+    ),
+    'government': (
+        "SELECT id, title, agency, location, value, deadline, "
+        "description, naics_code, set_aside, posted_date, solicitation_number, website_url "
+        "FROM contracts "
+        "WHERE deadline IS NOT NULL AND deadline != '' AND deadline != 'Rolling' "
+        "ORDER BY deadline ASC LIMIT 20"
+    ),
+}
+
+COLUMNS = (
+    'item_key', 'source', 'source_id', 'title', 'agency', 'location', 'state', 'category',
+    'value', 'value_amount', 'deadline', 'deadline_date', 'description', 'website_url',
+    'is_small_business', 'contact_name', 'email', 'phone', 'lead_type', 'urgency_level',
+    'solicitation_number', 'priority', 'refreshed_at',
+)
+
+
+def sanitize_phone(p: Any) -> str:
+    """Reject placeholders like 555-XXXX and clearly invalid numbers."""
+    if not p:
+        return 'N/A'
+    s = str(p).strip()
+    digits = ''.join(ch for ch in s if ch.isdigit())
+    if len(digits) < 10 or _PLACEHOLDER_PHONE.match(s):
+        return 'N/A'
+    return s
+
+
+def parse_deadline(value: Any) -> Optional[date]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    s = str(value).strip()
+    if 'T' in s or s.endswith('Z'):
+        try:
+            return datetime.fromisoformat(s.replace('Z', '+00:00')).date()
+        except ValueError:
+            pass
+    for fmt in DEADLINE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt).date()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(s).date()
+    except ValueError:
+        return None
+
+
+def normalize_deadline(value: Any) -> str:
+    """Display form (MM/DD/YYYY) of a deadline; unparseable text is kept as-is."""
+    if not value or value in ('ASAP', 'Not specified'):
+        return value or 'Not specified'
+    parsed = parse_deadline(value)
+    return parsed.strftime('%m/%d/%Y') if parsed else str(value)
+
+
+def extract_state(location: Any) -> str:
+    if not location:
+        return 'Unknown'
+    location = str(location)
+    for abbr, full_name in STATES.items():
+        if f', {abbr}' in location or f' {abbr} ' in location or location.endswith(f' {abbr}'):
+            return abbr
+        if full_name in location:
+            return abbr
+    parts = location.split(',')
+    if len(parts) >= 2:
+        return parts[-1].strip()
+    return 'Unknown'
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """First dollar amount in a value/budget string ("$25K - $50K" -> 25000)."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _AMOUNT.search(str(value))
+    if not m:
+        return None
+    amount = float(m.group(1).replace(',', ''))
+    suffix = (m.group(2) or '').lower()
+    return amount * (1000 if suffix == 'k' else 1_000_000 if suffix == 'm' else 1)
+
+
+def priority_score(urgency_level: str, is_small_business: bool = False) -> int:
+    return URGENCY_PRIORITY.get(urgency_level, URGENCY_PRIORITY['normal']) + (
+        SMALL_BUSINESS_BONUS if is_small_business else 0)
+
+
+def _item(source: str, source_id: Any, **fields) -> Dict[str, Any]:
+    deadline = fields.pop('raw_deadline')
+    deadline_date = parse_deadline(deadline)
+    fields.update({
+        'item_key': f'{source}_{source_id}' if source != 'government' else f'contract_{source_id}',
+        'source': source,
+        'source_id': source_id,
+        'state': extract_state(fields['location']),
+        'value_amount': parse_amount(fields['value']),
+        'deadline': fields.get('deadline') or normalize_deadline(deadline),
+        'deadline_date': deadline_date.isoformat() if deadline_date else None,
+        'is_small_business': 1 if fields['is_small_business'] else 0,
+        'priority': priority_score(fields['urgency_level'], fields['is_small_business']),
+    })
+    fields.setdefault('solicitation_number', None)
+    for key in ('value', 'category', 'title', 'agency', 'location'):
+        if fields.get(key) is not None:
+            fields[key] = str(fields[key])
+    return fields
+
+
+def build_items(source: str, rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Turn raw source rows into display-ready feed rows."""
+    items = []
+    for r in rows:
+        if source == 'supply':
+            quick = bool(r[13])
+            items.append(_item(
+                'supply', r[0], title=r[1], agency=r[2], location=r[3], category=r[4], value=r[5],
+                raw_deadline=r[6], description=r[7], website_url=r[8], is_small_business=bool(r[9]),
+                contact_name=r[10] or 'Procurement Office', email=r[11] or 'N/A',
+                phone=sanitize_phone(r[12]),
+                lead_type='Supply Contract' + (' - Quick Win' if quick else ''),
+                urgency_level='quick-win' if quick else 'normal'))
+        elif source == 'commercial':
+            items.append(_item(
+                'commercial', r[0], title=f"Commercial Cleaning - {r[1]}", agency=r[3], location=r[2],
+                category=r[4], value=r[5], raw_deadline=None, deadline='ASAP',
+                description=f"Urgency: {r[6]}", website_url=None, is_small_business=False,
+                contact_name=r[8] or 'Business Contact', email=r[9] or 'N/A',
+                phone=sanitize_phone(r[10]), lead_type='Commercial Request', urgency_level=r[6]))
+        else:
+            items.append(_item(
+                'government', r[0], title=r[1], agency=r[2], location=r[3],
+                category=r[7] or 'Janitorial Services', value=r[4], raw_deadline=r[5],
+                description=r[6][:200] if r[6] else 'Government cleaning contract',
+                website_url=r[11], is_small_business=bool(r[8]),
+                contact_name='Procurement Office', email='See contract details',
+                phone='See contract details',
+                lead_type='Government Contract' + (' - Small Business Set-Aside' if r[8] else ''),
+                urgency_level='quick-win', solicitation_number=r[10] or 'N/A'))
+    return items
+
+
+class QuickWinsFeed:
+    TABLE = 'quick_win_items'
+    REFRESH_TABLE = 'quick_win_refreshes'
+
+    def __init__(self, engine_getter: Callable, max_age_seconds: float = 900.0,
+                 clock: Callable[[], float] = time.time):
+        self._engine_getter = engine_getter
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._ready = False
+        self._last_refresh: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        return self._engine_getter()
+
+    def ensure_table(self):
+        if self._ready:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(text(f'''CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                item_key VARCHAR(64) PRIMARY KEY,
+                source VARCHAR(20) NOT NULL,
+                source_id INTEGER NOT NULL,
+                title TEXT,
+                agency TEXT,
+                location TEXT,
+                state VARCHAR(64),
+                category TEXT,
+                value TEXT,
+                value_amount REAL,
+                deadline TEXT,
+                deadline_date VARCHAR(10),
+                description TEXT,
+                website_url TEXT,
+                is_small_business INTEGER DEFAULT 0,
+                contact_name TEXT,
+                email TEXT,
+                phone TEXT,
+                lead_type TEXT,
+                urgency_level VARCHAR(20),
+                solicitation_number TEXT,
+                priority INTEGER NOT NULL DEFAULT 0,
+                refreshed_at REAL
+            )'''))
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{self.TABLE}_order '
+                              f'ON {self.TABLE} (priority DESC, deadline_date, item_key)'))
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{self.TABLE}_state '
+                              f'ON {self.TABLE} (state, priority DESC)'))
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{self.TABLE}_value '
+                              f'ON {self.TABLE} (value_amount)'))
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{self.TABLE}_source '
+                              f'ON {self.TABLE} (source)'))
+            conn.execute(text(f'''CREATE TABLE IF NOT EXISTS {self.REFRESH_TABLE} (
+                source VARCHAR(20) PRIMARY KEY,
+                refreshed_at REAL NOT NULL
+            )'''))
+        self._ready = True
+
+    def refresh(self, sources: Optional[Iterable[str]] = None, engine=None) -> Dict[str, int]:
+        """Rebuild the given sources (default: all). Returns rows stored per source."""
+        self.ensure_table()
+        engine = engine or self.engine
+        now = self._clock()
+        counts = {}
+        insert = text(f"INSERT INTO {self.TABLE} ({', '.join(COLUMNS)}) "
+                      f"VALUES ({', '.join(':' + c for c in COLUMNS)})")
+        stamp = text(f'INSERT INTO {self.REFRESH_TABLE} (source, refreshed_at) VALUES (:s, :now) '
+                     f'ON CONFLICT (source) DO UPDATE SET refreshed_at = excluded.refreshed_at')
+        for source in sources or SOURCES:
+            try:
+                with engine.begin() as conn:
+                    items = build_items(source, conn.execute(text(SOURCE_SQL[source])).fetchall())
+                    conn.execute(text(f'DELETE FROM {self.TABLE} WHERE source = :s'), {'s': source})
+                    if items:
+                        for item in items:
+                            item['refreshed_at'] = now
+                        conn.execute(insert, items)
+                    conn.execute(stamp, {'s': source, 'now': now})
+                counts[source] = len(items)
+            except Exception as e:
+                print(f"⚠️ Quick Wins refresh failed for {source}: {e}")
+        self._last_refresh = now
+        return counts
+
+    def _fresh(self) -> bool:
+        return self._last_refresh is not None and self._clock() - self._last_refresh < self.max_age_seconds
+
+    def _refresh_once(self, engine, wait: bool) -> bool:
+        """Rebuild unless another thread is (or just was) doing it."""
+        if not self._refresh_lock.acquire(blocking=wait):
+            return False
+        try:
+            if self._fresh():
+                return False
+            self.refresh(engine=engine)
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def refresh_if_stale(self) -> bool:
+        """Start a rebuild when the feed is older than max_age_seconds. Returns whether one started."""
+        self.ensure_table()
+        if self._fresh():
+            return False
+        with self.engine.connect() as conn:
+            last, built = conn.execute(text(f'SELECT MIN(refreshed_at), COUNT(*) FROM {self.REFRESH_TABLE}')).fetchone()
+        if built == len(SOURCES) and self._clock() - float(last) < self.max_age_seconds:
+            self._last_refresh = float(last)
+            return False
+        # Resolve the engine here: the getter may need the caller's app context
+        engine = self.engine
+        if not built:
+            return self._refresh_once(engine, wait=True)  # nothing to serve yet
+        if self._refresh_lock.locked():
+            return False
+        threading.Thread(target=self._refresh_once, args=(engine, False), name='quick-wins-refresh',
+                         daemon=True).start()
+        return True
+
+    def page(self, state: Optional[str] = None, city: Optional[str] = None,
+             min_value: Optional[float] = None, page: int = 1, per_page: int = 25,
+             today: Optional[date] = None) -> Dict[str, Any]:
+        """One page of the feed plus filtered totals for the badges."""
+        self.refresh_if_stale()
+        where, params = ['1=1'], {}
+        if state:
+            where.append('UPPER(state) = :state')
+            params['state'] = state.upper()
+        if city:
+            where.append('LOWER(location) LIKE :city')
+            params['city'] = f'%{city.lower()}%'
+        if min_value is not None:
+            where.append('value_amount >= :min_value')
+            params['min_value'] = float(min_value)
+        where_sql = ' AND '.join(where)
+        params['week'] = ((today or date.today()) + timedelta(days=7)).isoformat()
+        with self.engine.connect() as conn:
+            stats = conn.execute(text(f'''
+                SELECT COUNT(*),
+                       SUM(CASE WHEN deadline_date IS NOT NULL AND deadline_date <= :week THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN urgency_level = 'urgent' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN urgency_level = 'quick-win' THEN 1 ELSE 0 END)
+                FROM {self.TABLE} WHERE {where_sql}
+            '''), params).fetchone()
+            total = int(stats[0] or 0)
+            total_pages = max(1, math.ceil(total / per_page))
+            page = min(max(1, int(page)), total_pages)
+            rows = conn.execute(text(f'''
+                SELECT * FROM {self.TABLE} WHERE {where_sql}
+                ORDER BY priority DESC, CASE WHEN deadline_date IS NULL THEN 1 ELSE 0 END,
+                         deadline_date, item_key
+                LIMIT :limit OFFSET :offset
+            '''), {**params, 'limit': per_page, 'offset': (page - 1) * per_page}).mappings().fetchall()
+        items = []
+        for row in rows:
+            item = dict(row)
+            item['id'] = item['item_key']
+            item['is_small_business'] = bool(item['is_small_business'])
+            items.append(item)
+        return {
+            'items': items,
+            'total': total,
+            'page': page,
+            'total_pages': total_pages,
+            'counts': {
+                'expiring_7days': int(stats[1] or 0),
+                'urgent': int(stats[2] or 0),
+                'quick_win': int(stats[3] or 0),
+            },
+        }
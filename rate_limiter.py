@@ -0,0 +1,235 @@
+"""Shared rate limiting for all gunicorn workers.
+
+Replaces the per-process dicts (``email_rate_limits``, ``TWOFA_ATTEMPTS``) that
+doubled every limit under two workers, reset on each ``max_requests`` recycle
+and grew without bound for idle users.
+
+Usage:
+from rate_limiter import build_rate_limiter
+limiter = build_rate_limiter(lambda: db.engine)
+result = limiter.hit('external_email:42', limit=50, window_seconds=3600)
+if not result.allowed:
+    ...  # 429, retry after result.retry_after seconds
+
+Design:
+- GCRA (generic cell rate algorithm): one float per key (the "theoretical
+  arrival time"), so every check is O(1) regardless of the limit size.
+- A key whose TAT is in the past carries no information and is swept, which
+  bounds storage to the keys active within their window.
+- Pluggable stores, selected with RATE_LIMIT_BACKEND:
+    * ``db``     - ``rate_limits`` table in the app database (default)
+    * ``shm``    - SQLite file on /dev/shm shared by the workers of one host
+    * ``memory`` - per-process LRU dict (tests / single worker only)
+  The SQL stores apply the GCRA step in a single atomic UPSERT, so concurrent
+  workers never over-admit.
+"""
+from __future__ import annotations
+
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # seconds until the next request would be admitted
+    reset_after: float  # seconds until the bucket is completely empty again
+
+
+class MemoryRateLimitStore:
+    """Process-local store. Bounded by ``max_keys`` (oldest keys evicted first)."""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._tats: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_tat(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._tats.get(key)
+
+    def apply(self, key: str, now: float, increment: float, tolerance: float) -> Tuple[bool, float]:
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            allowed = tat - now <= tolerance
+            if allowed:
+                tat += increment
+                self._tats[key] = tat
+                self._tats.move_to_end(key)
+                while len(self._tats) > self.max_keys:
+                    self._tats.popitem(last=False)
+            return allowed, tat
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._tats.pop(key, None)
+
+    def sweep(self, now: float) -> int:
+        with self._lock:
+            expired = [k for k, tat in self._tats.items() if tat < now]
+            for k in expired:
+                del self._tats[k]
+            return len(expired)
+
+
+class SQLRateLimitStore:
+    """Store backed by a ``rate_limits`` table (PostgreSQL or SQLite).
+
+    Uses its own connection from the engine pool, so a limiter call never
+    commits or rolls back the caller's ``db.session``.
+    """
+
+    TABLE = 'rate_limits'
+
+    def __init__(self, engine_getter: Callable):
+        self._engine_getter = engine_getter
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        return self._engine_getter()
+
+    def _is_postgres(self) -> bool:
+        return self.engine.dialect.name == 'postgresql'
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            float_type = 'DOUBLE PRECISION' if self._is_postgres() else 'REAL'
+            with self.engine.begin() as conn:
+                conn.execute(text(f'''CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    bucket_key TEXT PRIMARY KEY,
+                    tat {float_type} NOT NULL,
+                    last_allowed INTEGER DEFAULT 1
+                )'''))
+                conn.execute(text(f'CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_tat ON {self.TABLE}(tat)'))
+            self._ready = True
+
+    def get_tat(self, key: str) -> Optional[float]:
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            row = conn.execute(text(f'SELECT tat FROM {self.TABLE} WHERE bucket_key = :k'), {'k': key}).fetchone()
+        return float(row[0]) if row else None
+
+    def apply(self, key: str, now: float, increment: float, tolerance: float) -> Tuple[bool, float]:
+        self._ensure_table()
+        greatest = 'GREATEST' if self._is_postgres() else 'MAX'
+        t = self.TABLE
+        cur = f'{greatest}({t}.tat, :now)'
+        sql = f'''INSERT INTO {t} (bucket_key, tat, last_allowed) VALUES (:k, :now + :inc, 1)
+                  ON CONFLICT (bucket_key) DO UPDATE SET
+                      tat = CASE WHEN {cur} - :now <= :tol THEN {cur} + :inc ELSE {t}.tat END,
+                      last_allowed = CASE WHEN {cur} - :now <= :tol THEN 1 ELSE 0 END
+                  RETURNING tat, last_allowed'''
+        with self.engine.begin() as conn:
+            row = conn.execute(text(sql), {'k': key, 'now': now, 'inc': increment, 'tol': tolerance}).fetchone()
+        return bool(row[1]), float(row[0])
+
+    def delete(self, key: str) -> None:
+        self._ensure_table()
+        with self.engine.begin() as conn:
+            conn.execute(text(f'DELETE FROM {self.TABLE} WHERE bucket_key = :k'), {'k': key})
+
+    def sweep(self, now: float) -> int:
+        self._ensure_table()
+        with self.engine.begin() as conn:
+            result = conn.execute(text(f'DELETE FROM {self.TABLE} WHERE tat < :now'), {'now': now})
+        return result.rowcount or 0
+
+
+def shared_memory_store(path: Optional[str] = None) -> SQLRateLimitStore:
+    """SQLite file on tmpfs (/dev/shm when present) shared by all local workers."""
+    if not path:
+        base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        path = os.path.join(base, 'contractlink_rate_limits.db')
+    engine = create_engine(f'sqlite:///{path}', connect_args={'timeout': 5, 'check_same_thread': False})
+    with engine.begin() as conn:
+        conn.execute(text('PRAGMA journal_mode=WAL'))
+    return SQLRateLimitStore(lambda: engine)
+
+
+class RateLimiter:
+    """GCRA limiter: at most ``limit`` hits per ``window_seconds``, evenly replenished."""
+
+    def __init__(self, store, sweep_interval: float = 300.0, clock: Callable[[], float] = time.time):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._last_sweep = clock()
+
+    @staticmethod
+    def _interval(limit: int, window_seconds: float) -> float:
+        return float(window_seconds) / max(int(limit), 1)
+
+    def _result(self, allowed: bool, tat: float, now: float, limit: int, window_seconds: float) -> RateLimitResult:
+        interval = self._interval(limit, window_seconds)
+        used = max(tat - now, 0.0)
+        remaining = max(int(math.floor((window_seconds - used) / interval + 1e-9)), 0)
+        retry_after = 0.0 if remaining else max(used - (window_seconds - interval), 0.0)
+        return RateLimitResult(allowed, limit, remaining, retry_after, used)
+
+    def _maybe_sweep(self, now: float):
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        try:
+            self.store.sweep(now)
+        except Exception as e:
+            print(f"⚠️ Rate limit sweep failed: {e}")
+
+    def hit(self, key: str, limit: int, window_seconds: float, cost: int = 1) -> RateLimitResult:
+        """Consume ``cost`` units for ``key``; denied hits consume nothing."""
+        now = self._clock()
+        self._maybe_sweep(now)
+        interval = self._interval(limit, window_seconds)
+        increment = interval * cost
+        if cost > limit:
+            return RateLimitResult(False, limit, 0, float(window_seconds), 0.0)
+        try:
+            allowed, tat = self.store.apply(key, now, increment, window_seconds - increment)
+        except Exception as e:
+            # Fail open: a broken limiter store must never lock users out
+            print(f"⚠️ Rate limit store error for {key}: {e}")
+            return RateLimitResult(True, limit, limit, 0.0, 0.0)
+        return self._result(allowed, tat, now, limit, window_seconds)
+
+    def peek(self, key: str, limit: int, window_seconds: float) -> RateLimitResult:
+        """Report whether one more hit would be admitted, without consuming it."""
+        now = self._clock()
+        try:
+            tat = self.store.get_tat(key)
+        except Exception as e:
+            print(f"⚠️ Rate limit store error for {key}: {e}")
+            return RateLimitResult(True, limit, limit, 0.0, 0.0)
+        tat = max(tat if tat is not None else now, now)
+        allowed = tat - now <= window_seconds - self._interval(limit, window_seconds)
+        return self._result(allowed, tat, now, limit, window_seconds)
+
+    def reset(self, key: str) -> None:
+        self.store.delete(key)
+
+
+def build_rate_limiter(engine_getter: Optional[Callable] = None, backend: Optional[str] = None) -> RateLimiter:
+    """Create the limiter selected by RATE_LIMIT_BACKEND (db | shm | memory)."""
+    backend = (backend or os.getenv('RATE_LIMIT_BACKEND', 'db')).strip().lower()
+    if backend == 'db' and engine_getter is not None:
+        store = SQLRateLimitStore(engine_getter)
+    elif backend in ('db', 'shm'):
+        store = shared_memory_store(os.getenv('RATE_LIMIT_SHM_PATH') or None)
+    else:
+        store = MemoryRateLimitStore()
+    return RateLimiter(store)
@@ -0,0 +1,270 @@
+"""Shared cleaning-relevance classifier for every ingestor and cleanup job.
+
+Scrapers, the federal cleanup jobs and the international adapters each used to
+carry their own keyword list and an ``any(keyword in text_lower ...)`` loop.
+This module holds the single vocabulary and compiles each term set into one
+regular expression. Most rows match no include term, so they cost a single
+scan; the exclude pattern only runs on rows that did match.
+
+Usage:
+from relevance import is_cleaning_related, classify_batch
+if is_cleaning_related(title, naics_code='561720'):
+    ...
+results = classify_batch(rows)           # rows: strings or lead dicts
+keep = [row for row, r in zip(rows, results) if r.relevant]
+
+Rules, in order:
+1. NAICS: janitorial codes are always relevant; IT/software/consulting codes
+   never are. Other codes fall through to the text rules.
+2. An include term inside an exclude phrase does not count, so "data
+   cleaning" shadows the "cleaning" inside it.
+3. A strong include term ("janitorial", "custodial", ...) makes the row
+   relevant whatever else it mentions.
+4. Otherwise exclude terms ("software", "cloud", "consulting", ...) veto
+   the remaining include terms, and any include term left makes the row
+   relevant.
+
+Terms match at a word start and may be followed by any suffix, so
+"disinfect" covers "disinfection" and "porter" does not match "reporter".
+Whole web pages nearly always contain some exclude term in their navigation,
+so page-level scans should test ``classify(page).matched`` rather than
+``relevant``.
+
+``LISTING_EXCLUDE_TERMS`` is a separate list of status/off-topic title words
+hidden from the federal listing; ``title_exclusion_sql`` renders it as SQL.
+
+Run ``python relevance.py`` for a micro-benchmark against the old loop.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+INCLUDE_TERMS = (
+    'janitor', 'custodial', 'cleaning', 'housekeeping', 'sanitation', 'sanitiz',
+    'disinfect', 'hygiene', 'floor care', 'carpet cleaning', 'window cleaning',
+    'pressure washing', 'power washing', 'trash removal', 'waste management',
+    'facilities maintenance', 'building maintenance', 'building services',
+    'porter', 'environmental services', 'grounds maintenance', 'snow removal',
+)
+
+# Unambiguous janitorial work: a row matching one of these stays relevant even
+# when an exclude term also appears ("janitorial services ... work order software")
+STRONG_INCLUDE_TERMS = (
+    'janitor', 'custodial', 'housekeeping', 'floor care', 'carpet cleaning', 'window cleaning',
+    'pressure washing', 'power washing',
+)
+
+# Contexts where "cleaning" and friends are not physical cleaning work
+EXCLUDE_TERMS = (
+    'data cleaning', 'data cleansing', 'data model', 'data management', 'database',
+    'data warehouse', 'data science', 'data governance', 'data quality', 'data pipeline',
+    'enterprise data', 'metadata', 'software', 'it services', 'information technology',
+    'cloud', 'cyber', 'analytics', 'machine learning', 'programming', 'coding',
+    'system integration', 'business intelligence', 'dashboard', 'etl', 'consulting',
+    'advisory',
+)
+
+# NAICS prefixes -> verdict. Longest matching prefix wins.
+NAICS_RULES = {
+    '561720': True,   # Janitorial Services
+    '561790': True,   # Other Services to Buildings and Dwellings
+    '5415': False,    # Computer Systems Design
+    '5182': False,    # Data Processing and Hosting
+    '5112': False,    # Software Publishers
+    '5416': False,    # Management and Technical Consulting
+}
+
+# Title words hidden from the federal contracts listing (awards, cancellations
+# and off-topic solicitations that share a NAICS code with janitorial work).
+LISTING_EXCLUDE_TERMS = (
+    'award', 'cancel', 'inactive', 'construction', 'engineering', 'launcher',
+    'vehicle', 'research', 'development', 'accelerator',
+)
+
+TEXT_FIELDS = ('title', 'description', 'naics_description')
+
+
+class Relevance(NamedTuple):
+    relevant: bool
+    matched: Tuple[str, ...] = ()
+    excluded: Tuple[str, ...] = ()
+    naics_rule: Optional[bool] = None
+
+
+NOT_RELEVANT = Relevance(False)
+
+
+def _row_text(row: Any) -> Tuple[str, Optional[str]]:
+    if row is None:
+        return '', None
+    if isinstance(row, str):
+        return row, None
+    parts = [str(row.get(f) or '') for f in TEXT_FIELDS]
+    naics = row.get('naics_code') or row.get('naics')
+    return ' '.join(p for p in parts if p), (str(naics) if naics else None)
+
+
+def _compile(terms: Sequence[str]) -> Optional[Pattern[str]]:
+    """One word-start alternation for a term set (None when the set is empty).
+
+    The term is group 1 and the match includes the character before it, so
+    callers scan ``' ' + text``. A leading character class (rather than a
+    lookbehind) lets ``re`` skip straight to word boundaries.
+    """
+    return re.compile(r'[^a-z0-9](' + trie_pattern(terms) + ')') if terms else None
+
+
+def trie_pattern(terms: Iterable[str], space: Optional[str] = None) -> str:
+    """Regex alternation factored into a prefix trie.
+
+    ``re`` tries alternatives one by one, so a flat ``a|b|c`` list costs one
+    attempt per term at every position; the trie shares common prefixes. The
+    optional groups are greedy, so the longest term at a position wins.
+    ``space`` replaces the literal space inside terms (e.g. ``r'\\s+'``).
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [(space if ch == ' ' and space else re.escape(ch)) + build(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class RelevanceClassifier:
+    """Include, strong-include and exclude terms, each compiled into one pattern."""
+
+    def __init__(self, include: Iterable[str] = INCLUDE_TERMS, exclude: Iterable[str] = EXCLUDE_TERMS,
+                 naics_rules: Optional[dict] = None, strong: Iterable[str] = STRONG_INCLUDE_TERMS):
+        self.include = tuple(t.lower() for t in include)
+        self.exclude = tuple(t.lower() for t in exclude)
+        self.strong = frozenset(t.lower() for t in strong) & set(self.include)
+        self.naics_rules = dict(NAICS_RULES if naics_rules is None else naics_rules)
+        self._include = _compile(self.include)
+        self._exclude = _compile(self.exclude)
+        self._strong = _compile(tuple(self.strong))
+        # Exclude phrases that contain an include term and so can shadow it
+        self._shadowing = frozenset(
+            e for e in self.exclude if self._include and self._include.search(' ' + e))
+        self._prefix_lengths = sorted({len(p) for p in self.naics_rules}, reverse=True)
+
+    def naics_verdict(self, naics_code: Optional[str]) -> Optional[bool]:
+        code = str(naics_code or '').strip()
+        for length in self._prefix_lengths:
+            if len(code) >= length and code[:length] in self.naics_rules:
+                return self.naics_rules[code[:length]]
+        return None
+
+    def _unshadowed(self, content: str) -> List[str]:
+        """Include hits that do not start inside an exclude phrase ("data cleaning")"""
+        spans = [m.span(1) for m in self._exclude.finditer(content)]
+        return [m.group(1) for m in self._include.finditer(content)
+                if not any(start <= m.start(1) < end for start, end in spans)]
+
+    def classify(self, row: Any, naics_code: Optional[str] = None) -> Relevance:
+        """Classify a string or a lead dict (title/description/naics_code)."""
+        if isinstance(row, str):
+            content = row
+        else:
+            content, row_naics = _row_text(row)
+            naics_code = naics_code or row_naics
+        content = ' ' + content.lower()  # the patterns consume the character before a term
+        hits = self._include.findall(content) if self._include else ()
+        rule = self.naics_verdict(naics_code) if naics_code else None
+        if not hits:
+            return NOT_RELEVANT if rule is None else Relevance(rule, naics_rule=rule)
+        # Strong terms stand on their own, so only weak hits pay for the exclude scan
+        strong = not self.strong.isdisjoint(hits)
+        excluded = self._exclude.findall(content) if self._exclude and not strong else ()
+        if excluded and not self._shadowing.isdisjoint(excluded):
+            hits = self._unshadowed(content)
+        matched, excluded = tuple(dict.fromkeys(hits)), tuple(dict.fromkeys(excluded))
+        if rule is not None:
+            return Relevance(rule, matched, excluded, rule)
+        return Relevance(bool(matched) and (strong or not excluded), matched, excluded)
+
+    def is_relevant(self, row: Any, naics_code: Optional[str] = None) -> bool:
+        """classify(...).relevant, stopping at the first deciding term for plain text."""
+        if naics_code or not isinstance(row, str) or not self._include:
+            return self.classify(row, naics_code).relevant
+        content = ' ' + row.lower()
+        if not self._include.search(content):
+            return False
+        if self._strong and self._strong.search(content):
+            return True
+        excluded = self._exclude.search(content) if self._exclude else None
+        if excluded is None:
+            return True
+        if excluded.group(1) in self._shadowing:
+            return self.classify(row).relevant
+        return False
+
+    def classify_batch(self, rows: Sequence[Any]) -> List[Relevance]:
+        """Classify many rows; same results as classify() per row."""
+        classify = self.classify
+        return [classify(row) for row in rows]
+
+    def filter(self, rows: Sequence[Any]) -> List[Any]:
+        classify = self.classify
+        return [row for row in rows if classify(row).relevant]
+
+
+def title_exclusion_sql(column: str = 'title', terms: Iterable[str] = LISTING_EXCLUDE_TERMS) -> str:
+    """``LOWER(column) NOT LIKE ...`` conjunction for the listing exclusions."""
+    return ' AND '.join(f"LOWER({column}) NOT LIKE '%{t.replace(chr(39), '')}%'" for t in terms)
+
+
+default_classifier = RelevanceClassifier()
+classify = default_classifier.classify
+classify_batch = default_classifier.classify_batch
+is_cleaning_related = default_classifier.is_relevant
+filter_relevant = default_classifier.filter
+
+
+def benchmark(rows: int = 20000, repeat: int = 3) -> dict:
+    """Time the classifier against the previous per-keyword substring loop."""
+    import random
+    import time
+
+    rng = random.Random(7)
+    words = ('annual', 'services', 'for', 'building', 'county', 'office', 'repair', 'supply',
+             'software', 'hvac', 'roof', 'parking', 'lot', 'support', 'project', 'facility')
+    sample = []
+    for _ in range(rows):
+        tokens = [rng.choice(words) for _ in range(rng.randint(8, 40))]
+        if rng.random() < 0.2:
+            tokens.insert(rng.randrange(len(tokens)), rng.choice(INCLUDE_TERMS))
+        sample.append(' '.join(tokens))
+
+    def legacy(batch):
+        out = []
+        for t in batch:
+            lower = t.lower()
+            out.append(not any(k in lower for k in EXCLUDE_TERMS) and any(k in lower for k in INCLUDE_TERMS))
+        return out
+
+    timings = {}
+    for name, fn in (('legacy_loop', legacy),
+                     ('is_cleaning_related', lambda b: [is_cleaning_related(t) for t in b]),
+                     ('classify', lambda b: [classify(t) for t in b])):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(sample)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = round(rows / best)
+    return {'rows': rows, 'rows_per_second': timings}
+
+
+if __name__ == '__main__':
+    print(benchmark())
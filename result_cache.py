@@ -0,0 +1,192 @@
+"""Stale-while-revalidate cache for slow, externally sourced search results.
+
+The state and city RFP finders used to call SAM.gov, DemandStar, the national
+scrapers and portal pages inside the user's request whenever their own
+tables looked thin or old. This module keeps the last good result per key in
+``result_cache`` and always answers from it. Once an entry is older than
+``max_age``, one background refresh is started and later requests see the
+new result.
+
+Usage:
+from result_cache import ResultCache
+cache = ResultCache(lambda: db.engine, context=app.app_context)
+result = cache.get('state_rfps:VA', compute=lambda: search(...), max_age=1800,
+                   seed=lambda: local_rows_only(...))
+result.payload, result.refreshed_at, result.stale, result.refreshing
+
+Rules:
+- A hit is returned as-is. If it is stale, a refresh is scheduled first.
+- On a miss, ``seed`` (cheap, local-only) answers immediately if it returns
+  something; otherwise the call waits up to ``cold_wait`` seconds for the
+  first refresh and then returns an empty result marked ``refreshing``.
+- Refreshes are coalesced per key: one future per key inside a process, and
+  a claim column (conditional UPDATE) across processes. A claim older than
+  ``claim_timeout`` is considered dead. A failed refresh keeps the last
+  good payload and holds the claim, which gives a retry backoff.
+- Payloads must be JSON-serialisable.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+
+@dataclass
+class CachedResult:
+    payload: Any
+    refreshed_at: Optional[float]   # epoch seconds of the payload, None if never computed
+    stale: bool
+    refreshing: bool
+    error: str = ''
+
+    @property
+    def age_seconds(self) -> Optional[int]:
+        return None if self.refreshed_at is None else int(time.time() - self.refreshed_at)
+
+    def freshness(self) -> Dict[str, Any]:
+        """JSON-ready freshness block for API responses."""
+        refreshed = (datetime.fromtimestamp(self.refreshed_at, timezone.utc).isoformat()
+                     if self.refreshed_at else None)
+        return {'refreshed_at': refreshed, 'age_seconds': self.age_seconds,
+                'stale': self.stale, 'refreshing': self.refreshing}
+
+
+class ResultCache:
+    """Database-backed SWR cache shared by all workers."""
+
+    def __init__(self, engine_getter: Callable, context: Optional[Callable] = None,
+                 max_workers: int = 4, claim_timeout: float = 300.0, cold_wait: float = 8.0):
+        self._engine_getter = engine_getter
+        self._engine = None
+        self.context = context
+        self.claim_timeout = claim_timeout
+        self.cold_wait = cold_wait
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='result-cache')
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Any] = {}
+        self._ready = False
+
+    @property
+    def engine(self):
+        # Resolved on the request thread and reused by refresh workers
+        if self._engine is None:
+            self._engine = self._engine_getter()
+        return self._engine
+
+    def ensure_table(self):
+        if self._ready:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE IF NOT EXISTS result_cache (
+                cache_key TEXT PRIMARY KEY,
+                payload TEXT,
+                refreshed_at DOUBLE PRECISION,
+                refresh_started DOUBLE PRECISION,
+                last_error TEXT
+            )'''))
+        self._ready = True
+
+    def _read(self, key: str):
+        with self.engine.connect() as conn:
+            return conn.execute(text('''SELECT payload, refreshed_at, refresh_started, last_error
+                                        FROM result_cache WHERE cache_key = :k'''), {'k': key}).fetchone()
+
+    def _claim(self, key: str) -> bool:
+        """Take the cross-process refresh claim for ``key``."""
+        now = time.time()
+        with self.engine.begin() as conn:
+            claimed = conn.execute(text('''UPDATE result_cache SET refresh_started = :now
+                                           WHERE cache_key = :k
+                                             AND (refresh_started IS NULL OR refresh_started < :dead)'''),
+                                   {'now': now, 'k': key, 'dead': now - self.claim_timeout}).rowcount
+        if claimed:
+            return True
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text('INSERT INTO result_cache (cache_key, refresh_started) VALUES (:k, :now)'),
+                             {'k': key, 'now': now})
+            return True
+        except IntegrityError:
+            return False  # another worker holds the claim
+
+    def _refresh(self, key: str, compute: Callable[[], Any]):
+        if not self._claim(key):
+            return None
+        try:
+            if self.context is not None:
+                with self.context():
+                    payload = compute()
+            else:
+                payload = compute()
+        except Exception as e:
+            # Keep the claim: it expires after claim_timeout, which spaces out retries
+            with self.engine.begin() as conn:
+                conn.execute(text('UPDATE result_cache SET last_error = :e WHERE cache_key = :k'),
+                             {'e': str(e)[:500], 'k': key})
+            raise
+        with self.engine.begin() as conn:
+            conn.execute(text('''UPDATE result_cache
+                                 SET payload = :p, refreshed_at = :t, refresh_started = NULL, last_error = NULL
+                                 WHERE cache_key = :k'''),
+                         {'p': json.dumps(payload, default=str), 't': time.time(), 'k': key})
+        return payload
+
+    def refresh(self, key: str, compute: Callable[[], Any]):
+        """Schedule a refresh of ``key`` unless one is already running here; returns its future."""
+        self.ensure_table()
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._pool.submit(self._refresh, key, compute)
+                self._inflight[key] = future
+                future.add_done_callback(lambda f, k=key: self._inflight.pop(k, None))
+            return future
+
+    def get(self, key: str, compute: Callable[[], Any], max_age: float,
+            seed: Optional[Callable[[], Any]] = None) -> CachedResult:
+        """Return the cached payload for ``key`` (see module docstring for the rules)."""
+        self.ensure_table()
+        row = self._read(key)
+        now = time.time()
+        refreshing = row is not None and row[2] is not None and row[2] >= now - self.claim_timeout
+        error = (row[3] or '') if row is not None else ''
+
+        if row is not None and row[0] is not None:
+            stale = now - (row[1] or 0) > max_age
+            if stale and not refreshing:
+                self.refresh(key, compute)
+                refreshing = True
+            return CachedResult(json.loads(row[0]), row[1], stale, refreshing, error)
+
+        # Cold key
+        future = self.refresh(key, compute)
+        if seed is not None:
+            payload = seed()
+            if payload:
+                return CachedResult(payload, None, True, True, error)
+        try:
+            payload = future.result(timeout=self.cold_wait)
+        except FutureTimeout:
+            return CachedResult(None, None, True, True, error)
+        except Exception as e:
+            return CachedResult(None, None, True, False, str(e))
+        if payload is None:  # refreshed by another worker; read what it stored
+            row = self._read(key)
+            if row is not None and row[0] is not None:
+                return CachedResult(json.loads(row[0]), row[1], False, False, row[3] or '')
+            return CachedResult(None, None, True, True, error)
+        return CachedResult(payload, time.time(), False, False)
+
+    def invalidate(self, key: str):
+        """Mark ``key`` stale so the next read refreshes it (the old payload is still served)."""
+        self.ensure_table()
+        with self.engine.begin() as conn:
+            conn.execute(text('UPDATE result_cache SET refreshed_at = 0 WHERE cache_key = :k'), {'k': key})
@@ -0,0 +1,584 @@
+"""Route-level load test: seed synthetic production volumes, measure latency.
+
+Drives the heavy pages through Flask's test client with concurrent workers
+and reports p50/p95/p99 latency and SQL queries per request. The JSON report
+includes the commit, so runs can be compared across commits.
+
+Usage:
+python route_benchmark.py --scale 0.01                      # SQLite, 1% of production volumes
+python route_benchmark.py --rows federal_contracts=500000 --concurrency 8 --requests 200
+python route_benchmark.py --database-url postgresql://localhost/bench --json > after.json
+python route_benchmark.py --compare before.json after.json
+
+Design:
+- The app picks its database when imported, so ``load_app`` sets
+  SQLITE_DB_NAME (or DATABASE_URL) and moves into a scratch directory first.
+  init_db's sqlite3 helpers open ./leads.db, so both layers share one file.
+- SQLite gets the production schema by running init_postgres_db through a
+  statement shim (SERIAL, NOW(), ADD COLUMN IF NOT EXISTS). Tables init_db
+  already created are kept. Some routes still use Postgres-only SQL and take
+  their error paths on SQLite (visible in the status column); use
+  ``--database-url`` for production-faithful numbers.
+- Volumes are ``PRODUCTION_ROWS`` x ``--scale``; ``--rows`` overrides a table.
+  States and agencies are Zipf-weighted. Posting dates decay exponentially
+  with age. About 20% of titles are cleaning work. Activity, messages and
+  saved leads follow a power law over users.
+- Seeding reflects each table and inserts only columns that exist there, in
+  batches, one transaction per table. Seeded users share one password hash.
+- Queries are counted per worker thread with a ``before_cursor_execute``
+  listener. Raw sqlite3 connections (``get_db_connection``) are not counted.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import MetaData, event, inspect, text
+from sqlalchemy.sql import sqltypes
+
+PRODUCTION_ROWS = {
+    'leads': 50_000,
+    'federal_contracts': 500_000,
+    'contracts': 50_000,
+    'supply_contracts': 100_000,
+    'commercial_lead_requests': 20_000,
+    'residential_leads': 20_000,
+    'user_activity': 1_000_000,
+    'saved_leads': 100_000,
+    'messages': 200_000,
+    'forum_posts': 20_000,
+    'forum_comments': 100_000,
+}
+BATCH_SIZE = 5000
+PASSWORD = 'Bench-Pass-123!'
+ADMIN_USERNAME = 'bench_admin'
+
+STATES = ['VA', 'MD', 'DC', 'NC', 'TX', 'CA', 'FL', 'NY', 'PA', 'GA', 'OH', 'IL', 'WA', 'AZ', 'CO', 'MA', 'NJ',
+          'TN', 'SC', 'MI', 'MN', 'MO', 'IN', 'WI', 'OR', 'KY', 'AL', 'LA', 'OK', 'UT', 'NV', 'IA', 'KS', 'AR',
+          'MS', 'NM', 'NE', 'ID', 'WV', 'HI', 'NH', 'ME', 'MT', 'RI', 'DE', 'SD', 'ND', 'AK', 'VT', 'WY']
+CITIES = ['Richmond', 'Norfolk', 'Virginia Beach', 'Arlington', 'Alexandria', 'Hampton', 'Baltimore', 'Raleigh',
+          'Austin', 'Sacramento', 'Tampa', 'Albany', 'Harrisburg', 'Atlanta', 'Columbus', 'Springfield']
+AGENCIES = ['General Services Administration', 'Department of Veterans Affairs', 'Department of the Navy',
+            'Department of the Army', 'Department of the Air Force', 'Department of Homeland Security',
+            'Department of Health and Human Services', 'Department of Justice', 'Department of Energy',
+            'Department of Agriculture', 'Department of the Interior', 'Social Security Administration',
+            'National Park Service', 'Defense Logistics Agency', 'Federal Bureau of Prisons', 'NASA']
+CLEANING_WORK = ['Janitorial Services', 'Custodial Services', 'Facility Cleaning', 'Floor Care and Carpet Cleaning',
+                 'Window Washing', 'Disinfection Services', 'Post-Construction Cleanup', 'Pressure Washing']
+OTHER_WORK = ['HVAC Maintenance', 'Roof Replacement', 'IT Support Services', 'Parking Lot Repaving',
+              'Office Furniture', 'Software Licenses', 'Security Guard Services', 'Landscaping', 'Elevator Repair',
+              'Fleet Maintenance', 'Printing Services', 'Medical Supplies', 'Engineering Study']
+NAICS_CLEANING = ['561720', '561720', '561720', '561210', '561790']
+NAICS_OTHER = ['238220', '541511', '541330', '561612', '561730', '811111', '423210', '236220']
+BUSINESS_TYPES = ['Office', 'Medical Facility', 'Retail', 'Warehouse', 'School', 'Restaurant', 'Church', 'Gym']
+PRODUCT_CATEGORIES = ['Janitorial Supplies', 'Paper Products', 'Chemicals', 'Equipment', 'Trash Liners']
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+class SyntheticData:
+    """Row generators with production-like skew, deterministic for a seed."""
+
+    def __init__(self, rows: Dict[str, int], seed: int = 7, today: Optional[date] = None):
+        self.rows = rows
+        self.rng = random.Random(seed)
+        self.today = today or date.today()
+        self.users = max(rows.get('leads', 1), 1)
+        self._state_weights = _zipf_weights(len(STATES))
+        self._agency_weights = _zipf_weights(len(AGENCIES))
+
+    # -- distributions -------------------------------------------------
+    def state(self) -> str:
+        return self.rng.choices(STATES, self._state_weights)[0]
+
+    def agency(self) -> str:
+        return self.rng.choices(AGENCIES, self._agency_weights)[0]
+
+    def posted(self, mean_age_days: float = 30) -> date:
+        return self.today - timedelta(days=min(int(self.rng.expovariate(1 / mean_age_days)), 720))
+
+    def stamp(self, mean_age_days: float = 30) -> datetime:
+        day = self.posted(mean_age_days)
+        return datetime(day.year, day.month, day.day, self.rng.randrange(24), self.rng.randrange(60))
+
+    def active_user(self) -> int:
+        """User id where a few heavy users own most rows (Pareto)."""
+        return min(int(self.rng.paretovariate(1.2)), self.users)
+
+    def work(self) -> Tuple[str, bool]:
+        cleaning = self.rng.random() < 0.2
+        return self.rng.choice(CLEANING_WORK if cleaning else OTHER_WORK), cleaning
+
+    def money(self) -> int:
+        return int(self.rng.lognormvariate(12.4, 1.1))
+
+    def location(self) -> str:
+        return f"{self.rng.choice(CITIES)}, {self.state()}"
+
+    # -- tables --------------------------------------------------------
+    def leads(self, i: int, password_hash: str) -> Dict[str, Any]:
+        admin = i == 1
+        return {
+            'id': i, 'company_name': f'Bench Cleaning {i}', 'contact_name': f'Bench User {i}',
+            'email': f'user{i}@bench.example', 'username': ADMIN_USERNAME if admin else f'user{i}',
+            'password_hash': password_hash, 'state': self.state(), 'is_admin': admin,
+            # user2 is the paid subscriber the load test signs in as
+            'subscription_status': 'paid' if i <= 2 or self.rng.random() < 0.25 else self.rng.choice(['free', 'unpaid']),
+            'credits_balance': self.rng.randrange(0, 200), 'twofa_enabled': False,
+            'registration_date': self.posted(200).isoformat(), 'created_at': self.stamp(200),
+        }
+
+    def federal_contracts(self, i: int) -> Dict[str, Any]:
+        work, cleaning = self.work()
+        posted = self.posted()
+        return {
+            'id': i, 'title': f'{work} - {self.rng.choice(CITIES)} Facility {i}', 'agency': self.agency(),
+            'department': self.agency(), 'location': self.location(), 'value': f'${self.money():,}',
+            'deadline': posted + timedelta(days=self.rng.randint(7, 60)),
+            'description': f'{work} for federal facilities. Solicitation {i}.',
+            'naics_code': self.rng.choice(NAICS_CLEANING if cleaning else NAICS_OTHER),
+            'sam_gov_url': f'https://sam.gov/opp/bench{i}/view', 'notice_id': f'BENCH-{i}',
+            'set_aside': self.rng.choice(['', '', 'Small Business', '8(a)', 'SDVOSB']),
+            'posted_date': posted, 'created_at': self.stamp(),
+        }
+
+    def contracts(self, i: int) -> Dict[str, Any]:
+        work, cleaning = self.work()
+        posted = self.posted()
+        return {
+            'id': i, 'title': f'{work} RFP {i}', 'agency': f'City of {self.rng.choice(CITIES)}',
+            'location': self.location(), 'value': f'${self.money():,}',
+            'deadline': posted + timedelta(days=self.rng.randint(-10, 60)),
+            'description': f'{work} for municipal buildings.',
+            'naics_code': self.rng.choice(NAICS_CLEANING if cleaning else NAICS_OTHER),
+            'website_url': f'https://city.example/bids/{i}', 'status': 'open', 'created_at': self.stamp(),
+        }
+
+    def supply_contracts(self, i: int) -> Dict[str, Any]:
+        posted = self.posted()
+        category = self.rng.choice(PRODUCT_CATEGORIES)
+        return {
+            'id': i, 'title': f'{category} Supply Contract {i}', 'agency': self.agency(), 'location': self.location(),
+            'product_category': category, 'estimated_value': float(self.money()),
+            'bid_deadline': posted + timedelta(days=self.rng.randint(7, 45)),
+            'description': f'Recurring {category.lower()} purchasing.', 'website_url': f'https://buyer.example/{i}',
+            'is_quick_win': self.rng.random() < 0.1, 'is_small_business_set_aside': self.rng.random() < 0.3,
+            'status': 'open' if self.rng.random() < 0.8 else 'closed', 'posted_date': posted.isoformat(),
+            'category': category, 'contact_email': f'buyer{i}@agency.example', 'created_at': self.stamp(),
+        }
+
+    def commercial_lead_requests(self, i: int) -> Dict[str, Any]:
+        return {
+            'id': i, 'business_name': f'Bench Business {i}', 'contact_name': f'Owner {i}',
+            'email': f'owner{i}@biz.example', 'phone': f'555-{i % 10000:04d}', 'address': f'{i} Main St',
+            'city': self.rng.choice(CITIES), 'state': self.state(), 'business_type': self.rng.choice(BUSINESS_TYPES),
+            'square_footage': self.rng.randrange(1000, 80000, 500), 'frequency': self.rng.choice(['daily', 'weekly', 'monthly']),
+            'services_needed': self.rng.choice(CLEANING_WORK), 'budget_range': f'${self.money() // 100:,}/mo',
+            'urgency': self.rng.choice(['normal', 'normal', 'urgent', 'emergency']),
+            'status': self.rng.choice(['open', 'open', 'open', 'closed']), 'created_at': self.stamp(),
+        }
+
+    def residential_leads(self, i: int) -> Dict[str, Any]:
+        return {
+            'id': i, 'homeowner_name': f'Homeowner {i}', 'address': f'{i} Oak Ave', 'city': self.rng.choice(CITIES),
+            'state': self.state(), 'property_type': self.rng.choice(['House', 'Condo', 'Townhouse']),
+            'bedrooms': self.rng.randint(1, 6), 'square_footage': self.rng.randrange(600, 6000, 100),
+            'contact_email': f'home{i}@mail.example', 'estimated_value': self.rng.randint(100, 900),
+            'cleaning_frequency': self.rng.choice(['weekly', 'biweekly', 'monthly', 'one-time']),
+            'services_needed': self.rng.choice(CLEANING_WORK), 'status': 'new', 'created_at': self.stamp(),
+        }
+
+    def user_activity(self, i: int) -> Dict[str, Any]:
+        return {
+            'id': i, 'user_email': f'user{self.active_user()}@bench.example',
+            'action_type': self.rng.choice(['view_contract', 'view_contract', 'search', 'save_lead', 'login', 'download']),
+            'description': 'Benchmark activity', 'reference_id': str(self.rng.randrange(1, 10000)),
+            'reference_type': 'federal_contract', 'created_at': self.stamp(20),
+        }
+
+    def saved_leads(self, i: int) -> Dict[str, Any]:
+        work, _ = self.work()
+        return {
+            'id': i, 'user_email': f'user{self.active_user()}@bench.example',
+            'lead_type': self.rng.choice(['federal', 'supply', 'commercial']), 'lead_id': str(i),
+            'lead_title': work, 'lead_data': {'title': work}, 'status': 'saved', 'saved_at': self.stamp(),
+        }
+
+    def messages(self, i: int) -> Dict[str, Any]:
+        from_admin = self.rng.random() < 0.3
+        user = self.active_user()
+        return {
+            'id': i, 'sender_id': 1 if from_admin else user, 'recipient_id': user if from_admin else 1,
+            'subject': f'Message {i}', 'body': 'Benchmark message body. ' * 5, 'is_read': self.rng.random() < 0.6,
+            'is_admin_message': from_admin, 'created_at': self.stamp(), 'sent_at': self.stamp(),
+        }
+
+    def forum_posts(self, i: int) -> Dict[str, Any]:
+        user = self.active_user()
+        return {
+            'id': i, 'title': f'Question about {self.rng.choice(CLEANING_WORK).lower()} #{i}',
+            'content': 'How do you price this kind of work? ' * 4, 'post_type': self.rng.choice(['discussion', 'question']),
+            'user_email': f'user{user}@bench.example', 'user_name': f'Bench User {user}',
+            'views': int(self.rng.paretovariate(1.5) * 10), 'status': 'active', 'created_at': self.stamp(60),
+        }
+
+    def forum_comments(self, i: int) -> Dict[str, Any]:
+        user = self.active_user()
+        return {
+            'id': i, 'post_id': min(int(self.rng.paretovariate(1.1)), max(self.rows.get('forum_posts', 1), 1)),
+            'user_email': f'user{user}@bench.example', 'user_name': f'Bench User {user}',
+            'comment_text': 'Good question, here is what we do.', 'created_at': self.stamp(60),
+        }
+
+
+def scaled_rows(scale: float, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    rows = {table: max(int(count * scale), 1) for table, count in PRODUCTION_ROWS.items()}
+    rows.update(overrides or {})
+    return rows
+
+
+def _coerce(value: Any, column_type) -> Any:
+    if isinstance(column_type, sqltypes.DateTime):
+        return datetime(value.year, value.month, value.day) if type(value) is date else value
+    if isinstance(column_type, sqltypes.Date):
+        return value.date() if isinstance(value, datetime) else value
+    if isinstance(column_type, sqltypes.String) and isinstance(value, (date, datetime, int, float)) \
+            and not isinstance(value, bool):
+        return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+    if isinstance(value, dict) and not isinstance(column_type, sqltypes.JSON):
+        return json.dumps(value)
+    return value
+
+
+def seed(engine, rows: Dict[str, int], seed_value: int = 7, batch_size: int = BATCH_SIZE,
+         progress: Callable[[str], None] = lambda message: None) -> Dict[str, float]:
+    """Replace the contents of each table in ``rows`` with synthetic rows.
+
+    Returns seconds spent per table. Tables missing from the database are
+    skipped.
+    """
+    from werkzeug.security import generate_password_hash
+
+    data = SyntheticData(rows, seed_value)
+    password_hash = generate_password_hash(PASSWORD)
+    existing = set(inspect(engine).get_table_names())
+    metadata = MetaData()
+    metadata.reflect(engine, only=[t for t in rows if t in existing])
+    timings = {}
+    for name, count in rows.items():
+        if name not in metadata.tables:
+            progress(f'skip {name}: table not present')
+            continue
+        table = metadata.tables[name]
+        make = getattr(data, name)
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(table.delete())
+            for start in range(1, count + 1, batch_size):
+                batch = []
+                for i in range(start, min(start + batch_size, count + 1)):
+                    row = make(i, password_hash) if name == 'leads' else make(i)
+                    batch.append({k: _coerce(v, table.c[k].type) for k, v in row.items() if k in table.c})
+                conn.execute(table.insert(), batch)
+            if engine.dialect.name == 'postgresql' and 'id' in table.c:
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+                                  f"(SELECT COALESCE(MAX(id), 1) FROM {name}))"))
+        timings[name] = round(time.perf_counter() - started, 2)
+        progress(f'seeded {name}: {count:,} rows in {timings[name]}s')
+    return timings
+
+
+# -- schema -----------------------------------------------------------------
+
+_SQLITE_SHIM = (
+    (re.compile(r'\bBIGSERIAL PRIMARY KEY|\bSERIAL PRIMARY KEY', re.I), 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r'\bNOW\(\)', re.I), 'CURRENT_TIMESTAMP'),
+    (re.compile(r'ADD COLUMN IF NOT EXISTS', re.I), 'ADD COLUMN'),
+)
+
+
+# Production DDL that differs from init_postgres_db (e.g. numeric estimated_value)
+SCHEMA_MIGRATIONS = ('migrations/create_supply_contracts.sql',)
+
+
+def _create_statements(path: str) -> List[str]:
+    with open(path) as f:
+        sql = '\n'.join(line for line in f if not line.lstrip().startswith('--'))
+    return [s.strip() for s in sql.split(';') if s.strip().upper().startswith('CREATE')]
+
+
+def build_sqlite_schema(app_module):
+    """Create the production tables on SQLite: SCHEMA_MIGRATIONS, then init_postgres_db."""
+    engine = app_module.db.engine
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    def shim(conn, cursor, statement, parameters, context, executemany):
+        for pattern, replacement in _SQLITE_SHIM:
+            statement = pattern.sub(replacement, statement)
+        return statement, parameters
+
+    event.listen(engine, 'before_cursor_execute', shim, retval=True)
+    try:
+        with engine.begin() as conn:
+            for path in SCHEMA_MIGRATIONS:
+                for statement in _create_statements(os.path.join(root, path)):
+                    conn.exec_driver_sql(statement)
+        with contextlib.redirect_stdout(io.StringIO()):
+            app_module.init_postgres_db()
+    finally:
+        event.remove(engine, 'before_cursor_execute', shim)
+
+
+def load_app(workdir: str, database_url: Optional[str] = None):
+    """Import app.py against a scratch database. Must run before anything imports app."""
+    if 'app' in sys.modules:
+        raise RuntimeError('app is already imported; run route_benchmark.py in its own process')
+    os.makedirs(workdir, exist_ok=True)
+    if database_url:
+        os.environ['DATABASE_URL'] = database_url
+    else:
+        os.environ.pop('DATABASE_URL', None)
+        os.environ['SQLITE_DB_NAME'] = os.path.join(os.path.abspath(workdir), 'leads.db')
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(workdir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as app_module
+    if not database_url:
+        with app_module.app.app_context():
+            build_sqlite_schema(app_module)
+    return app_module
+
+
+# -- load -------------------------------------------------------------------
+
+@dataclass
+class Route:
+    name: str
+    paths: Sequence[str]           # cycled through, so filters and pages vary
+    role: Optional[str] = 'user'   # None (anonymous), 'user' or 'admin'
+
+
+ROUTES = [
+    Route('client_dashboard', ['/client-dashboard']),
+    Route('federal_contracts', ['/federal-contracts', '/federal-contracts?state=VA&page=2',
+                                '/federal-contracts?department=Department+of+the+Navy', '/federal-contracts?page=50']),
+    Route('quick_wins', ['/quick-wins', '/quick-wins?state=VA', '/quick-wins?page=3&min_value=50000']),
+    Route('commercial_contracts', ['/commercial-contracts', '/commercial-contracts?state=VA&q=office']),
+    Route('search_site', ['/api/search?q=janitorial', '/api/search?q=paper+products', '/api/search?q=richmond']),
+    Route('admin_enhanced', ['/admin-enhanced', '/admin-enhanced?section=users&page=2',
+                             '/admin-enhanced?section=users&search=user1'], role='admin'),
+    Route('mailbox', ['/mailbox', '/mailbox?folder=sent', '/mailbox?page=2']),
+    Route('community_forum', ['/community-forum', '/community-forum?tab=requests&city=Richmond']),
+]
+
+
+class QueryCounter:
+    """Counts statements executed on an engine, per thread."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._local = threading.local()
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+    def take(self) -> int:
+        count, self._local.count = getattr(self._local, 'count', 0), 0
+        return count
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples: List[Tuple[float, int, int]]) -> Dict[str, Any]:
+    """samples: (seconds, status, queries) per request."""
+    latencies = sorted(s[0] * 1000 for s in samples)
+    statuses: Dict[str, int] = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(samples),
+        'status': statuses,
+        'p50_ms': round(_percentile(latencies, 50), 2),
+        'p95_ms': round(_percentile(latencies, 95), 2),
+        'p99_ms': round(_percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'queries_per_request': round(sum(s[2] for s in samples) / len(samples), 1) if samples else 0.0,
+    }
+
+
+def run_route(flask_app, counter: QueryCounter, route: Route, requests: int, concurrency: int,
+              login: Callable[[Any, Optional[str]], None], warmup: int = 1) -> Dict[str, Any]:
+    """Issue ``requests`` requests to one route from ``concurrency`` logged-in clients."""
+    per_worker = [requests // concurrency + (1 if w < requests % concurrency else 0) for w in range(concurrency)]
+
+    def worker(index: int) -> List[Tuple[float, int, int]]:
+        client = flask_app.test_client()
+        login(client, route.role)
+        for n in range(warmup):
+            client.get(route.paths[n % len(route.paths)])
+        counter.take()
+        samples = []
+        for n in range(per_worker[index]):
+            path = route.paths[(index + n) % len(route.paths)]
+            started = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - started
+            samples.append((elapsed, response.status_code, counter.take()))
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = [s for batch in pool.map(worker, range(concurrency)) for s in batch]
+    wall = time.perf_counter() - started
+    summary = summarize(samples)
+    summary['throughput_rps'] = round(len(samples) / wall, 1) if wall else 0.0
+    return summary
+
+
+def signin_login(client, role: Optional[str]):
+    """Sign a test client in as a seeded user or the seeded admin."""
+    if role is None:
+        return
+    username = ADMIN_USERNAME if role == 'admin' else 'user2'
+    client.post('/signin', data={'username': username, 'password': PASSWORD})
+
+
+def run_load(flask_app, engine, routes: Sequence[Route], requests: int, concurrency: int,
+             login: Callable[[Any, Optional[str]], None] = signin_login,
+             progress: Callable[[str], None] = lambda message: None) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    with QueryCounter(engine) as counter:
+        for route in routes:
+            results[route.name] = run_route(flask_app, counter, route, requests, concurrency, login)
+            progress(f"{route.name}: p50 {results[route.name]['p50_ms']}ms p99 {results[route.name]['p99_ms']}ms")
+    return results
+
+
+# -- report -----------------------------------------------------------------
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    header = f"{'route':<22}{'reqs':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'queries':>9}{'rps':>8}  status"
+    lines = [f"commit {report['meta']['commit'] or '?'} on {report['meta']['database']}, "
+             f"concurrency {report['meta']['concurrency']}", header, '-' * len(header)]
+    for name, r in report['routes'].items():
+        status = ' '.join(f'{code}x{n}' for code, n in sorted(r['status'].items()))
+        lines.append(f"{name:<22}{r['requests']:>6}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}"
+                     f"{r['max_ms']:>9}{r['queries_per_request']:>9}{r.get('throughput_rps', 0):>8}  {status}")
+    return '\n'.join(lines)
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> str:
+    """Per-route change in p50/p99 latency and queries between two JSON reports."""
+    def delta(old, new):
+        return f"{new:>9} ({(new - old) / old * 100:+.0f}%)" if old else f"{new:>9}"
+
+    lines = [f"{before['meta']['commit'] or '?'} -> {after['meta']['commit'] or '?'}",
+             f"{'route':<22}{'p50 ms':>17}{'p99 ms':>17}{'queries':>17}"]
+    for name, new in after['routes'].items():
+        old = before['routes'].get(name)
+        if not old:
+            lines.append(f"{name:<22}  (new)")
+            continue
+        lines.append(f"{name:<22}{delta(old['p50_ms'], new['p50_ms']):>17}{delta(old['p99_ms'], new['p99_ms']):>17}"
+                     f"{delta(old['queries_per_request'], new['queries_per_request']):>17}")
+    return '\n'.join(lines)
+
+
+def _parse_rows(values: List[str]) -> Dict[str, int]:
+    overrides = {}
+    for value in values:
+        table, _, count = value.partition('=')
+        if table not in PRODUCTION_ROWS or not count.isdigit():
+            raise argparse.ArgumentTypeError(f"--rows expects table=count with table in {sorted(PRODUCTION_ROWS)}")
+        overrides[table] = int(count)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=0.01, help='fraction of PRODUCTION_ROWS to seed')
+    parser.add_argument('--rows', nargs='*', default=[], metavar='TABLE=N', help='per-table row counts')
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL'),
+                        help='Postgres URL (its tables are overwritten); default is a scratch SQLite file')
+    parser.add_argument('--workdir', default=None, help='scratch directory (default: a new temp dir)')
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the data already in --workdir/--database-url')
+    parser.add_argument('--routes', nargs='*', default=None, help=f"subset of: {', '.join(r.name for r in ROUTES)}")
+    parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--json', action='store_true', help='print the JSON report')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='diff two JSON reports and exit')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f, open(args.compare[1]) as g:
+            print(compare(json.load(f), json.load(g)))
+        return
+    unknown = set(args.routes or ()) - {r.name for r in ROUTES}
+    if unknown:
+        parser.error(f"unknown route(s): {', '.join(sorted(unknown))}")
+    try:
+        rows = scaled_rows(args.scale, _parse_rows(args.rows))
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    log = lambda message: print(message, file=sys.stderr)
+    routes = [r for r in ROUTES if args.routes is None or r.name in args.routes]
+    # The app logs with print(); keep stdout for the report
+    with contextlib.redirect_stdout(sys.stderr):
+        app_module = load_app(args.workdir or tempfile.mkdtemp(prefix='route-bench-'), args.database_url)
+        flask_app = app_module.app
+        flask_app.config['TESTING'] = True
+        with flask_app.app_context():
+            engine = app_module.db.engine
+            if not args.skip_seed:
+                seed(engine, rows, args.seed, progress=log)
+            results = run_load(flask_app, engine, routes, args.requests, args.concurrency, progress=log)
+
+    report = {
+        'meta': {'commit': _commit(), 'database': engine.dialect.name, 'rows': rows,
+                 'requests': args.requests, 'concurrency': args.concurrency, 'seed': args.seed,
+                 'recorded_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')},
+        'routes': results,
+    }
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,15 @@
 """
 Run Real Aviation Scrapers
 1. Remove fake/sample leads
-2. Run aviation_scraper_v2.py (airport procurement, airlines, ground handlers)
+2. Run aviation_scraper_v2.py (airport procurement, airlines, ground handlers),
+   which upserts its leads as each source finishes
 3. Run aviation_airline_scraper.py (airline hubs and bases)
-4. Save all real leads to database
+4. Save the airline hub leads to database
 """
 
 from app import app, db
-from sqlalchemy import text
+from sqlalchemy import func, text
+from db_access import upsert
 import sys
 
 def clear_fake_aviation_leads():
@@ -35,8 +37,10 @@ def run_aviation_scraper_v2():
         print("\n🛫 Running Aviation Scraper V2 (Airport Procurement Pages)...")
         from aviation_scraper_v2 import scrape_all_v2
         
-        # Scrape airports, airlines, and ground handlers
-        results = scrape_all_v2(max_airports=10, max_airlines=5, max_ground_handlers=3)
+        # Scrape airports, airlines, and ground handlers; saved as each source finishes
+        with app.app_context():
+            results = scrape_all_v2(max_airports=10, max_airlines=5, max_ground_handlers=3,
+                                    engine=db.engine)
         
         if results:
             print(f"✅ Found {len(results)} opportunities from Aviation Scraper V2")
@@ -83,63 +87,28 @@ def save_leads_to_database(leads):
     """Save scraped leads to database"""
     with app.app_context():
         try:
-            saved_count = 0
-            for lead in leads:
-                try:
-                    # Extract lead data
-                    company_name = lead.get('company_name', 'Unknown')[:200]
-                    company_type = lead.get('company_type', lead.get('category', 'Aviation'))
-                    city = lead.get('city', 'Unknown')
-                    state = lead.get('state', 'Unknown')
-                    
-                    # Optional fields
-                    aircraft_types = lead.get('aircraft_types', '')
-                    fleet_size = lead.get('fleet_size')
-                    contact_email = lead.get('contact_email', lead.get('email', ''))
-                    contact_phone = lead.get('contact_phone', lead.get('phone', ''))
-                    website_url = lead.get('website_url', lead.get('url', ''))
-                    services_needed = lead.get('services_needed', lead.get('services', 'Aviation cleaning'))
-                    estimated_value = lead.get('estimated_monthly_value', lead.get('value', ''))
-                    notes = lead.get('notes', lead.get('description', ''))
-                    data_source = lead.get('data_source', 'Web scraper')
-                    
-                    # Insert into database
-                    db.session.execute(text("""
-                        INSERT INTO aviation_cleaning_leads
-                        (company_name, company_type, aircraft_types, fleet_size, city, state,
-                         contact_phone, contact_email, website_url, services_needed,
-                         estimated_monthly_value, notes, data_source, is_active)
-                        VALUES
-                        (:company_name, :company_type, :aircraft_types, :fleet_size, :city, :state,
-                         :contact_phone, :contact_email, :website_url, :services_needed,
-                         :estimated_monthly_value, :notes, :data_source, TRUE)
-                        ON CONFLICT (company_name, city, state) DO UPDATE SET
-                        contact_email = EXCLUDED.contact_email,
-                        contact_phone = EXCLUDED.contact_phone,
-                        website_url = EXCLUDED.website_url,
-                        last_verified = CURRENT_TIMESTAMP
-                    """), {
-                        'company_name': company_name,
-                        'company_type': company_type,
-                        'aircraft_types': aircraft_types,
-                        'fleet_size': fleet_size,
-                        'city': city,
-                        'state': state,
-                        'contact_phone': contact_phone,
-                        'contact_email': contact_email,
-                        'website_url': website_url,
-                        'services_needed': services_needed,
-                        'estimated_monthly_value': estimated_value,
-                        'notes': notes,
-                        'data_source': data_source
-                    })
-                    saved_count += 1
-                    print(f"  ✅ Saved: {company_name[:50]}")
-                    
-                except Exception as e:
-                    print(f"  ⚠️ Error saving {company_name}: {e}")
-                    continue
+            rows = [{
+                'company_name': lead.get('company_name', 'Unknown')[:200],
+                'company_type': lead.get('company_type', lead.get('category', 'Aviation')),
+                'aircraft_types': lead.get('aircraft_types', ''),
+                'fleet_size': lead.get('fleet_size'),
+                'city': lead.get('city', 'Unknown'),
+                'state': lead.get('state', 'Unknown'),
+                'contact_phone': lead.get('contact_phone', lead.get('phone', '')),
+                'contact_email': lead.get('contact_email', lead.get('email', '')),
+                'website_url': lead.get('website_url', lead.get('url', '')),
+                'services_needed': lead.get('services_needed', lead.get('services', 'Aviation cleaning')),
+                'estimated_monthly_value': lead.get('estimated_monthly_value', lead.get('value', '')),
+                'notes': lead.get('notes', lead.get('description', '')),
+                'data_source': lead.get('data_source', 'Web scraper'),
+                'is_active': True,
+            } for lead in leads]
             
+            # One multi-row upsert; repeated (company, city, state) keys collapse to the last lead
+            saved_count = upsert(db.session.connection(), 'aviation_cleaning_leads', rows,
+                                 conflict=('company_name', 'city', 'state'),
+                                 update=('contact_email', 'contact_phone', 'website_url'),
+                                 touch={'last_verified': func.current_timestamp()})
             db.session.commit()
             print(f"\n✅ Successfully saved {saved_count}/{len(leads)} real aviation leads")
             return saved_count
@@ -161,10 +130,8 @@ def main():
     # Step 2: Run scrapers
     all_leads = []
     
-    # Run Aviation Scraper V2 (airport procurement)
-    v2_results = run_aviation_scraper_v2()
-    if v2_results:
-        all_leads.extend(v2_results)
+    # Run Aviation Scraper V2 (airport procurement; saves its own results)
+    run_aviation_scraper_v2()
     
     # Run Airline Hub Scraper
     airline_results = run_airline_scraper()
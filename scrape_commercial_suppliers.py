@@ -20,12 +20,12 @@ Requires:
 """
 
 import requests
-from bs4 import BeautifulSoup
 import json
 import time
 from datetime import datetime
 from app import app, db
 from sqlalchemy import text
+from html_parsing import make_soup
 
 # Target business categories
 BUSINESS_CATEGORIES = {
@@ -149,7 +149,7 @@ def scrape_yellowpages(category, city):
         response = requests.get(url, headers=headers, timeout=10)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
             
             # Find business listings
             listings = soup.find_all('div', class_='result', limit=5)
@@ -202,7 +202,7 @@ def scrape_company_procurement_info(company_name):
         response = requests.get(search_url, headers=headers, timeout=10)
         
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
             
             # Look for email addresses
             emails = []
@@ -5,12 +5,13 @@ and adds them to the local government contracts database.
 """
 
 import requests
-from bs4 import BeautifulSoup
 import sqlite3
 from datetime import datetime
 import re
 import time
 
+from html_parsing import make_soup
+
 # Database connection
 DB_PATH = 'leads.db'
 
@@ -40,7 +41,7 @@ def scrape_eva_opportunities():
         response = requests.get(url, headers=headers, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = make_soup(response.content)
         
         opportunities = []
         
@@ -0,0 +1,236 @@
+"""Offline scraper benchmark: replay recorded portals and measure the parsers.
+
+Each registered scraper runs against its cassette in ``benchmarks/cassettes``
+(see http_cassette.py), so results are repeatable and need no network.
+
+Usage:
+python scraper_benchmark.py --record demandstar aviation_v2   # capture live pages once
+python scraper_benchmark.py                                   # replay every cassette
+python scraper_benchmark.py demandstar --json
+
+Design:
+- Replay patches ``time.sleep`` to a no-op, so politeness delays and retry
+  backoff do not count; what remains is parsing plus bookkeeping.
+- Two passes per scraper: a timed pass (pages/sec, parse ms/page) and a
+  ``tracemalloc`` pass for peak memory, because tracing slows Python code
+  several-fold. ``reset`` hooks clear module caches between passes.
+- parse ms/page is process CPU time minus the CPU time spent inside the
+  cassette transport, divided by the responses served. Both are CPU clocks,
+  so the figure stays correct for scrapers that fetch from worker threads
+  (wall time would double-count overlapping requests). Yield is results and
+  results per page.
+- Scrapers without a cassette are reported as skipped; requests missing from a
+  cassette are counted as misses (a sign the cassette needs re-recording).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from http_cassette import use_cassette
+
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'cassettes')
+
+
+@dataclass
+class Benchmark:
+    name: str
+    run: Callable[[], Optional[Iterable[Any]]]
+    reset: Optional[Callable[[], None]] = None
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def register(name: str, reset: Optional[Callable[[], None]] = None):
+    """Decorator adding a zero-argument scraper run to the suite."""
+    def decorator(fn):
+        BENCHMARKS[name] = Benchmark(name, fn, reset)
+        return fn
+    return decorator
+
+
+def _national(cls_name: str):
+    def run():
+        import national_scrapers
+        return getattr(national_scrapers, cls_name)().scrape()
+    return run
+
+
+for _name, _cls in (('symphony', 'SymphonyScraper'), ('demandstar', 'DemandStarScraper'),
+                    ('bidexpress', 'BidExpressScraper'), ('commbuys', 'COMBUYSScraper'),
+                    ('emaryland', 'EMarylandScraper'), ('newhampshire', 'NewHampshireScraper'),
+                    ('rhodeisland', 'RhodeIslandScraper'), ('arizona', 'ArizonaScraper')):
+    register(_name)(_national(_cls))
+
+
+@register('construction')
+def _construction():
+    from construction_scraper import ConstructionLeadsScraper
+    return ConstructionLeadsScraper().scrape_all_states(limit_per_state=2)
+
+
+@register('local_gov')
+def _local_gov():
+    from local_gov_scraper import VirginiaLocalGovScraper
+    return VirginiaLocalGovScraper().fetch_all_local_contracts()
+
+
+@register('city_county')
+def _city_county():
+    from scrapers.city_county_scraper import CityCountyScraper
+    return CityCountyScraper().scrape()
+
+
+def _clear_industry_days():
+    from scrapers import industry_days_events_scraper
+    industry_days_events_scraper.source_cache.clear()
+
+
+@register('industry_days', reset=_clear_industry_days)
+def _industry_days():
+    from scrapers.industry_days_events_scraper import IndustryDaysEventsScraper
+    return IndustryDaysEventsScraper().scrape_all_states()
+
+
+@register('aviation_v2')
+def _aviation_v2():
+    from aviation_scraper_v2 import scrape_all_v2
+    return scrape_all_v2()
+
+
+def _clear_international():
+    from integrations import international_sources
+    for state in (international_sources._feeds, international_sources._breakers,
+                  international_sources._metrics):
+        state.clear()
+
+
+@register('international', reset=_clear_international)
+def _international():
+    from integrations.international_sources import fetch_international_cleaning
+    return fetch_international_cleaning()
+
+
+def cassette_path(name: str, directory: str = CASSETTE_DIR) -> str:
+    return os.path.join(directory, f'{name}.json')
+
+
+@contextmanager
+def _no_sleep():
+    original = time.sleep
+    time.sleep = lambda seconds: None
+    try:
+        yield
+    finally:
+        time.sleep = original
+
+
+def _count(results) -> int:
+    try:
+        return len(results)
+    except TypeError:
+        return sum(1 for _ in results or ())
+
+
+def _pass(bench: Benchmark, path: str, trace: bool) -> Dict[str, Any]:
+    if bench.reset:
+        bench.reset()
+    with use_cassette(path) as cassette, _no_sleep():
+        if trace:
+            tracemalloc.start()
+        started, cpu_started = time.perf_counter(), time.process_time()
+        try:
+            results = _count(bench.run())
+        finally:
+            wall = time.perf_counter() - started
+            cpu = time.process_time() - cpu_started
+            peak = tracemalloc.get_traced_memory()[1] if trace else 0
+            if trace:
+                tracemalloc.stop()
+    return {'results': results, 'wall': wall, 'cpu': cpu, 'peak': peak, **cassette.stats}
+
+
+def run_benchmark(bench: Benchmark, directory: str = CASSETTE_DIR) -> Dict[str, Any]:
+    """Replay one scraper's cassette and return its measurements."""
+    path = cassette_path(bench.name, directory)
+    if not os.path.exists(path):
+        return {'name': bench.name, 'status': 'skipped', 'reason': 'no cassette'}
+    try:
+        timed = _pass(bench, path, trace=False)
+        traced = _pass(bench, path, trace=True)
+    except Exception as e:
+        return {'name': bench.name, 'status': 'error', 'reason': str(e)[:200]}
+    pages = timed['hits']
+    parse_seconds = max(timed['cpu'] - timed['http_cpu_seconds'], 0.0)
+    return {
+        'name': bench.name,
+        'status': 'ok',
+        'pages': pages,
+        'misses': timed['misses'],
+        'seconds': round(timed['wall'], 4),
+        'pages_per_sec': round(pages / timed['wall'], 1) if timed['wall'] else None,
+        'parse_ms_per_page': round(parse_seconds * 1000 / pages, 2) if pages else None,
+        'peak_mb': round(traced['peak'] / 1e6, 2),
+        'results': timed['results'],
+        'results_per_page': round(timed['results'] / pages, 2) if pages else None,
+    }
+
+
+def record(bench: Benchmark, directory: str = CASSETTE_DIR) -> Dict[str, Any]:
+    """Run one scraper live and save every response it receives."""
+    if bench.reset:
+        bench.reset()
+    with use_cassette(cassette_path(bench.name, directory), mode='record') as cassette:
+        try:
+            results = _count(bench.run())
+        except Exception as e:
+            return {'name': bench.name, 'status': 'error', 'reason': str(e)[:200], **cassette.stats}
+    return {'name': bench.name, 'status': 'recorded', 'results': results, **cassette.stats}
+
+
+def run_suite(names: Optional[List[str]] = None, directory: str = CASSETTE_DIR) -> List[Dict[str, Any]]:
+    return [run_benchmark(BENCHMARKS[name], directory) for name in names or BENCHMARKS]
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    header = f"{'scraper':<14}{'pages':>7}{'pages/s':>10}{'parse ms/pg':>13}{'peak MB':>9}{'results':>9}{'per pg':>8}"
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        if row['status'] != 'ok':
+            lines.append(f"{row['name']:<14}  {row['status']}: {row.get('reason', '')}")
+            continue
+        lines.append(f"{row['name']:<14}{row['pages']:>7}{row['pages_per_sec'] or 0:>10}"
+                     f"{row['parse_ms_per_page'] or 0:>13}{row['peak_mb']:>9}{row['results']:>9}"
+                     f"{row['results_per_page'] or 0:>8}" + (f"  ({row['misses']} misses)" if row['misses'] else ''))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scrapers', nargs='*', metavar='scraper',
+                        help=f"subset to run (default: all). One of: {', '.join(sorted(BENCHMARKS))}")
+    parser.add_argument('--record', action='store_true', help='hit the live portals and (re)write cassettes')
+    parser.add_argument('--cassettes', default=CASSETTE_DIR, help='cassette directory')
+    parser.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    args = parser.parse_args(argv)
+    unknown = sorted(set(args.scrapers) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f"unknown scraper(s): {', '.join(unknown)}")
+
+    if args.record:
+        rows = [record(BENCHMARKS[name], args.cassettes) for name in args.scrapers or BENCHMARKS]
+        print(json.dumps(rows, indent=2))
+        return
+    rows = run_suite(args.scrapers, args.cassettes)
+    print(json.dumps(rows, indent=2) if args.json else format_report(rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,8 +8,8 @@ import logging
 from datetime import datetime
 from sam_gov_fetcher import SAMgovFetcher
 from local_gov_scraper import VirginiaLocalGovScraper
-from sqlalchemy import create_engine, text
-import os
+from sqlalchemy import text
+from db_access import get_engine
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,12 +22,8 @@ class ProcurementScraperScheduler:
     """Automated scheduler for procurement opportunity scrapers"""
     
     def __init__(self):
-        # Use the same database as the Flask app
-        database_url = os.environ.get('DATABASE_URL', 'sqlite:///contracts.db')
-        if database_url.startswith('postgres://'):
-            database_url = database_url.replace('postgres://', 'postgresql://', 1)
-        
-        self.engine = create_engine(database_url)
+        # Use the same database (and pool) as the Flask app
+        self.engine = get_engine()
         self.sam_fetcher = SAMgovFetcher()
         self.local_scraper = VirginiaLocalGovScraper()
     
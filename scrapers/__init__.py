@@ -4,8 +4,8 @@ Automated web scrapers for government procurement portals
 """
 
 from .base_scraper import BaseScraper, ScraperError
-from .eva_virginia_scraper import EVAVirginiaScraper
-from .state_portal_scraper import StatePortalScraper
+from scrapers_deprecated.eva_virginia_scraper import EVAVirginiaScraper
+from scrapers_deprecated.state_portal_scraper import StatePortalScraper
 from .city_county_scraper import CityCountyScraper
 
 __all__ = [
@@ -0,0 +1,9 @@
+"""
+Base Scraper (compatibility import)
+The legacy BaseScraper moved to scrapers_deprecated/ with the old state
+scrapers; CityCountyScraper and the ScraperManager still build on it.
+"""
+
+from scrapers_deprecated.base_scraper import BaseScraper, ScrapeCancelled, ScraperError, logger
+
+__all__ = ['BaseScraper', 'ScrapeCancelled', 'ScraperError', 'logger']
@@ -3,7 +3,7 @@ City/County Bid Board Scraper
 Scrapes local government procurement sites in Virginia
 """
 
-from .base_scraper import BaseScraper, logger
+from .base_scraper import BaseScraper, ScrapeCancelled, logger
 from typing import List, Dict
 import re
 
@@ -136,6 +136,9 @@ class CityCountyScraper(BaseScraper):
                 
                 logger.info(f"[{self.name}] {city_config['name']}: Found {len(contracts)} contracts")
             
+            except ScrapeCancelled as e:
+                e.partial = all_contracts + e.partial
+                raise
             except Exception as e:
                 logger.error(f"[{self.name}] Error scraping {city_key}: {e}")
                 continue
@@ -194,6 +197,9 @@ class CityCountyScraper(BaseScraper):
                 if contracts:
                     break
             
+            except ScrapeCancelled as e:
+                e.partial = contracts
+                raise
             except Exception as e:
                 logger.warning(f"[{self.name}] Error with {url}: {e}")
                 continue
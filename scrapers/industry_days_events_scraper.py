@@ -2,16 +2,81 @@
 Industry Days & Events Scraper
 Extracts government industry days, networking events, and procurement opportunities
 Supports all 50 states and major cities
+
+SAM.gov and the SBA calendar are national feeds: they are fetched once and
+filtered or partitioned by state in memory. State portals are fetched
+concurrently, one request per host at a time. Every source's events are
+cached in-process for SOURCE_TTL seconds, so per-state calls made right
+after a 50-state run do not touch the network.
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin, urlparse
 from datetime import datetime, timedelta
+import threading
 import time
 import re
 import json
 
+from city_portals import HostGate
+from html_parsing import make_soup
+
+SOURCE_TTL = 3600  # seconds a source's events are reused
+MAX_WORKERS = 8
+
+# State procurement portal URLs (expandable)
+STATE_PORTALS = {
+    'VA': 'https://eva.virginia.gov',
+    'MD': 'https://emma.maryland.gov',
+    'TX': 'https://www.txsmartbuy.com',
+    'CA': 'https://www.caleprocure.ca.gov',
+    'NY': 'https://online.ogs.ny.gov',
+    'FL': 'https://www.myflorida.com/apps/vbs',
+    'PA': 'https://www.emarketplace.state.pa.us',
+    'OH': 'https://procure.ohio.gov',
+    'NC': 'https://www.ips.state.nc.us',
+    'GA': 'https://ssl.doas.state.ga.us',
+    # Add more states...
+}
+
+EVENT_KEYWORDS = ['industry day', 'networking event', 'vendor fair',
+                  'matchmaking', 'meet the buyer', 'procurement event',
+                  'small business', 'outreach event']
+
+
+class SourceCache:
+    """Events per source key with a TTL, shared by every scraper instance in the process."""
+    
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+    
+    def get_or_load(self, key, load):
+        """
+        Cached events for ``key``, or ``load()``; a load that raises is not cached.
+        Returns a new list each call, so callers may extend it without touching the cache.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return list(entry[1])
+        events = load()
+        with self._lock:
+            self._entries[key] = (time.monotonic(), events)
+        return list(events)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+source_cache = SourceCache(SOURCE_TTL)
+host_gate = HostGate(per_host=1, interval=1.0)
+
+
 class IndustryDaysEventsScraper:
     """
     Universal scraper for government industry days and events
@@ -24,6 +89,9 @@ class IndustryDaysEventsScraper:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
         # State abbreviations
         self.states = {
@@ -69,61 +137,60 @@ class IndustryDaysEventsScraper:
         """
         Scrape industry days from SAM.gov Interact platform
         https://sam.gov/content/opportunities
-        """
-        events = []
         
+        One national query, cached; ``state_filter`` selects from it.
+        """
         try:
-            # SAM.gov API endpoint for opportunities
-            base_url = "https://sam.gov/api/prod/opportunities/v2/search"
-            
-            params = {
-                "limit": 100,
-                "postedFrom": (datetime.now() - timedelta(days=90)).strftime('%m/%d/%Y'),
-                "postedTo": (datetime.now() + timedelta(days=365)).strftime('%m/%d/%Y'),
-                "opportunityType": "s",  # Special notices (includes industry days)
-                "ptype": "p"  # Procurement type
-            }
-            
-            if state_filter:
-                params['state'] = state_filter
-            
-            response = self.session.get(base_url, params=params, timeout=30)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                for opp in data.get('opportunities', []):
-                    # Check if it's an industry day or event
-                    title = opp.get('title', '').lower()
-                    description = opp.get('description', '').lower()
-                    
-                    event_keywords = ['industry day', 'networking event', 'vendor fair', 
-                                     'matchmaking', 'meet the buyer', 'procurement event',
-                                     'small business', 'outreach event']
-                    
-                    is_event = any(keyword in title or keyword in description 
-                                  for keyword in event_keywords)
-                    
-                    if is_event:
-                        events.append({
-                            'title': opp.get('title'),
-                            'description': opp.get('description', '')[:1000],
-                            'agency': opp.get('departmentName', 'Federal Agency'),
-                            'location': opp.get('placeOfPerformance', {}).get('cityName', 'Multiple Locations'),
-                            'state': opp.get('placeOfPerformance', {}).get('state', state_filter or 'N/A'),
-                            'date': opp.get('postedDate'),
-                            'deadline': opp.get('responseDeadLine'),
-                            'url': f"https://sam.gov/opp/{opp.get('noticeId')}/view",
-                            'notice_id': opp.get('noticeId'),
-                            'source': 'SAM.gov Industry Days',
-                            'event_type': 'Industry Day'
-                        })
-            
-            print(f"✅ Found {len(events)} industry days on SAM.gov")
-            
+            events = source_cache.get_or_load(('sam.gov',), self._fetch_sam_gov_events)
         except Exception as e:
             print(f"❌ Error scraping SAM.gov: {e}")
+            return []
         
+        if state_filter:
+            events = [e for e in events if e['state'] == state_filter]
+        print(f"✅ Found {len(events)} industry days on SAM.gov")
+        return events
+    
+    def _fetch_sam_gov_events(self):
+        # SAM.gov API endpoint for opportunities
+        base_url = "https://sam.gov/api/prod/opportunities/v2/search"
+        
+        params = {
+            "limit": 1000,
+            "postedFrom": (datetime.now() - timedelta(days=90)).strftime('%m/%d/%Y'),
+            "postedTo": (datetime.now() + timedelta(days=365)).strftime('%m/%d/%Y'),
+            "opportunityType": "s",  # Special notices (includes industry days)
+            "ptype": "p"  # Procurement type
+        }
+        
+        response = self.session.get(base_url, params=params, timeout=30)
+        response.raise_for_status()
+        
+        events = []
+        for opp in response.json().get('opportunities', []):
+            # Check if it's an industry day or event
+            title = (opp.get('title') or '').lower()
+            description = (opp.get('description') or '').lower()
+            if not any(keyword in title or keyword in description for keyword in EVENT_KEYWORDS):
+                continue
+            
+            place = opp.get('placeOfPerformance') or {}
+            state = place.get('state')
+            if isinstance(state, dict):
+                state = state.get('code')
+            events.append({
+                'title': opp.get('title'),
+                'description': (opp.get('description') or '')[:1000],
+                'agency': opp.get('departmentName', 'Federal Agency'),
+                'location': place.get('cityName', 'Multiple Locations'),
+                'state': state or 'N/A',
+                'date': opp.get('postedDate'),
+                'deadline': opp.get('responseDeadLine'),
+                'url': f"https://sam.gov/opp/{opp.get('noticeId')}/view",
+                'notice_id': opp.get('noticeId'),
+                'source': 'SAM.gov Industry Days',
+                'event_type': 'Industry Day'
+            })
         return events
     
     def scrape_virginia_events(self):
@@ -140,7 +207,7 @@ class IndustryDaysEventsScraper:
             for url in urls:
                 response = self.session.get(url, timeout=15)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
                     
                     # Find event listings
                     event_divs = soup.find_all(['div', 'article'], 
@@ -168,62 +235,61 @@ class IndustryDaysEventsScraper:
         return events
     
     def scrape_sba_events(self, state_filter=None):
-        """Scrape Small Business Administration events"""
-        events = []
-        
+        """Scrape Small Business Administration events (one cached national page)"""
         try:
-            # SBA Events Calendar API
-            url = "https://www.sba.gov/events"
-            
-            response = self.session.get(url, timeout=15)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                event_cards = soup.find_all(['div', 'article'], 
-                                           class_=re.compile(r'event|card', re.I))
-                
-                for card in event_cards[:30]:
-                    title_elem = card.find(['h2', 'h3', 'a'])
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        
-                        # Extract location
-                        location_text = card.get_text()
-                        location = 'Online'
-                        state_match = re.search(r'\b(' + '|'.join(self.states.values()) + r')\b', 
-                                               location_text, re.I)
-                        if state_match:
-                            location = state_match.group(1)
-                            state_abbr = [k for k, v in self.states.items() 
-                                         if v.lower() == location.lower()]
-                            state = state_abbr[0] if state_abbr else 'N/A'
-                        else:
-                            state = 'N/A'
-                        
-                        # Apply state filter
-                        if state_filter and state != state_filter:
-                            continue
-                        
-                        link = card.find('a', href=True)
-                        event_url = urljoin(url, link['href']) if link else url
-                        
-                        events.append({
-                            'title': title,
-                            'description': card.get_text(strip=True)[:500],
-                            'agency': 'U.S. Small Business Administration',
-                            'location': location,
-                            'state': state,
-                            'url': event_url,
-                            'source': 'SBA Events Calendar',
-                            'event_type': 'Small Business Event'
-                        })
-                
-                print(f"✅ Found {len(events)} SBA events")
-                
+            events = source_cache.get_or_load(('sba',), self._fetch_sba_events)
         except Exception as e:
             print(f"⚠️ SBA scraping: {e}")
+            return []
         
+        # Apply state filter
+        if state_filter:
+            events = [e for e in events if e['state'] == state_filter]
+        print(f"✅ Found {len(events)} SBA events")
+        return events
+    
+    def _fetch_sba_events(self):
+        # SBA Events Calendar API
+        url = "https://www.sba.gov/events"
+        
+        response = self.session.get(url, timeout=15)
+        response.raise_for_status()
+        
+        soup = make_soup(response.text)
+        state_codes = {v.lower(): k for k, v in self.states.items()}
+        state_pattern = re.compile(r'\b(' + '|'.join(self.states.values()) + r')\b', re.I)
+        
+        events = []
+        event_cards = soup.find_all(['div', 'article'], 
+                                   class_=re.compile(r'event|card', re.I))
+        
+        for card in event_cards[:30]:
+            title_elem = card.find(['h2', 'h3', 'a'])
+            if not title_elem:
+                continue
+            title = title_elem.get_text(strip=True)
+            
+            # Extract location
+            location = 'Online'
+            state = 'N/A'
+            state_match = state_pattern.search(card.get_text(' '))
+            if state_match:
+                location = state_match.group(1)
+                state = state_codes.get(location.lower(), 'N/A')
+            
+            link = card.find('a', href=True)
+            event_url = urljoin(url, link['href']) if link else url
+            
+            events.append({
+                'title': title,
+                'description': card.get_text(strip=True)[:500],
+                'agency': 'U.S. Small Business Administration',
+                'location': location,
+                'state': state,
+                'url': event_url,
+                'source': 'SBA Events Calendar',
+                'event_type': 'Small Business Event'
+            })
         return events
     
     def scrape_state_procurement_events(self, state_code):
@@ -231,157 +297,168 @@ class IndustryDaysEventsScraper:
         Scrape state-specific procurement portals
         Template for expanding to all 50 states
         """
-        events = []
         state_name = self.states.get(state_code, state_code)
+        if state_code not in STATE_PORTALS:
+            return []
         
-        # State procurement portal URLs (expandable)
-        state_portals = {
-            'VA': 'https://eva.virginia.gov',
-            'MD': 'https://emma.maryland.gov',
-            'TX': 'https://www.txsmartbuy.com',
-            'CA': 'https://www.caleprocure.ca.gov',
-            'NY': 'https://online.ogs.ny.gov',
-            'FL': 'https://www.myflorida.com/apps/vbs',
-            'PA': 'https://www.emarketplace.state.pa.us',
-            'OH': 'https://procure.ohio.gov',
-            'NC': 'https://www.ips.state.nc.us',
-            'GA': 'https://ssl.doas.state.ga.us',
-            # Add more states...
-        }
+        try:
+            events = source_cache.get_or_load(('portal', state_code),
+                                              lambda: self._fetch_state_portal_events(state_code))
+        except Exception as e:
+            print(f"⚠️ {state_name} scraping: {e}")
+            return []
+        
+        if events:
+            print(f"✅ Found {len(events)} {state_name} procurement events")
+        return events
+    
+    def _fetch_state_portal_events(self, state_code):
+        state_name = self.states.get(state_code, state_code)
+        portal_url = STATE_PORTALS[state_code]
+        host = urlparse(portal_url).netloc
         
-        portal_url = state_portals.get(state_code)
+        # Try to find events page
+        event_paths = ['/events', '/calendar', '/outreach', '/vendors', '/opportunities']
+        events = []
+        last_error = None
+        reached = False
         
-        if portal_url:
+        for path in event_paths:
+            slot = host_gate.acquire(host)
             try:
-                # Try to find events page
-                event_paths = ['/events', '/calendar', '/outreach', '/vendors', '/opportunities']
-                
-                for path in event_paths:
-                    try:
-                        response = self.session.get(portal_url + path, timeout=10)
-                        if response.status_code == 200:
-                            soup = BeautifulSoup(response.text, 'html.parser')
-                            
-                            # Generic event extraction
-                            event_elements = soup.find_all(['div', 'article', 'li'], 
-                                                          class_=re.compile(r'event|calendar|listing', re.I))
-                            
-                            for elem in event_elements[:15]:
-                                title_elem = elem.find(['h2', 'h3', 'h4', 'strong', 'a'])
-                                if title_elem and len(title_elem.get_text(strip=True)) > 10:
-                                    events.append({
-                                        'title': title_elem.get_text(strip=True),
-                                        'description': elem.get_text(strip=True)[:500],
-                                        'agency': f'{state_name} State Procurement',
-                                        'location': state_name,
-                                        'state': state_code,
-                                        'url': portal_url + path,
-                                        'source': f'{state_name} Procurement Portal',
-                                        'event_type': 'State Procurement Event'
-                                    })
-                            
-                            if events:
-                                break  # Found events, stop trying other paths
-                                
-                    except Exception:
-                        continue
-                
-                if events:
-                    print(f"✅ Found {len(events)} {state_name} procurement events")
-                
+                response = self.session.get(portal_url + path, timeout=10)
             except Exception as e:
-                print(f"⚠️ {state_name} scraping: {e}")
+                last_error = e
+                continue
+            finally:
+                slot.release()
+            reached = True
+            if response.status_code != 200:
+                continue
+            
+            soup = make_soup(response.text)
+            
+            # Generic event extraction
+            event_elements = soup.find_all(['div', 'article', 'li'], 
+                                          class_=re.compile(r'event|calendar|listing', re.I))
+            
+            for elem in event_elements[:15]:
+                title_elem = elem.find(['h2', 'h3', 'h4', 'strong', 'a'])
+                if title_elem and len(title_elem.get_text(strip=True)) > 10:
+                    events.append({
+                        'title': title_elem.get_text(strip=True),
+                        'description': elem.get_text(strip=True)[:500],
+                        'agency': f'{state_name} State Procurement',
+                        'location': state_name,
+                        'state': state_code,
+                        'url': portal_url + path,
+                        'source': f'{state_name} Procurement Portal',
+                        'event_type': 'State Procurement Event'
+                    })
+            
+            if events:
+                break  # Found events, stop trying other paths
         
+        if not reached and last_error is not None:
+            raise last_error  # portal unreachable: retry next time instead of caching nothing
         return events
     
-    def scrape_all_states(self, limit_per_state=5):
-        """Scrape events from all 50 states"""
-        all_events = []
+    @staticmethod
+    def _by_state(events):
+        grouped = {}
+        for event in events:
+            grouped.setdefault(event.get('state'), []).append(event)
+        return grouped
+    
+    def scrape_all_states(self, limit_per_state=5, max_workers=MAX_WORKERS):
+        """
+        Scrape events from all 50 states
         
+        The national feeds are fetched once and split by state; state
+        portals run concurrently (one request per host at a time).
+        """
         print(f"\n🚀 Starting 50-state event scraper...")
+        started = time.monotonic()
         
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='industry-days') as pool:
+            sam = pool.submit(self.scrape_sam_gov_events)
+            sba = pool.submit(self.scrape_sba_events)
+            portals = {code: pool.submit(self.scrape_state_procurement_events, code)
+                       for code in self.states if code in STATE_PORTALS}
+            sam_by_state = self._by_state(sam.result())
+            sba_by_state = self._by_state(sba.result())
+            portal_events = {code: future.result() for code, future in portals.items()}
+        
+        all_events = []
         for state_code, state_name in self.states.items():
-            print(f"\n📍 Scraping {state_name} ({state_code})...")
-            
-            # Try multiple sources
-            events = []
-            
-            # 1. SAM.gov federal events in this state
-            events.extend(self.scrape_sam_gov_events(state_code))
-            
-            # 2. SBA events in this state
-            events.extend(self.scrape_sba_events(state_code))
-            
-            # 3. State procurement portal
-            events.extend(self.scrape_state_procurement_events(state_code))
+            # SAM.gov, then SBA, then the state portal
+            events = (sam_by_state.get(state_code, []) + sba_by_state.get(state_code, [])
+                      + portal_events.get(state_code, []))
             
             # Limit per state to avoid overwhelming database
             events = events[:limit_per_state]
-            
             all_events.extend(events)
-            
-            print(f"   ✅ {len(events)} events found in {state_name}")
-            
-            # Be respectful - delay between states
-            time.sleep(2)
+            if events:
+                print(f"   ✅ {len(events)} events found in {state_name}")
         
-        print(f"\n✅ Total events scraped: {len(all_events)} across {len(self.states)} states")
+        print(f"\n✅ Total events scraped: {len(all_events)} across {len(self.states)} states "
+              f"in {time.monotonic() - started:.1f}s")
         
         return all_events
     
     def save_to_database(self, events, db_session):
         """Save scraped events to database"""
-        from sqlalchemy import text
+        from sqlalchemy import bindparam, text
+        
+        if not events:
+            return 0
         
-        saved_count = 0
+        # Duplicates: same URL, or same title + agency, in the table or earlier in this batch
+        existing = db_session.execute(text('''
+            SELECT url, title, agency FROM government_contracts 
+            WHERE url IN :urls OR title IN :titles
+        ''').bindparams(bindparam('urls', expanding=True), bindparam('titles', expanding=True)), {
+            'urls': sorted({event.get('url', '') for event in events}),
+            'titles': sorted({event['title'] for event in events if event['title']})
+        }).fetchall()
+        seen_urls = {row[0] for row in existing}
+        seen_keys = {(row[1], row[2]) for row in existing}
         
+        rows = []
         for event in events:
-            try:
-                # Check for duplicates
-                existing = db_session.execute(text('''
-                    SELECT id FROM government_contracts 
-                    WHERE url = :url OR (title = :title AND agency = :agency)
-                '''), {
-                    'url': event.get('url', ''),
-                    'title': event['title'],
-                    'agency': event.get('agency', 'Unknown')
-                }).fetchone()
-                
-                if existing:
-                    continue
-                
-                # Insert event
-                db_session.execute(text('''
-                    INSERT INTO government_contracts 
-                    (title, agency, location, url, description, posted_date, deadline, 
-                     contract_type, naics_code, data_source, notice_id, state)
-                    VALUES 
-                    (:title, :agency, :location, :url, :description, :posted_date, :deadline,
-                     :contract_type, :naics_code, :data_source, :notice_id, :state)
-                '''), {
-                    'title': event['title'],
-                    'agency': event.get('agency', 'Government Agency'),
-                    'location': event.get('location', 'N/A'),
-                    'url': event.get('url', ''),
-                    'description': event.get('description', ''),
-                    'posted_date': event.get('date', datetime.now().strftime('%Y-%m-%d')),
-                    'deadline': event.get('deadline'),
-                    'contract_type': event.get('event_type', 'Industry Day'),
-                    'naics_code': '561720',
-                    'data_source': event.get('source', 'Industry Days Scraper'),
-                    'notice_id': event.get('notice_id'),
-                    'state': event.get('state', 'N/A')
-                })
-                
-                saved_count += 1
-                print(f"✅ Saved: {event['title'][:60]}")
-                
-            except Exception as e:
-                print(f"❌ Error saving {event['title'][:50]}: {e}")
+            url = event.get('url', '')
+            key = (event['title'], event.get('agency', 'Unknown'))
+            if url in seen_urls or key in seen_keys:
                 continue
+            seen_urls.add(url)
+            seen_keys.add(key)
+            rows.append({
+                'title': event['title'],
+                'agency': event.get('agency', 'Government Agency'),
+                'location': event.get('location', 'N/A'),
+                'url': url,
+                'description': event.get('description', ''),
+                'posted_date': event.get('date', datetime.now().strftime('%Y-%m-%d')),
+                'deadline': event.get('deadline'),
+                'contract_type': event.get('event_type', 'Industry Day'),
+                'naics_code': '561720',
+                'data_source': event.get('source', 'Industry Days Scraper'),
+                'notice_id': event.get('notice_id'),
+                'state': event.get('state', 'N/A')
+            })
         
+        if rows:
+            db_session.execute(text('''
+                INSERT INTO government_contracts 
+                (title, agency, location, url, description, posted_date, deadline, 
+                 contract_type, naics_code, data_source, notice_id, state)
+                VALUES 
+                (:title, :agency, :location, :url, :description, :posted_date, :deadline,
+                 :contract_type, :naics_code, :data_source, :notice_id, :state)
+            '''), rows)
         db_session.commit()
-        return saved_count
+        print(f"✅ Saved {len(rows)} new events ({len(events) - len(rows)} duplicates)")
+        return len(rows)
 
 
 # CLI usage
@@ -14,15 +14,136 @@ Sources:
 6. Commercial property management companies
 
 Output: Buyers who need janitorial supplies (cleaning chemicals, paper products, equipment)
+
+The five discovery phases run concurrently. Each finished phase is handed to
+a single writer, which de-duplicates buyers on normalized agency + title +
+location and bulk-upserts them into supply_contracts. start_buyer_scrape_job
+runs the whole thing in the background and returns a pollable job handle
+with per-phase timings. Job state is mirrored to ``supply_buyer_jobs`` after
+every phase, so a poll that reaches another worker still finds the job.
 """
 
 import requests
 import json
+import re
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
 import os
 from bs4 import BeautifulSoup
+from sqlalchemy import bindparam, inspect, text
+
+# (phase name, scraper method), in result order
+PHASES = (
+    ('sam_gov', 'scrape_sam_gov_supply_requests'),
+    ('state_portals', 'scrape_state_procurement_portals'),
+    ('education', 'scrape_educational_institutions'),
+    ('healthcare', 'scrape_healthcare_facilities'),
+    ('property_mgmt', 'scrape_commercial_property_managers'),
+)
+
+PHASE_DESCRIPTIONS = {
+    'sam_gov': 'Federal supply requests',
+    'state_portals': '10 major states',
+    'education': '5 major school districts',
+    'healthcare': '4 major hospital systems',
+    'property_mgmt': '4 national companies',
+}
+
+SUPPLY_COLUMNS = ('title', 'agency', 'location', 'estimated_value', 'description', 'website_url',
+                  'status', 'posted_date', 'category', 'product_category', 'requirements',
+                  'contact_email', 'contact_phone', 'created_at')
+# Refreshed on an existing row when the same buyer is found again
+UPDATE_COLUMNS = ('estimated_value', 'description', 'website_url', 'posted_date',
+                  'requirements', 'contact_email', 'contact_phone')
+# A blank value found later never overwrites a stored one
+KEEP_IF_BLANK = ('contact_email', 'contact_phone')
+MAX_FINISHED_JOBS = 20
+
+
+def _normalize(value: Any) -> str:
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(value or '').lower()).split())
+
+
+def buyer_key(agency: Any, title: Any, location: Any) -> Tuple[str, str, str]:
+    """Dedup key: agency, title and location, lowercased with punctuation and spacing collapsed."""
+    return _normalize(agency), _normalize(title), _normalize(location)
+
+
+def buyer_row(buyer: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a discovered buyer to supply_contracts columns."""
+    return {
+        'title': buyer['contract_title'],
+        'agency': buyer['buyer_name'],
+        'location': buyer['location'],
+        'estimated_value': buyer['estimated_monthly_value'],
+        'description': f"{buyer['organization_type']} seeking {buyer['supply_category']}. {buyer['buyer_type']}. {buyer['recurring']}",
+        'website_url': buyer['website_url'],
+        'status': 'open',
+        'posted_date': buyer.get('posted_date') or datetime.now().strftime('%Y-%m-%d'),
+        'category': buyer['supply_category'],
+        'product_category': buyer['supply_category'],
+        'requirements': f"Buyer Type: {buyer['buyer_type']}. Recurring: {buyer['recurring']}. Contact: {buyer.get('contact_email', 'See website')}",
+        'contact_email': buyer.get('contact_email', ''),
+        'contact_phone': buyer.get('contact_phone', ''),
+        'created_at': datetime.now()
+    }
+
+
+class BuyerWriter:
+    """Streaming de-duplication plus bulk upsert of buyers into supply_contracts"""
+
+    def __init__(self):
+        self._columns = None
+        self._seen = set()  # keys written during this run
+
+    def _existing_columns(self, conn) -> set:
+        if self._columns is None:
+            self._columns = {c['name'] for c in inspect(conn).get_columns('supply_contracts')}
+        return self._columns
+
+    def write(self, conn, buyers: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Upsert one batch on ``conn``: update rows with the same key, insert the rest
+
+        Returns:
+            {'inserted': n, 'updated': n, 'duplicates': n}
+        """
+        rows = {}
+        for buyer in buyers:
+            row = buyer_row(buyer)
+            key = buyer_key(row['agency'], row['title'], row['location'])
+            if key in self._seen or key in rows:
+                continue
+            rows[key] = row
+        duplicates = len(buyers) - len(rows)
+        if not rows:
+            return {'inserted': 0, 'updated': 0, 'duplicates': duplicates}
+        self._seen.update(rows)
+
+        columns = self._existing_columns(conn)
+        candidates = conn.execute(text(
+            'SELECT id, agency, title, location FROM supply_contracts WHERE LOWER(agency) IN :agencies'
+        ).bindparams(bindparam('agencies', expanding=True)),
+            {'agencies': sorted({row['agency'].strip().lower() for row in rows.values()})})
+        existing = {buyer_key(r[1], r[2], r[3]): r[0] for r in candidates}
+
+        update_cols = [c for c in UPDATE_COLUMNS if c in columns]
+        updates = [dict({c: rows[k][c] for c in update_cols}, id=existing[k]) for k in rows if k in existing]
+        if updates:
+            assignments = ', '.join(f"{c} = COALESCE(NULLIF(:{c}, ''), {c})" if c in KEEP_IF_BLANK else f'{c} = :{c}'
+                                    for c in update_cols)
+            conn.execute(text(f"UPDATE supply_contracts SET {assignments} WHERE id = :id"), updates)
+
+        insert_cols = [c for c in SUPPLY_COLUMNS if c in columns]
+        inserts = [{c: row[c] for c in insert_cols} for k, row in rows.items() if k not in existing]
+        if inserts:
+            conn.execute(text(f"INSERT INTO supply_contracts ({', '.join(insert_cols)}) "
+                              f"VALUES ({', '.join(':' + c for c in insert_cols)})"), inserts)
+        return {'inserted': len(inserts), 'updated': len(updates), 'duplicates': duplicates}
 
 class JanitorialSupplyBuyersScraper:
     def __init__(self):
@@ -65,7 +186,9 @@ class JanitorialSupplyBuyersScraper:
             
             all_buyers = []
             
-            for keyword in keywords[:3]:  # Limit to avoid rate limiting
+            for i, keyword in enumerate(keywords[:3]):  # Limit to avoid rate limiting
+                if i:
+                    time.sleep(2)  # Rate limiting
                 params = {
                     'api_key': api_key,
                     'q': keyword,
@@ -102,7 +225,6 @@ class JanitorialSupplyBuyersScraper:
                         all_buyers.append(buyer)
                     
                     print(f"  ✅ Found {len(opportunities)} supply requests for '{keyword}'")
-                    time.sleep(2)  # Rate limiting
                 else:
                     print(f"  ⚠️  SAM.gov API error for '{keyword}': {response.status_code}")
             
@@ -436,36 +558,45 @@ class JanitorialSupplyBuyersScraper:
         print(f"  ✅ Added {len(property_buyers)} property management buyers")
         return property_buyers
     
-    def scrape_all_sources(self):
+    def scrape_all_sources(self, sink: Optional[Callable[[str, List[Dict]], None]] = None,
+                           max_workers: int = len(PHASES)):
         """
         Comprehensive scrape from all sources
+        
+        Phases run concurrently; ``sink(phase, buyers)`` is called on this
+        thread as each phase finishes. Per-phase timings end up in
+        ``self.phase_timings``.
         """
         print("\n" + "="*60)
         print("🧹 JANITORIAL SUPPLY BUYERS - NATIONWIDE SCRAPER")
         print("="*60)
         
-        all_buyers = []
-        
-        # 1. SAM.gov federal supply requests
-        sam_buyers = self.scrape_sam_gov_supply_requests(limit=20)
-        all_buyers.extend(sam_buyers)
+        found = {}
+        self.phase_timings = {}
         
-        # 2. State procurement portals
-        state_buyers = self.scrape_state_procurement_portals()
-        all_buyers.extend(state_buyers)
-        
-        # 3. Educational institutions
-        education_buyers = self.scrape_educational_institutions()
-        all_buyers.extend(education_buyers)
-        
-        # 4. Healthcare facilities
-        healthcare_buyers = self.scrape_healthcare_facilities()
-        all_buyers.extend(healthcare_buyers)
+        def run_phase(method_name):
+            started = time.monotonic()
+            try:
+                return getattr(self, method_name)(), None, time.monotonic() - started
+            except Exception as e:
+                return [], str(e), time.monotonic() - started
         
-        # 5. Commercial property managers
-        property_buyers = self.scrape_commercial_property_managers()
-        all_buyers.extend(property_buyers)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='supply-buyers') as pool:
+            futures = {pool.submit(run_phase, method): phase for phase, method in PHASES}
+            for future in as_completed(futures):
+                phase = futures[future]
+                buyers, error, seconds = future.result()
+                found[phase] = buyers
+                self.phase_timings[phase] = {'scrape_seconds': round(seconds, 3), 'found': len(buyers)}
+                if error:
+                    self.phase_timings[phase]['error'] = error
+                    print(f"❌ {phase} failed: {error}")
+                if sink is not None and buyers:
+                    started = time.monotonic()
+                    sink(phase, buyers)
+                    self.phase_timings[phase]['save_seconds'] = round(time.monotonic() - started, 3)
         
+        all_buyers = [buyer for phase, _ in PHASES for buyer in found.get(phase, [])]
         self.buyers = all_buyers
         
         print("\n" + "="*60)
@@ -476,60 +607,148 @@ class JanitorialSupplyBuyersScraper:
     
     def save_to_database(self, db_session):
         """
-        Save buyers to supply_contracts table
+        Save buyers to supply_contracts table (de-duplicated bulk upsert)
         """
-        from sqlalchemy import text
-        
         print(f"\n💾 Saving {len(self.buyers)} buyers to database...")
         
-        saved_count = 0
-        
-        for buyer in self.buyers:
-            try:
-                # Insert into supply_contracts table
-                query = text("""
-                    INSERT INTO supply_contracts (
-                        title, agency, location, estimated_value, description,
-                        website_url, status, posted_date, category, 
-                        product_category, requirements, contact_email, contact_phone,
-                        created_at
-                    ) VALUES (
-                        :title, :agency, :location, :estimated_value, :description,
-                        :website_url, :status, :posted_date, :category,
-                        :product_category, :requirements, :contact_email, :contact_phone,
-                        :created_at
-                    )
-                """)
-                
-                db_session.execute(query, {
-                    'title': buyer['contract_title'],
-                    'agency': buyer['buyer_name'],
-                    'location': buyer['location'],
-                    'estimated_value': buyer['estimated_monthly_value'],
-                    'description': f"{buyer['organization_type']} seeking {buyer['supply_category']}. {buyer['buyer_type']}. {buyer['recurring']}",
-                    'website_url': buyer['website_url'],
-                    'status': 'open',
-                    'posted_date': buyer.get('posted_date', datetime.now().strftime('%Y-%m-%d')),
-                    'category': buyer['supply_category'],
-                    'product_category': buyer['supply_category'],
-                    'requirements': f"Buyer Type: {buyer['buyer_type']}. Recurring: {buyer['recurring']}. Contact: {buyer.get('contact_email', 'See website')}",
-                    'contact_email': buyer.get('contact_email', ''),
-                    'contact_phone': buyer.get('contact_phone', ''),
-                    'created_at': datetime.now()
-                })
-                
-                saved_count += 1
-                
-            except Exception as e:
-                print(f"  ⚠️  Error saving {buyer['buyer_name']}: {e}")
-                continue
-        
+        counts = BuyerWriter().write(db_session.connection(), self.buyers)
         db_session.commit()
-        print(f"✅ Saved {saved_count} buyers to database")
+        saved_count = counts['inserted'] + counts['updated']
+        print(f"✅ Saved {saved_count} buyers to database "
+              f"({counts['inserted']} new, {counts['updated']} updated)")
         
         return saved_count
 
 
+# ---------------------------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------------------------
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+_jobs_tables = set()  # engine URLs where supply_buyer_jobs is known to exist
+
+
+def _ensure_jobs_table(engine):
+    key = str(engine.url)
+    if key in _jobs_tables:
+        return
+    with engine.begin() as conn:
+        conn.execute(text('''CREATE TABLE IF NOT EXISTS supply_buyer_jobs
+                     (job_id TEXT PRIMARY KEY,
+                      status TEXT,
+                      phases TEXT,
+                      result TEXT,
+                      started_at TEXT,
+                      completed_at TEXT)'''))
+    _jobs_tables.add(key)
+
+
+def _persist_job(engine, job: Dict[str, Any]):
+    try:
+        with engine.begin() as conn:
+            params = {'job_id': job['job_id'], 'status': job['status'], 'phases': json.dumps(job['phases']),
+                      'result': json.dumps(job['result']), 'started_at': job['started_at'],
+                      'completed_at': job['completed_at']}
+            updated = conn.execute(text('''UPDATE supply_buyer_jobs SET status = :status, phases = :phases,
+                                           result = :result, completed_at = :completed_at
+                                           WHERE job_id = :job_id'''), params)
+            if not updated.rowcount:
+                conn.execute(text('''INSERT INTO supply_buyer_jobs
+                                     (job_id, status, phases, result, started_at, completed_at)
+                                     VALUES (:job_id, :status, :phases, :result, :started_at, :completed_at)'''),
+                             params)
+    except Exception as e:
+        print(f"⚠️ Could not record buyer scrape job {job['job_id']}: {e}")
+
+
+def start_buyer_scrape_job(engine) -> Dict[str, Any]:
+    """
+    Scrape and save all buyers in a background thread; returns the job handle
+
+    Phases are saved as they finish, each in its own transaction. A request
+    while a job is running in this process returns that job instead of
+    starting another.
+    """
+    _ensure_jobs_table(engine)
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job['status'] == 'running':
+                return dict(job)
+        job = {
+            'job_id': uuid.uuid4().hex[:12],
+            'status': 'running',
+            'started_at': datetime.now().isoformat(),
+            'completed_at': None,
+            'phases': {},
+            'result': None,
+        }
+        _jobs[job['job_id']] = job
+        finished = [j for j in _jobs.values() if j['status'] != 'running']
+        for old in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del _jobs[old['job_id']]
+    _persist_job(engine, job)
+
+    def run():
+        started = time.monotonic()
+        writer = BuyerWriter()
+        totals = {'inserted': 0, 'updated': 0, 'duplicates': 0}
+        scraper = JanitorialSupplyBuyersScraper()
+
+        def save(phase, buyers):
+            with engine.begin() as conn:
+                counts = writer.write(conn, buyers)
+            for k in totals:
+                totals[k] += counts[k]
+            job['phases'] = dict(scraper.phase_timings)
+            _persist_job(engine, job)
+
+        try:
+            buyers = scraper.scrape_all_sources(sink=save)
+            with engine.connect() as conn:
+                total = conn.execute(text('SELECT COUNT(*) FROM supply_contracts')).scalar()
+            job['phases'] = scraper.phase_timings
+            job['result'] = {
+                'found': len(buyers),
+                'saved': totals['inserted'] + totals['updated'],
+                'inserted': totals['inserted'],
+                'updated': totals['updated'],
+                'duplicates': totals['duplicates'],
+                'total': total,
+                'duration_seconds': round(time.monotonic() - started, 3),
+                'sources': dict(PHASE_DESCRIPTIONS),
+            }
+            job['status'] = 'completed'
+        except Exception as e:
+            print(f"❌ Buyer scrape job {job['job_id']} failed: {e}")
+            job['status'] = 'error'
+            job['result'] = {'error': str(e)}
+        job['completed_at'] = datetime.now().isoformat()
+        _persist_job(engine, job)
+
+    threading.Thread(target=run, daemon=True, name=f"supply-buyers-{job['job_id']}").start()
+    return dict(job)
+
+
+def get_buyer_scrape_job(job_id: str, engine=None) -> Optional[Dict[str, Any]]:
+    """Job state from this process, or from supply_buyer_jobs if another worker ran it"""
+    job = _jobs.get(job_id)
+    if job:
+        return dict(job)
+    if engine is None:
+        return None
+    _ensure_jobs_table(engine)
+    with engine.connect() as conn:
+        row = conn.execute(text('''SELECT job_id, status, phases, result, started_at, completed_at
+                                   FROM supply_buyer_jobs WHERE job_id = :job_id'''), {'job_id': job_id}).fetchone()
+    if not row:
+        return None
+    job = dict(row._mapping)
+    job['phases'] = json.loads(job['phases'] or '{}')
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+
 # Standalone execution
 if __name__ == '__main__':
     scraper = JanitorialSupplyBuyersScraper()
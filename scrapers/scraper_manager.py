@@ -1,78 +1,258 @@
 """
 Scraper Manager and Scheduler
 Coordinates all scrapers and provides admin interface
+
+Runs scrapers in parallel, each in its own worker with its own scraper
+instance (and so its own HTTP session), bounded by ``max_workers``. A
+scraper that passes its ``timeout`` (or whose job is cancelled) is stopped
+cooperatively: its next page request raises ScrapeCancelled instead of
+touching the network. Whatever it collected up to then is still saved;
+scrapers with broad ``except Exception`` handlers re-raise ScrapeCancelled
+with those rows on ``partial`` rather than returning an empty list.
+
+Results stream into a single writer thread as each scraper finishes, which
+bulk-inserts new contracts into the app's main database (one executemany
+per scraper, de-duplicated on title + agency) instead of opening a SQLite
+connection per save. ``scraper_logs`` lives in the same database and records
+pages fetched, bytes downloaded and per-phase timings for every run.
+
+Usage:
+    manager = get_scraper_manager(lambda: db.engine)
+    job = manager.start_job(['all'])            # returns immediately
+    manager.get_job(job['job_id'])              # poll status/results
+    manager.run_all_scrapers()                  # blocking, parallel
 """
 
-import sqlite3
-from datetime import datetime
-import logging
-from typing import List, Dict, Optional
+import importlib
+import json
 import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+from sqlalchemy import bindparam, inspect, text
+
+from db_access import get_engine
+
+from scrapers.base_scraper import ScrapeCancelled, logger
+
+# name -> "module:Class"; the EVA and state portal scrapers now live in scrapers_deprecated/
+SCRAPER_REGISTRY = {
+    'eva_virginia': 'scrapers_deprecated.eva_virginia_scraper:EVAVirginiaScraper',
+    'state_portals': 'scrapers_deprecated.state_portal_scraper:StatePortalScraper',
+    'city_county': 'scrapers.city_county_scraper:CityCountyScraper',
+}
+
+DEFAULT_MAX_WORKERS = 3
+DEFAULT_TIMEOUT = 900  # seconds per scraper
+WRITE_CHUNK = 500
+MAX_FINISHED_JOBS = 50
+
+CONTRACT_COLUMNS = ('title', 'agency', 'location', 'value', 'deadline', 'description',
+                    'naics_code', 'website_url', 'data_source')
+
+LOG_COLUMNS = {
+    'job_id': 'TEXT',
+    'pages_fetched': 'INTEGER DEFAULT 0',
+    'bytes_fetched': 'INTEGER DEFAULT 0',
+    'duration_seconds': 'REAL',
+    'phase_timings': 'TEXT',
+}
+
+
+def _load_scraper_class(path: str):
+    module_name, class_name = path.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class _RunMonitor:
+    """
+    Per-scraper instrumentation: counts pages and bytes on the scraper's
+    requests session and stops it at the next request after the deadline
+    or a cancel.
+    """
+
+    def __init__(self, scraper, deadline: float, cancel_event: threading.Event):
+        self.deadline = deadline
+        self.cancel_event = cancel_event
+        self.pages = 0
+        self.bytes = 0
+        self.stopped = None
 
-from scrapers.base_scraper import logger
-from scrapers.eva_virginia_scraper import EVAVirginiaScraper
-from scrapers.state_portal_scraper import StatePortalScraper
-from scrapers.city_county_scraper import CityCountyScraper
+        session = getattr(scraper, 'session', None)
+        if session is not None:
+            session.hooks.setdefault('response', []).append(self._count)
+            request = session.request
+
+            def guarded_request(*args, **kwargs):
+                self.check()
+                return request(*args, **kwargs)
+            session.request = guarded_request
+
+        rate_limit_delay = getattr(scraper, '_rate_limit_delay', None)
+        if rate_limit_delay is not None:
+            # Don't sleep out a politeness delay for a request that will not be sent
+            def guarded_delay():
+                self.check()
+                return rate_limit_delay()
+            scraper._rate_limit_delay = guarded_delay
+
+    def _count(self, response, *args, **kwargs):
+        self.pages += 1
+        length = response.headers.get('Content-Length')
+        self.bytes += int(length) if length and length.isdigit() else len(response.content or b'')
+
+    def check(self):
+        if self.cancel_event.is_set():
+            self.stopped = self.stopped or 'cancelled'
+        elif time.monotonic() > self.deadline:
+            self.stopped = self.stopped or 'timeout'
+        if self.stopped:
+            raise ScrapeCancelled(self.stopped)
+
+
+class ContractWriter:
+    """Bulk, de-duplicated inserts of scraped contracts into ``contracts``"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._columns = None
+
+    def _insert_columns(self, conn) -> List[str]:
+        if self._columns is None:
+            existing = {c['name'] for c in inspect(conn).get_columns('contracts')}
+            self._columns = [c for c in CONTRACT_COLUMNS if c in existing]
+        return self._columns
+
+    def write(self, contracts: List[Dict], source: str) -> int:
+        """
+        Insert contracts whose (title, agency) is not already stored
+
+        Args:
+            contracts: Standardized contract dictionaries
+            source: Default data_source value
+
+        Returns:
+            Number of contracts inserted
+        """
+        rows = {}
+        for contract in contracts:
+            title = (contract.get('title') or '').strip()
+            agency = (contract.get('agency') or '').strip()
+            if not title or not agency or (title, agency) in rows:
+                continue
+            row = {col: contract.get(col) for col in CONTRACT_COLUMNS}
+            row.update(title=title, agency=agency, data_source=contract.get('data_source') or source)
+            rows[(title, agency)] = row
+        if not rows:
+            return 0
+
+        existing_sql = text('SELECT title, agency FROM contracts WHERE title IN :titles').bindparams(
+            bindparam('titles', expanding=True))
+        saved = 0
+        with self.engine.begin() as conn:
+            columns = self._insert_columns(conn)
+            insert_sql = text(f"INSERT INTO contracts ({', '.join(columns)}) "
+                              f"VALUES ({', '.join(':' + c for c in columns)})")
+            keys = list(rows)
+            for start in range(0, len(keys), WRITE_CHUNK):
+                chunk = keys[start:start + WRITE_CHUNK]
+                titles = list({title for title, _ in chunk})
+                existing = {(r[0], r[1]) for r in conn.execute(existing_sql, {'titles': titles})}
+                new_rows = [{c: rows[k][c] for c in columns} for k in chunk if k not in existing]
+                if new_rows:
+                    conn.execute(insert_sql, new_rows)
+                    saved += len(new_rows)
+        return saved
 
 
 class ScraperManager:
     """
     Manages all scrapers and provides scheduling capabilities
     """
-    
-    def __init__(self, db_path: str = 'leads.db'):
+
+    def __init__(self, engine_getter: Callable, scrapers: Optional[Dict] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT):
         """
         Initialize scraper manager
-        
+
         Args:
-            db_path: Path to SQLite database
+            engine_getter: Callable returning the SQLAlchemy engine to write to
+            scrapers: Optional name -> scraper class/factory mapping (default: SCRAPER_REGISTRY)
+            max_workers: Scrapers allowed to run at the same time
+            timeout: Seconds each scraper may run before it is stopped
         """
-        self.db_path = db_path
-        self.scrapers = {
-            'eva_virginia': EVAVirginiaScraper(),
-            'state_portals': StatePortalScraper(),
-            'city_county': CityCountyScraper()
-        }
-        
+        self._engine_getter = engine_getter
+        self._engine = None
+        self.scrapers = dict(scrapers) if scrapers is not None else dict(SCRAPER_REGISTRY)
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self.jobs = {}
+        self._jobs_lock = threading.Lock()
         self.scraper_status = {}
         self.is_running = False
-        self._ensure_scraper_log_table()
-    
+        self._log_table_ready = False
+
+    @property
+    def engine(self):
+        # Resolved once, in the caller's (app) context, and reused by worker threads
+        if self._engine is None:
+            self._engine = self._engine_getter()
+        return self._engine
+
     def _ensure_scraper_log_table(self):
-        """Create scraper log table if it doesn't exist"""
+        """Create scraper log table if it doesn't exist, adding the metric columns to older tables"""
+        if self._log_table_ready:
+            return
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS scraper_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    scraper_name TEXT NOT NULL,
-                    started_at TIMESTAMP NOT NULL,
-                    completed_at TIMESTAMP,
-                    status TEXT DEFAULT 'running',
-                    contracts_found INTEGER DEFAULT 0,
-                    contracts_saved INTEGER DEFAULT 0,
-                    error_message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            conn.commit()
-            conn.close()
-            
+            is_pg = self.engine.dialect.name == 'postgresql'
+            id_type = 'SERIAL PRIMARY KEY' if is_pg else 'INTEGER PRIMARY KEY AUTOINCREMENT'
+            with self.engine.begin() as conn:
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS scraper_logs (
+                        id {id_type},
+                        scraper_name TEXT NOT NULL,
+                        started_at TIMESTAMP NOT NULL,
+                        completed_at TIMESTAMP,
+                        status TEXT DEFAULT 'running',
+                        contracts_found INTEGER DEFAULT 0,
+                        contracts_saved INTEGER DEFAULT 0,
+                        error_message TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """))
+                existing = {c['name'] for c in inspect(conn).get_columns('scraper_logs')}
+                for column, ddl in LOG_COLUMNS.items():
+                    if column not in existing:
+                        conn.execute(text(f"ALTER TABLE scraper_logs ADD COLUMN {column} {ddl}"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS idx_scraper_logs_job ON scraper_logs(job_id)"))
+            self._log_table_ready = True
+
         except Exception as e:
             logger.error(f"Error creating scraper_logs table: {e}")
-    
+
+    def _resolve_names(self, names: List[str]) -> List[str]:
+        if not names or 'all' in names:
+            return list(self.scrapers)
+        return list(dict.fromkeys(names))
+
+    def _build_scraper(self, scraper_name: str):
+        factory = self.scrapers[scraper_name]
+        if isinstance(factory, str):
+            factory = _load_scraper_class(factory)
+        return factory()
+
     def run_scraper(self, scraper_name: str, save_to_db: bool = True) -> Dict:
         """
         Run a specific scraper
-        
+
         Args:
             scraper_name: Name of scraper to run
             save_to_db: Whether to save results to database
-            
+
         Returns:
             Dictionary with scraper results
         """
@@ -81,246 +261,408 @@ class ScraperManager:
                 'success': False,
                 'error': f'Unknown scraper: {scraper_name}'
             }
-        
-        scraper = self.scrapers[scraper_name]
-        
-        # Log start
-        log_id = self._log_scraper_start(scraper_name)
-        
-        try:
-            logger.info(f"Starting scraper: {scraper_name}")
-            start_time = datetime.now()
-            
-            # Run the scraper
-            contracts = scraper.scrape()
-            
-            contracts_saved = 0
-            
-            if save_to_db and contracts:
-                # Save to database
-                conn = sqlite3.connect(self.db_path)
-                contracts_saved = scraper.save_contracts(contracts, conn)
-                conn.close()
-            
-            # Log completion
-            duration = (datetime.now() - start_time).total_seconds()
-            
-            self._log_scraper_complete(
-                log_id,
-                status='success',
-                contracts_found=len(contracts),
-                contracts_saved=contracts_saved
-            )
-            
-            result = {
-                'success': True,
-                'scraper': scraper_name,
-                'contracts_found': len(contracts),
-                'contracts_saved': contracts_saved,
-                'duration_seconds': duration,
-                'started_at': start_time.isoformat(),
-                'completed_at': datetime.now().isoformat()
-            }
-            
-            logger.info(f"✅ {scraper_name} complete: {contracts_saved}/{len(contracts)} contracts saved")
-            return result
-        
-        except Exception as e:
-            logger.error(f"❌ {scraper_name} failed: {e}")
-            
-            self._log_scraper_complete(
-                log_id,
-                status='error',
-                error_message=str(e)
-            )
-            
-            return {
-                'success': False,
-                'scraper': scraper_name,
-                'error': str(e)
-            }
-    
-    def run_all_scrapers(self, save_to_db: bool = True) -> Dict:
+
+        results = self._run_batch([scraper_name], save_to_db, max_workers=1)
+        return results['scrapers'][scraper_name]
+
+    def run_all_scrapers(self, save_to_db: bool = True, parallel: bool = True,
+                         max_workers: Optional[int] = None) -> Dict:
         """
-        Run all scrapers sequentially
-        
+        Run all scrapers
+
         Args:
             save_to_db: Whether to save results to database
-            
+            parallel: Run scrapers concurrently (False runs them one at a time)
+            max_workers: Override the manager's concurrency limit
+
         Returns:
             Dictionary with aggregated results
         """
         logger.info("Running all scrapers...")
-        
+        workers = 1 if not parallel else (max_workers or self.max_workers)
+        results = self._run_batch(list(self.scrapers), save_to_db, max_workers=workers)
+
+        logger.info(f"✅ All scrapers complete: {results['total_contracts_saved']} total contracts saved "
+                    f"in {results['duration_seconds']:.1f}s")
+        return results
+
+    def _run_batch(self, names: List[str], save_to_db: bool, max_workers: int,
+                   job_id: Optional[str] = None, cancel_event: Optional[threading.Event] = None) -> Dict:
+        """Run scrapers in a bounded pool, streaming each result into one writer thread"""
+        self._ensure_scraper_log_table()
+        job_id = job_id or uuid.uuid4().hex[:12]
+        cancel_event = cancel_event or threading.Event()
+        writer = ContractWriter(self.engine) if save_to_db else None
+        started = time.monotonic()
+
         results = {
+            'job_id': job_id,
             'started_at': datetime.now().isoformat(),
             'scrapers': {},
             'total_contracts_found': 0,
             'total_contracts_saved': 0
         }
-        
-        for scraper_name in self.scrapers.keys():
-            result = self.run_scraper(scraper_name, save_to_db)
-            results['scrapers'][scraper_name] = result
-            
-            if result.get('success'):
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='scraper-writer') as write_pool, \
+                ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names))),
+                                   thread_name_prefix='scraper') as pool:
+            futures = {
+                name: pool.submit(self._run_one, name, writer, write_pool, job_id, cancel_event)
+                for name in names
+            }
+            for name, future in futures.items():
+                result = future.result()
+                results['scrapers'][name] = result
                 results['total_contracts_found'] += result.get('contracts_found', 0)
                 results['total_contracts_saved'] += result.get('contracts_saved', 0)
-        
+
         results['completed_at'] = datetime.now().isoformat()
-        
-        logger.info(f"✅ All scrapers complete: {results['total_contracts_saved']} total contracts saved")
+        results['duration_seconds'] = round(time.monotonic() - started, 3)
         return results
-    
+
+    def _run_one(self, scraper_name: str, writer: Optional[ContractWriter], write_pool,
+                 job_id: str, cancel_event: threading.Event) -> Dict:
+        """Run one scraper in its worker thread; never raises"""
+        start_time = datetime.now()
+        log_id = self._log_scraper_start(scraper_name, job_id)
+        self.scraper_status[scraper_name] = 'running'
+        timings = {}
+        monitor = None
+        contracts = []
+        contracts_saved = 0
+        error = None
+
+        try:
+            logger.info(f"Starting scraper: {scraper_name}")
+            phase = time.monotonic()
+            scraper = self._build_scraper(scraper_name)
+            monitor = _RunMonitor(scraper, phase + self.timeout, cancel_event)
+            timings['setup'] = time.monotonic() - phase
+
+            phase = time.monotonic()
+            try:
+                contracts = scraper.scrape() or []
+            except ScrapeCancelled as e:
+                contracts = e.partial
+            timings['scrape'] = time.monotonic() - phase
+
+            contracts_saved = 0
+            if writer is not None and contracts:
+                # Writes are serialized on one thread; waiting for it is the "queue" phase
+                queued = time.monotonic()
+                timing = {}
+
+                def save():
+                    timing['start'] = time.monotonic()
+                    return writer.write(contracts, getattr(scraper, 'name', scraper_name))
+                contracts_saved = write_pool.submit(save).result()
+                timings['queue'] = timing['start'] - queued
+                timings['save'] = time.monotonic() - timing['start']
+
+        except Exception as e:
+            logger.error(f"❌ {scraper_name} failed: {e}")
+            error = str(e)
+
+        status = 'error' if error else (monitor.stopped if monitor and monitor.stopped else 'success')
+        if status == 'timeout':
+            error = f'Timed out after {self.timeout}s; {len(contracts)} partial results kept'
+        elif status == 'cancelled':
+            error = f'Cancelled; {len(contracts)} partial results kept'
+        duration = (datetime.now() - start_time).total_seconds()
+        timings = {k: round(v, 3) for k, v in timings.items()}
+        pages = monitor.pages if monitor else 0
+        bytes_fetched = monitor.bytes if monitor else 0
+
+        self._log_scraper_complete(
+            log_id,
+            status=status,
+            contracts_found=len(contracts),
+            contracts_saved=contracts_saved,
+            error_message=error,
+            pages_fetched=pages,
+            bytes_fetched=bytes_fetched,
+            duration_seconds=duration,
+            phase_timings=timings
+        )
+        self.scraper_status[scraper_name] = status
+
+        if status == 'error':
+            return {
+                'success': False,
+                'scraper': scraper_name,
+                'status': status,
+                'error': error,
+                'duration_seconds': duration
+            }
+
+        logger.info(f"✅ {scraper_name} {status}: {contracts_saved}/{len(contracts)} contracts saved, "
+                    f"{pages} pages in {duration:.1f}s")
+        return {
+            'success': True,
+            'scraper': scraper_name,
+            'status': status,
+            'contracts_found': len(contracts),
+            'contracts_saved': contracts_saved,
+            'pages_fetched': pages,
+            'bytes_fetched': bytes_fetched,
+            'timings': timings,
+            'duration_seconds': duration,
+            'started_at': start_time.isoformat(),
+            'completed_at': datetime.now().isoformat()
+        }
+
+    def start_job(self, names: List[str], save_to_db: bool = True) -> Dict:
+        """
+        Run scrapers in the background and return a job handle immediately
+
+        A request for scrapers that are already running in another job
+        returns that job instead of starting a second run.
+
+        Args:
+            names: Scraper names, or ['all']
+            save_to_db: Whether to save results to database
+
+        Returns:
+            Job dictionary (job_id, status, scrapers, ...)
+        """
+        unknown = [n for n in names if n != 'all' and n not in self.scrapers]
+        if unknown:
+            raise ValueError(f"Unknown scraper: {', '.join(unknown)}")
+        names = self._resolve_names(names)
+        self.engine  # resolve in the caller's app context before handing off
+
+        with self._jobs_lock:
+            for job in self.jobs.values():
+                if job['status'] == 'running' and set(names) & set(job['scrapers']):
+                    return self._job_view(job)
+
+            job = {
+                'job_id': uuid.uuid4().hex[:12],
+                'scrapers': names,
+                'status': 'running',
+                'started_at': datetime.now().isoformat(),
+                'completed_at': None,
+                'result': None,
+                'cancel_event': threading.Event()
+            }
+            self.jobs[job['job_id']] = job
+            self._prune_jobs()
+
+        def run():
+            try:
+                result = self._run_batch(names, save_to_db, self.max_workers,
+                                         job_id=job['job_id'], cancel_event=job['cancel_event'])
+                job['result'] = result
+                job['status'] = 'cancelled' if job['cancel_event'].is_set() else 'completed'
+            except Exception as e:
+                logger.error(f"Scraper job {job['job_id']} failed: {e}")
+                job['status'] = 'error'
+                job['result'] = {'error': str(e)}
+            job['completed_at'] = datetime.now().isoformat()
+
+        threading.Thread(target=run, daemon=True, name=f"scrape-job-{job['job_id']}").start()
+        return self._job_view(job)
+
+    def cancel_job(self, job_id: str) -> bool:
+        """Ask a running job's scrapers to stop at their next request"""
+        job = self.jobs.get(job_id)
+        if not job or job['status'] != 'running':
+            return False
+        job['cancel_event'].set()
+        return True
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """
+        Get a job's status; falls back to scraper_logs for jobs started by another worker
+
+        Args:
+            job_id: Handle returned by start_job
+
+        Returns:
+            Job dictionary or None if unknown
+        """
+        job = self.jobs.get(job_id)
+        if job:
+            return self._job_view(job)
+
+        logs = [log for log in self._query_logs('WHERE job_id = :job_id', {'job_id': job_id}, 100)]
+        if not logs:
+            return None
+        running = any(log['status'] == 'running' for log in logs)
+        return {
+            'job_id': job_id,
+            'scrapers': [log['scraper_name'] for log in logs],
+            'status': 'running' if running else 'completed',
+            'started_at': str(min(log['started_at'] for log in logs)),
+            'completed_at': None if running else str(max(log['completed_at'] for log in logs)),
+            'logs': logs
+        }
+
+    @staticmethod
+    def _job_view(job: Dict) -> Dict:
+        return {k: v for k, v in job.items() if k != 'cancel_event'}
+
+    def _prune_jobs(self):
+        finished = [j for j in self.jobs.values() if j['status'] != 'running']
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job['job_id']]
+
+    def _query_logs(self, where: str, params: Dict, limit: int) -> List[Dict]:
+        self._ensure_scraper_log_table()
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(f"""
+                SELECT *
+                FROM scraper_logs
+                {where}
+                ORDER BY started_at DESC
+                LIMIT :limit
+            """), dict(params, limit=limit)).mappings().all()
+        logs = [dict(row) for row in rows]
+        for log in logs:
+            if log.get('phase_timings'):
+                try:
+                    log['phase_timings'] = json.loads(log['phase_timings'])
+                except (TypeError, ValueError):
+                    pass
+        return logs
+
     def get_scraper_logs(self, limit: int = 50) -> List[Dict]:
         """
         Get recent scraper execution logs
-        
+
         Args:
             limit: Maximum number of logs to return
-            
+
         Returns:
             List of log dictionaries
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT *
-                FROM scraper_logs
-                ORDER BY started_at DESC
-                LIMIT ?
-            """, (limit,))
-            
-            logs = [dict(row) for row in cursor.fetchall()]
-            conn.close()
-            
-            return logs
-        
+            return self._query_logs('', {}, limit)
+
         except Exception as e:
             logger.error(f"Error fetching scraper logs: {e}")
             return []
-    
+
     def get_scraper_stats(self) -> Dict:
         """
         Get statistics for all scrapers
-        
+
         Returns:
             Dictionary with scraper statistics
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Get stats for each scraper
-            cursor.execute("""
-                SELECT 
-                    scraper_name,
-                    COUNT(*) as total_runs,
-                    SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as successful_runs,
-                    SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END) as failed_runs,
-                    SUM(contracts_saved) as total_contracts_saved,
-                    MAX(started_at) as last_run_at
-                FROM scraper_logs
-                GROUP BY scraper_name
-            """)
-            
-            stats = {}
-            for row in cursor.fetchall():
-                stats[row['scraper_name']] = dict(row)
-            
-            conn.close()
-            return stats
-        
+            self._ensure_scraper_log_table()
+            with self.engine.connect() as conn:
+                rows = conn.execute(text("""
+                    SELECT
+                        scraper_name,
+                        COUNT(*) as total_runs,
+                        SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as successful_runs,
+                        SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END) as failed_runs,
+                        SUM(CASE WHEN status IN ('timeout', 'cancelled') THEN 1 ELSE 0 END) as stopped_runs,
+                        SUM(contracts_saved) as total_contracts_saved,
+                        SUM(pages_fetched) as total_pages_fetched,
+                        SUM(bytes_fetched) as total_bytes_fetched,
+                        AVG(duration_seconds) as avg_duration_seconds,
+                        MAX(started_at) as last_run_at
+                    FROM scraper_logs
+                    GROUP BY scraper_name
+                """)).mappings().all()
+            return {row['scraper_name']: dict(row) for row in rows}
+
         except Exception as e:
             logger.error(f"Error fetching scraper stats: {e}")
             return {}
-    
-    def _log_scraper_start(self, scraper_name: str) -> int:
+
+    def _log_scraper_start(self, scraper_name: str, job_id: Optional[str] = None) -> int:
         """Log scraper start and return log ID"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO scraper_logs (scraper_name, started_at, status)
-                VALUES (?, ?, 'running')
-            """, (scraper_name, datetime.now()))
-            
-            log_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            return log_id
-        
+            params = {'name': scraper_name, 'started': datetime.now(), 'job_id': job_id}
+            with self.engine.begin() as conn:
+                if self.engine.dialect.name == 'postgresql':
+                    return conn.execute(text("""
+                        INSERT INTO scraper_logs (scraper_name, started_at, status, job_id)
+                        VALUES (:name, :started, 'running', :job_id) RETURNING id
+                    """), params).scalar()
+                return conn.execute(text("""
+                    INSERT INTO scraper_logs (scraper_name, started_at, status, job_id)
+                    VALUES (:name, :started, 'running', :job_id)
+                """), params).lastrowid
+
         except Exception as e:
             logger.error(f"Error logging scraper start: {e}")
             return 0
-    
-    def _log_scraper_complete(self, log_id: int, status: str, 
+
+    def _log_scraper_complete(self, log_id: int, status: str,
                             contracts_found: int = 0,
                             contracts_saved: int = 0,
-                            error_message: str = None):
+                            error_message: str = None,
+                            pages_fetched: int = 0,
+                            bytes_fetched: int = 0,
+                            duration_seconds: float = None,
+                            phase_timings: Dict = None):
         """Log scraper completion"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE scraper_logs
-                SET completed_at = ?,
-                    status = ?,
-                    contracts_found = ?,
-                    contracts_saved = ?,
-                    error_message = ?
-                WHERE id = ?
-            """, (
-                datetime.now(),
-                status,
-                contracts_found,
-                contracts_saved,
-                error_message,
-                log_id
-            ))
-            
-            conn.commit()
-            conn.close()
-        
+            with self.engine.begin() as conn:
+                conn.execute(text("""
+                    UPDATE scraper_logs
+                    SET completed_at = :completed_at,
+                        status = :status,
+                        contracts_found = :found,
+                        contracts_saved = :saved,
+                        error_message = :error,
+                        pages_fetched = :pages,
+                        bytes_fetched = :bytes,
+                        duration_seconds = :duration,
+                        phase_timings = :timings
+                    WHERE id = :id
+                """), {
+                    'completed_at': datetime.now(),
+                    'status': status,
+                    'found': contracts_found,
+                    'saved': contracts_saved,
+                    'error': error_message,
+                    'pages': pages_fetched,
+                    'bytes': bytes_fetched,
+                    'duration': duration_seconds,
+                    'timings': json.dumps(phase_timings or {}),
+                    'id': log_id
+                })
+
         except Exception as e:
             logger.error(f"Error logging scraper complete: {e}")
-    
+
     def schedule_daily_scrape(self, hour: int = 2, minute: int = 0):
         """
         Schedule daily scraper runs
-        
+
         Args:
             hour: Hour to run (0-23, default 2 AM)
             minute: Minute to run (0-59, default 0)
         """
+        self.engine  # resolve in the caller's app context before handing off
+
         def run_scheduled():
             while self.is_running:
                 now = datetime.now()
-                
+
                 # Check if it's time to run
                 if now.hour == hour and now.minute == minute:
                     logger.info("⏰ Scheduled scraper run starting...")
                     self.run_all_scrapers(save_to_db=True)
-                    
+
                     # Sleep for 60 seconds to avoid running multiple times in same minute
                     time.sleep(60)
                 else:
                     # Check every 30 seconds
                     time.sleep(30)
-        
+
         self.is_running = True
         thread = threading.Thread(target=run_scheduled, daemon=True)
         thread.start()
-        
+
         logger.info(f"✅ Scheduled daily scraper run at {hour:02d}:{minute:02d}")
-    
+
     def stop_scheduler(self):
         """Stop the scheduler"""
         self.is_running = False
@@ -329,13 +671,27 @@ class ScraperManager:
 
 # Global scraper manager instance
 _manager = None
+_manager_lock = threading.Lock()
 
 
-def get_scraper_manager(db_path: str = 'leads.db') -> ScraperManager:
-    """Get or create scraper manager instance"""
+def get_scraper_manager(target: Union[str, Callable, None] = None) -> ScraperManager:
+    """
+    Get or create scraper manager instance
+
+    Args:
+        target: Engine getter (the app passes ``lambda: db.engine``), a
+            SQLite path, or None for the shared app database (see db_access.py)
+    """
     global _manager
-    
+
     if _manager is None:
-        _manager = ScraperManager(db_path)
-    
+        with _manager_lock:
+            if _manager is None:
+                if callable(target):
+                    engine_getter = target
+                else:
+                    engine = get_engine(f'sqlite:///{target}' if target else None)
+                    engine_getter = lambda: engine
+                _manager = ScraperManager(engine_getter)
+
     return _manager
@@ -4,12 +4,13 @@ Extracts construction and cleaning contract opportunities from vabuilderssummit.
 """
 
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 from datetime import datetime
 import time
 import re
 
+from html_parsing import make_soup
+
 class VABuildersSummitScraper:
     """Scraper for VA Builders Summit website"""
     
@@ -32,7 +33,7 @@ class VABuildersSummitScraper:
             response = self.session.get(self.base_url, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = make_soup(response.text)
             links = soup.find_all("a", href=True)
             
             # Convert relative URLs to absolute
@@ -127,7 +128,7 @@ class VABuildersSummitScraper:
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = make_soup(response.text)
             
             # Extract title
             title_tag = soup.find("h1") or soup.find("title")
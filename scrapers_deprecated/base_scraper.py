@@ -13,6 +13,8 @@ import logging
 import socket
 from urllib.parse import urljoin, urlparse
 
+from html_parsing import make_soup
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,6 +25,20 @@ class ScraperError(Exception):
     pass
 
 
+class ScrapeCancelled(Exception):
+    """
+    Raised inside a scraper's worker once it timed out or was cancelled
+
+    Scrapers that catch broad exceptions re-raise this one, putting the rows
+    collected so far on ``partial`` so the ScraperManager can still save them.
+    """
+
+    def __init__(self, reason: str, partial: Optional[List[Dict]] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.partial = partial or []
+
+
 class BaseScraper:
     """Base class for all government procurement scrapers - MODERNIZED"""
     
@@ -197,7 +213,7 @@ class BaseScraper:
         if not html:
             return None
         try:
-            return BeautifulSoup(html, 'html.parser')
+            return make_soup(html)
         except Exception as e:
             logger.error(f"[{self.name}] Failed to parse HTML: {e}")
             return None
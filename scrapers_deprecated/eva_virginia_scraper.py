@@ -3,7 +3,7 @@ EVA Virginia State Scraper
 Scrapes eVA.virginia.gov for janitorial/cleaning RFPs
 """
 
-from .base_scraper import BaseScraper, logger
+from .base_scraper import BaseScraper, ScrapeCancelled, logger
 from typing import List, Dict
 import re
 
@@ -87,6 +87,9 @@ class EVAVirginiaScraper(BaseScraper):
             logger.info(f"[{self.name}] ✅ Scrape complete. Found {len(contracts)} contracts")
             return contracts
         
+        except ScrapeCancelled as e:
+            e.partial = contracts
+            raise
         except Exception as e:
             logger.error(f"[{self.name}] ❌ Scrape failed: {e}")
             return []
@@ -3,7 +3,7 @@ Nationwide State Portal Scraper
 Scrapes procurement portals for all 50 US states
 """
 
-from .base_scraper import BaseScraper, logger
+from .base_scraper import BaseScraper, ScrapeCancelled, logger
 from typing import List, Dict
 import concurrent.futures
 
@@ -102,6 +102,9 @@ class StatePortalScraper(BaseScraper):
                 
                 logger.info(f"[{self.name}] {state_code}: Found {len(contracts)} contracts")
             
+            except ScrapeCancelled as e:
+                e.partial = all_contracts + e.partial
+                raise
             except Exception as e:
                 logger.error(f"[{self.name}] Error scraping {state_code}: {e}")
                 continue
@@ -172,6 +175,9 @@ class StatePortalScraper(BaseScraper):
                     logger.debug(f"[{self.name}] {state_code}: Error parsing listing: {e}")
                     continue
         
+        except ScrapeCancelled as e:
+            e.partial = contracts
+            raise
         except Exception as e:
             logger.error(f"[{self.name}] Error scraping {state_code}: {e}")
         
@@ -269,6 +275,9 @@ class StatePortalScraper(BaseScraper):
                     contracts = future.result()
                     all_contracts.extend(contracts)
                     logger.info(f"[{self.name}] {state}: Completed with {len(contracts)} contracts")
+                except ScrapeCancelled as e:
+                    all_contracts.extend(e.partial)
+                    logger.info(f"[{self.name}] {state}: Stopped ({e.reason}) with {len(e.partial)} contracts")
                 except Exception as e:
                     logger.error(f"[{self.name}] {state}: Failed with error: {e}")
         
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import unittest
+import requests
+from requests.adapters import BaseAdapter
+from sqlalchemy import create_engine, text
+import aviation_scraper_v2
+from aviation_scraper_v2 import extract_opportunities, scrape_all_v2
+
+PAGE = b'''<html><head><title>Business Opportunities</title><script>var bid = 1;</script></head><body>
+<ul>
+<li><a href="/bids/7">Terminal custodial services RFP</a> due 12/01/2025, contact buyer@airport.example</li>
+<li><a href="/about">About the airport</a></li>
+<li>Solicitation 25-9 <a href="https://vendors.example/25-9">details</a></li>
+</ul>
+<p><a href="/parking">Parking</a> <a href="/maps">Maps</a></p>
+</body></html>'''
+
+class SlowAdapter(BaseAdapter):
+    def __init__(self, delay=0.2):
+        super().__init__()
+        self.delay = delay
+
+    def send(self, request, **kwargs):
+        time.sleep(self.delay)
+        response = requests.Response()
+        response.status_code, response.url, response.request = 200, request.url, request
+        response._content = PAGE
+        return response
+
+    def close(self):
+        pass
+
+class AviationScraperV2TestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = requests.Session()
+        self.session.mount('https://', SlowAdapter())
+        self._saved = aviation_scraper_v2.session
+        aviation_scraper_v2.session = self.session
+
+    def tearDown(self):
+        aviation_scraper_v2.session = self._saved
+
+    def test_links_are_matched_on_own_or_parent_text(self):
+        found = extract_opportunities(PAGE, 'https://www.airport.example/business', 'Test (TST)', 'airport',
+                                      {'state': 'VA', 'city': 'Norfolk'})
+        self.assertEqual([o['url'] for o in found],
+                         ['https://www.airport.example/bids/7', 'https://vendors.example/25-9'])
+        first = found[0]
+        self.assertEqual(first['title'], 'Terminal custodial services RFP')
+        self.assertEqual(first['contact_email'], 'buyer@airport.example')
+        self.assertEqual(first['deadline'], '12/01/2025')
+        self.assertTrue({'rfp', 'custodial'} <= set(first['detected_keywords']))
+        self.assertEqual(found[1]['title'], 'details')  # qualified by its parent's "Solicitation"
+
+    def test_sweep_is_concurrent_and_upserts_results(self):
+        engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}")
+        with engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE aviation_cleaning_leads (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                company_name TEXT NOT NULL, company_type TEXT NOT NULL, city TEXT NOT NULL, state TEXT NOT NULL,
+                contact_email TEXT, contact_phone TEXT, website_url TEXT, services_needed TEXT, notes TEXT,
+                data_source TEXT, discovered_via TEXT, last_verified TIMESTAMP, is_active BOOLEAN DEFAULT 1,
+                UNIQUE(company_name, city, state))'''))
+        started = time.monotonic()
+        results = scrape_all_v2(max_airports=4, max_airlines=0, max_ground_handlers=0, engine=engine)
+        self.assertLess(time.monotonic() - started, 0.6)  # 4 x 0.2s on distinct hosts, overlapped
+        self.assertEqual(len(results), 8)
+        self.assertEqual(results[0]['source'], list(aviation_scraper_v2.AIRPORT_PROCUREMENT_URLS)[0])
+        # A second sweep refreshes the same rows instead of duplicating them
+        scrape_all_v2(max_airports=4, max_airlines=0, max_ground_handlers=0, engine=engine)
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text('SELECT COUNT(*) FROM aviation_cleaning_leads')).scalar(), 8)
+            self.assertEqual(conn.execute(text(
+                'SELECT COUNT(*) FROM aviation_cleaning_leads WHERE last_verified IS NOT NULL')).scalar(), 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, text
+from bulk_import import BulkImporter
+
+CSV = '''\ufefftitle,Agency,location,value,deadline,url,contact_email,unused
+Floor Care,City of Hampton,"Hampton,  VA","$5,000",12/31/2025,https://h.example,buy@h.example,x
+Floor  care,CITY OF HAMPTON,"Hampton, VA",,,,,
+,Missing Title Co,"Norfolk, VA",,,,,
+Paper Goods,Norfolk Schools,"Norfolk, VA",,next week,,,
+Soap,Norfolk Schools,"Norfolk, VA",,,,not-an-email,
+Existing Bid,GSA,"Richmond, VA",,,,,
+'''
+
+class BulkImportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.dir, 'app.db')}")
+        with self.engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE supply_contracts (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                agency TEXT NOT NULL, location TEXT NOT NULL, product_category TEXT, estimated_value TEXT,
+                bid_deadline TEXT, website_url TEXT, contact_email TEXT, is_quick_win BOOLEAN, status TEXT,
+                posted_date TEXT)'''))
+            conn.execute(text('''CREATE TABLE federal_contracts (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                agency TEXT NOT NULL, value TEXT CHECK (value != 'bad'), sam_gov_url TEXT NOT NULL,
+                notice_id TEXT UNIQUE, posted_date DATE)'''))
+            conn.execute(text("INSERT INTO supply_contracts (title, agency, location) VALUES ('Existing Bid', 'GSA', 'Richmond, VA')"))
+        self.importer = BulkImporter(lambda: self.engine, chunk_rows=2)
+
+    def test_file_import_validates_dedups_and_reports_rows(self):
+        path = os.path.join(self.dir, 'upload.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(CSV)
+        seen = []
+        result = self.importer.import_file('supply_contracts', path, progress=lambda r: seen.append(r['rows']))
+        self.assertEqual((result['rows'], result['inserted'], result['duplicates'], result['failed']), (6, 1, 2, 3))
+        self.assertEqual(seen, [2, 4, 6])
+        self.assertEqual([e['row'] for e in result['errors']], [4, 5, 6])
+        self.assertIn('missing title', result['errors'][0]['error'])
+        self.assertEqual(result['ignored_columns'], ['unused'])
+        with self.engine.connect() as conn:
+            row = conn.execute(text("SELECT location, bid_deadline, website_url, status FROM supply_contracts "
+                                    "WHERE title = 'Floor Care'")).fetchone()
+        self.assertEqual(tuple(row), ('Hampton, VA', '2025-12-31', 'https://h.example', 'open'))
+
+    def test_rejected_chunk_falls_back_to_single_rows(self):
+        rows = [{'title': 'A', 'agency': 'GSA', 'value': '1'}, {'title': 'B', 'agency': 'GSA', 'value': 'bad'},
+                {'title': 'C', 'agency': 'GSA', 'notice_id': 'N-1'}]
+        result = self.importer.import_rows('federal_contracts', rows)
+        self.assertEqual((result['inserted'], result['failed']), (2, 1))
+        self.assertEqual(result['errors'][0]['row'], 2)
+        again = self.importer.import_rows('federal_contracts', rows[:1] + rows[2:])
+        self.assertEqual((again['inserted'], again['duplicates']), (0, 2))  # derived notice_id is stable
+
+    def test_driver_error_from_copy_falls_back_to_single_rows(self):
+        rows = [{'title': 'A', 'agency': 'GSA', 'value': '1'}, {'title': 'B', 'agency': 'GSA', 'value': 'bad'},
+                {'title': 'C', 'agency': 'GSA', 'notice_id': 'N-1'}]
+        # COPY raises the driver's own error class, not a SQLAlchemy DBAPIError
+        with mock.patch('bulk_import.bulk_insert', side_effect=sqlite3.IntegrityError('COPY rejected the chunk')):
+            result = self.importer.import_rows('federal_contracts', rows)
+        self.assertEqual((result['inserted'], result['failed']), (2, 1))
+        self.assertEqual(result['errors'][0]['row'], 2)
+
+    def test_background_job_reports_progress_from_table(self):
+        path = os.path.join(self.dir, 'job.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(CSV)
+        done = []
+        job = self.importer.start_job('supply_contracts', path, filename='bids.csv', on_complete=done.append)
+        for _ in range(100):
+            if done:
+                break
+            time.sleep(0.02)
+        self.assertEqual(done[0]['inserted'], 1)
+        self.assertFalse(os.path.exists(path))
+        stored = BulkImporter(lambda: self.engine).get_job(job['job_id'])  # as another worker sees it
+        self.assertEqual((stored['status'], stored['filename'], stored['result']['percent']), ('completed', 'bids.csv', 100))
+        with self.assertRaises(ValueError):
+            self.importer.start_job('leads', path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import time
+import unittest
+import requests
+from requests.adapters import BaseAdapter
+from city_portals import CityPortalFetcher, parse_portal_page
+
+PAGE = b'''<html><head><script>var cleaning = 1;</script></head><body>
+<h1>Purchasing - janitorial and custodial bids</h1>
+<table>
+<tr class="BidRow"><td><a href="/bids/123">RFP 24-123 Custodial Services for City Hall</a></td></tr>
+<tr class="bidrow"><td>IFB 24-200 Asphalt Paving</td></tr>
+<tr class="other"><td>Janitorial supplies (not a listing row)</td></tr>
+</table>
+<ul><li class="opportunity-item"><a href="https://bids.example.gov/9">Window cleaning at the library</a></li></ul>
+</body></html>'''
+
+class CountingAdapter(BaseAdapter):
+    def __init__(self, delays=None):
+        super().__init__()
+        self.delays = delays or {}
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        self.calls.append((request.url, dict(request.headers)))
+        time.sleep(self.delays.get(request.url, 0.05))
+        response = requests.Response()
+        response.status_code, response.url, response.request = 200, request.url, request
+        response._content = PAGE
+        response.headers['ETag'] = '"v1"'
+        return response
+
+    def close(self):
+        pass
+
+def make_fetcher(adapter, **kwargs):
+    fetcher = CityPortalFetcher(**kwargs)
+    fetcher.session.mount('https://', adapter)
+    return fetcher
+
+class CityPortalsTestCase(unittest.TestCase):
+    def test_parse_finds_relevant_listing_rows_and_resolves_links(self):
+        parsed = parse_portal_page(PAGE, 'https://www.city.example/purchasing')
+        self.assertIn('janitor', parsed['keywords'])
+        self.assertEqual(parsed['listings'], [
+            {'text': 'RFP 24-123 Custodial Services for City Hall', 'url': 'https://www.city.example/bids/123'},
+            {'text': 'Window cleaning at the library', 'url': 'https://bids.example.gov/9'},
+        ])
+        self.assertNotIn('var cleaning', parsed['text'])
+
+    def test_search_is_concurrent_and_returns_partial_results_within_budget(self):
+        adapter = CountingAdapter({'https://slow.example/bids': 1.0})
+        fetcher = make_fetcher(adapter, host_interval=0)
+        portals = {f'City {i}': f'https://c{i}.example/bids' for i in range(6)}
+        portals['Slowtown'] = 'https://slow.example/bids'
+        started = time.monotonic()
+        search = fetcher.search(portals, budget=0.5)
+        results = search.collect()
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(search.pending, ['Slowtown'])
+        # The slow fetch finishes in the background and serves the next search from cache
+        time.sleep(0.7)
+        again = fetcher.search({'Slowtown': 'https://slow.example/bids'}, budget=0.1).collect()
+        self.assertTrue(again[0].from_cache)
+        self.assertEqual(len(adapter.calls), 7)
+
+    def test_cities_sharing_a_portal_each_get_a_result(self):
+        adapter = CountingAdapter({'https://county.example/bids': 0.2})
+        fetcher = make_fetcher(adapter, host_interval=0)
+        portals = {'Hampton': 'https://county.example/bids', 'Poquoson': 'https://county.example/bids'}
+        self.assertEqual(fetcher.search(portals, budget=0.05).collect(), [])  # still in flight...
+        search = fetcher.search(portals, budget=2)  # ...so this search shares that one future
+        self.assertEqual(sorted(r.city for r in search.collect()), ['Hampton', 'Poquoson'])
+        self.assertEqual(len(adapter.calls), 1)
+
+        search = fetcher.search({'Hampton': 'https://county.example/bids',
+                                 'Poquoson': 'https://county.example/bids'}, budget=0)
+        search.collect()
+        self.assertEqual(sorted(search.pending), ['Hampton', 'Poquoson'])
+
+    def test_same_host_requests_are_spaced_and_revalidated_after_ttl(self):
+        adapter = CountingAdapter()
+        fetcher = make_fetcher(adapter, host_interval=0.2, fetch_ttl=0)
+        started = time.monotonic()
+        fetcher.search({'A': 'https://shared.example/a', 'B': 'https://shared.example/b'}, budget=2).collect()
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        result = fetcher.fetch('A', 'https://shared.example/a')
+        self.assertEqual(adapter.calls[-1][1].get('If-None-Match'), '"v1"')
+        self.assertTrue(result.from_cache)  # same content hash: not re-parsed
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from compliance_engine import ComplianceEngine, Requirement, compliance_engine
+
+class ComplianceEngineTestCase(unittest.TestCase):
+    def test_page_offsets_clauses_and_line_breaks(self):
+        pages = ['SECTION C - Statement of\nWork. The contractor shall carry general liability insurance.',
+                 'Safety plans are due at kickoff. Offerors must be registered in SAM.gov.']
+        report = compliance_engine.evaluate(pages)
+        self.assertEqual([(h.term, h.page, h.offset) for h in report.hits['scope_of_work']],
+                         [('section c', 1, 0), ('statement of work', 1, 12)])
+        self.assertEqual(report.first_page('sam_registration'), 2)
+        self.assertEqual(report.counts['safety'], 1)  # "safety plans": longest term, plural allowed
+        self.assertEqual([(c.page, c.text) for c in report.clauses],
+                         [(1, 'The contractor shall carry general liability insurance.'),
+                          (2, 'Offerors must be registered in SAM.gov.')])
+        matrix = {row['id']: row for row in report.as_checklist()['matrix']}
+        self.assertTrue(matrix['insurance']['ok'])
+        self.assertFalse(matrix['bonding']['ok'])
+
+    def test_whole_words_only(self):
+        report = compliance_engine.evaluate('Sowing season; reporters; ptsd; the schedules')
+        self.assertEqual(report.counts['scope_of_work'], 0)
+        self.assertEqual(report.counts['schedule'], 1)
+
+    def test_proposal_coverage_summary(self):
+        coverage = compliance_engine.evaluate('Our staffing plan and training program.',
+                                              'Pricing attached. Staffing levels per shift.',
+                                              checklist='proposal').as_coverage()
+        self.assertEqual(coverage['matched'], 3)
+        self.assertIn('Past Performance', coverage['missing'])
+        self.assertEqual(coverage['ambiguous'], ['Pricing / Bid Schedule', 'Training'])
+        self.assertIn('Add measurable past performance examples.', coverage['recommendations'])
+
+    def test_crosswalk_with_custom_catalog(self):
+        engine = ComplianceEngine([Requirement('bond', 'Bonding', 'bonding', ('bid bond',)),
+                                   Requirement('osha', 'Safety', 'safety', ('osha',)),
+                                   Requirement('green', 'Green', 'performance', ('green seal',))], version='t1')
+        result = engine.crosswalk(['A bid bond is required.', 'Follow OSHA rules.'], ['We comply with OSHA.'])
+        self.assertEqual([r.id for r in result['required']], ['bond', 'osha'])
+        self.assertEqual([r.id for r in result['missing']], ['bond'])
+        self.assertEqual(result['coverage'], 50.0)
+
+if __name__ == '__main__':
+    unittest.main()
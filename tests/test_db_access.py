@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, func, text
+import db_access
+from db_access import bulk_insert, clear_column_cache, database_url, existing_columns, get_engine, register_engine, upsert
+
+class DbAccessTestCase(unittest.TestCase):
+    def setUp(self):
+        self.url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}"
+        self.engine = get_engine(self.url)
+        with self.engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE national_contracts (id INTEGER PRIMARY KEY, state TEXT NOT NULL,
+                title TEXT, solicitation_number TEXT, agency TEXT, scraped_at TEXT, UNIQUE(state, solicitation_number))'''))
+
+    def test_urls_resolve_to_one_cached_pool(self):
+        with mock.patch.dict(os.environ, {'DATABASE_URL': 'postgres://u:p@db/leads'}):
+            self.assertEqual(database_url(), 'postgresql://u:p@db/leads')
+        with mock.patch.dict(os.environ, {'DATABASE_URL': '', 'SQLITE_DB_NAME': 'other.db'}):
+            self.assertEqual(database_url(), f"sqlite:///{os.path.join(os.path.dirname(db_access.__file__), 'other.db')}")
+        self.assertIs(get_engine(self.url), self.engine)
+        self.assertEqual(type(self.engine.pool).__name__, 'QueuePool')
+
+        app_engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'flask.db')}")
+        register_engine(app_engine)
+        self.assertIs(get_engine(str(app_engine.url)), app_engine)
+        raw = get_engine(self.url).raw_connection()  # legacy ? placeholders still work
+        raw.cursor().execute('INSERT INTO national_contracts (state, title) VALUES (?, ?)', ('VA', 'raw'))
+        raw.commit()
+        raw.close()
+
+    def test_bulk_insert_and_upsert(self):
+        rows = [{'state': 'VA', 'title': f't{i}', 'solicitation_number': str(i), 'not_a_column': 'x'} for i in range(25)]
+        with self.engine.begin() as conn:
+            self.assertEqual(bulk_insert(conn, 'national_contracts', rows, chunk_size=10), 25)
+        changed = [{'state': 'VA', 'title': 'old', 'solicitation_number': '3', 'agency': 'GSA'},
+                   {'state': 'VA', 'title': 'new', 'solicitation_number': '3', 'agency': 'GSA'},
+                   {'state': 'MD', 'title': 'fresh', 'solicitation_number': '3', 'agency': 'GSA'}]
+        with self.engine.begin() as conn:
+            self.assertEqual(upsert(conn, 'national_contracts', changed, conflict=('state', 'solicitation_number'),
+                                    update=('title',), touch={'scraped_at': func.current_timestamp()}), 2)
+            upsert(conn, 'national_contracts', [dict(changed[1], title='ignored')],
+                   conflict=('state', 'solicitation_number'))
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text('SELECT COUNT(*) FROM national_contracts')).scalar(), 26)
+            row = conn.execute(text("SELECT title, agency, scraped_at FROM national_contracts "
+                                    "WHERE state = 'VA' AND solicitation_number = '3'")).fetchone()
+        self.assertEqual(row[:2], ('new', None))  # agency not in update, so left alone
+        self.assertIsNotNone(row[2])
+
+        with self.engine.begin() as conn:
+            upsert(conn, 'national_contracts', [{'state': 'VA', 'solicitation_number': '3', 'title': None,
+                                                 'agency': None}],
+                   conflict=('state', 'solicitation_number'), update=('title', 'agency'), keep_stored=('title',))
+            self.assertEqual(conn.execute(text("SELECT title FROM national_contracts WHERE state = 'VA' "
+                                               "AND solicitation_number = '3'")).scalar(), 'new')
+
+    def test_column_cache_is_per_engine_and_follows_schema_changes(self):
+        other = create_engine(str(self.engine.url))
+        with self.engine.connect() as conn:
+            self.assertNotIn('due_date', existing_columns(conn, 'national_contracts'))
+        with self.engine.begin() as conn:
+            conn.execute(text('ALTER TABLE national_contracts ADD COLUMN due_date TEXT'))
+            self.assertIn('due_date', existing_columns(conn, 'national_contracts'))
+
+        raw = other.raw_connection()  # DDL SQLAlchemy never sees
+        with other.connect() as conn:
+            self.assertIn('due_date', existing_columns(conn, 'national_contracts'))
+            raw.cursor().execute('ALTER TABLE national_contracts ADD COLUMN notes TEXT')
+            raw.commit()
+            raw.close()
+            self.assertNotIn('notes', existing_columns(conn, 'national_contracts'))
+            clear_column_cache(other, 'national_contracts')
+            self.assertIn('notes', existing_columns(conn, 'national_contracts'))
+        with self.engine.connect() as conn:
+            self.assertNotIn('notes', existing_columns(conn, 'national_contracts'))  # its own entry
+            clear_column_cache()
+            self.assertIn('notes', existing_columns(conn, 'national_contracts'))
+
+    def test_benchmark_reports_connections_and_throughput(self):
+        report = db_access.benchmark(self.url, rows=200, acquisitions=20)
+        self.assertEqual(report['database'], 'sqlite')
+        self.assertEqual(set(report['connect_ms']), {'fresh', 'pooled'})
+        self.assertEqual(set(report['rows_per_second']), {'row_by_row', 'bulk_insert', 'upsert_update'})
+        self.assertIn('bulk_insert', db_access.format_report(report))
+        with self.engine.connect() as conn:
+            self.assertNotIn(db_access.BENCH_TABLE, [r[0] for r in conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'table'"))])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import time
+import unittest
+from sqlalchemy import create_engine, text
+from document_extraction import DocumentExtractor, find_sections
+
+class DocumentExtractorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp, 'docs.db')}")
+        self.extractor = DocumentExtractor(lambda: self.engine, os.path.join(self.tmp, 'store'))
+
+    def _make_pdf(self, name, pages):
+        from reportlab.pdfgen import canvas
+        path = os.path.join(self.tmp, name)
+        c = canvas.Canvas(path)
+        for lines in pages:
+            y = 750
+            for line in lines:
+                c.drawString(72, y, line)
+                y -= 16
+            c.showPage()
+        c.save()
+        return path
+
+    def test_pdf_pages_sections_and_dedup_by_hash(self):
+        path = self._make_pdf('rfp.pdf', [
+            ['SECTION C - STATEMENT OF WORK', 'The contractor shall provide janitorial services.'],
+            ['3.2 Quality Control Plan', 'Inspections are performed weekly.'],
+        ])
+        sha = self.extractor.submit(path, 'rfp.pdf')
+        info = self.extractor.wait(sha, timeout=10)
+        self.assertEqual((info['status'], info['page_count'], info['pages_done']), ('done', 2, 2))
+        self.assertIn('janitorial services', self.extractor.text(sha))
+        self.assertEqual([(s['title'], s['page']) for s in self.extractor.sections(sha)],
+                         [('SECTION C - STATEMENT OF WORK', 1), ('3.2 Quality Control Plan', 2)])
+        # Same bytes under another name reuse the stored pages instead of re-parsing
+        copy = os.path.join(self.tmp, 'copy.pdf')
+        with open(path, 'rb') as src, open(copy, 'wb') as dst:
+            dst.write(src.read())
+        self.assertEqual(self.extractor.submit(copy, 'copy.pdf'), sha)
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text('SELECT COUNT(*) FROM document_pages')).scalar(), 2)
+
+    def test_text_files_are_chunked_and_temp_upload_can_be_removed(self):
+        extractor = DocumentExtractor(lambda: self.engine, os.path.join(self.tmp, 'store'), chunk_chars=50)
+        path = os.path.join(self.tmp, 'notes.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(f'line {i} of the capability statement' for i in range(10)))
+        sha = extractor.submit(path, 'notes.txt')
+        os.remove(path)
+        self.assertEqual(extractor.wait(sha, timeout=10)['status'], 'done')
+        self.assertGreater(len(extractor.pages(sha)), 1)
+        self.assertTrue(extractor.text(sha).startswith('line 0'))
+        self.assertEqual(extractor.text(sha, max_chars=6), 'line 0')
+
+    def test_expired_claim_is_resumed_by_a_poll(self):
+        path = os.path.join(self.tmp, 'sow.txt')
+        with open(path, 'w') as f:
+            f.write('Scope of work for custodial services')
+        sha = self.extractor.submit(path, 'sow.txt', owner=7)
+        self.assertEqual(self.extractor.wait(sha, timeout=10)['status'], 'done')
+        self.assertTrue(self.extractor.owned_by(sha, '7'))
+        self.assertFalse(self.extractor.owned_by(sha, 8))
+
+        # A worker that died mid-claim: recent claims are left alone, expired ones are taken over
+        with self.engine.begin() as conn:
+            conn.execute(text('DELETE FROM document_pages'))
+            conn.execute(text("UPDATE document_extractions SET status = 'processing', updated_at = :t"),
+                         {'t': time.time() - 5})
+        self.assertEqual(self.extractor.wait(sha, timeout=0.3)['status'], 'processing')
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE document_extractions SET updated_at = :t"),
+                         {'t': time.time() - self.extractor.stale_seconds - 1})
+        self.assertEqual(self.extractor.wait(sha, timeout=10)['status'], 'done')
+        self.assertIn('custodial', self.extractor.text(sha))
+
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE document_extractions SET status = 'failed'"))
+        self.assertEqual(self.extractor.wait(sha, timeout=0.3)['status'], 'failed')  # polls do not retry failures
+
+    def test_find_sections_ignores_body_text(self):
+        sections = find_sections('Intro paragraph text.\nPART II CONTRACT CLAUSES\nshall comply.\n', 4)
+        self.assertEqual(sections, [{'title': 'PART II CONTRACT CLAUSES', 'page': 4, 'offset': 22}])
+
+if __name__ == '__main__':
+    unittest.main()
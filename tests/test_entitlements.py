@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, text
+from entitlements import EntitlementService
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+class EntitlementServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(tempfile.mkdtemp(), 'ent.db')
+        self.engine = create_engine(f'sqlite:///{path}')
+        with self.engine.begin() as conn:
+            conn.execute(text('CREATE TABLE leads (id INTEGER PRIMARY KEY, email TEXT, subscription_status TEXT, paypal_subscription_id TEXT)'))
+            conn.execute(text('CREATE TABLE subscriptions (id INTEGER PRIMARY KEY, email TEXT, status TEXT, plan_type TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'))
+            conn.execute(text("INSERT INTO leads VALUES (1, 'a@example.com', 'paid', 'I-123')"))
+            conn.execute(text("INSERT INTO leads VALUES (2, 'b@example.com', 'free', NULL)"))
+            conn.execute(text("INSERT INTO subscriptions (email, status, plan_type) VALUES ('a@example.com', 'active', 'annual')"))
+        self.clock = FakeClock()
+        self.service = EntitlementService(lambda: self.engine, recheck_seconds=30, clock=self.clock)
+
+    def _set_status(self, user_id, status):
+        with self.engine.begin() as conn:
+            conn.execute(text('UPDATE leads SET subscription_status = :s WHERE id = :u'), {'s': status, 'u': user_id})
+
+    def test_plan_features(self):
+        paid = self.service.get(1)
+        self.assertTrue(paid.is_paid)
+        self.assertTrue(paid.allows('historical_awards'))
+        free = self.service.get(2)
+        self.assertFalse(free.allows('quick_wins'))
+        self.assertEqual(free.limit('free_lead_views'), 3)
+        self.assertTrue(self.service.get(2, is_admin=True).allows('historical_awards'))
+
+    def test_cached_until_version_bumped(self):
+        self.assertTrue(self.service.get(1).is_paid)
+        self._set_status(1, 'cancelled')
+        # Unbumped changes are not seen, even after the recheck interval
+        self.clock.now += 60
+        self.assertTrue(self.service.get(1).is_paid)
+        self.assertEqual(self.service.bump(paypal_subscription_id='I-123'), 1)
+        self.assertFalse(self.service.get(1).is_paid)
+
+    def test_bump_from_other_worker_seen_after_recheck(self):
+        other = EntitlementService(lambda: self.engine, clock=self.clock)
+        self.assertFalse(self.service.get(2).is_paid)
+        self._set_status(2, 'paid')
+        other.bump(email='B@example.com')
+        self.assertFalse(self.service.get(2).is_paid)
+        self.clock.now += 31
+        self.assertTrue(self.service.get(2).is_paid)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+import unittest
+import html_parsing
+from html_parsing import LISTING_REGIONS, css, first, make_soup, parse_html, text_of, xpath
+
+PAGE = b'''<?xml version="1.0" encoding="utf-8"?>
+<html><head><title>Bids</title><script>var bid = "janitorial";</script></head><body>
+<nav><a href="/home">Home</a></nav>
+<table class="bids"><tr><th>Title</th></tr>
+<tr class="bid-row"><td><a href="/bid/7">Custodial   services</a><!-- internal --></td><td>Due 12/01</td></tr>
+</table>
+<div class="footer">Call us</div>
+</body></html>'''
+
+class HtmlParsingTestCase(unittest.TestCase):
+    def test_lxml_document_drops_noise_and_resolves_links(self):
+        doc = parse_html(PAGE.decode(), base_url='https://city.example/purchasing/')
+        self.assertNotIn('janitorial', doc.text_content())
+        row = first(doc, 'table.bids tr.bid-row')
+        self.assertEqual(text_of(first(row, 'a')), 'Custodial services')
+        self.assertEqual([a.get('href') for a in css(row, 'a')], ['https://city.example/bid/7'])
+        self.assertEqual(xpath(doc, 'string(//title)'), 'Bids')
+        self.assertIsNone(parse_html(b''))
+        self.assertEqual(text_of(first(doc, 'p.missing')), '')
+
+    def test_soup_keeps_bs4_api_and_parses_only_listing_regions(self):
+        soup = make_soup(PAGE)
+        self.assertEqual(len(soup.find_all('a')), 2)
+        regions = make_soup(PAGE, only=LISTING_REGIONS)
+        self.assertEqual([a['href'] for a in regions.find_all('a')], ['/bid/7'])
+        self.assertEqual(make_soup(b'').find_all('a'), [])
+
+    def test_benchmark_times_every_parser_on_recorded_pages(self):
+        path = os.path.join(tempfile.mkdtemp(), 'portal.json')
+        with open(path, 'w') as f:
+            json.dump({'interactions': [
+                {'method': 'GET', 'url': 'https://city.example/', 'body_sha1': '', 'status': 200,
+                 'headers': {'Content-Type': 'text/html'}, 'body': PAGE.decode()},
+                {'method': 'GET', 'url': 'https://city.example/api', 'body_sha1': '', 'status': 200,
+                 'headers': {'Content-Type': 'application/json'}, 'body': '{}'},
+            ]}, f)
+        result = html_parsing.benchmark([path], repeat=1)
+        self.assertEqual(result['pages'], 1)
+        self.assertEqual(set(result['ms_per_page']), {'bs4_html_parser', 'bs4_lxml', 'bs4_lxml_regions', 'lxml'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+import scraper_benchmark
+from http_cassette import Cassette, CassetteMiss, use_cassette
+from national_scrapers.base_scraper import BaseScraper
+
+PAGE = '<html><body><a href="/bid/1">Janitorial services RFP</a><a href="/bid/2">Custodial bid</a></body></html>'
+
+class LiveAdapter(BaseAdapter):
+    """Stands in for the network while recording."""
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        response = requests.Response()
+        response.status_code, response.url, response.request = 200, request.url, request
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response.headers['Set-Cookie'] = 'session=secret'
+        response._content = f'{PAGE}<!-- {self.calls} -->'.encode()
+        return response
+
+    def close(self):
+        pass
+
+class HttpCassetteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'portal.json')
+        self.live = LiveAdapter()
+        session = requests.Session()
+        session.mount('https://', self.live)
+        with use_cassette(self.path, mode='record'):
+            session.get('https://portal.example/bids?page=1&api_key=SECRET')
+            session.get('https://portal.example/bids?api_key=SECRET&page=1')
+            session.post('https://portal.example/search', data={'q': 'janitorial'})
+
+    def test_replay_serves_recorded_responses_offline(self):
+        with open(self.path) as f:
+            saved = f.read()
+        self.assertNotIn('SECRET', saved)
+        self.assertNotIn('Set-Cookie', saved)
+        self.assertEqual(len(json.loads(saved)['interactions']), 3)
+        with use_cassette(self.path) as cassette:
+            first = requests.get('https://portal.example/bids?page=1&api_key=OTHER')
+            second = requests.get('https://portal.example/bids?page=1&api_key=OTHER')
+            third = requests.get('https://portal.example/bids?page=1&api_key=OTHER')
+            loose = requests.get('https://portal.example/bids?page=1&ts=123')
+            posted = requests.post('https://portal.example/search', data={'q': 'janitorial'})
+            with self.assertRaises(CassetteMiss):
+                requests.get('https://portal.example/unrecorded')
+            scraped = BaseScraper('portal').fetch_page('https://portal.example/bids?page=1')
+        self.assertEqual(self.live.calls, 3)
+        self.assertTrue(first.text.endswith('<!-- 1 -->'))
+        self.assertTrue(second.text.endswith('<!-- 2 -->'))
+        self.assertTrue(third.text.endswith('<!-- 2 -->'))  # the last answer repeats
+        self.assertEqual(loose.status_code, 200)
+        self.assertTrue(posted.text.endswith('<!-- 3 -->'))
+        self.assertEqual(scraped.encoding, 'utf-8')
+        self.assertEqual((cassette.stats['hits'], cassette.stats['misses']), (6, 1))
+
+    def test_httpx_clients_replay_from_the_same_cassette(self):
+        with use_cassette(self.path):
+            response = httpx.Client().get('https://portal.example/bids', params={'page': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Janitorial services RFP', response.text)
+
+    def test_benchmark_reports_throughput_and_yield(self):
+        def run():
+            text = requests.get('https://portal.example/bids?page=1').text
+            return [chunk for chunk in text.split('<a ')[1:]]
+
+        scraper_benchmark.register('portal')(run)
+        self.addCleanup(scraper_benchmark.BENCHMARKS.pop, 'portal')
+        row, missing = scraper_benchmark.run_suite(['portal', 'symphony'], self.dir)
+        self.assertEqual(row['status'], 'ok')
+        self.assertEqual((row['pages'], row['results'], row['results_per_page'], row['misses']), (1, 2, 2.0, 0))
+        self.assertGreater(row['pages_per_sec'], 0)
+        self.assertGreater(row['peak_mb'], 0)
+        self.assertEqual(missing['status'], 'skipped')
+        self.assertIn('portal', scraper_benchmark.format_report([row, missing]))
+
+    def test_benchmark_parse_time_holds_for_threaded_scrapers(self):
+        def parse(url):
+            text = requests.get(url).text
+            deadline = time.thread_time() + 0.005  # ~5ms of parsing per page
+            while time.thread_time() < deadline:
+                pass
+            return text
+
+        def run():
+            urls = ['https://portal.example/bids?page=1'] * 8
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                return list(pool.map(parse, urls))
+
+        def slow_play(cassette, *args):
+            threading.Event().wait(0.02)  # a transport that blocks without burning CPU
+            return play(cassette, *args)
+
+        play = Cassette.play
+        scraper_benchmark.register('portal')(run)
+        self.addCleanup(scraper_benchmark.BENCHMARKS.pop, 'portal')
+        with mock.patch.object(Cassette, 'play', slow_play):
+            row = scraper_benchmark.run_benchmark(scraper_benchmark.BENCHMARKS['portal'], self.dir)
+        self.assertEqual(row['pages'], 8)
+        self.assertGreaterEqual(row['parse_ms_per_page'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import time
+import unittest
+import requests
+from requests.adapters import BaseAdapter
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from scrapers import industry_days_events_scraper as idays
+from scrapers.industry_days_events_scraper import IndustryDaysEventsScraper
+
+SAM = {'opportunities': [
+    {'title': 'Janitorial Industry Day', 'noticeId': 'N1', 'departmentName': 'GSA',
+     'placeOfPerformance': {'state': {'code': 'VA'}, 'cityName': 'Richmond'}},
+    {'title': 'Small business outreach event', 'noticeId': 'N2',
+     'placeOfPerformance': {'state': {'code': 'TX'}}},
+    {'title': 'Boiler replacement', 'noticeId': 'N3', 'placeOfPerformance': {'state': {'code': 'VA'}}},
+]}
+SBA = b'''<html><body>
+<div class="event-card"><h3>Contracting 101</h3><p>Richmond, Virginia</p><a href="/event/1">More</a></div>
+<div class="event-card"><h3>Export basics</h3><p>Online</p></div>
+</body></html>'''
+PORTAL = b'<html><body><li class="event-item"><a href="#">Vendor outreach session for facilities</a></li></body></html>'
+
+class FeedAdapter(BaseAdapter):
+    def __init__(self, delay=0.1):
+        super().__init__()
+        self.delay = delay
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        self.calls.append(request.url)
+        time.sleep(self.delay)
+        response = requests.Response()
+        response.status_code, response.url, response.request = 200, request.url, request
+        if 'sam.gov' in request.url:
+            response._content = json.dumps(SAM).encode()
+        elif 'sba.gov' in request.url:
+            response._content = SBA
+        else:
+            response._content = PORTAL
+        return response
+
+    def close(self):
+        pass
+
+class IndustryDaysScraperTestCase(unittest.TestCase):
+    def setUp(self):
+        idays.source_cache.clear()
+        self.adapter = FeedAdapter()
+        self.scraper = IndustryDaysEventsScraper()
+        self.scraper.session.mount('https://', self.adapter)
+
+    def test_all_states_fetches_national_feeds_once_and_portals_concurrently(self):
+        started = time.monotonic()
+        events = self.scraper.scrape_all_states(limit_per_state=5)
+        self.assertLess(time.monotonic() - started, 0.8)  # 12 fetches x 0.1s, overlapped, no sleeps
+        self.assertEqual(sum('sam.gov' in url for url in self.adapter.calls), 1)
+        self.assertEqual(sum('sba.gov' in url for url in self.adapter.calls), 1)
+        self.assertEqual(len(self.adapter.calls), 2 + len(idays.STATE_PORTALS))
+        va = [e['source'] for e in events if e['state'] == 'VA']
+        self.assertEqual(va, ['SAM.gov Industry Days', 'SBA Events Calendar', 'Virginia Procurement Portal'])
+        self.assertEqual([e['title'] for e in events if e['state'] == 'TX'][0], 'Small business outreach event')
+        # Per-state calls right after are served from the source cache
+        self.assertEqual(len(self.scraper.scrape_sam_gov_events('VA')), 1)
+        self.assertEqual(len(self.scraper.scrape_state_procurement_events('MD')), 1)
+        self.assertEqual(len(self.adapter.calls), 2 + len(idays.STATE_PORTALS))
+
+    def test_cached_lists_are_not_shared_with_callers(self):
+        sizes = []
+        for _ in range(3):  # as the admin route does: SAM events extended with SBA events
+            events = self.scraper.scrape_sam_gov_events()
+            events.extend(self.scraper.scrape_sba_events())
+            sizes.append((len(self.scraper.scrape_sam_gov_events()), len(events)))
+        self.assertEqual(sizes, [sizes[0]] * 3)
+        self.assertGreater(sizes[0][1], sizes[0][0])
+        self.scraper.scrape_state_procurement_events('VA').append({'title': 'extra'})
+        self.assertEqual(len(self.scraper.scrape_state_procurement_events('VA')), 1)
+
+    def test_save_skips_duplicates_with_one_insert(self):
+        engine = create_engine('sqlite://')
+        with engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE government_contracts (id INTEGER PRIMARY KEY, title TEXT, agency TEXT,
+                location TEXT, url TEXT, description TEXT, posted_date TEXT, deadline TEXT, contract_type TEXT,
+                naics_code TEXT, data_source TEXT, notice_id TEXT, state TEXT)'''))
+            conn.execute(text("INSERT INTO government_contracts (title, agency, url) VALUES ('Old', 'GSA', 'https://a')"))
+        events = [{'title': 'Old', 'agency': 'GSA', 'url': 'https://other'},
+                  {'title': 'New', 'agency': 'GSA', 'url': 'https://b'},
+                  {'title': 'Same page', 'agency': 'VA', 'url': 'https://b'},
+                  {'title': 'Newer', 'agency': 'GSA', 'url': 'https://c'}]
+        with Session(engine) as session:
+            self.assertEqual(self.scraper.save_to_database(events, session), 2)
+            self.assertEqual(session.execute(text('SELECT COUNT(*) FROM government_contracts')).scalar(), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import time
+import unittest
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from integrations import international_sources as intl
+
+RSS = b'''<rss><channel>
+<item><guid>a1</guid><title>Office cleaning services</title><link>https://feed.example/a1</link></item>
+<item><guid>a2</guid><title>Software licence renewal</title><link>https://feed.example/a2</link></item>
+</channel></rss>'''
+RSS_MORE = RSS.replace(b'</channel>', b'<item><guid>a3</guid><title>Janitorial contract</title></item></channel>')
+
+class FeedAdapter(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.bodies = {}
+        self.delays = {}
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        url = request.url.split('?')[0]
+        self.calls.append((url, dict(request.headers)))
+        time.sleep(self.delays.get(url, 0))
+        response = requests.Response()
+        response.url, response.request = request.url, request
+        body = self.bodies.get(url)
+        if isinstance(body, Exception):
+            raise body
+        if request.headers.get('If-None-Match') == '"v1"' and body == RSS:
+            response.status_code = 304
+            return response
+        response.status_code, response._content = 200, body or b'{"releases": []}'
+        response.headers['ETag'] = '"v1"' if body == RSS else '"v2"'
+        return response
+
+    def close(self):
+        pass
+
+class InternationalSourcesTestCase(unittest.TestCase):
+    def setUp(self):
+        intl._feeds.clear()
+        intl._breakers.clear()
+        intl._running.clear()
+        intl._metrics.clear()
+        self.adapter = FeedAdapter()
+        intl.session.mount('https://', self.adapter)
+        self.registry = intl.SOURCE_ADAPTERS[:]
+
+    def tearDown(self):
+        intl.SOURCE_ADAPTERS[:] = self.registry
+        intl.session.mount('https://', HTTPAdapter())
+
+    def test_feed_uses_conditional_get_and_normalizes_only_new_items(self):
+        self.adapter.bodies['https://feed.example/rss'] = RSS
+        normalized = []
+        original = intl._map_rss_item
+        intl._map_rss_item = lambda it, label: normalized.append(it.findtext('guid')) or original(it, label)
+        try:
+            first = intl.fetch_rss_from_url('https://feed.example/rss', 'Test')
+            self.assertEqual([r['title'] for r in first], ['Office cleaning services'])
+            again = intl.fetch_rss_from_url('https://feed.example/rss', 'Test')  # 304
+            self.assertEqual(self.adapter.calls[-1][1].get('If-None-Match'), '"v1"')
+            self.assertEqual(again, first)
+            self.adapter.bodies['https://feed.example/rss'] = RSS_MORE
+            changed = intl.fetch_rss_from_url('https://feed.example/rss', 'Test')
+        finally:
+            intl._map_rss_item = original
+        self.assertEqual(len(changed), 2)
+        self.assertEqual(normalized, ['a1', 'a2', 'a3'])
+
+    def test_sources_run_concurrently_with_timeouts_and_breakers(self):
+        def slow(limit):
+            time.sleep(0.5)
+            return [{'title': 'slow'}], 1
+
+        def broken(limit):
+            raise RuntimeError('feed down')
+
+        intl.SOURCE_ADAPTERS[:] = [
+            intl.SourceAdapter('fast', lambda limit: ([{'title': 'fast'}], 1)),
+            intl.SourceAdapter('slow', slow, timeout=0.2),
+            intl.SourceAdapter('broken', broken),
+        ]
+        started = time.monotonic()
+        self.assertEqual(intl.fetch_international_cleaning(), [{'title': 'fast'}])
+        self.assertLess(time.monotonic() - started, 0.4)
+        for _ in range(intl.BREAKER_THRESHOLD - 1):
+            intl.fetch_international_cleaning()
+        metrics = intl.get_source_metrics()
+        self.assertEqual(metrics['broken']['breaker'], 'open')
+        self.assertEqual(metrics['broken']['failures'], intl.BREAKER_THRESHOLD)
+        intl.fetch_international_cleaning()
+        metrics = intl.get_source_metrics()
+        self.assertEqual(metrics['broken']['skipped'], 1)
+        self.assertEqual(metrics['fast']['last_items'], 1)
+        self.assertGreaterEqual(metrics['slow']['timeouts'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
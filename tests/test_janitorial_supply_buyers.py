@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+import unittest
+from sqlalchemy import create_engine, text
+from scrapers import janitorial_supply_buyers_scraper as buyers_mod
+from scrapers.janitorial_supply_buyers_scraper import BuyerWriter, JanitorialSupplyBuyersScraper
+
+def buyer(name, title, location='Oakland, CA', email='buy@example.org'):
+    return {'buyer_name': name, 'contract_title': title, 'location': location, 'organization_type': 'Healthcare System',
+            'supply_category': 'Janitorial Supplies', 'estimated_monthly_value': '$1,000', 'website_url': 'https://x',
+            'buyer_type': 'Hospital', 'recurring': 'Yes', 'contact_email': email, 'contact_phone': ''}
+
+class JanitorialSupplyBuyersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'app.db')}")
+        with self.engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE supply_contracts (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                agency TEXT NOT NULL, location TEXT NOT NULL, product_category TEXT, estimated_value TEXT,
+                description TEXT, website_url TEXT, contact_email TEXT, contact_phone TEXT, status TEXT,
+                posted_date TEXT, category TEXT, created_at TIMESTAMP)'''))
+            conn.execute(text("INSERT INTO supply_contracts (title, agency, location, contact_email) "
+                              "VALUES ('Kaiser National Supply Contract', 'Kaiser Permanente', 'Oakland, CA', 'old@kp.org')"))
+
+    def test_writer_dedups_on_normalized_key_and_upserts(self):
+        writer = BuyerWriter()
+        with self.engine.begin() as conn:
+            counts = writer.write(conn, [
+                buyer('KAISER PERMANENTE', 'Kaiser national supply contract.', email='new@kp.org'),
+                buyer('HCA Healthcare', 'HCA Cleaning Supply Contract', 'Nashville, TN'),
+                buyer('HCA  Healthcare', 'HCA cleaning supply contract', 'Nashville TN'),
+            ])
+        self.assertEqual(counts, {'inserted': 1, 'updated': 1, 'duplicates': 1})
+        with self.engine.begin() as conn:  # found again without contact details: stored ones are kept
+            BuyerWriter().write(conn, [buyer('Kaiser Permanente', 'Kaiser National Supply Contract', email='')])
+        with self.engine.begin() as conn:  # a later phase finding the same buyer is skipped
+            self.assertEqual(writer.write(conn, [buyer('HCA Healthcare', 'HCA Cleaning Supply Contract', 'Nashville, TN')]),
+                             {'inserted': 0, 'updated': 0, 'duplicates': 1})
+        with self.engine.connect() as conn:
+            rows = conn.execute(text('SELECT agency, contact_email FROM supply_contracts ORDER BY id')).fetchall()
+        self.assertEqual([tuple(r) for r in rows], [('Kaiser Permanente', 'new@kp.org'), ('HCA Healthcare', 'buy@example.org')])
+
+    def test_job_runs_phases_concurrently_and_reports_timings(self):
+        original = {name: getattr(JanitorialSupplyBuyersScraper, method) for name, method in buyers_mod.PHASES}
+
+        def slow_phase(name):
+            def phase(self):
+                time.sleep(0.3)
+                return [buyer(f'{name} buyer', f'{name} contract')]
+            return phase
+
+        for name, method in buyers_mod.PHASES:
+            setattr(JanitorialSupplyBuyersScraper, method, slow_phase(name))
+        try:
+            started = time.monotonic()
+            job = buyers_mod.start_buyer_scrape_job(self.engine)
+            self.assertEqual(buyers_mod.start_buyer_scrape_job(self.engine)['job_id'], job['job_id'])
+            while buyers_mod.get_buyer_scrape_job(job['job_id'])['status'] == 'running':
+                time.sleep(0.05)
+            self.assertLess(time.monotonic() - started, 1.0)  # 5 x 0.3s overlapped
+        finally:
+            for name, method in buyers_mod.PHASES:
+                setattr(JanitorialSupplyBuyersScraper, method, original[name])
+        finished = buyers_mod.get_buyer_scrape_job(job['job_id'])
+        self.assertEqual(finished['status'], 'completed')
+        self.assertEqual((finished['result']['inserted'], finished['result']['total']), (5, 6))
+        self.assertEqual(set(finished['phases']), {name for name, _ in buyers_mod.PHASES})
+        self.assertIn('save_seconds', finished['phases']['healthcare'])
+
+        buyers_mod._jobs.pop(job['job_id'])  # a poll landing on another worker
+        self.assertIsNone(buyers_mod.get_buyer_scrape_job(job['job_id']))
+        stored = buyers_mod.get_buyer_scrape_job(job['job_id'], self.engine)
+        self.assertEqual((stored['status'], stored['result']['inserted']), ('completed', 5))
+        self.assertEqual(set(stored['phases']), {name for name, _ in buyers_mod.PHASES})
+        self.assertIsNone(buyers_mod.get_buyer_scrape_job('missing', self.engine))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, text
+from lead_dedup import LeadDeduplicator, cluster_records
+
+class ClusterRecordsTestCase(unittest.TestCase):
+    def test_near_duplicates_across_sources(self):
+        records = [
+            {'title': 'Janitorial Services - Building 12', 'agency': 'Dept of Veterans Affairs', 'location': 'Richmond, VA', 'source': 'sam'},
+            {'title': 'Grounds Maintenance Services', 'agency': 'City of Norfolk', 'location': 'Norfolk, VA', 'source': 'city'},
+            {'title': 'JANITORIAL SERVICES BLDG 12', 'agency': 'Department of Veterans Affairs', 'location': 'Richmond, VA', 'source': 'demandstar'},
+            {'title': 'Janitorial Services - Building 12', 'agency': 'Dept of Veterans Affairs', 'location': 'Austin, TX', 'source': 'usaspending'},
+            {'title': 'Janitorial Services - Building 14', 'agency': 'Dept of Veterans Affairs', 'location': 'Richmond, VA', 'source': 'sam'},
+        ]
+        clusters = sorted(cluster_records(records))
+        self.assertEqual(clusters, [[0, 2], [1], [3], [4]])
+
+class LeadDeduplicatorTestCase(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(tempfile.mkdtemp(), 'dedup.db')
+        self.engine = create_engine(f'sqlite:///{path}')
+        with self.engine.begin() as conn:
+            conn.execute(text('CREATE TABLE federal_contracts (id INTEGER PRIMARY KEY, title TEXT, agency TEXT, location TEXT, sam_gov_url TEXT)'))
+            conn.execute(text('CREATE TABLE city_rfps (id INTEGER PRIMARY KEY, rfp_title TEXT, department TEXT, city_name TEXT, state_code TEXT, rfp_url TEXT)'))
+        self.dedup = LeadDeduplicator(lambda: self.engine, tables={
+            k: v for k, v in __import__('lead_dedup').LEAD_TABLES.items() if k in ('federal_contracts', 'city_rfps')
+        })
+
+    def test_incremental_ingest_keeps_canonical_and_links(self):
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO city_rfps VALUES (1, 'Custodial Services for City Hall', 'Public Works', 'Norfolk', 'VA', 'https://norfolk.example/rfp1')"))
+        self.assertEqual(self.dedup.ingest_new()['city_rfps']['processed'], 1)
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO federal_contracts VALUES (7, 'Custodial Services - City Hall', 'Public Works', 'Norfolk, VA', 'https://sam.gov/opp/7')"))
+            conn.execute(text("INSERT INTO federal_contracts VALUES (8, 'HVAC Repair', 'GSA', 'Denver, CO', 'https://sam.gov/opp/8')"))
+        results = self.dedup.ingest_new()
+        self.assertEqual(results['federal_contracts'], {'processed': 2, 'duplicates': 1})
+        # Federal record outranks the city scrape and becomes canonical
+        links = self.dedup.source_links('city_rfps', 1)
+        self.assertEqual([(l['table'], l['id'], l['canonical']) for l in links],
+                         [('federal_contracts', 7, True), ('city_rfps', 1, False)])
+        with self.engine.connect() as conn:
+            visible = conn.execute(text('SELECT id FROM city_rfps WHERE ' + self.dedup.exclude_duplicates_sql('city_rfps'))).fetchall()
+        self.assertEqual(visible, [])
+        # Nothing new to process on a second pass
+        self.assertEqual(self.dedup.ingest_new()['federal_contracts']['processed'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, text
+import lead_exports
+from lead_exports import LeadExporter
+
+class LeadExportsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'exports.db')}")
+        with self.engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE federal_contracts (id INTEGER PRIMARY KEY, title TEXT, agency TEXT,
+                location TEXT, value TEXT, deadline DATE, naics_code TEXT, posted_date DATE, notice_id TEXT)'''))
+            conn.execute(text('INSERT INTO federal_contracts (title, agency, location, value, naics_code, posted_date, '
+                              'notice_id) VALUES (:t, :a, :l, :v, :n, :p, :i)'), [
+                {'t': f'Janitorial services {i}' if i % 2 else f'Grounds {i}', 'a': 'GSA',
+                 'l': 'Norfolk, VA' if i % 3 else 'Austin, TX', 'v': '=HYPERLINK("x")' if i == 1 else str(i * 1000),
+                 'n': '561720', 'p': f'2025-01-{(i % 28) + 1:02d}', 'i': f'N{i}'} for i in range(1, 301)])
+        self.exporter = LeadExporter(lambda: self.engine, batch_size=50)
+
+    def test_formats_and_filters_share_one_query(self):
+        filters = {'state': 'va', 'q': 'Janitorial', 'posted_since': '2025-01-10'}
+        rows = list(csv.DictReader(io.StringIO(b''.join(self.exporter.stream('federal_contracts', 'csv', filters))
+                                               .decode())))
+        self.assertTrue(rows)
+        self.assertTrue(all(r['location'].endswith('VA') and r['posted_date'] >= '2025-01-10' for r in rows))
+        self.assertNotIn('department', rows[0])  # absent from this table, so skipped
+
+        stats = {}
+        lines = b''.join(self.exporter.stream('federal_contracts', 'ndjson', filters, stats=stats)).splitlines()
+        self.assertEqual((len(lines), stats['rows']), (len(rows), len(rows)))
+        self.assertEqual(json.loads(lines[0])['notice_id'], rows[0]['notice_id'])
+
+        excel = b''.join(self.exporter.stream('federal_contracts', 'excel', {'q': 'services 1'})).decode('utf-8')
+        self.assertTrue(excel.startswith('\ufeff'))
+        self.assertIn('"\'=HYPERLINK(""x"")"', excel)
+
+    def test_gzip_stream_is_chunked_and_round_trips(self):
+        chunks = []
+        original = lead_exports.CHUNK_BYTES
+        lead_exports.CHUNK_BYTES = 1024
+        try:
+            for chunk in self.exporter.stream('federal_contracts', 'csv'):
+                chunks.append(chunk)
+        finally:
+            lead_exports.CHUNK_BYTES = original
+        self.assertGreater(len(chunks), 10)
+        self.assertTrue(all(len(c) < 2048 for c in chunks))
+        body = b''.join(self.exporter.stream('federal_contracts', 'csv', compress=True))
+        self.assertEqual(gzip.decompress(body), b''.join(chunks))
+
+        out = io.BytesIO()
+        self.assertEqual(self.exporter.write(out, 'federal_contracts', 'ndjson', compress=True), 300)
+        self.assertEqual(len(gzip.decompress(out.getvalue()).splitlines()), 300)
+
+    def test_bad_arguments_fail_before_streaming(self):
+        for args in [('nope', 'csv', None), ('federal_contracts', 'xlsx', None),
+                     ('federal_contracts', 'csv', {'email': 'x'}), ('federal_contracts', 'csv', {'state': 'Virginia'}),
+                     ('federal_contracts', 'csv', {'posted_since': "2025-01-01' OR 1=1"})]:
+            with self.assertRaises(ValueError):
+                self.exporter.stream(*args)
+        self.assertTrue(self.exporter.source('leads').admin_only)
+        self.assertEqual(self.exporter.filename('leads', 'excel', True)[-7:], '.csv.gz')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from datetime import date
+from sqlalchemy import create_engine, text
+from quick_wins_feed import QuickWinsFeed, parse_amount, sanitize_phone
+
+class QuickWinsFeedTestCase(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(tempfile.mkdtemp(), 'qw.db')
+        self.engine = create_engine(f'sqlite:///{path}')
+        with self.engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE supply_contracts (id INTEGER PRIMARY KEY, title TEXT, agency TEXT,
+                location TEXT, product_category TEXT, estimated_value TEXT, bid_deadline TEXT, description TEXT,
+                website_url TEXT, is_small_business_set_aside BOOLEAN, contact_name TEXT, contact_email TEXT,
+                contact_phone TEXT, is_quick_win BOOLEAN, status TEXT)'''))
+            conn.execute(text('''CREATE TABLE commercial_lead_requests (id INTEGER PRIMARY KEY, business_name TEXT,
+                city TEXT, business_type TEXT, services_needed TEXT, budget_range TEXT, urgency TEXT,
+                created_at TEXT, contact_person TEXT, email TEXT, phone TEXT, status TEXT)'''))
+            conn.execute(text('''CREATE TABLE contracts (id INTEGER PRIMARY KEY, title TEXT, agency TEXT, location TEXT,
+                value TEXT, deadline TEXT, description TEXT, naics_code TEXT, set_aside TEXT, posted_date TEXT,
+                solicitation_number TEXT, website_url TEXT)'''))
+            conn.execute(text("""INSERT INTO supply_contracts VALUES
+                (1, 'Paper goods', 'Acme', 'Norfolk, VA', 'Paper', '$50,000', '2030-01-10', 'd', NULL, 0, NULL, NULL, '757-555-1234', 1, 'open'),
+                (2, 'Mops', 'Beta', 'Austin, TX', 'Tools', '5000', '01/05/2030', 'd', NULL, 1, 'Pat', 'p@x.com', '(512) 867-5309', 0, 'open'),
+                (3, 'Closed bid', 'Gamma', 'Richmond, VA', 'Tools', '90000', '2030-01-01', 'd', NULL, 0, NULL, NULL, NULL, 1, 'closed')"""))
+            conn.execute(text("""INSERT INTO commercial_lead_requests VALUES
+                (1, 'Cafe', 'Norfolk, VA', 'Restaurant', 'Deep clean', '$2K - $5K', 'emergency', '2030-01-01', NULL, NULL, NULL, 'open'),
+                (2, 'Gym', 'Dallas, TX', 'Fitness', 'Nightly', '$1K', 'normal', '2030-01-01', NULL, NULL, NULL, 'open')"""))
+            conn.execute(text("""INSERT INTO contracts VALUES
+                (9, 'Custodial', 'City of Norfolk', 'Norfolk, VA', '$120,000', '2030-01-03', 'desc', NULL, 'SB', NULL, 'RFP-9', NULL)"""))
+        self.feed = QuickWinsFeed(lambda: self.engine)
+
+    def test_helpers(self):
+        self.assertEqual(sanitize_phone('757-555-1234'), 'N/A')
+        self.assertEqual(sanitize_phone('(512) 867-5309'), '(512) 867-5309')
+        self.assertEqual(parse_amount('$2K - $5K'), 2000)
+        self.assertEqual(parse_amount('$150,000'), 150000)
+
+    def test_refresh_and_page(self):
+        self.assertEqual(self.feed.refresh(), {'supply': 2, 'commercial': 1, 'government': 1})
+        result = self.feed.page(today=date(2029, 12, 31))
+        self.assertEqual([i['id'] for i in result['items']],
+                         ['commercial_1', 'contract_9', 'supply_1', 'supply_2'])
+        self.assertEqual(result['counts'], {'expiring_7days': 2, 'urgent': 0, 'quick_win': 2})
+        first_supply = result['items'][2]
+        self.assertEqual((first_supply['state'], first_supply['deadline'], first_supply['phone']),
+                         ('VA', '01/10/2030', 'N/A'))
+
+    def test_filters_and_pagination_in_sql(self):
+        self.feed.refresh()
+        va = self.feed.page(state='va', min_value=10000)
+        self.assertEqual([i['id'] for i in va['items']], ['contract_9', 'supply_1'])
+        paged = self.feed.page(page=2, per_page=3)
+        self.assertEqual((paged['total'], paged['total_pages'], len(paged['items'])), (4, 2, 1))
+        self.assertEqual([i['id'] for i in self.feed.page(city='austin')['items']], ['supply_2'])
+
+    def test_refresh_if_stale_builds_empty_feed(self):
+        self.assertEqual(self.feed.page()['total'], 4)
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE supply_contracts SET status = 'closed'"))
+        self.assertEqual(self.feed.page()['total'], 4)  # still fresh
+        self.feed.refresh(['supply'])
+        self.assertEqual(self.feed.page()['total'], 2)
+
+    def test_empty_feed_counts_as_fresh(self):
+        with self.engine.begin() as conn:
+            for table in ('supply_contracts', 'commercial_lead_requests', 'contracts'):
+                conn.execute(text(f'DELETE FROM {table}'))
+        self.assertTrue(self.feed.refresh_if_stale())
+        other_worker = QuickWinsFeed(lambda: self.engine)
+        with mock.patch.object(other_worker, 'refresh') as refresh:
+            self.assertEqual(other_worker.page()['total'], 0)
+        refresh.assert_not_called()
+
+    def test_stale_feed_is_rebuilt_in_the_background(self):
+        now = [1000.0]
+        feed = QuickWinsFeed(lambda: self.engine, max_age_seconds=60, clock=lambda: now[0])
+        self.assertEqual(feed.page()['total'], 4)  # first build runs in the request
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE supply_contracts SET status = 'closed'"))
+        now[0] += 61
+        release = threading.Event()
+        original = feed.refresh
+        with mock.patch.object(feed, 'refresh', side_effect=lambda **kw: release.wait(5) and original(**kw)):
+            self.assertEqual(feed.page()['total'], 4)  # stale rows served while the rebuild runs
+            self.assertFalse(feed.refresh_if_stale())  # one rebuild at a time
+            release.set()
+            deadline = time.monotonic() + 5
+            while feed.page()['total'] != 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(feed.page()['total'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
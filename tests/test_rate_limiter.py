@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from rate_limiter import RateLimiter, MemoryRateLimitStore, shared_memory_store
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    def __call__(self):
+        return self.now
+
+class RateLimiterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.tmpdir = tempfile.mkdtemp()
+        self.stores = {
+            'memory': MemoryRateLimitStore(),
+            'sqlite': shared_memory_store(os.path.join(self.tmpdir, 'rl.db')),
+        }
+
+    def test_limit_and_replenish(self):
+        for name, store in self.stores.items():
+            limiter = RateLimiter(store, clock=self.clock)
+            results = [limiter.hit(f'k:{name}', 5, 600).allowed for _ in range(6)]
+            self.assertEqual(results, [True] * 5 + [False], name)
+            denied = limiter.hit(f'k:{name}', 5, 600)
+            self.assertAlmostEqual(denied.retry_after, 120.0, places=3)
+            # One emission interval later exactly one more hit is admitted
+            self.clock.now += 120
+            self.assertTrue(limiter.hit(f'k:{name}', 5, 600).allowed, name)
+            self.assertFalse(limiter.hit(f'k:{name}', 5, 600).allowed, name)
+            self.clock.now = 1000.0
+
+    def test_peek_does_not_consume(self):
+        for name, store in self.stores.items():
+            limiter = RateLimiter(store, clock=self.clock)
+            for _ in range(10):
+                self.assertTrue(limiter.peek(f'p:{name}', 2, 60).allowed)
+            limiter.hit(f'p:{name}', 2, 60)
+            limiter.hit(f'p:{name}', 2, 60)
+            self.assertFalse(limiter.peek(f'p:{name}', 2, 60).allowed, name)
+
+    def test_sweep_removes_expired_keys(self):
+        for name, store in self.stores.items():
+            limiter = RateLimiter(store, clock=self.clock)
+            limiter.hit(f'a:{name}', 3, 30)
+            limiter.hit(f'b:{name}', 3, 3000)
+            self.assertEqual(store.sweep(self.clock.now + 60), 1, name)
+            self.assertIsNone(store.get_tat(f'a:{name}'))
+            self.assertIsNotNone(store.get_tat(f'b:{name}'))
+
+if __name__ == '__main__':
+    unittest.main()
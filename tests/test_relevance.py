@@ -0,0 +1,42 @@
+import unittest
+from relevance import RelevanceClassifier, classify, classify_batch, is_cleaning_related, title_exclusion_sql
+
+class RelevanceClassifierTestCase(unittest.TestCase):
+    def test_include_exclude_and_word_starts(self):
+        self.assertTrue(classify('Janitorial Services - Building 12').relevant)
+        self.assertEqual(classify('Disinfection of transit buses').matched, ('disinfect',))
+        self.assertFalse(classify('Court reporter services').relevant)
+        result = classify('Data cleaning for the enterprise data warehouse')
+        self.assertFalse(result.relevant)
+        self.assertEqual(result.matched, ())  # "data cleaning" shadows "cleaning"
+        self.assertFalse(classify('Cleaning software license renewal').relevant)
+
+    def test_strong_terms_survive_exclude_terms(self):
+        row = {'title': 'Janitorial services', 'description': 'Contractor logs work orders in the agency software'}
+        self.assertTrue(classify(row).relevant)
+        self.assertTrue(is_cleaning_related('Custodial staff for the cloud consulting office'))
+        self.assertFalse(is_cleaning_related('Dashboard for cleaning schedules'))
+        self.assertEqual([is_cleaning_related(t) for t in ('data cleaning', 'porter', 'nothing')],
+                         [classify(t).relevant for t in ('data cleaning', 'porter', 'nothing')])
+
+    def test_naics_rules(self):
+        self.assertTrue(classify({'title': 'Support services', 'naics_code': '561720'}).relevant)
+        self.assertFalse(classify({'title': 'Office cleaning portal', 'naics_code': '541512'}).relevant)
+        self.assertTrue(classify({'title': 'Office cleaning', 'naics_code': '236220'}).relevant)
+
+    def test_batch_matches_single_row_results(self):
+        rows = ['Custodial services', '', None, {'title': 'HVAC repair'},
+                {'title': 'Floor care', 'description': 'strip and wax'}, 'cloud cleaning tool', 'porter']
+        self.assertEqual(classify_batch(rows), [classify(r) for r in rows])
+        self.assertEqual([r.relevant for r in classify_batch(rows)],
+                         [True, False, False, False, True, False, True])
+
+    def test_custom_terms_and_listing_sql(self):
+        clf = RelevanceClassifier(include=['aircraft cleaning'], exclude=[], naics_rules={})
+        self.assertTrue(clf.is_relevant('Aircraft Cleaning at Gate 4'))
+        self.assertFalse(clf.is_relevant('Janitorial services'))
+        self.assertEqual(title_exclusion_sql('title', ['award', 'cancel']),
+                         "LOWER(title) NOT LIKE '%award%' AND LOWER(title) NOT LIKE '%cancel%'")
+
+if __name__ == '__main__':
+    unittest.main()
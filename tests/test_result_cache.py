@@ -0,0 +1,71 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from sqlalchemy import create_engine, text
+from result_cache import ResultCache
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp, 'app.db')}")
+        self.cache = ResultCache(lambda: self.engine, cold_wait=2)
+
+    def wait_idle(self):
+        deadline = time.monotonic() + 5
+        while self.cache._inflight and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    def test_cold_key_answers_from_seed_while_first_refresh_runs(self):
+        result = self.cache.get('state_rfps:VA', compute=lambda: (time.sleep(0.2), {'rfps': ['live']})[1],
+                                max_age=60, seed=lambda: {'rfps': ['local']})
+        self.assertEqual(result.payload, {'rfps': ['local']})
+        self.assertTrue(result.refreshing)
+        self.wait_idle()
+        result = self.cache.get('state_rfps:VA', compute=lambda: {'rfps': ['unused']}, max_age=60)
+        self.assertEqual(result.payload, {'rfps': ['live']})
+        self.assertFalse(result.stale)
+        self.assertIsNotNone(result.freshness()['refreshed_at'])
+
+    def test_stale_entry_is_served_immediately_and_refreshed_once(self):
+        self.cache.get('city_rfps:VA', compute=lambda: {'v': 1}, max_age=60)
+        self.cache.invalidate('city_rfps:VA')
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(2)
+            return {'v': 2}
+
+        started = time.monotonic()
+        results = [self.cache.get('city_rfps:VA', compute=compute, max_age=60) for _ in range(5)]
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertTrue(all(r.payload == {'v': 1} and r.stale and r.refreshing for r in results))
+        release.set()
+        self.wait_idle()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.get('city_rfps:VA', compute=compute, max_age=60).payload, {'v': 2})
+
+    def test_failed_refresh_keeps_last_good_payload(self):
+        self.cache.get('state_rfps:MD', compute=lambda: {'v': 1}, max_age=60)
+        self.cache.invalidate('state_rfps:MD')
+
+        def boom():
+            raise RuntimeError('SAM.gov 503')
+
+        self.cache.get('state_rfps:MD', compute=boom, max_age=60)
+        self.wait_idle()
+        result = self.cache.get('state_rfps:MD', compute=boom, max_age=60)
+        self.assertEqual(result.payload, {'v': 1})
+        self.assertEqual(result.error, 'SAM.gov 503')
+        # The failed claim is held until claim_timeout, so no retry storm
+        self.assertTrue(result.refreshing)
+        self.assertFalse(self.cache._inflight)
+        with self.engine.connect() as conn:
+            self.assertIsNotNone(conn.execute(text(
+                "SELECT refresh_started FROM result_cache WHERE cache_key = 'state_rfps:MD'")).scalar())
+
+if __name__ == '__main__':
+    unittest.main()
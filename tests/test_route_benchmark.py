@@ -0,0 +1,73 @@
+import collections
+import os
+import tempfile
+import time
+import unittest
+from flask import Flask, session
+from sqlalchemy import create_engine, text
+import route_benchmark
+from route_benchmark import Route, compare, run_load, scaled_rows, seed
+
+class RouteBenchmarkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+        with self.engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE federal_contracts (id INTEGER PRIMARY KEY, title TEXT NOT NULL,
+                agency TEXT NOT NULL, location TEXT, value TEXT, deadline DATE, naics_code TEXT,
+                sam_gov_url TEXT NOT NULL, notice_id TEXT UNIQUE, posted_date DATE)'''))
+            conn.execute(text('''CREATE TABLE saved_leads (id INTEGER PRIMARY KEY, user_email TEXT NOT NULL,
+                lead_type TEXT NOT NULL, lead_id TEXT NOT NULL, lead_data JSON, saved_at TIMESTAMP,
+                UNIQUE(user_email, lead_type, lead_id))'''))
+            conn.execute(text("INSERT INTO federal_contracts (title, agency, sam_gov_url) VALUES ('old', 'x', 'y')"))
+
+    def test_seed_fills_existing_tables_with_skewed_rows(self):
+        rows = scaled_rows(0.002, {'saved_leads': 300})
+        self.assertEqual(rows['federal_contracts'], 1000)
+        timings = seed(self.engine, rows)
+        self.assertEqual(set(timings), {'federal_contracts', 'saved_leads'})  # other tables absent here
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text('SELECT COUNT(*) FROM federal_contracts')).scalar(), 1000)
+            self.assertEqual(conn.execute(text('SELECT COUNT(*) FROM saved_leads')).scalar(), 300)
+            states = collections.Counter(r[0][-2:] for r in conn.execute(text('SELECT location FROM federal_contracts')))
+            heavy = conn.execute(text('SELECT COUNT(*) FROM saved_leads WHERE user_email = :e'),
+                                 {'e': 'user1@bench.example'}).scalar()
+        self.assertEqual(states.most_common(1)[0][0], 'VA')
+        self.assertGreater(heavy, 300 * 0.3)
+
+    def test_load_reports_latency_queries_and_status_per_route(self):
+        app = Flask(__name__)
+        app.secret_key = 'test'
+        seed(self.engine, {'federal_contracts': 50})
+
+        @app.route('/list')
+        def listing():
+            if session.get('role') != 'user':
+                return 'denied', 403
+            with self.engine.connect() as conn:
+                conn.execute(text('SELECT COUNT(*) FROM federal_contracts')).scalar()
+                conn.execute(text('SELECT * FROM federal_contracts LIMIT 10')).fetchall()
+            time.sleep(0.05)
+            return 'ok'
+
+        def login(client, role):
+            with client.session_transaction() as sess:
+                sess['role'] = role
+
+        started = time.monotonic()
+        results = run_load(app, self.engine, [Route('list', ['/list']), Route('anon', ['/list'], role=None)],
+                           requests=20, concurrency=4, login=login)
+        self.assertLess(time.monotonic() - started, 0.9)  # 20 x 50ms over 4 workers
+        self.assertEqual(results['list']['status'], {'200': 20})
+        self.assertEqual(results['list']['queries_per_request'], 2.0)
+        self.assertGreaterEqual(results['list']['p50_ms'], 50)
+        self.assertLessEqual(results['list']['p50_ms'], results['list']['p99_ms'])
+        self.assertEqual((results['anon']['status'], results['anon']['queries_per_request']), ({'403': 20}, 0.0))
+
+        before = {'meta': {'commit': 'aaa'}, 'routes': {'list': dict(results['list'], p50_ms=100.0)}}
+        after = {'meta': {'commit': 'bbb'}, 'routes': {'list': dict(results['list'], p50_ms=50.0)}}
+        self.assertIn('(-50%)', compare(before, after))
+        self.assertIn('list', route_benchmark.format_report(dict(after, meta={'commit': 'bbb', 'database': 'sqlite',
+                                                                              'concurrency': 4})))
+
+if __name__ == '__main__':
+    unittest.main()
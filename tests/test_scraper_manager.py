@@ -0,0 +1,131 @@
+import os
+import tempfile
+import time
+import unittest
+import requests
+from requests.adapters import BaseAdapter
+from sqlalchemy import create_engine, text
+from scrapers.scraper_manager import ScrapeCancelled, ScraperManager
+
+class PageAdapter(BaseAdapter):
+    """Serves a fixed body for every URL, after an optional delay."""
+    def __init__(self, body=b'<html>bid</html>', delay=0.0):
+        super().__init__()
+        self.body, self.delay = body, delay
+
+    def send(self, request, **kwargs):
+        time.sleep(self.delay)
+        response = requests.Response()
+        response.status_code, response._content, response.url = 200, self.body, request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+def make_scraper(name, contracts, pages=1, delay=0.0):
+    class FakeScraper:
+        def __init__(self):
+            self.name = name
+            self.session = requests.Session()
+            self.session.mount('https://', PageAdapter(delay=delay))
+
+        def _rate_limit_delay(self):
+            pass
+
+        def scrape(self):
+            found = []
+            for i in range(pages):
+                try:
+                    self._rate_limit_delay()
+                    self.session.get(f'https://portal.example/{name}/{i}')
+                except Exception:
+                    continue  # like the real scrapers, one bad page does not stop the run
+                found.extend(contracts[i:i + 1])
+            return found
+    return FakeScraper
+
+def contract(title, agency='City of Norfolk'):
+    return {'title': title, 'agency': agency, 'location': 'Norfolk, VA', 'value': '$10,000',
+            'deadline': None, 'description': '', 'naics_code': '561720', 'website_url': ''}
+
+class ScraperManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp, 'app.db')}")
+        with self.engine.begin() as conn:
+            conn.execute(text('''CREATE TABLE contracts (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                                 agency TEXT NOT NULL, location TEXT, value TEXT, deadline DATE, description TEXT,
+                                 naics_code TEXT, website_url TEXT, data_source TEXT)'''))
+            conn.execute(text("INSERT INTO contracts (title, agency) VALUES ('Existing janitorial', 'City of Norfolk')"))
+
+    def test_parallel_run_bulk_saves_new_contracts_and_logs_metrics(self):
+        manager = ScraperManager(lambda: self.engine, scrapers={
+            'a': make_scraper('Portal A', [contract('Existing janitorial'), contract('Custodial services')], pages=2, delay=0.2),
+            'b': make_scraper('Portal B', [contract('Custodial services'), contract('Floor care')], pages=2, delay=0.2),
+        })
+        started = time.monotonic()
+        result = manager.run_all_scrapers()
+        self.assertLess(time.monotonic() - started, 0.75)  # 2 x 0.4s of fetching overlapped
+        self.assertEqual((result['total_contracts_found'], result['total_contracts_saved']), (4, 2))
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text('SELECT COUNT(*) FROM contracts')).scalar(), 3)
+            self.assertEqual(conn.execute(text("SELECT data_source FROM contracts WHERE title = 'Floor care'")).scalar(),
+                             'Portal B')
+        logs = {log['scraper_name']: log for log in manager.get_scraper_logs()}
+        self.assertEqual(logs['a']['status'], 'success')
+        self.assertEqual((logs['a']['pages_fetched'], logs['a']['bytes_fetched']), (2, 32))
+        self.assertTrue({'setup', 'scrape', 'save'} <= set(logs['a']['phase_timings']))
+        self.assertEqual(manager.get_scraper_stats()['b']['total_pages_fetched'], 2)
+
+    def test_timeout_stops_scraper_at_next_request_and_keeps_partial_results(self):
+        manager = ScraperManager(lambda: self.engine, timeout=0.25, scrapers={
+            'slow': make_scraper('Slow', [contract(f'Bid {i}') for i in range(20)], pages=20, delay=0.1),
+        })
+        started = time.monotonic()
+        result = manager.run_scraper('slow')
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(result['status'], 'timeout')
+        self.assertTrue(0 < result['contracts_saved'] < 20)
+
+    def test_scrapers_with_broad_handlers_hand_back_partial_results(self):
+        class CatchAllScraper(make_scraper('Catch-all', [], delay=0.1)):
+            def scrape(self):
+                found = []
+                try:  # shaped like EVAVirginiaScraper.scrape
+                    for i in range(20):
+                        self.session.get(f'https://portal.example/catch-all/{i}')
+                        found.append(contract(f'Bid {i}'))
+                    return found
+                except ScrapeCancelled as e:
+                    e.partial = found
+                    raise
+                except Exception:
+                    return []
+
+        manager = ScraperManager(lambda: self.engine, timeout=0.25, scrapers={'catch_all': CatchAllScraper})
+        result = manager.run_scraper('catch_all')
+        self.assertEqual(result['status'], 'timeout')
+        self.assertTrue(0 < result['contracts_saved'] < 20)
+        log = manager.get_scraper_logs()[0]
+        self.assertEqual(log['error_message'], f"Timed out after 0.25s; {result['contracts_saved']} partial results kept")
+
+    def test_start_job_returns_handle_and_coalesces_running_jobs(self):
+        manager = ScraperManager(lambda: self.engine, scrapers={
+            'a': make_scraper('Portal A', [contract('Window washing')], pages=1, delay=0.3),
+        })
+        job = manager.start_job(['all'])
+        self.assertEqual(job['status'], 'running')
+        self.assertEqual(manager.start_job(['a'])['job_id'], job['job_id'])
+        deadline = time.monotonic() + 5
+        while manager.get_job(job['job_id'])['status'] == 'running' and time.monotonic() < deadline:
+            time.sleep(0.05)
+        finished = manager.get_job(job['job_id'])
+        self.assertEqual(finished['status'], 'completed')
+        self.assertEqual(finished['result']['total_contracts_saved'], 1)
+        # Another worker only sees the log rows
+        other = ScraperManager(lambda: self.engine, scrapers={})
+        self.assertEqual(other.get_job(job['job_id'])['scrapers'], ['a'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,9 +4,18 @@ Upload real federal contracts to the database
 """
 import sys
 from datetime import datetime
-from app import app, db
+from app import app, db, bulk_importer
 from sqlalchemy import text
 
+def import_contracts(contracts):
+    """Bulk-insert contract dicts, skipping notice IDs already stored; returns rows inserted"""
+    result = bulk_importer.import_rows('federal_contracts', contracts)
+    if result['duplicates']:
+        print(f"   Skipped {result['duplicates']} contract(s) already in the database")
+    for error in result['errors']:
+        print(f"   ❌ Error with {contracts[error['row'] - 1]['title']}: {error['error']}")
+    return result['inserted']
+
 def upload_contract():
     """Interactive contract upload"""
     print("=" * 70)
@@ -90,24 +99,10 @@ def upload_contract():
         if deleted > 0:
             print(f"   Removed {deleted} demo contracts")
         
-        # Insert new contracts
-        inserted = 0
-        for contract in contracts:
-            try:
-                db.session.execute(text('''
-                    INSERT INTO federal_contracts 
-                    (title, agency, department, location, value, deadline, description, 
-                     naics_code, sam_gov_url, notice_id, set_aside, posted_date)
-                    VALUES (:title, :agency, :department, :location, :value, :deadline, 
-                            :description, :naics_code, :sam_gov_url, :notice_id, 
-                            :set_aside, :posted_date)
-                '''), contract)
-                inserted += 1
-                print(f"   ✅ {contract['title']}")
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-        
         db.session.commit()
+        
+        # Insert new contracts
+        inserted = import_contracts(contracts)
         print(f"\n✅ Successfully uploaded {inserted} contract(s)!")
 
 def upload_from_csv():
@@ -127,7 +122,7 @@ def upload_from_csv():
             contracts = []
             
             for row in reader:
-                notice_id = row.get('notice_id') or f"CSV-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                notice_id = row.get('notice_id') or None  # the importer derives one per title + agency
                 contracts.append({
                     'title': row.get('title', 'Untitled'),
                     'agency': row.get('agency', 'Unknown'),
@@ -159,23 +154,10 @@ def upload_from_csv():
             if deleted > 0:
                 print(f"   Removed {deleted} demo contracts")
             
-            # Insert contracts
-            inserted = 0
-            for contract in contracts:
-                try:
-                    db.session.execute(text('''
-                        INSERT INTO federal_contracts 
-                        (title, agency, department, location, value, deadline, description, 
-                         naics_code, sam_gov_url, notice_id, set_aside, posted_date)
-                        VALUES (:title, :agency, :department, :location, :value, :deadline, 
-                                :description, :naics_code, :sam_gov_url, :notice_id, 
-                                :set_aside, :posted_date)
-                    '''), contract)
-                    inserted += 1
-                except Exception as e:
-                    print(f"   ❌ Error with {contract['title']}: {e}")
-            
             db.session.commit()
+            
+            # Insert contracts
+            inserted = import_contracts(contracts)
             print(f"\n✅ Successfully uploaded {inserted} contract(s)!")
             
     except FileNotFoundError: